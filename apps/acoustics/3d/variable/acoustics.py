@@ -3,7 +3,7 @@
 
 import numpy as np
 
-def acoustics3D(iplot=False,htmlplot=False,use_petsc=False,outdir='./_output',solver_type='classic'):
+def acoustics3D(iplot=False,htmlplot=False,use_petsc=False,outdir='./_output',solver_type='classic',kernel_language='Fortran'):
     """
     Example python script for solving the 3d acoustics equations.
     """
@@ -18,7 +18,13 @@ def acoustics3D(iplot=False,htmlplot=False,use_petsc=False,outdir='./_output',so
     else:
         raise Exception('Unrecognized solver_type.')
 
-    solver.dim_split=False
+    solver.kernel_language = kernel_language
+    if kernel_language == 'Python':
+        import rp_vc_acoustics_3d
+        solver.rp = rp_vc_acoustics_3d.rp
+
+    # The Python kernels only support dimensional splitting in 3D
+    solver.dim_split = (kernel_language == 'Python')
     solver.mwaves = 2
     solver.limiters = pyclaw.limiters.tvd.MC
 
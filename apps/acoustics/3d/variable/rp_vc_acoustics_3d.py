@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Normal Riemann solvers for variable coefficient acoustics in 3D, for use
+with the Python kernels of ClawSolver3D.  This is a direct translation of
+rpn3_vc_acoustics.f.
+
+The direction of the Riemann problems is axis 1 of each array.  The
+auxiliary variables are the impedance (aux[0]) and the sound speed (aux[1]).
+"""
+
+import numpy as np
+
+def _rpn3(q_l,q_r,aux_l,aux_r,mu):
+    meqn = 4
+    mwaves = 2
+
+    # Impedance and sound speed on each side of the interface
+    z_l = aux_l[0]
+    z_r = aux_r[0]
+    c_l = aux_l[1]
+    c_r = aux_r[1]
+
+    delta_p = q_r[0] - q_l[0]
+    delta_u = q_r[mu] - q_l[mu]
+    a1 = (-delta_p + z_r*delta_u) / (z_l + z_r)
+    a2 =  (delta_p + z_l*delta_u) / (z_l + z_r)
+
+    wave = np.zeros((meqn,mwaves)+q_l.shape[1:])
+    s = np.empty((mwaves,)+q_l.shape[1:])
+
+    wave[0,0] = -a1*z_l
+    wave[mu,0] = a1
+    s[0] = -c_l
+
+    wave[0,1] = a2*z_r
+    wave[mu,1] = a2
+    s[1] = c_r
+
+    amdq = s[0]*wave[:,0]
+    apdq = s[1]*wave[:,1]
+
+    return wave,s,amdq,apdq
+
+def rp_vc_acoustics_3d_x(q_l,q_r,aux_l,aux_r,aux_global):
+    r"""Normal Riemann solver in the x-direction"""
+    return _rpn3(q_l,q_r,aux_l,aux_r,1)
+
+def rp_vc_acoustics_3d_y(q_l,q_r,aux_l,aux_r,aux_global):
+    r"""Normal Riemann solver in the y-direction"""
+    return _rpn3(q_l,q_r,aux_l,aux_r,2)
+
+def rp_vc_acoustics_3d_z(q_l,q_r,aux_l,aux_r,aux_global):
+    r"""Normal Riemann solver in the z-direction"""
+    return _rpn3(q_l,q_r,aux_l,aux_r,3)
+
+rp = [rp_vc_acoustics_3d_x, rp_vc_acoustics_3d_y, rp_vc_acoustics_3d_z]
@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark suite of the problems in apps/ across solvers, kernel languages
+and grid sizes.
+
+Each benchmark sets up one of the problems below with a given solver
+(classic or sharpclaw), kernel language (Python or Fortran) and number of
+cells per dimension, takes a time step to set up the solver, then times
+nsteps time steps of fixed size, keeping the best of *repeat* timings.  It
+reports the time steps per second and the cell updates (cells times steps)
+per second.
+
+==================  ==================================================
+Problem             Setup
+==================  ==================================================
+acoustics_1d        apps/acoustics/1d/homogeneous
+acoustics_2d        apps/acoustics/2d/homogeneous
+acoustics_3d        apps/acoustics/3d/variable
+advection_1d        apps/advection/1d/constant
+burgers_1d          apps/burgers/1d
+shockbubble         apps/euler/2d/shockbubble (grid of 4n x n cells)
+shallow_2d          apps/shallow/2d
+==================  ==================================================
+
+Combinations that cannot run here, because a Fortran kernel has not been
+built or there is no Python Riemann solver for the problem, are reported as
+skipped.
+
+The results are appended to a JSON history file (``benchmarks/history.json``
+by default), a list of runs holding the date, host, git commit and the
+results of every benchmark.  Every benchmark is compared with the last run
+in the history on the same host that has it; a cell update rate lower by
+more than the threshold (10% by default) is flagged as a regression, and
+the exit status is then 1.
+
+Usage::
+
+    python benchmarks/apps.py [options] [problem ...]
+
+Run ``python benchmarks/apps.py --help`` for the options.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import subprocess
+from optparse import OptionParser
+
+import numpy as np
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..')
+
+def _app_path(*path):
+    r"""Make the modules of an app directory importable."""
+    directory = os.path.join(root,*path)
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+class Skip(Exception):
+    r"""Raised when a combination cannot be benchmarked here."""
+    pass
+
+# ============================================================================
+#  Problems
+# ============================================================================
+# Each problem is a function (solver_type,kernel_language,n) returning the
+# solver and the solution, with the initial conditions of the app and a
+# stable time step solver.dt_initial, which is used for all time steps.
+
+def acoustics_1d(solver_type,kernel_language,n):
+    import pyclaw
+    from riemann import rp_acoustics
+    solver = _solver_1d(pyclaw,solver_type,kernel_language)
+    solver.mwaves = rp_acoustics.mwaves
+    if kernel_language == 'Python':
+        solver.rp = rp_acoustics.rp_acoustics_1d
+    solver.limiters = pyclaw.limiters.tvd.MC
+    solver.bc_lower[0] = pyclaw.BC.periodic
+    solver.bc_upper[0] = pyclaw.BC.periodic
+
+    x = pyclaw.Dimension('x',0.0,1.0,n)
+    grid = pyclaw.Grid(x)
+    state = pyclaw.State(grid,2)
+    state.aux_global.update({'rho':1.0,'bulk':1.0,'zz':1.0,'cc':1.0})
+    xc = grid.x.center
+    state.q[0,:] = np.exp(-100 * (xc-0.75)**2)
+    state.q[1,:] = 0.
+    solver.dt_initial = 0.9*grid.d[0]
+    return solver,pyclaw.Solution(state)
+
+def acoustics_2d(solver_type,kernel_language,n):
+    import pyclaw
+    if solver_type == 'classic':
+        solver = pyclaw.ClawSolver2D()
+    else:
+        solver = pyclaw.SharpClawSolver2D()
+    solver.kernel_language = kernel_language
+    if kernel_language == 'Python':
+        if solver_type != 'classic':
+            raise Skip('no Python kernel for SharpClawSolver2D')
+        _app_path('test','acoustics','2d','homogeneous')
+        import rp_acoustics_2d
+        solver.rp  = rp_acoustics_2d.rp
+        solver.rpt = rp_acoustics_2d.rpt
+    solver.dim_split = False
+    solver.mwaves = 2
+    solver.limiters = pyclaw.limiters.tvd.MC
+    solver.bc_lower[0] = pyclaw.BC.reflecting
+    solver.bc_upper[0] = pyclaw.BC.outflow
+    solver.bc_lower[1] = pyclaw.BC.reflecting
+    solver.bc_upper[1] = pyclaw.BC.outflow
+
+    x = pyclaw.Dimension('x',-1.0,1.0,n)
+    y = pyclaw.Dimension('y',-1.0,1.0,n)
+    grid = pyclaw.Grid([x,y])
+    state = pyclaw.State(grid,3)
+    state.aux_global.update({'rho':1.0,'bulk':4.0,'cc':2.0,'zz':2.0})
+    Y,X = np.meshgrid(grid.y.center,grid.x.center)
+    r = np.sqrt(X**2 + Y**2)
+    width = 0.2
+    state.q[0,:,:] = (np.abs(r-0.5)<=width)*(1.+np.cos(np.pi*(r-0.5)/width))
+    state.q[1,:,:] = 0.
+    state.q[2,:,:] = 0.
+    solver.dt_initial = 0.4*grid.d[0]/state.aux_global['cc']
+    return solver,pyclaw.Solution(state)
+
+def acoustics_3d(solver_type,kernel_language,n):
+    import pyclaw
+    if solver_type != 'classic':
+        raise Skip('no 3D SharpClaw solver')
+    solver = pyclaw.ClawSolver3D()
+    solver.kernel_language = kernel_language
+    if kernel_language == 'Python':
+        _app_path('apps','acoustics','3d','variable')
+        import rp_vc_acoustics_3d
+        solver.rp = rp_vc_acoustics_3d.rp
+    # The Python kernels only support dimensional splitting in 3D
+    solver.dim_split = (kernel_language == 'Python')
+    solver.mwaves = 2
+    solver.limiters = pyclaw.limiters.tvd.MC
+    for idim in xrange(3):
+        solver.bc_lower[idim] = pyclaw.BC.reflecting
+        solver.bc_upper[idim] = pyclaw.BC.periodic
+        solver.aux_bc_lower[idim] = pyclaw.BC.reflecting
+        solver.aux_bc_upper[idim] = pyclaw.BC.periodic
+
+    dimensions = [pyclaw.Dimension(name,-1.0,1.0,n) for name in ('x','y','z')]
+    grid = pyclaw.Grid(dimensions)
+    state = pyclaw.State(grid,4,2)
+    grid.compute_c_center()
+    X,Y,Z = grid._c_center
+    state.aux[0,...] = 1.0*(X<0.) + 2.0*(X>=0.) # Impedance
+    state.aux[1,...] = 1.0*(X<0.) + 2.0*(X>=0.) # Sound speed
+    r = np.sqrt((X+0.5)**2 + Y**2 + Z**2)
+    width = 0.1
+    state.q[0,...] = (np.abs(r-0.3)<=width)*(1.+np.cos(np.pi*(r-0.3)/width))
+    state.q[1:,...] = 0.
+    solver.dt_initial = 0.4*grid.d[0]/2.0
+    return solver,pyclaw.Solution(state)
+
+def advection_1d(solver_type,kernel_language,n):
+    import pyclaw
+    from riemann import rp_advection
+    solver = _solver_1d(pyclaw,solver_type,kernel_language)
+    solver.mwaves = rp_advection.mwaves
+    if kernel_language == 'Python':
+        solver.rp = rp_advection.rp_advection_1d
+    solver.bc_lower[0] = pyclaw.BC.periodic
+    solver.bc_upper[0] = pyclaw.BC.periodic
+
+    x = pyclaw.Dimension('x',0.0,1.0,n)
+    grid = pyclaw.Grid(x)
+    state = pyclaw.State(grid,1)
+    state.aux_global['u'] = 1.
+    xc = grid.x.center
+    state.q[0,:] = np.exp(-100 * (xc-0.75)**2)
+    solver.dt_initial = 0.9*grid.d[0]
+    return solver,pyclaw.Solution(state)
+
+def burgers_1d(solver_type,kernel_language,n):
+    import pyclaw
+    solver = _solver_1d(pyclaw,solver_type,kernel_language)
+    if kernel_language == 'Python':
+        from riemann import rp_burgers
+        solver.rp = rp_burgers.rp_burgers_1d
+    solver.mwaves = 1
+    solver.limiters = pyclaw.limiters.tvd.vanleer
+    solver.bc_lower[0] = pyclaw.BC.periodic
+    solver.bc_upper[0] = pyclaw.BC.periodic
+
+    x = pyclaw.Dimension('x',0.0,1.0,n)
+    grid = pyclaw.Grid(x)
+    state = pyclaw.State(grid,1)
+    xc = grid.x.center
+    state.q[0,:] = np.sin(np.pi*2*xc) + 0.50
+    state.aux_global['efix'] = True
+    solver.dt_initial = 0.5*grid.d[0]
+    return solver,pyclaw.Solution(state)
+
+def shockbubble(solver_type,kernel_language,n):
+    import pyclaw
+    if kernel_language == 'Python':
+        raise Skip('no Python Riemann solver for the 2D Euler equations')
+    _app_path('apps','euler','2d','shockbubble')
+    import shockbubble as app
+    if solver_type == 'sharpclaw':
+        solver = pyclaw.SharpClawSolver2D()
+        solver.dq_src = app.dq_Euler_radial
+        solver.weno_order = 5
+        solver.lim_type = 2
+    else:
+        solver = pyclaw.ClawSolver2D()
+        solver.dim_split = 0
+        solver.order_trans = 2
+        solver.limiters = [4,4,4,4,2]
+        solver.step_src = app.step_Euler_radial
+    solver.kernel_language = kernel_language
+    solver.mwaves = 5
+    solver.bc_lower[0] = pyclaw.BC.custom
+    solver.bc_upper[0] = pyclaw.BC.outflow
+    solver.bc_lower[1] = pyclaw.BC.reflecting
+    solver.bc_upper[1] = pyclaw.BC.outflow
+    for idim in xrange(2):
+        solver.aux_bc_lower[idim] = pyclaw.BC.outflow
+        solver.aux_bc_upper[idim] = pyclaw.BC.outflow
+    solver.user_bc_lower = app.shockbc
+
+    x = pyclaw.Dimension('x',0.0,2.0,4*n)
+    y = pyclaw.Dimension('y',0.0,0.5,n)
+    grid = pyclaw.Grid([x,y])
+    state = pyclaw.State(grid,5,1)
+    state.aux_global['gamma'] = app.gamma
+    state.aux_global['gamma1'] = app.gamma1
+    app.qinit(state)
+    app.auxinit(state)
+    solver.dt_initial = 0.1*grid.d[0]
+    return solver,pyclaw.Solution(state)
+
+def shallow_2d(solver_type,kernel_language,n):
+    import pyclaw
+    if kernel_language == 'Python':
+        raise Skip('no Python Riemann solver for the 2D shallow water equations')
+    if solver_type == 'classic':
+        solver = pyclaw.ClawSolver2D()
+    else:
+        solver = pyclaw.SharpClawSolver2D()
+    solver.kernel_language = kernel_language
+    solver.mwaves = 3
+    solver.limiters = pyclaw.limiters.tvd.MC
+    solver.bc_lower[0] = pyclaw.BC.outflow
+    solver.bc_upper[0] = pyclaw.BC.reflecting
+    solver.bc_lower[1] = pyclaw.BC.outflow
+    solver.bc_upper[1] = pyclaw.BC.reflecting
+    solver.dim_split = 1
+
+    x = pyclaw.Dimension('x',-2.5,2.5,n)
+    y = pyclaw.Dimension('y',-2.5,2.5,n)
+    grid = pyclaw.Grid([x,y])
+    state = pyclaw.State(grid,3)
+    state.aux_global['grav'] = 1.0
+    # Dam break (see apps/shallow/2d/shallow2D.py)
+    Y,X = np.meshgrid(grid.y.center,grid.x.center)
+    r = np.sqrt(X**2 + Y**2)
+    state.q[0,:,:] = 2.*(r<=0.5) + 1.*(r>0.5)
+    state.q[1,:,:] = 0.
+    state.q[2,:,:] = 0.
+    solver.dt_initial = 0.1*grid.d[0]
+    return solver,pyclaw.Solution(state)
+
+def _solver_1d(pyclaw,solver_type,kernel_language):
+    if solver_type == 'classic':
+        solver = pyclaw.ClawSolver1D()
+    else:
+        solver = pyclaw.SharpClawSolver1D()
+    solver.kernel_language = kernel_language
+    return solver
+
+problems = [('acoustics_1d',acoustics_1d,1),('acoustics_2d',acoustics_2d,2),
+            ('acoustics_3d',acoustics_3d,3),('advection_1d',advection_1d,1),
+            ('burgers_1d',burgers_1d,1),('shockbubble',shockbubble,2),
+            ('shallow_2d',shallow_2d,2)]
+r"""(list) - Name, setup function and number of dimensions of every problem"""
+
+sizes = {1:[100,1000,10000],2:[50,100,200],3:[16,32]}
+r"""(dict) - Numbers of cells per dimension by number of dimensions"""
+
+# ============================================================================
+#  Running
+# ============================================================================
+def time_steps(setup,solver_type,kernel_language,n,nsteps,repeat):
+    r"""
+    Time *nsteps* time steps of a problem
+
+    :Output:
+     - (dict) - Best time in seconds, steps per second and cell updates per
+       second, number of steps and of cells
+    """
+    best = None
+    for i in xrange(repeat):
+        solver,solution = setup(solver_type,kernel_language,n)
+        solver.dt_variable = False
+        solver.setup(solution)
+        solver.dt = solver.dt_initial
+        # A first step to set up work arrays and import the kernels
+        solver.evolve_to_time(solution,solution.t+solver.dt)
+        start = time.time()
+        status = solver.evolve_to_time(solution,solution.t+nsteps*solver.dt)
+        elapsed = time.time() - start
+        solver.teardown()
+        if status['numsteps'] != nsteps:
+            raise Exception('%s steps taken instead of %s' % (status['numsteps'],nsteps))
+        if best is None or elapsed < best:
+            best = elapsed
+    ncells = int(np.prod(solution.state.grid.n))
+    return {'seconds':best,'nsteps':nsteps,'ncells':ncells,
+            'steps_per_second':nsteps/best,
+            'cell_updates_per_second':ncells*nsteps/best}
+
+def run(names,solver_types,kernel_languages,nsteps,repeat,quick=False):
+    r"""
+    Run the benchmarks
+
+    :Output:
+     - (dict) - Result of every benchmark by key
+       problem/solver_type/kernel_language/n
+     - (dict) - Reason by key of the benchmarks that were skipped
+    """
+    results = {}
+    skipped = {}
+    for (name,setup,ndim) in problems:
+        if len(names) > 0 and name not in names:
+            continue
+        for solver_type in solver_types:
+            for kernel_language in kernel_languages:
+                for n in sizes[ndim][:1 if quick else None]:
+                    key = '%s/%s/%s/%s' % (name,solver_type,kernel_language,n)
+                    try:
+                        results[key] = time_steps(setup,solver_type,kernel_language,
+                                                  n,nsteps,repeat)
+                    except (Skip,ImportError,NotImplementedError),error:
+                        skipped[key] = '%s: %s' % (error.__class__.__name__,error)
+    return results,skipped
+
+# ============================================================================
+#  History
+# ============================================================================
+def git_commit():
+    r"""Return the git commit of the source tree, or None."""
+    try:
+        process = subprocess.Popen(['git','rev-parse','HEAD'],cwd=root,
+                                   stdout=subprocess.PIPE,stderr=subprocess.PIPE)
+        out,err = process.communicate()
+    except OSError:
+        return None
+    if process.returncode != 0:
+        return None
+    return out.strip()
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    f = open(path,'r')
+    history = json.load(f)
+    f.close()
+    return history
+
+def save_history(path,history):
+    tmp_path = path + '.tmp'
+    f = open(tmp_path,'w')
+    json.dump(history,f,indent=1,sort_keys=True)
+    f.close()
+    os.rename(tmp_path,path)
+
+def compare(results,history,host,threshold):
+    r"""
+    Compare *results* with the last run on *host* in *history* that has
+    each benchmark
+
+    :Output:
+     - (dict) - Ratio of the cell update rate to that of the previous run,
+       by key
+     - (list) - Keys of the benchmarks slower by more than *threshold*
+    """
+    ratios = {}
+    regressions = []
+    for key,result in results.iteritems():
+        for previous_run in reversed(history):
+            if previous_run['host'] == host and key in previous_run['results']:
+                previous = previous_run['results'][key]['cell_updates_per_second']
+                ratios[key] = result['cell_updates_per_second']/previous
+                if ratios[key] < 1. - threshold:
+                    regressions.append(key)
+                break
+    return ratios,sorted(regressions)
+
+
+if __name__=="__main__":
+    parser = OptionParser(usage="%prog [options] [problem ...]",
+                          description="Problems: "+', '.join([p[0] for p in problems]))
+    parser.add_option('--solver',action='append',dest='solver_types',
+                      help="solver type, classic or sharpclaw (default both)")
+    parser.add_option('--kernel',action='append',dest='kernel_languages',
+                      help="kernel language, Python or Fortran (default both)")
+    parser.add_option('--nsteps',type='int',default=20,
+                      help="time steps timed per benchmark (default %default)")
+    parser.add_option('--repeat',type='int',default=3,
+                      help="timings per benchmark, the best is kept (default %default)")
+    parser.add_option('--quick',action='store_true',default=False,
+                      help="only the smallest grid of every problem")
+    parser.add_option('--history',default=os.path.join(root,'benchmarks','history.json'),
+                      help="JSON history file (default %default)")
+    parser.add_option('--threshold',type='float',default=0.1,
+                      help="relative slowdown flagged as a regression (default %default)")
+    parser.add_option('--no-save',action='store_false',dest='save',default=True,
+                      help="do not append the results to the history")
+    options,names = parser.parse_args()
+
+    solver_types = options.solver_types or ['classic','sharpclaw']
+    kernel_languages = options.kernel_languages or ['Python','Fortran']
+    results,skipped = run(names,solver_types,kernel_languages,options.nsteps,
+                          options.repeat,options.quick)
+
+    host = socket.gethostname()
+    history = load_history(options.history)
+    ratios,regressions = compare(results,history,host,options.threshold)
+
+    print "%-40s %12s %16s %8s" % ('benchmark','steps/s','cell updates/s','vs last')
+    for key in sorted(results):
+        result = results[key]
+        ratio = '%8.2f' % ratios[key] if key in ratios else '%8s' % '-'
+        flag = '  REGRESSION' if key in regressions else ''
+        print "%-40s %12.1f %16.4g %s%s" % (key,result['steps_per_second'],
+                                          result['cell_updates_per_second'],ratio,flag)
+    for key in sorted(skipped):
+        print "%-40s skipped (%s)" % (key,skipped[key])
+
+    if options.save and len(results) > 0:
+        history.append({'date':time.strftime('%Y-%m-%dT%H:%M:%S'),'host':host,
+                        'commit':git_commit(),'python':platform.python_version(),
+                        'numpy':np.__version__,'results':results})
+        save_history(options.history,history)
+
+    if len(regressions) > 0:
+        print "%s benchmarks slower by more than %g%%" % (len(regressions),
+                                                          100*options.threshold)
+        sys.exit(1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark of writing and reading a 2D frame in the ascii (fort.q) format.
+
+A frame with meqn=3 on an mx x my grid is written and read with the block
+implementation in :mod:`pyclaw.io.ascii` and with the loops over cells that
+it replaced, which are reproduced here as the baseline.  The files written by
+both are compared byte by byte.
+
+Usage::
+
+    python benchmarks/ascii_io.py [mx] [my]
+"""
+
+import os
+import sys
+import time
+import shutil
+import filecmp
+import tempfile
+
+import numpy as np
+
+def loop_write(q,file_name):
+    r"""Write q in the fort.q layout one value at a time."""
+    q_file = open(file_name,'w')
+    meqn,mx,my = q.shape
+    for j in xrange(my):
+        for k in xrange(mx):
+            for m in xrange(meqn):
+                q_file.write("%18.8e" % q[m,k,j])
+            q_file.write('\n')
+        q_file.write('\n')
+    q_file.close()
+
+def loop_read(q,file_name):
+    r"""Read q written by loop_write one line at a time."""
+    f = open(file_name,'r')
+    meqn,mx,my = q.shape
+    for j in xrange(my):
+        for i in xrange(mx):
+            l = []
+            while len(l)<meqn:
+                line = f.readline()
+                l = l + line.split()
+            for m in xrange(meqn):
+                q[m,i,j] = float(l[m])
+        f.readline()
+    f.close()
+
+def block_write(q,file_name):
+    from pyclaw.io.ascii import write_array
+    q_file = open(file_name,'w')
+    write_array(q_file,q)
+    q_file.close()
+
+def block_read(q,file_name):
+    from pyclaw.io.ascii import read_array
+    f = open(file_name,'r')
+    tokens = f.read().split()
+    f.close()
+    q[...],pos = read_array(tokens,0,q.shape)
+
+def timed(function,*args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+if __name__=="__main__":
+    mx = int(sys.argv[1]) if len(sys.argv)>1 else 1000
+    my = int(sys.argv[2]) if len(sys.argv)>2 else mx
+
+    q = np.asfortranarray(np.random.rand(3,mx,my))
+    q_loop = np.empty_like(q)
+    q_block = np.empty_like(q)
+    path = tempfile.mkdtemp()
+    try:
+        loop_file = os.path.join(path,'loop.q')
+        block_file = os.path.join(path,'block.q')
+        times = [timed(loop_write,q,loop_file),timed(block_write,q,block_file),
+                 timed(loop_read,q_loop,loop_file),timed(block_read,q_block,block_file)]
+        identical = filecmp.cmp(loop_file,block_file,shallow=False)
+    finally:
+        shutil.rmtree(path)
+
+    print "Frame of %s x %s x 3 values" % (mx,my)
+    print "%-6s %12s %12s %8s" % ('','loops (s)','blocks (s)','speedup')
+    print "%-6s %12.3f %12.3f %8.1f" % ('write',times[0],times[1],times[0]/times[1])
+    print "%-6s %12.3f %12.3f %8.1f" % ('read',times[2],times[3],times[2]/times[3])
+    print "Files identical: %s" % identical
+    print "Values read identical: %s" % np.all(q_loop==q_block)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark of evolving an ensemble of 1D problems together.
+
+A 1D acoustics problem is solved for N different bulk moduli, once with one
+solver per member (one after the other) and once as an ensemble with
+:class:`pyclaw.EnsembleSolver`.  The time per member and the speedup of the
+ensemble are reported for the Python kernels of both solvers.
+
+Usage::
+
+    python benchmarks/ensemble.py [mx] [tfinal]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+def make_solver(solver_type):
+    import pyclaw
+    from riemann import rp_acoustics
+
+    if solver_type == 'classic':
+        solver = pyclaw.ClawSolver1D()
+    else:
+        solver = pyclaw.SharpClawSolver1D()
+    solver.kernel_language = 'Python'
+    solver.rp = rp_acoustics.rp_acoustics_1d
+    solver.mwaves = 2
+    solver.limiters = [4]*solver.mwaves
+    solver.bc_lower[0] = pyclaw.BC.periodic
+    solver.bc_upper[0] = pyclaw.BC.periodic
+    return solver
+
+def make_state(mx,bulk):
+    import pyclaw
+
+    x = pyclaw.Dimension('x',0.0,1.0,mx)
+    grid = pyclaw.Grid(x)
+    state = pyclaw.State(grid,2)
+    state.aux_global.update({'rho':1.0,'bulk':bulk,'zz':np.sqrt(bulk),'cc':np.sqrt(bulk)})
+    xc = grid.x.center
+    state.q[0,:] = np.exp(-100 * (xc-0.75)**2)
+    state.q[1,:] = 0.
+    return state
+
+def run_serial(solver_type,mx,bulks,tfinal):
+    import pyclaw
+
+    start = time.time()
+    for bulk in bulks:
+        solution = pyclaw.Solution(make_state(mx,bulk))
+        solver = make_solver(solver_type)
+        solver.dt_initial = 0.1/mx
+        solver.setup(solution)
+        solver.dt = solver.dt_initial
+        solver.evolve_to_time(solution,tfinal)
+    return time.time() - start
+
+def run_ensemble(solver_type,mx,bulks,tfinal):
+    import pyclaw
+
+    start = time.time()
+    ensemble = pyclaw.EnsembleState([make_state(mx,bulk) for bulk in bulks])
+    solver = make_solver(solver_type)
+    solver.dt_initial = 0.1/mx
+    ensemble_solver = pyclaw.EnsembleSolver(solver)
+    ensemble_solver.setup(ensemble)
+    ensemble_solver.evolve_to_time(ensemble,tfinal)
+    return time.time() - start
+
+if __name__=="__main__":
+    mx     = int(sys.argv[1]) if len(sys.argv)>1 else 200
+    tfinal = float(sys.argv[2]) if len(sys.argv)>2 else 0.5
+
+    print "mx=%s, tfinal=%s" % (mx,tfinal)
+    print "%-10s %8s %16s %16s %8s" % ('solver','members','serial s/member',
+                                       'ensemble s/member','speedup')
+    for solver_type in ('classic','sharpclaw'):
+        for nmembers in (1,4,16,64):
+            bulks = np.linspace(1.0,4.0,nmembers)
+            serial = run_serial(solver_type,mx,bulks,tfinal)
+            ensemble = run_ensemble(solver_type,mx,bulks,tfinal)
+            print "%-10s %8d %16.4f %16.4f %8.2f" % (solver_type,nmembers,
+                    serial/nmembers,ensemble/nmembers,serial/ensemble)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark of recording values at many gauges of a 2D grid.
+
+The values at ngauges gauges are recorded for nsteps time steps with
+:class:`pyclaw.gauges.GaugeRecorder` and with the loop over gauges that it
+replaced, which wrote a line to the file of each gauge at every step and is
+reproduced here as the baseline.
+
+Usage::
+
+    python benchmarks/gauges.py [ngauges] [nsteps]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+def loop_record(q,gauges,nsteps,path):
+    r"""Record q at the gauges one gauge and one step at a time."""
+    os.makedirs(path)
+    files = [open(os.path.join(path,'gauge%s.txt' % i),'a')
+             for i in xrange(len(gauges))]
+    for n in xrange(nsteps):
+        t = n*0.1
+        for i,gauge in enumerate(gauges):
+            x=gauge[0]; y=gauge[1]
+            p=q[:,x,y]
+            files[i].write(str(t)+' '+' '.join(str(j) for j in p)+'\n')
+    for f in files: f.close()
+
+def recorder_record(q,gauges,nsteps,path,format):
+    from pyclaw.gauges import GaugeRecorder
+    recorder = GaugeRecorder(path,format)
+    for i,gauge in enumerate(gauges):
+        recorder.add(gauge,'gauge%s' % i)
+    recorder.start()
+    for n in xrange(nsteps):
+        recorder.record(n*0.1,q)
+    recorder.close()
+
+def timed(function,*args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+if __name__=="__main__":
+    ngauges = int(sys.argv[1]) if len(sys.argv)>1 else 100
+    nsteps = int(sys.argv[2]) if len(sys.argv)>2 else 2000
+
+    q = np.asfortranarray(np.random.rand(3,200,200))
+    gauges = [list(index) for index in
+              np.random.randint(0,200,size=(ngauges,2))]
+    formats = ['ascii','binary']
+    try:
+        __import__('h5py')
+        formats.append('hdf5')
+    except ImportError:
+        pass
+
+    path = tempfile.mkdtemp()
+    try:
+        loop_time = timed(loop_record,q,gauges,nsteps,os.path.join(path,'loop'))
+        times = []
+        for format in formats:
+            times.append(timed(recorder_record,q,gauges,nsteps,
+                               os.path.join(path,format),format))
+    finally:
+        shutil.rmtree(path)
+
+    print "%s gauges, %s steps" % (ngauges,nsteps)
+    print "%-8s %10s %8s" % ('','time (s)','speedup')
+    print "%-8s %10.3f %8.1f" % ('loop',loop_time,1.)
+    for format,t in zip(formats,times):
+        print "%-8s %10.3f %8.1f" % (format,t,loop_time/t)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark of the memory traffic due to ghost cell handling in the classic
+2D solver.
+
+For each configuration, a number of time steps of 2D acoustics is taken and
+the number of bytes of solution data copied per step (solver.status['bytes_copied'])
+is reported together with the time per step.  The configurations with
+persistent_qbc=False correspond to the old copy-in/copy-out handling of qbc.
+
+The Python kernels use the Riemann solvers from test/acoustics/2d/homogeneous;
+the Fortran kernels are included if classic2.so can be imported.
+
+Usage::
+
+    python benchmarks/ghost_cell_copies.py [mx] [nsteps]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__),'..','test','acoustics','2d','homogeneous'))
+
+def setup_problem(mx,kernel_language,dim_split,persistent_qbc):
+    import pyclaw
+    import acoustics
+    import rp_acoustics_2d
+
+    solver = pyclaw.ClawSolver2D()
+    solver.kernel_language = kernel_language
+    solver.rp  = rp_acoustics_2d.rp
+    solver.rpt = rp_acoustics_2d.rpt
+    solver.mwaves = 2
+    solver.limiters = [4]*solver.mwaves
+    solver.dim_split = dim_split
+    solver.persistent_qbc = persistent_qbc
+    solver.dt_variable = False
+    for idim in xrange(2):
+        solver.bc_lower[idim] = pyclaw.BC.outflow
+        solver.bc_upper[idim] = pyclaw.BC.outflow
+
+    x = pyclaw.grid.Dimension('x',-1.0,1.0,mx)
+    y = pyclaw.grid.Dimension('y',-1.0,1.0,mx)
+    grid = pyclaw.grid.Grid([x,y])
+    state = pyclaw.State(grid,3)
+    state.aux_global.update({'rho':1.0,'bulk':4.0,'cc':2.0,'zz':2.0})
+    acoustics.qinit(state)
+    solution = pyclaw.Solution(state)
+
+    solver.dt_initial = 0.4*grid.d[0]/state.aux_global['cc']
+    solver.setup(solution)
+    solver.dt = solver.dt_initial
+    return solver,solution
+
+def run(mx,nsteps,kernel_language,dim_split,persistent_qbc):
+    solver,solution = setup_problem(mx,kernel_language,dim_split,persistent_qbc)
+    tend = solution.t + nsteps*solver.dt
+    start = time.time()
+    status = solver.evolve_to_time(solution,tend)
+    elapsed = time.time() - start
+    solver.teardown()
+    nsteps = status['numsteps']
+    return status['bytes_copied']/nsteps, elapsed/nsteps, solution.state.q.nbytes
+
+if __name__=="__main__":
+    mx     = int(sys.argv[1]) if len(sys.argv)>1 else 400
+    nsteps = int(sys.argv[2]) if len(sys.argv)>2 else 10
+
+    kernels = ['Python']
+    try:
+        __import__('classic2')
+        kernels.append('Fortran')
+    except ImportError:
+        pass
+
+    print "Grid %sx%s, %s steps" % (mx,mx,nsteps)
+    print "%-8s %-9s %-15s %15s %10s %12s" % ('kernel','dim_split','persistent_qbc',
+                                              'bytes/step','q sizes','s/step')
+    for kernel_language in kernels:
+        for dim_split in (True,False):
+            for persistent_qbc in (False,True):
+                nbytes,seconds,qbytes = run(mx,nsteps,kernel_language,dim_split,persistent_qbc)
+                print "%-8s %-9s %-15s %15d %10.2f %12.4f" % (kernel_language,dim_split,
+                        persistent_qbc,nbytes,float(nbytes)/qbytes,seconds)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark of limiting the waves with :func:`pyclaw.limiters.tvd.limit`.
+
+For each limiter and number of interfaces, the waves of a system with meqn
+equations and mwaves waves are limited with limit and a workspace kept
+between calls, as the classic solvers do, and with the engine that limit
+replaced, which built masked arrays for r, recomputed the CFL number for
+every equation and let the limiters allocate their results.  The old engine
+is reproduced here as the baseline.
+
+Usage::
+
+    python benchmarks/limiters.py [meqn] [mwaves] [nrepeat]
+"""
+
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from pyclaw.limiters import tvd
+
+def masked_limit(meqn,wave,s,limiter,dtdx):
+    r"""Limit the waves as limit did before it used a workspace."""
+    wave_norm2 = np.sum(np.square(wave),axis=0)
+    wave_zero_mask = np.array((wave_norm2 == 0), dtype=float)
+    wave_nonzero_mask = (1.0-wave_zero_mask)
+    dotls = np.sum(wave[:,:,1:]*wave[:,:,:-1],axis=0)
+    spos = np.array(s > 0.0, dtype=float)[:,1:-1]
+    r = np.ma.array((spos*dotls[:,:-1] + (1-spos)*dotls[:,1:]))
+    r /= np.ma.array(wave_norm2[:,1:-1])
+    r.fill_value = 0
+    r = r.filled()
+    for mw in xrange(wave.shape[1]):
+        limit_func = tvd.limiter_functions.get(limiter[mw])
+        if limit_func is not None:
+            for m in xrange(meqn):
+                cfl = np.abs(s[mw,1:-1]*(dtdx[1:-2]*spos[mw,:]
+                                        + (1-spos[mw,:])*dtdx[2:-1]))
+                wlimitr = limit_func(r[mw,:].ravel(),cfl.ravel())
+                wlimitr = wlimitr.reshape(r[mw,:].shape)
+                wave[m,mw,1:-1] = wave[m,mw,1:-1]*wave_zero_mask[mw,1:-1] \
+                    + wlimitr * wave[m,mw,1:-1] * wave_nonzero_mask[mw,1:-1]
+    return wave
+
+def timed(function,meqn,waves,*args):
+    r"""Best time of calls of *function* on each of *waves*."""
+    best = None
+    for wave in waves:
+        start = time.time()
+        function(meqn,wave,*args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+if __name__=="__main__":
+    meqn = int(sys.argv[1]) if len(sys.argv)>1 else 3
+    mwaves = int(sys.argv[2]) if len(sys.argv)>2 else 2
+    nrepeat = int(sys.argv[3]) if len(sys.argv)>3 else 20
+    sizes = [100,1000,10000,100000]
+    warnings.simplefilter('ignore')
+    np.seterr(all='ignore')
+
+    print "meqn = %s, mwaves = %s, best of %s calls" % (meqn,mwaves,nrepeat)
+    print "%-8s %8s %12s %12s %8s" % ('limiter','n','masked (us)','limit (us)','speedup')
+    for limiter in sorted(tvd.limiter_functions.keys()):
+        for n in sizes:
+            wave = np.random.randn(meqn,mwaves,n)
+            s = np.random.randn(mwaves,n)
+            dtdx = np.zeros(n+1) + 0.4
+            limiters = np.array([limiter]*mwaves)
+            workspace = tvd.LimiterWorkspace()
+            tvd.limit(meqn,wave.copy(),s,limiters,dtdx,workspace)
+            masked_time = timed(masked_limit,meqn,[wave.copy() for i in xrange(nrepeat)],
+                                s,limiters,dtdx)
+            limit_time = timed(tvd.limit,meqn,[wave.copy() for i in xrange(nrepeat)],
+                               s,limiters,dtdx,workspace)
+            print "%-8s %8d %12.1f %12.1f %8.1f" % (limiter,n,1.e6*masked_time,
+                                                     1.e6*limit_time,masked_time/limit_time)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Benchmark of the WENO reconstruction of :mod:`pyclaw.limiters.reconstruct`.
+
+For each order and number of cells, q with meqn components is reconstructed
+with a :class:`~pyclaw.limiters.reconstruct.WenoReconstructor` created once,
+as the SharpClaw solvers do, and with :func:`~pyclaw.limiters.reconstruct.weno`,
+which looks up the kernels and allocates the arrays at every call.  The
+difference is the overhead per call, which matters most on small grids.
+
+The module :mod:`pyclaw.limiters.weno.reconstruct` must be built.
+
+Usage::
+
+    python benchmarks/weno.py [meqn] [nrepeat]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+try:
+    from pyclaw.limiters import reconstruct
+except ImportError:
+    print "The WENO reconstruction module pyclaw.limiters.weno.reconstruct is not built"
+    sys.exit(1)
+
+def timed(function,q,nrepeat):
+    r"""Best time of *nrepeat* calls of *function* on *q*."""
+    best = None
+    for i in xrange(nrepeat):
+        start = time.time()
+        function(q)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+if __name__=="__main__":
+    meqn = int(sys.argv[1]) if len(sys.argv)>1 else 2
+    nrepeat = int(sys.argv[2]) if len(sys.argv)>2 else 20
+    sizes = [100,1000,100000]
+
+    print "meqn = %s, best of %s calls" % (meqn,nrepeat)
+    print "%-6s %8s %12s %18s %13s %8s" % ('order','n','weno (us)','reconstructor (us)',
+                                            'overhead (us)','speedup')
+    for order in xrange(5,19,2):
+        for n in sizes:
+            q = np.random.randn(meqn,n)
+            reconstructor = reconstruct.WenoReconstructor(order,meqn,n)
+            weno_time = timed(lambda q: reconstruct.weno(order,q),q,nrepeat)
+            reconstructor_time = timed(reconstructor.reconstruct,q,nrepeat)
+            print "%-6d %8d %12.1f %18.1f %13.1f %8.2f" % (order,n,1.e6*weno_time,
+                                                          1.e6*reconstructor_time,
+                                                          1.e6*(weno_time-reconstructor_time),
+                                                          weno_time/reconstructor_time)
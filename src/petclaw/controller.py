@@ -15,3 +15,27 @@ class Controller(pyclawController):
         from petsc4py import PETSc
         rank = PETSc.Comm.getRank(PETSc.COMM_WORLD)
         return rank == 0
+
+    def can_write_async(self):
+        # PETSc and parallel HDF5 output use collective MPI calls, which must
+        # be made from the main thread of every process
+        return False
+
+    def get_checkpoint_path(self):
+        r"""
+        Every process writes its own checkpoint, so a run must be restarted
+        on the same number of processes.
+        """
+        from petsc4py import PETSc
+        path = super(Controller,self).get_checkpoint_path()
+        if PETSc.Comm.getSize(PETSc.COMM_WORLD) > 1:
+            path = path + '.%s' % PETSc.Comm.getRank(PETSc.COMM_WORLD)
+        return path
+
+    def get_profile_path(self):
+        r"""Every process writes the timings of its own phases."""
+        from petsc4py import PETSc
+        path = super(Controller,self).get_profile_path()
+        if PETSc.Comm.getSize(PETSc.COMM_WORLD) > 1:
+            path = path + '.%s' % PETSc.Comm.getRank(PETSc.COMM_WORLD)
+        return path
@@ -35,4 +35,12 @@ try:
     __all__ += ['read_petsc','write_petsc']
 except(ImportError):
     logging.debug("No petsc support found.")
+
+# Check for parallel HDF5 support
+try:
+    import h5py
+    from hdf5 import read_petsc_hdf5, write_petsc_hdf5
+    __all__ += ['read_petsc_hdf5','write_petsc_hdf5']
+except(ImportError):
+    logging.debug("No hdf5 support found.")
  
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Routines for reading and writing HDF5 files in parallel.
+
+Every process writes its own block of the distributed arrays directly into
+datasets shared by all processes, using MPI-IO collective writes through the
+``mpio`` driver of h5py, so that no data is gathered on a single process.
+Reading works the same way: every process reads only the block of the global
+arrays that it owns, so a frame can be read back (e.g. to restart a run) on
+a different number of processes than it was written on.
+
+The files have the layout of :mod:`pyclaw.io.hdf5` (one group per grid with
+the grid attributes, q of global shape (meqn,n1,...) and optionally aux),
+so they can also be read serially by pyclaw.  The global values of the
+state, aux_global, are stored as attributes ``aux_global.<name>`` of the
+group.
+
+Writing with more than one process requires h5py built against a parallel
+HDF5 library, and mpi4py.
+"""
+
+import os
+import logging
+
+import numpy as np
+import h5py
+
+from pyclaw.io import hdf5
+
+logger = logging.getLogger('io')
+
+def write_petsc_hdf5(solution,frame,path='./',file_prefix='claw',write_aux=False,
+                     options={},write_p=False):
+    r"""
+    Write out a Solution to a HDF5 file, in parallel.
+
+    Must be called by all processes.
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) petclaw solution
+       to be output
+     - *frame* - (int) Frame number
+     - *path* - (string) Root path
+     - *file_prefix* - (string) Prefix for the file name.  ``default = 'claw'``
+     - *write_aux* - (bool) Boolean controlling whether the associated
+       auxiliary array should be written out.  ``default = False``
+     - *options* - (dict) Optional argument dictionary, see
+       `Parallel HDF5 Option Table`_
+     - *write_p* - (bool) Write the derived quantities p instead of q.
+       ``default = False``
+
+    .. _`Parallel HDF5 Option Table`:
+
+    collective : if True (default), the arrays are written with collective
+                 MPI-IO operations, otherwise every process writes
+                 independently
+    """
+    # Option parsing
+    option_defaults = {'collective':True}
+    for (k,v) in option_defaults.iteritems():
+        if options.has_key(k):
+            exec("%s = options['%s']" % (k,k))
+        else:
+            exec('%s = v' % k)
+
+    filename = os.path.join(path,'%s%s.hdf' % (file_prefix,str(frame).zfill(4)))
+    f,parallel = open_file(filename,'w')
+    collective = collective and parallel
+
+    # Every process makes the same calls creating groups, attributes and
+    # datasets, as HDF5 requires for changes to the file structure
+    for state in solution.states:
+        grid = state.grid
+        subgroup = f.create_group('grid%s' % grid.gridno)
+        if write_p:
+            q = state.p
+        else:
+            q = state.q
+        hdf5.write_attributes(subgroup,state,q.shape[0])
+        subgroup.attrs['t'] = state.t
+        for (key,value) in sorted(state.aux_global.iteritems()):
+            if isinstance(value,(int,long,float,str,np.number)):
+                subgroup.attrs['aux_global.%s' % key] = value
+
+        write_block(subgroup,'q',q,grid,collective)
+        if write_aux and state.maux > 0:
+            write_block(subgroup,'aux',state.aux,grid,collective)
+
+    f.close()
+
+
+def read_petsc_hdf5(solution,frame,path='./',file_prefix='claw',read_aux=True,
+                    options={}):
+    r"""
+    Read in a HDF5 file into a petclaw Solution, in parallel.
+
+    Must be called by all processes.  The states are distributed over the
+    processes in the same way as newly created petclaw states, independently
+    of the number of processes that wrote the file.
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) Solution object to
+       read the data into.
+     - *frame* - (int) Frame number
+     - *path* - (string) Root path
+     - *file_prefix* - (string) Prefix for the file name.  ``default = 'claw'``
+     - *read_aux* - (bool) Whether or not to read aux, if it was written.
+       ``default = True``
+     - *options* - (dict) Optional argument dictionary, see
+       `Parallel HDF5 Option Table`_
+    """
+    import petclaw
+
+    # Option parsing
+    option_defaults = {'collective':True}
+    for (k,v) in option_defaults.iteritems():
+        if options.has_key(k):
+            exec("%s = options['%s']" % (k,k))
+        else:
+            exec('%s = v' % k)
+
+    if frame < 0:
+        # Don't construct file names with negative frameno values.
+        raise IOError("Frame " + str(frame) + " does not exist ***")
+
+    filename = os.path.join(path,'%s%s.hdf' % (file_prefix,str(frame).zfill(4)))
+    f,parallel = open_file(filename,'r')
+    collective = collective and parallel
+
+    for name in sorted(f.keys()):
+        subgroup = f[name]
+
+        # Create the grid with petclaw dimensions
+        serial_grid = hdf5.read_grid(subgroup)
+        dimensions = []
+        for serial_dim in serial_grid.dimensions:
+            dim = petclaw.Dimension(serial_dim.name,serial_dim.lower,
+                                    serial_dim.upper,serial_dim.n)
+            for attr in ['bc_lower','bc_upper','units']:
+                if hasattr(serial_dim,attr):
+                    setattr(dim,attr,getattr(serial_dim,attr))
+            dimensions.append(dim)
+        grid = petclaw.Grid(dimensions)
+        grid.gridno = serial_grid.gridno
+        grid.level = serial_grid.level
+
+        maux = int(subgroup.attrs.get('maux',0))
+        state = petclaw.State(grid,int(subgroup.attrs['meqn']),maux)
+        state.t = subgroup.attrs['t']
+        for attr in subgroup.attrs.keys():
+            if attr.startswith('aux_global.'):
+                value = subgroup.attrs[attr]
+                if isinstance(value,np.generic):
+                    value = value.item()
+                state.aux_global[attr[len('aux_global.'):]] = value
+
+        state.q = read_block(subgroup['q'],grid,collective)
+        if read_aux and maux > 0 and 'aux' in subgroup:
+            state.aux = read_block(subgroup['aux'],grid,collective)
+
+        solution.states.append(state)
+
+    f.close()
+
+
+def open_file(filename,mode):
+    r"""
+    Open a HDF5 file on all processes of PETSc.COMM_WORLD
+
+    :Output:
+     - (h5py.File) - Open file
+     - (bool) - Whether the file was opened with the mpio driver
+    """
+    from petsc4py import PETSc
+    parallel_h5py = h5py.get_config().mpi
+    if PETSc.Comm.getSize(PETSc.COMM_WORLD) > 1 and not parallel_h5py:
+        raise IOError("Parallel HDF5 output requires h5py built with MPI support")
+    if parallel_h5py:
+        comm = PETSc.COMM_WORLD.tompi4py()
+        return h5py.File(filename,mode,driver='mpio',comm=comm),True
+    return h5py.File(filename,mode),False
+
+
+def _local_box(grid):
+    r"""Return the slices of the global arrays owned by this process."""
+    return (slice(None),) + tuple([slice(dim.nstart,dim.nend)
+                                   for dim in grid.dimensions])
+
+
+def write_block(group,name,array,grid,collective=True):
+    r"""
+    Create the dataset *name* holding the global array whose local block
+    on this process is *array*, and write that block.
+    """
+    dataset = group.create_dataset(name,(array.shape[0],)+tuple(grid.n),dtype='f8')
+    if collective:
+        with dataset.collective:
+            dataset[_local_box(grid)] = array
+    else:
+        dataset[_local_box(grid)] = array
+
+
+def read_block(dataset,grid,collective=True):
+    r"""Return the block of *dataset* owned by this process."""
+    if collective:
+        with dataset.collective:
+            return dataset[_local_box(grid)]
+    return dataset[_local_box(grid)]
@@ -162,6 +162,8 @@ class State(pyclaw.state.State):
         r"""(float) - Current time represented on this grid, 
             ``default = 0.0``"""
         self.mcapa = -1
+        self.qbc = None
+        self._qbc_mbc = 0
 
         self._init_q_da(meqn)
         if maux>0: self._init_aux_da(maux)
@@ -268,6 +270,16 @@ class State(pyclaw.state.State):
             shape.insert(0,self.maux)
             return self.lauxVec.getArray().reshape(shape, order = 'F')
 
+    def allocate_qbc(self,mbc):
+        """
+        PETSc keeps q in a global vector, which cannot share memory with the
+        local vector qbc; this only allocates an array for qbc.
+        """
+        import numpy as np
+        shape = [n + 2*mbc for n in self.grid.ng]
+        shape.insert(0,self.meqn)
+        return np.zeros(shape,order='F')
+
     def set_mbc(self,mbc):
         r"""
         This is a hack to deal with the fact that petsc4py
@@ -289,5 +301,23 @@ class State(pyclaw.state.State):
             self._init_aux_da(self.maux,mbc)
             self.aux = aux0
 
+    def new_stage(self):
+        r"""
+        Return a state for the stages of Runge-Kutta methods, which shares
+        the grid, aux, aux_global and DA of this state and has a global
+        vector of its own for q (not initialized).  Creating a new DA would
+        be much more expensive.
+        """
+        stage = object.__new__(self.__class__)
+        stage.__dict__.update(self.__dict__)
+        stage.gqVec = self.q_da.createGlobalVector()
+        stage._p_da = None
+        stage.gpVec = None
+        stage._F_da = None
+        stage.gFVec = None
+        stage.qbc = None
+        stage._qbc_mbc = 0
+        return stage
+
     def sum_F(self,i):
         return self.gFVec.strideNorm(i,0)
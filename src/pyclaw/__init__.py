@@ -29,10 +29,17 @@ from cfl import CFL
 import riemann
 import plot
 
+__all__.extend(['FrameStore','LazySolution'])
+from framestore import FrameStore
+from lazy import LazySolution
+
 __all__.extend(['ClawSolver1D','ClawSolver2D','ClawSolver3D','SharpClawSolver1D','SharpClawSolver2D'])
 from clawpack import ClawSolver1D, ClawSolver2D, ClawSolver3D
 from sharpclaw import SharpClawSolver1D, SharpClawSolver2D
 
+__all__.extend(['EnsembleState','EnsembleSolver'])
+from ensemble import EnsembleState, EnsembleSolver
+
 
 # Sub-packages
 import limiters
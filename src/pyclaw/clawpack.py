@@ -77,6 +77,13 @@ class ClawSolver(Solver):
         The level of detail of logged messages from the Fortran solver.
         ``Default = 0``.
 
+    .. attribute:: persistent_qbc
+
+        If True, state.q is stored as the interior of the ghost-padded
+        array qbc (see :meth:`~pyclaw.state.State.allocate_qbc`), so that
+        q is not copied into qbc before the ghost cells are filled in 
+        each step.  ``Default = True``.
+
     :Initialization:
     
     Input:
@@ -104,11 +111,23 @@ class ClawSolver(Solver):
         self._default_attr_values['start_step'] = None
         self._default_attr_values['kernel_language'] = 'Fortran'
         self._default_attr_values['verbosity'] = 0
+        self._default_attr_values['persistent_qbc'] = True
         self._default_attr_values['cfl_max'] = 1.0
         self._default_attr_values['cfl_desired'] = 0.9
 
         # Call general initialization function
         super(ClawSolver,self).__init__(data)
+
+        # Work arrays of the limiters of the Python kernels
+        self._limiter_workspace = limiters.tvd.LimiterWorkspace()
+
+        # Copy of qbc from before the step, allocated by the unsplit
+        # Fortran solvers in 2D and 3D
+        self.qold = None
+
+        # Increments of qbc accumulated by the sweeps of the Python kernels
+        # in 2D and 3D, allocated with qbc
+        self.dq = None
     
     # ========== Time stepping routines ======================================
     def step(self,solution):
@@ -143,7 +162,8 @@ class ClawSolver(Solver):
             self.start_step(self,solution)
 
         if self.src_split == 2 and self.step_src is not None:
-            self.step_src(self,solution.states[0],self.dt/2.0)
+            with self.profiler.timer('source'):
+                self.step_src(self,solution.states[0],self.dt/2.0)
     
         self.step_hyperbolic(solution)
 
@@ -154,16 +174,31 @@ class ClawSolver(Solver):
             return False
 
         if self.step_src is not None:
-            # Strang splitting
-            if self.src_split == 2:
-                self.step_src(self,solution.states[0],self.dt/2.0)
-
-            # Godunov Splitting
-            if self.src_split == 1:
-                self.step_src(self,solution.states[0],self.dt)
+            with self.profiler.timer('source'):
+                # Strang splitting
+                if self.src_split == 2:
+                    self.step_src(self,solution.states[0],self.dt/2.0)
+
+                # Godunov Splitting
+                if self.src_split == 1:
+                    self.step_src(self,solution.states[0],self.dt)
                 
         return True
             
+    def _q_before_step(self,state):
+        r"""
+        The unsplit Fortran steps copy qbc into qold before updating qbc,
+        so that a rejected step can be undone from the interior of qold
+        without saving q, unless start_step or a half step on the source
+        term changes q before the copy.
+        """
+        if self.qold is None or self.dim_split or self.kernel_language != 'Fortran':
+            return None
+        if self.start_step is not None or (self.src_split == 2 and self.step_src is not None):
+            return None
+        mbc = self.mbc
+        return self.qold[(slice(None),)+(slice(mbc,-mbc),)*(self.qold.ndim-1)]
+
     def check_cfl_settings(self):
         pass
 
@@ -178,6 +213,105 @@ class ClawSolver(Solver):
         """
         raise Exception("Dummy routine, please override!")
 
+    def sweep(self,state,idim,dq,lines=(),transverse=False):
+        r"""
+        Compute the increments due to all Riemann problems normal to
+        dimension idim and add them to dq.  This is the vectorized Python
+        counterpart of the Fortran routines flux2/flux3; rather than looping
+        over grid lines, every line normal to idim is handled at once.
+
+        The direction idim is rolled to axis 1 of qbc and auxbc, so the
+        Riemann solver for that direction sees arrays of shape
+        (meqn,n,...) with one trailing axis per transverse dimension.
+
+        :Input:
+         - *state* - (:class:`~pyclaw.state.State`) State being evolved
+         - *idim* - (int) Direction of the sweep (0, 1 or 2)
+         - *dq* - (ndarray(meqn,...)) Array shaped like qbc that accumulates
+           the update
+         - *lines* - (tuple of slices) Range of grid lines (in the rolled
+           transverse axes) on which the Riemann problems are solved.
+           Defaults to all lines.
+         - *transverse* - (bool) Whether to propagate transverse waves
+           (see :meth:`ClawSolver2D.transverse_sweep`)
+
+        :Output:
+         - (float) - Maximum Courant number seen in this sweep
+        """
+        import numpy as np
+
+        grid = state.grid
+        mbc = self.mbc
+        n = grid.ng[idim]
+
+        # Rolled views of q, aux and dq; the sweep direction is axis 1
+        index = (slice(None),slice(None))+tuple(lines)
+        q  = np.rollaxis(self.qbc,idim+1,1)[index]
+        dqn = np.rollaxis(dq,idim+1,1)[index]
+        if state.maux>0:
+            aux = np.rollaxis(self.auxbc,idim+1,1)[index]
+            aux_l = aux[:,:-1]
+            aux_r = aux[:,1:]
+        else:
+            aux   = None
+            aux_l = None
+            aux_r = None
+
+        # Local value of dt/dx, broadcast over the transverse axes
+        if state.mcapa>=0:
+            dtdx = self.dt / (grid.d[idim] * aux[state.mcapa])
+        else:
+            dtdx = np.zeros((q.shape[1],)+(1,)*(q.ndim-2)) + self.dt/grid.d[idim]
+
+        if isinstance(self.rp,(list,tuple)): rp = self.rp[idim]
+        else: rp = self.rp
+
+        q_l = q[:,:-1]
+        q_r = q[:,1:]
+        with self.profiler.timer('riemann'):
+            wave,s,amdq,apdq = rp(q_l,q_r,aux_l,aux_r,state.aux_global)
+
+        # Riemann problem LL+k sits at the left edge of cell mbc+k;
+        # interfaces LL..UL-1 affect the cells inside the grid.
+        #        LL    |                               |     UL
+        #  |  LL |     |     |     |  ...  |     |     |  UL  |     |
+        #              |                               |
+        LL = mbc - 1
+        UL = mbc + n
+
+        # Godunov update
+        dqn[:,mbc:UL] -= dtdx[mbc:UL] * (apdq[:,LL:UL-1] + amdq[:,mbc:UL])
+
+        # Compute maximum wave speed
+        cfl = max(0.0,np.max(dtdx[LL+1:UL+1]*s[:,LL:UL]),
+                      np.max(-dtdx[LL:UL]*s[:,LL:UL]))
+
+        cqxx = None
+        if self.order == 2:
+            # Apply limiters to waves
+            limiter = np.array(self.mthlim,ndmin=1)
+            if (limiter > 0).any():
+                with self.profiler.timer('limiting'):
+                    wave = limiters.tvd.limit(state.meqn,wave,s,limiter,dtdx,
+                                              self._limiter_workspace)
+
+            # Correction fluxes for second order q_{xx} terms
+            dtdxave = 0.5 * (dtdx[:-1] + dtdx[1:])
+            sabs = np.abs(s)
+            if self.fwave:
+                coeff = np.sign(s) * (1.0 - sabs*dtdxave)
+            else:
+                coeff = sabs * (1.0 - sabs*dtdxave)
+            cqxx = np.sum(coeff[np.newaxis,...] * wave, axis=1)
+
+            # Update q by differencing correction fluxes
+            dqn[:,mbc:UL] -= 0.5 * dtdx[mbc:UL] * (cqxx[:,mbc:UL] - cqxx[:,LL:UL-1])
+
+        if transverse:
+            self.transverse_sweep(state,idim,dq,lines,q_l,q_r,amdq,apdq,cqxx,dtdx)
+
+        return cfl
+
     def set_mthlim(self):
         r"""
         Convenience routine to convert user's limiter specification to 
@@ -232,12 +366,24 @@ class ClawSolver(Solver):
         if(self.kernel_language == 'Fortran'):
             self.set_fortran_parameters(solution)
             self.allocate_workspace(solution)
-        elif self.ndim>1:
-            raise Exception('Only Fortran kernels are supported in multi-D.')
 
         self.allocate_bc_arrays(solution.states[0])
 
 
+    def allocate_bc_arrays(self,state):
+        r"""
+        Create numpy arrays for q and aux with ghost cells attached, and the
+        array dq of increments of the Python kernels in 2D and 3D.
+        If :attr:`persistent_qbc` is set, q becomes a view of the interior
+        of qbc.
+        """
+        import numpy as np
+        super(ClawSolver,self).allocate_bc_arrays(state)
+        if self.persistent_qbc:
+            self.qbc = state.allocate_qbc(self.mbc)
+        if self.kernel_language == 'Python' and self.ndim > 1:
+            self.dq = np.empty(self.qbc.shape,order='F')
+
     def set_fortran_parameters(self,solution):
         r"""
         Pack parameters into format recognized by Clawpack (Fortran) code.
@@ -309,7 +455,8 @@ class ClawSolver1D(ClawSolver):
         state = solution.states[0]
         grid = state.grid
 
-        self.apply_q_bcs(state)
+        with self.profiler.timer('bcs'):
+            self.apply_q_bcs(state)
             
         meqn,mbc = state.meqn,self.mbc
           
@@ -320,7 +467,8 @@ class ClawSolver1D(ClawSolver):
             dx,dt = grid.d[0],self.dt
             dtdx = np.zeros( (mx+2*mbc) ) + dt/dx
             
-            self.qbc,cfl = classic.step1(mbc,mx,self.qbc,self.auxbc,dx,dt,self.method,self.mthlim)
+            with self.profiler.timer('kernel'):
+                self.qbc,cfl = classic.step1(mbc,mx,self.qbc,self.auxbc,dx,dt,self.method,self.mthlim)
             
         elif(self.kernel_language == 'Python'):
  
@@ -346,7 +494,8 @@ class ClawSolver1D(ClawSolver):
             else:
                 aux_l = None
                 aux_r = None
-            wave,s,amdq,apdq = self.rp(q_l,q_r,aux_l,aux_r,state.aux_global)
+            with self.profiler.timer('riemann'):
+                wave,s,amdq,apdq = self.rp(q_l,q_r,aux_l,aux_r,state.aux_global)
             
             # Update loop limits, these are the limits for the Riemann solver
             # locations, which then update a grid cell value
@@ -378,7 +527,9 @@ class ClawSolver1D(ClawSolver):
             
                 # Apply Limiters to waves
                 if (limiter > 0).any():
-                    wave = limiters.tvd.limit(state.meqn,wave,s,limiter,dtdx)
+                    with self.profiler.timer('limiting'):
+                        wave = limiters.tvd.limit(state.meqn,wave,s,limiter,dtdx,
+                                                  self._limiter_workspace)
 
                 # Compute correction fluxes for second order q_{xx} terms
                 dtdxave = 0.5 * (dtdx[LL-1:UL-1] + dtdx[LL:UL])
@@ -402,7 +553,8 @@ class ClawSolver1D(ClawSolver):
 
         else: raise Exception("Unrecognized kernel_language; choose 'Fortran' or 'Python'")
 
-        self.cfl.update_global_max(cfl)
+        with self.profiler.timer('cfl'):
+            self.cfl.update_global_max(cfl)
         state.set_q_from_qbc(mbc,self.qbc)
    
 
@@ -443,7 +595,25 @@ class ClawSolver2D(ClawSolver):
         ClawSolver2D.trans_cor: Transverse increment waves and transverse
         correction waves are computed and propagated.
 
-    Note that only the fortran routines are supported for now in 2D.
+    With kernel_language = 'Python', the Riemann solvers are Python
+    functions acting on whole arrays.  :attr:`rp` is either a single
+    function or a list with one function per dimension, with the same
+    signature as in 1D:
+
+        def rp(q_l,q_r,aux_l,aux_r,aux_global)
+
+    The arrays passed have the direction of the sweep along axis 1 and
+    the transverse direction along axis 2.  If transverse waves are used,
+    :attr:`rpt` must be given as well (again a function or a list of
+    functions), with the signature
+
+        def rpt(q_l,q_r,aux_below,aux_center,aux_above,imp,asdq,aux_global)
+
+    which splits the fluctuation asdq into the parts moving down and up
+    in the transverse direction and returns (bmasdq, bpasdq).  As in the
+    Fortran rpt2, the aux arrays are those of the cells into which asdq
+    moves (imp=1 for amdq, imp=2 for apdq) and of their neighbors below
+    and above.
     """
 
     no_trans  = 0
@@ -505,6 +675,12 @@ class ClawSolver2D(ClawSolver):
         mwork = (maxm+2*mbc) * (5*meqn + mwaves + meqn*mwaves)
         self.work = np.empty((mwork),order='F')
 
+        # Persistent copy of qbc for the unsplit algorithm
+        if not self.dim_split:
+            qbc_dim = [n+2*mbc for n in grid.ng]
+            qbc_dim.insert(0,meqn)
+            self.qold = np.empty(qbc_dim,order='F')
+
 
     # ========== Hyperbolic Step =====================================
     def step_hyperbolic(self,solution):
@@ -515,19 +691,20 @@ class ClawSolver2D(ClawSolver):
         Clawpack is based on the Lax-Wendroff method, combined with Riemann
         solvers and TVD limiters applied to waves.
         """
-        import numpy as np
 
+        state = solution.states[0]
+        grid = state.grid
+        mx,my = grid.ng
+        mbc = self.mbc
+
+        with self.profiler.timer('bcs'):
+            self.apply_q_bcs(state)
 
         if(self.kernel_language == 'Fortran'):
-            state = solution.states[0]
-            grid = state.grid
             dx,dy = grid.d
-            mx,my = grid.ng
             maxm = max(mx,my)
             
-            self.apply_q_bcs(state)
             qnew = self.qbc
-            qold = qnew.copy('F')
             
             classic = __import__(self.so_name)
 
@@ -535,27 +712,135 @@ class ClawSolver2D(ClawSolver):
                 #Right now only Godunov-dimensional-splitting is implemented.
                 #Strang-dimensional-splitting could be added following dimsp2.f in Clawpack.
 
-                q, cfl_x = classic.step2ds(maxm,self.mbc,mx,my, \
-                      qold,qnew,self.auxbc,dx,dy,self.dt,self.method,self.mthlim,\
-                      self.aux1,self.aux2,self.aux3,self.work,1)
+                # step2ds reads and updates one grid line at a time, 
+                # so qbc can be updated in place.
+                with self.profiler.timer('kernel'):
+                    q, cfl_x = classic.step2ds(maxm,self.mbc,mx,my, \
+                          qnew,qnew,self.auxbc,dx,dy,self.dt,self.method,self.mthlim,\
+                          self.aux1,self.aux2,self.aux3,self.work,1)
 
-                q, cfl_y = classic.step2ds(maxm,self.mbc,mx,my, \
-                      q,q,self.auxbc,dx,dy,self.dt,self.method,self.mthlim,\
-                      self.aux1,self.aux2,self.aux3,self.work,2)
+                with self.profiler.timer('kernel'):
+                    q, cfl_y = classic.step2ds(maxm,self.mbc,mx,my, \
+                          q,q,self.auxbc,dx,dy,self.dt,self.method,self.mthlim,\
+                          self.aux1,self.aux2,self.aux3,self.work,2)
 
                 cfl = max(cfl_x,cfl_y)
 
             else:
+                # step2 adds the increments to qnew, so it must start 
+                # from a copy of qold
+                qold = self.qold
+                qold[...] = qnew
+                self.status['bytes_copied'] += qold.nbytes
+
+                with self.profiler.timer('kernel'):
+                    q, cfl = classic.step2(maxm,self.mbc,mx,my, \
+                          qold,qnew,self.auxbc,dx,dy,self.dt,self.method,self.mthlim,\
+                          self.aux1,self.aux2,self.aux3,self.work)
+
+        elif(self.kernel_language == 'Python'):
+            dq = self.dq
+            dq.fill(0.)
+
+            if self.dim_split:
+                # Godunov splitting: the y-sweep sees the result of the x-sweep
+                cfl_x = self.sweep(state,0,dq)
+                self.qbc += dq
+
+                dq.fill(0.)
+                cfl_y = self.sweep(state,1,dq)
+                self.qbc += dq
+
+            else:
+                # Both sweeps start from the same data, so the increments
+                # are accumulated in dq and applied at the end.  Riemann
+                # problems are solved on the grid lines 0..m+1 so that the
+                # transverse waves reach every cell inside the grid.
+                transverse = self.order_trans > 0
+                cfl_x = self.sweep(state,0,dq,(slice(mbc-1,my+mbc+1),),transverse)
+                cfl_y = self.sweep(state,1,dq,(slice(mbc-1,mx+mbc+1),),transverse)
+                self.qbc += dq
 
-                q, cfl = classic.step2(maxm,self.mbc,mx,my, \
-                      qold,qnew,self.auxbc,dx,dy,self.dt,self.method,self.mthlim,\
-                      self.aux1,self.aux2,self.aux3,self.work)
+            cfl = max(cfl_x,cfl_y)
 
+        else: raise Exception("Unrecognized kernel_language; choose 'Fortran' or 'Python'")
+
+        with self.profiler.timer('cfl'):
             self.cfl.update_global_max(cfl)
-            state.set_q_from_qbc(self.mbc,self.qbc)
+        state.set_q_from_qbc(mbc,self.qbc)
+
+    def transverse_sweep(self,state,idim,dq,lines,q_l,q_r,amdq,apdq,cqxx,dtdx):
+        r"""
+        Split the normal fluctuations from a sweep in direction idim into
+        transverse fluctuations and add their contribution to dq.  This is
+        the transverse part of the Fortran routine flux2, applied to all
+        grid lines at once.
+
+        :Input:
+         - *state* - (:class:`~pyclaw.state.State`) State being evolved
+         - *idim* - (int) Direction of the normal sweep
+         - *dq* - (ndarray(meqn,...)) Array shaped like qbc that accumulates
+           the update
+         - *lines* - (tuple of slices) Grid lines on which the normal Riemann
+           problems were solved
+         - *q_l*, *q_r*, *amdq*, *apdq*, *dtdx* - Rolled arrays from
+           :meth:`sweep`
+         - *cqxx* - Second order correction fluxes from :meth:`sweep`, or
+           None if the method is first order
+        """
+        import numpy as np
 
+        grid = state.grid
+        mbc = self.mbc
+        jdim = 1 - idim
+        UL = mbc + grid.ng[idim]
+        jlo,jhi = lines[0].start,lines[0].stop
+
+        # Include the second order corrections in the fluctuations
+        if self.order == 2 and self.order_trans == self.trans_cor:
+            amdq = amdq + cqxx
+            apdq = apdq - cqxx
+
+        if isinstance(self.rpt,(list,tuple)): rpt = self.rpt[idim]
+        else: rpt = self.rpt
+
+        # Only the fluctuations that enter cells inside the grid are split:
+        # amdq from the right edge (imp=1) and apdq from the left edge (imp=2)
+        left  = slice(mbc,UL)
+        right = slice(mbc-1,UL-1)
+        if state.maux>0:
+            aux = np.rollaxis(self.auxbc,idim+1,1)[:,mbc:UL]
+            aux_below  = aux[:,:,jlo-1:jhi-1]
+            aux_center = aux[:,:,jlo:jhi]
+            aux_above  = aux[:,:,jlo+1:jhi+1]
+        else:
+            aux_below  = None
+            aux_center = None
+            aux_above  = None
+
+        with self.profiler.timer('riemann'):
+            bmamdq,bpamdq = rpt(q_l[:,left],q_r[:,left],aux_below,aux_center,
+                                aux_above,1,amdq[:,left],state.aux_global)
+            bmapdq,bpapdq = rpt(q_l[:,right],q_r[:,right],aux_below,aux_center,
+                                aux_above,2,apdq[:,right],state.aux_global)
+
+        gadd_below = -0.5 * dtdx[mbc:UL] * (bmamdq + bmapdq)
+        gadd_above = -0.5 * dtdx[mbc:UL] * (bpamdq + bpapdq)
+
+        # Local value of dt/dy for the cells that are updated
+        if state.mcapa>=0:
+            dtdy = self.dt / (grid.d[jdim] * aux[state.mcapa])
+            dtdy_below  = dtdy[:,jlo-1:jhi-1]
+            dtdy_center = dtdy[:,jlo:jhi]
+            dtdy_above  = dtdy[:,jlo+1:jhi+1]
         else:
-            raise NotImplementedError("No python implementation for step_hyperbolic in 2D.")
+            dtdy = self.dt / grid.d[jdim]
+            dtdy_below,dtdy_center,dtdy_above = dtdy,dtdy,dtdy
+
+        dqn = np.rollaxis(dq,idim+1,1)[:,mbc:UL]
+        dqn[:,:,jlo:jhi]     -= dtdy_center * (gadd_above - gadd_below)
+        dqn[:,:,jlo-1:jhi-1] -= dtdy_below * gadd_below
+        dqn[:,:,jlo+1:jhi+1] += dtdy_above * gadd_above
 
 # ============================================================================
 #  ClawPack 3d Solver Class
@@ -594,8 +879,14 @@ class ClawSolver3D(ClawSolver):
         ClawSolver3D.trans_cor: Transverse increment waves and transverse
         correction waves are computed and propagated.
 
-    Note that only Fortran routines are supported for now in 3D --
-    there is no pure-python version.
+    With kernel_language = 'Python', only dimensional splitting is
+    supported.  :attr:`rp` is then either a single function or a list with
+    one function per dimension, with the same signature as in 1D:
+
+        def rp(q_l,q_r,aux_l,aux_r,aux_global)
+
+    The arrays passed have the direction of the sweep along axis 1 and
+    the two transverse directions along axes 2 and 3.
     """
 
     no_trans  = 0
@@ -645,6 +936,12 @@ class ClawSolver3D(ClawSolver):
         mwork = (maxm+2*mbc) * (31*meqn + mwaves + meqn*mwaves)
         self.work = np.empty((mwork),order='F')
 
+        # Persistent copy of qbc for the unsplit algorithm
+        if not self.dim_split:
+            qbc_dim = [n+2*mbc for n in grid.ng]
+            qbc_dim.insert(0,meqn)
+            self.qold = np.empty(qbc_dim,order='F')
+
 
     # ========== Hyperbolic Step =====================================
     def step_hyperbolic(self,solution):
@@ -655,19 +952,20 @@ class ClawSolver3D(ClawSolver):
         Clawpack is based on the Lax-Wendroff method, combined with Riemann
         solvers and TVD limiters applied to waves.
         """
-        import numpy as np
 
+        state = solution.states[0]
+        grid = state.grid
+        mx,my,mz = grid.ng
+        mbc = self.mbc
+
+        with self.profiler.timer('bcs'):
+            self.apply_q_bcs(state)
 
         if(self.kernel_language == 'Fortran'):
-            state = solution.states[0]
-            grid = state.grid
             dx,dy,dz = grid.d
-            mx,my,mz = grid.ng
             maxm = max(mx,my,mz)
             
-            self.apply_q_bcs(state)
             qnew = self.qbc
-            qold = qnew.copy('F')
             
             classic = __import__(self.so_name)
 
@@ -675,28 +973,55 @@ class ClawSolver3D(ClawSolver):
                 #Right now only Godunov-dimensional-splitting is implemented.
                 #Strang-dimensional-splitting could be added following dimsp2.f in Clawpack.
 
-                q, cfl_x = classic.step3ds(maxm,self.mbc,mx,my,mz, \
-                      qold,qnew,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
-                      self.aux1,self.aux2,self.aux3,self.work,1)
+                # step3ds reads and updates one grid line at a time, 
+                # so qbc can be updated in place.
+                with self.profiler.timer('kernel'):
+                    q, cfl_x = classic.step3ds(maxm,self.mbc,mx,my,mz, \
+                          qnew,qnew,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
+                          self.aux1,self.aux2,self.aux3,self.work,1)
 
-                q, cfl_y = classic.step3ds(maxm,self.mbc,mx,my,mz, \
-                      q,q,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
-                      self.aux1,self.aux2,self.aux3,self.work,2)
+                with self.profiler.timer('kernel'):
+                    q, cfl_y = classic.step3ds(maxm,self.mbc,mx,my,mz, \
+                          q,q,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
+                          self.aux1,self.aux2,self.aux3,self.work,2)
 
-                q, cfl_z = classic.step3ds(maxm,self.mbc,mx,my,mz, \
-                      q,q,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
-                      self.aux1,self.aux2,self.aux3,self.work,3)
+                with self.profiler.timer('kernel'):
+                    q, cfl_z = classic.step3ds(maxm,self.mbc,mx,my,mz, \
+                          q,q,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
+                          self.aux1,self.aux2,self.aux3,self.work,3)
 
                 cfl = max(cfl_x,cfl_y,cfl_z)
 
             else:
+                # step3 adds the increments to qnew, so it must start 
+                # from a copy of qold
+                qold = self.qold
+                qold[...] = qnew
+                self.status['bytes_copied'] += qold.nbytes
 
-                q, cfl = classic.step3(maxm,self.mbc,mx,my,mz, \
-                      qold,qnew,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
-                      self.aux1,self.aux2,self.aux3,self.work)
+                with self.profiler.timer('kernel'):
+                    q, cfl = classic.step3(maxm,self.mbc,mx,my,mz, \
+                          qold,qnew,self.auxbc,dx,dy,dz,self.dt,self.method,self.mthlim,\
+                          self.aux1,self.aux2,self.aux3,self.work)
 
-            self.cfl.update_global_max(cfl)
-            state.set_q_from_qbc(self.mbc,self.qbc)
+        elif(self.kernel_language == 'Python'):
+            if not self.dim_split:
+                raise NotImplementedError("Only dimensional splitting is implemented in Python in 3D.")
+
+            # Godunov splitting, as in step3ds: each sweep sees the result
+            # of the previous one.  Riemann problems are solved on the grid
+            # lines 0..m+1 in both transverse directions.
+            dq = self.dq
+            cfl = 0.
+            for idim in xrange(3):
+                lines = tuple([slice(mbc-1,n+mbc+1) for (jdim,n) in enumerate(grid.ng) 
+                               if jdim != idim])
+                dq.fill(0.)
+                cfl = max(cfl,self.sweep(state,idim,dq,lines))
+                self.qbc += dq
 
-        else:
-            raise NotImplementedError("No python implementation for step_hyperbolic in 3D.")
+        else: raise Exception("Unrecognized kernel_language; choose 'Fortran' or 'Python'")
+
+        with self.profiler.timer('cfl'):
+            self.cfl.update_global_max(cfl)
+        state.set_q_from_qbc(mbc,self.qbc)
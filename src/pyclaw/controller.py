@@ -19,7 +19,6 @@ running of compiled fortran binaries.
 import logging
 import sys
 import os
-import copy
 import shutil
 import time
 
@@ -27,6 +26,8 @@ from data import Data
 from solution import Solution
 from solver import Solver
 from util import FrameCounter
+from framestore import FrameStore
+from writer import AsyncWriter
 
 class Controller(object):
     r"""Controller for pyclaw simulation runs and plotting
@@ -53,7 +54,8 @@ class Controller(object):
                         'xclawcmd','xclawout','xclawerr','runmake','savecode',
                         'solver','keep_copy','write_aux_init',
                         'write_aux_always','output_format',
-                        'output_file_prefix','output_options','nout',
+                        'output_file_prefix','output_options',
+                        'async_output','checkpoint_interval','nout',
                         'outstyle','verbosity']
         r"""(list) - Viewable attributes of the `:class:`~pyclaw.controller.Controller`"""
 
@@ -93,8 +95,10 @@ class Controller(object):
         self.keep_copy = False 
         r"""(bool) - Keep a copy in memory of every output time, 
         ``default = False``"""
-        self.frames = []
-        r"""(list) - List of saved frames if ``keep_copy`` is set to ``True``"""
+        self.frames = FrameStore()
+        r"""(:class:`~pyclaw.framestore.FrameStore`) - Saved frames if
+        ``keep_copy`` is set to ``True``; replace it with a FrameStore with
+        another eviction policy to limit the frames kept in memory"""
         self.write_aux_init = False
         r"""(bool) - Write out initial auxiliary array, ``default = False``"""
         self.write_aux_always = False
@@ -110,6 +114,35 @@ class Controller(object):
         self.output_options = {}
         r"""(dict) - Output options passed to function writing and reading 
         data in output_format's format.  ``default = {}``"""
+        self.async_output = False
+        r"""(bool) - Write output files in a background thread while the
+        solution is evolved to the next output time, ``default = False``"""
+        self.output_queue_size = 2
+        r"""(int) - Maximum number of frames waiting to be written when
+        ``async_output`` is set, ``default = 2``"""
+        self.output_timing = {}
+        r"""(dict) - Seconds spent computing, writing output and waiting for
+        output to be written in the last call to run"""
+        self.profile = False
+        r"""(bool) - Time the phases of the run (boundary conditions, Riemann
+        solves, limiting, output, ...) with the profiler of the solver, log a
+        table of the times at the end of run and write them to
+        :meth:`get_profile_path`, with the throughput of the Fortran kernel
+        (see :mod:`pyclaw.perf`); the profiler is disabled again when run
+        returns, unless it was enabled before, ``default = False``"""
+
+        # Checkpointing
+        self.checkpoint_interval = None
+        r"""(float) - Wall-clock seconds between checkpoints written during
+        run, or None to write no checkpoints, ``default = None``"""
+        self.checkpoint_path = None
+        r"""(string) - File to write checkpoints to, ``outdir/checkpoint.pkl``
+        if None, ``default = None``"""
+        self._restart = None
+        self._frame = None
+        self._output_times = None
+        self._run_position = None
+        self._last_checkpoint = 0.
         
         # Classic output parameters, used in run convenience method
         self.tfinal = 1.0
@@ -209,24 +242,49 @@ class Controller(object):
             
         :Version: 1.0 (2009-05-01)
         """
-        
+        profiler = self.solver.profiler
+        profiler_enabled = profiler.enabled
+        if self.profile:
+            profiler.enabled = True
+            profiler.reset()
+        try:
+            return self._run(profiler)
+        finally:
+            # Later runs are timed only if they ask for it
+            profiler.enabled = profiler_enabled
+
+    def _run(self,profiler):
+        r"""Evolve the solution for :meth:`run` with the profiler set up."""
         import numpy as np
 
         frame = FrameCounter()
         frame.set_counter(self.start_frame)
+        self._frame = frame
+        self._io_time = 0.
+        restart = self._restart
+        self._restart = None
         if self.keep_copy:
-            self.frames = []
+            self.frames.clear()
                     
+        run_start = time.time()
+
         self.solver.setup(self.solution)
-        self.solver.dt = self.solver.dt_initial
+        if restart is None:
+            self.solver.dt = self.solver.dt_initial
+        else:
+            self._restore_solver(restart['solver'])
             
         self.check_validity()
 
-        # Write initial gauge values
-        self.solver.write_gauge_values(self.solution)
+        if restart is None:
+            # Start the gauge files and write initial gauge values
+            self.solution.state.grid.gauge_recorder.start()
+            self.solver.write_gauge_values(self.solution)
 
         # Output styles
-        if self.outstyle == 1:
+        if restart is not None and restart['run'] is not None:
+            output_times = restart['run']['output_times']
+        elif self.outstyle == 1:
             output_times = np.linspace(self.solution.t,
                     self.tfinal,self.nout+1)
         elif self.outstyle == 2:
@@ -236,74 +294,364 @@ class Controller(object):
         else:
             raise Exception("Invalid output style %s" % self.outstyle)  
          
+        self._output_times = output_times
+
+        # Position in the loop over output times to start from
+        first_output,first_step = 1,0
+        if restart is not None and restart['run'] is not None:
+            frame.set_counter(restart['run']['frame'])
+            first_output,first_step = restart['run']['position']
+
         # Output and save initial frame
-        if self.keep_copy:
-            self.frames.append(copy.deepcopy(self.solution))
+        if self.keep_copy and restart is None:
+            self.frames.add(self.solution)
+        writer = None
         if self.output_format is not None:
-            if os.path.exists(self.outdir) and self.overwrite==False:
+            if os.path.exists(self.outdir) and self.overwrite==False \
+                    and restart is None:
                 raise Exception("Refusing to overwrite existing output data. \
                  \nEither delete/move the directory or set controller.overwrite=True.")
-            if self.compute_p is not None:
-                self.compute_p(self.solution.state)
-                self.solution.write(frame,self.outdir_p,
-                                        self.output_format,
-                                        self.file_prefix_p,
-                                        write_aux = False,
-                                        options = self.output_options,
-                                        write_p = True) 
-
-            self.solution.write(frame,self.outdir,
-                                        self.output_format,
-                                        self.output_file_prefix,
-                                        self.write_aux_init,
-                                        self.output_options)
-
-        self.write_F('w')
-
-        logging.info("Solution %s computed for time t=%f" % 
-                        (frame,self.solution.t) )
-
-        for t in output_times[1:]:                
-            if self.outstyle < 3:
-                status = self.solver.evolve_to_time(self.solution,t)
-            else:
-                # Take nstepout steps and output
-                for n in xrange(self.nstepout):
-                    status = self.solver.evolve_to_time(self.solution)
-            frame.increment()
-            if self.keep_copy:
-                # Save current solution to dictionary with frame as key
-                self.frames.append(copy.deepcopy(self.solution))
-            if self.output_format is not None:
-                if self.compute_p is not None:
-                    self.compute_p(self.solution.state)
-                    self.solution.write(frame,self.outdir_p,
-                                            self.output_format,
-                                            self.file_prefix_p,
-                                            write_aux = False, 
-                                            options = self.output_options,
-                                            write_p = True) 
-                
-                self.solution.write(frame,self.outdir,
-                                            self.output_format,
-                                            self.output_file_prefix,
-                                            self.write_aux_always,
-                                            self.output_options)
-            self.write_F()
-
-            logging.info("Solution %s computed for time t=%f"
-                % (frame,self.solution.t))
-            for file in self.solution.state.grid.gauge_files: 
-                file.flush()
+            if self.async_output:
+                if self.can_write_async():
+                    writer = AsyncWriter(self.output_queue_size)
+                    writer.start()
+                else:
+                    logging.warning("Output format %s cannot be written in the \
+                        background; writing output synchronously." % self.output_format)
+            if restart is None:
+                with profiler.timer('output'):
+                    self.write_frame(frame,self.write_aux_init,writer)
+
+        if restart is None:
+            with profiler.timer('output'):
+                self.write_F('w')
+            logging.info("Solution %s computed for time t=%f" % 
+                            (frame,self.solution.t) )
+
+        compute_time = 0.
+        after_step = self.solver.after_step
+        if self.checkpoint_interval is not None:
+            self._last_checkpoint = time.time()
+            self.solver.after_step = self._checkpoint_if_due
+        try:
+            for i in xrange(first_output,len(output_times)):
+                t = output_times[i]
+                start = time.time()
+                if self.outstyle < 3:
+                    self._run_position = (i,0)
+                    status = self.solver.evolve_to_time(self.solution,t)
+                else:
+                    # Take nstepout steps and output
+                    for n in xrange(first_step,self.nstepout):
+                        self._run_position = (i,n)
+                        status = self.solver.evolve_to_time(self.solution)
+                    first_step = 0
+                compute_time += time.time() - start
+                frame.increment()
+                if self.keep_copy:
+                    # Save the arrays of the current solution as the next frame
+                    self.frames.add(self.solution)
+                with profiler.timer('output'):
+                    if self.output_format is not None:
+                        self.write_frame(frame,self.write_aux_always,writer)
+                    self.write_F()
+
+                logging.info("Solution %s computed for time t=%f"
+                    % (frame,self.solution.t))
+                with profiler.timer('gauges'):
+                    self.solution.state.grid.gauge_recorder.flush()
+        except:
+            # Clean up, but raise the error that stopped the run rather than
+            # one raised while cleaning up
+            exc_info = sys.exc_info()
+            try:
+                self._finish_run(writer,profiler)
+            except Exception:
+                logging.exception("Error while cleaning up after a failed run")
+            raise exc_info[0],exc_info[1],exc_info[2]
+        finally:
+            self.solver.after_step = after_step
+            self._run_position = None
+        self._finish_run(writer,profiler)
+
+        self.output_timing = {'compute':compute_time,'io':self._io_time,
+                              'wait':self._io_time,'overlap':0.}
+        if writer is not None:
+            self.output_timing.update({'io':writer.io_time+writer.snapshot_time,
+                                       'wait':writer.wait_time+writer.snapshot_time,
+                                       'overlap':writer.overlap_time()})
+        if self.output_format is not None:
+            logging.info("Computing took %fs, output %fs, of which %fs overlapped with computing"
+                % (compute_time,self.output_timing['io'],self.output_timing['overlap']))
             
-        self.solver.teardown()
-        for file in self.solution.state.grid.gauge_files: file.close()
+        if self.profile:
+            status['profile'] = profiler.summary()
+            self.write_profile(time.time()-run_start)
 
         # Return the current status of the solver
         return status
+
+    def _finish_run(self,writer,profiler):
+        r"""
+        Write the frames still queued, close the output and gauge files and
+        tear the solver down at the end of :meth:`run`, whether or not it
+        succeeded
+        """
+        try:
+            with profiler.timer('output'):
+                try:
+                    if writer is not None:
+                        writer.flush()
+                finally:
+                    if self.output_format is not None:
+                        self.close_output()
+        finally:
+            try:
+                self.solver.teardown()
+            finally:
+                with profiler.timer('gauges'):
+                    self.solution.state.grid.gauge_recorder.close()
+
+    def get_profile_path(self):
+        r"""Return the file the timings of the phases of a run are written to."""
+        return os.path.join(self.outdir,'profile.json')
+
+    def write_profile(self,run_time):
+        r"""
+        Log a table of the times spent in the phases of the run and write
+        them to :meth:`get_profile_path` as JSON, with the wall-clock time
+        *run_time* of the run and a description of the problem.
+        """
+        profiler = self.solver.profiler
+        logging.info("Time spent in the phases of the run:\n" + profiler.table())
+        info = {}
+        kernel = profiler.phases.get('kernel')
+        if kernel is not None:
+            from pyclaw import perf
+            info['kernel'] = perf.throughput(self.solver,self.solution.state,
+                                             kernel['calls'],kernel['total'])
+            logging.info("Throughput of the kernel:\n" + perf.report([info['kernel']]))
+        path = self.get_profile_path()
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        profiler.dump(path,run_time=run_time,
+                      solver=self.solver.__class__.__name__,
+                      kernel_language=getattr(self.solver,'kernel_language',None),
+                      grid=[int(n) for n in self.solution.state.grid.n],
+                      nout=len(self._output_times)-1,**info)
     
     # ========== Advanced output methods ==================================
 
+    def write_frame(self,frame,write_aux=False,writer=None):
+        r"""
+        Write the current solution as output frame *frame*
+
+        Writes the derived quantities computed by compute_p as well, if it is
+        set.  If *writer* (an :class:`~pyclaw.writer.AsyncWriter`) is given,
+        the solution is handed to it and written in the background.
+        """
+        frame = frame.get_counter()
+        if writer is None:
+            start = time.time()
+            write = self.solution.write
+        else:
+            write = lambda *args,**kwargs: writer.write(self.solution,*args,**kwargs)
+
+        if self.compute_p is not None:
+            self.compute_p(self.solution.state)
+            write(frame,self.outdir_p,
+                        self.output_format,
+                        self.file_prefix_p,
+                        write_aux = False,
+                        options = self.output_options,
+                        write_p = True)
+        write(frame,self.outdir,
+                    self.output_format,
+                    self.output_file_prefix,
+                    write_aux,
+                    self.output_options)
+
+        if writer is None:
+            self._io_time += time.time() - start
+
+    def close_output(self):
+        r"""
+        Close the files kept open by the output formats, if any, and log the
+        throughput of the output
+
+        An output format that keeps files open between frames provides a
+        function close_<format>(path) in the io package.
+        """
+        import io
+        from io import tuning
+        if isinstance(self.output_format,str):
+            formats = [self.output_format]
+        else:
+            formats = self.output_format
+        for form in formats:
+            close = getattr(io,'close_%s' % form,None)
+            if close is not None:
+                close(self.outdir)
+                if self.compute_p is not None:
+                    close(self.outdir_p)
+        for path in (self.outdir,self.outdir_p):
+            message = tuning.report(os.path.abspath(path))
+            if message is not None:
+                logging.info(message)
+
+    def can_write_async(self):
+        r"""Whether output_format can be written by an AsyncWriter."""
+        return True
+
+    # ========== Checkpoint and restart ======================================
+    def get_checkpoint_path(self):
+        r"""Return the file checkpoints are written to and read from."""
+        if self.checkpoint_path is not None:
+            return self.checkpoint_path
+        return os.path.join(self.outdir,'checkpoint.pkl')
+
+    def checkpoint(self,path=None):
+        r"""
+        Write a checkpoint from which the run can be resumed with
+        :meth:`restart`
+
+        The checkpoint holds q, aux, t and aux_global of every state, the
+        time step size, status, CFL number and step history of the solver,
+        the last error of its error controller (see
+        :class:`~pyclaw.ssp.PIController`), the frame counter and the
+        position in the loop over output times, and the lengths of the
+        gauge and functional files, so that a resumed run produces the
+        same results, bit for bit, as an uninterrupted one.  The
+        Runge--Kutta stages of SharpClaw are not saved: they are
+        overwritten at every step.
+
+        When called during :meth:`run` (which does so every
+        :attr:`checkpoint_interval` seconds), the checkpoint is taken
+        between two time steps and the run is resumed from that step.
+        Otherwise, resuming starts a new run from the current solution.
+
+        The file is written under a temporary name and then renamed, so
+        that an interrupted write never destroys the previous checkpoint.
+
+        :Input:
+         - *path* - (string) File to write, ``default = get_checkpoint_path()``
+        """
+        import pickle
+        import numpy as np
+
+        if path is None:
+            path = self.get_checkpoint_path()
+
+        states = []
+        for state in self.solution.states:
+            aux = None
+            if state.maux > 0:
+                aux = np.array(state.aux,order='F')
+            states.append({'q':np.array(state.q,order='F'),'aux':aux,
+                           't':state.t,'aux_global':state.aux_global,
+                           'mcapa':state.mcapa})
+
+        solver = self.solver
+        solver_data = {'dt':solver.dt,'status':dict(solver.status),
+                       'cfl':solver.cfl.get_cached_max(),
+                       'wave_speeds':list(solver._wave_speeds),
+                       'evolve_position':solver.evolve_position,
+                       'err_prev':None}
+        error_controller = getattr(solver,'_error_controller',None)
+        if error_controller is not None:
+            solver_data['err_prev'] = error_controller.err_prev
+
+        run = None
+        if self._run_position is not None:
+            run = {'frame':self._frame.get_counter(),
+                   'position':self._run_position,
+                   'output_times':list(self._output_times)}
+
+        gauges = self.solution.state.grid.gauge_recorder.tell()
+        F_length = None
+        if self.compute_F is not None and os.path.exists(self.F_path):
+            F_length = os.path.getsize(self.F_path)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        temporary_path = path + '.tmp'
+        f = open(temporary_path,'wb')
+        pickle.dump({'states':states,'solver':solver_data,'run':run,
+                     'gauges':gauges,'F_length':F_length},f,
+                    pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.rename(temporary_path,path)
+        self._last_checkpoint = time.time()
+        logging.info("Wrote checkpoint %s at t=%f" % (path,self.solution.t))
+
+    def restart(self,path=None):
+        r"""
+        Resume the run saved by :meth:`checkpoint`
+
+        The controller must be set up as for the original run (solver,
+        solution with the same grid, output options and gauges); q, aux,
+        t and the solver state are then replaced by those of the checkpoint,
+        the gauge and functional files are cut back to their length at the
+        checkpoint, and the run is continued.  Frames kept in memory with
+        keep_copy only include those computed after the restart.
+
+        :Input:
+         - *path* - (string) Checkpoint file, ``default = get_checkpoint_path()``
+
+        :Output:
+         - (dict) - Status of the solver, as returned by :meth:`run`
+        """
+        import pickle
+
+        if path is None:
+            path = self.get_checkpoint_path()
+        f = open(path,'rb')
+        data = pickle.load(f)
+        f.close()
+
+        for state,saved in zip(self.solution.states,data['states']):
+            state.q = saved['q']
+            if saved['aux'] is not None:
+                state.aux = saved['aux']
+            state.t = saved['t']
+            state.aux_global = saved['aux_global']
+            state.mcapa = saved['mcapa']
+
+        recorder = self.solution.state.grid.gauge_recorder
+        if len(recorder.tell()[1]) != len(data['gauges'][1]):
+            raise Exception("The gauges of the checkpoint and of the grid differ.")
+        recorder.truncate(data['gauges'])
+        if data['F_length'] is not None and os.path.exists(self.F_path):
+            F_file = open(self.F_path,'r+')
+            F_file.truncate(data['F_length'])
+            F_file.close()
+
+        logging.info("Restarting from checkpoint %s at t=%f" % (path,self.solution.t))
+        self._restart = data
+        return self.run()
+
+    def _restore_solver(self,saved):
+        r"""Give the solver the state saved by :meth:`checkpoint`."""
+        solver = self.solver
+        solver.dt = saved['dt']
+        solver.status.update(saved['status'])
+        solver.cfl.set_local_max(saved['cfl'])
+        solver.cfl.update_global_max(saved['cfl'])
+        solver._wave_speeds = list(saved['wave_speeds'])
+        if saved.get('err_prev') is not None:
+            solver._error_controller.err_prev = saved['err_prev']
+        if saved['evolve_position'] is not None:
+            solver.resume(saved['evolve_position'])
+
+    def _checkpoint_if_due(self,solver,solution):
+        if time.time() - self._last_checkpoint >= self.checkpoint_interval:
+            with solver.profiler.timer('checkpoint'):
+                self.checkpoint()
+
+
     def write_F(self,mode='a'):
         if self.compute_F is not None:
             self.compute_F(self.solution.state)
@@ -0,0 +1,545 @@
+r"""
+Module for evolving ensembles of 1D problems together.
+
+An ensemble is a set of members that share a grid, a Riemann solver and the
+solver parameters, but may differ in their initial conditions, aux arrays,
+aux_global values and times.  The members are stored together so that each
+Riemann solve, wave limiting and WENO reconstruction acts on all members at
+once, while every member keeps its own time step and CFL number.  A member
+whose step violates cfl_max is set back and retakes the step with a smaller
+time step; the other members are not affected.
+
+Typical usage, given a list of states on the same grid::
+
+    >>> ensemble = EnsembleState(states)
+    >>> solver = ClawSolver1D()
+    >>> solver.kernel_language = 'Python'
+    >>> solver.rp = rp_acoustics.rp_acoustics_1d
+    >>> ensemble_solver = EnsembleSolver(solver)
+    >>> ensemble_solver.setup(ensemble)
+    >>> status = ensemble_solver.evolve_to_time(ensemble,1.0)
+    >>> state = ensemble.get_state(0)
+
+Only the Python kernels of :class:`~pyclaw.clawpack.ClawSolver1D` and
+:class:`~pyclaw.sharpclaw.SharpClawSolver1D` are supported.
+"""
+
+import numpy as np
+
+import limiters.tvd
+import ssp
+from limiters import recon
+from clawpack import ClawSolver1D
+from sharpclaw import SharpClawSolver1D
+
+class EnsembleState(object):
+    r"""
+    Contains the q, aux, aux_global and t of the members of an ensemble.
+
+    q and aux are stored as arrays of shape (meqn,mx,nmembers) in Fortran
+    order, so that the data of each member is contiguous.  The properties
+    :attr:`q` and :attr:`aux` are views of them with the member index first.
+
+    Entries of aux_global that are the same for all members are kept as they
+    are; entries that differ must be numbers and are stored as arrays with
+    one value per member.
+
+    :Initialization:
+
+    Input:
+     - *states* - (list of :class:`~pyclaw.state.State`) States on the same
+       1D grid with the same meqn and maux, holding the initial data of the
+       members
+    Output:
+     - (:class:`EnsembleState`) - Initialized ensemble
+    """
+
+    # ========== Property Definitions ========================================
+    def q():
+        doc = r"""(ndarray(nmembers,meqn,mx)) - Solution of the members"""
+        def fget(self):
+            return np.rollaxis(self._q,2)
+        def fset(self,q):
+            self._q[...] = np.rollaxis(np.asarray(q),0,3)
+        return locals()
+    q = property(**q())
+
+    def aux():
+        doc = r"""(ndarray(nmembers,maux,mx)) - Auxiliary arrays of the members"""
+        def fget(self):
+            return np.rollaxis(self._aux,2)
+        def fset(self,aux):
+            self._aux[...] = np.rollaxis(np.asarray(aux),0,3)
+        return locals()
+    aux = property(**aux())
+
+    def __init__(self,states):
+        if len(states) == 0:
+            raise ValueError('An ensemble needs at least one member')
+        grid = states[0].grid
+        if grid.ndim != 1:
+            raise NotImplementedError('Ensembles are only implemented in 1D')
+        for state in states:
+            if state.grid.ng != grid.ng or state.meqn != states[0].meqn \
+                    or state.maux != states[0].maux:
+                raise ValueError('The members of an ensemble must have the same '
+                                 'grid size, meqn and maux')
+
+        # ========== Attribute Definitions ===================================
+        self.grid = grid
+        r"""pyclaw.Grid.grid - The grid shared by the members"""
+        self.nmembers = len(states)
+        r"""(int) - Number of members"""
+        self.meqn = states[0].meqn
+        r"""(int) - Number of unknowns (components of q)"""
+        self.maux = states[0].maux
+        r"""(int) - Number of auxiliary fields"""
+        self.mcapa = states[0].mcapa
+        self.t = np.array([state.t for state in states],dtype=float)
+        r"""(ndarray(nmembers)) - Current time of each member"""
+        self.aux_global = {}
+        r"""(dict) - Global values of the members; values that differ between
+            members are arrays of length nmembers"""
+        self.qbc = None
+        r"""(ndarray(meqn,mx+2*mbc,nmembers)) - Ghost-padded storage for q,
+            if allocated with :meth:`allocate_qbc`, ``default = None``"""
+
+        self._q = np.empty((self.meqn,grid.ng[0],self.nmembers),order='F')
+        self._aux = np.empty((self.maux,grid.ng[0],self.nmembers),order='F')
+        for k,state in enumerate(states):
+            self._q[...,k] = state.q
+            if self.maux > 0:
+                self._aux[...,k] = state.aux
+
+        for key,value in states[0].aux_global.iteritems():
+            values = [state.aux_global[key] for state in states]
+            if all([np.array_equal(v,value) for v in values]):
+                self.aux_global[key] = value
+            else:
+                try:
+                    self.aux_global[key] = np.array(values,dtype=float)
+                except (TypeError,ValueError):
+                    raise ValueError("aux_global['%s'] must be a number if it "
+                                     "differs between members" % key)
+                if self.aux_global[key].shape != (self.nmembers,):
+                    raise ValueError("aux_global['%s'] must be a number if it "
+                                     "differs between members" % key)
+
+    def __str__(self):
+        output = "Ensemble of %s members\n" % self.nmembers
+        output += "  t=%s meqn=%s maux=%s" % (self.t,self.meqn,self.maux)
+        return output
+
+    def allocate_qbc(self,mbc):
+        r"""
+        Allocate ghost-padded storage for q and make q a view of its
+        interior, so that a solver can update q in place.
+        """
+        qbc = np.zeros((self.meqn,self.grid.ng[0]+2*mbc,self.nmembers),order='F')
+        qbc[:,mbc:-mbc,:] = self._q
+        self._q = qbc[:,mbc:-mbc,:]
+        self.qbc = qbc
+        return qbc
+
+    def get_aux_global(self,k):
+        r"""
+        Return the aux_global dictionary of member *k*.
+        """
+        aux_global = {}
+        for key,value in self.aux_global.iteritems():
+            if isinstance(value,np.ndarray) and value.shape == (self.nmembers,):
+                aux_global[key] = value[k]
+            else:
+                aux_global[key] = value
+        return aux_global
+
+    def get_state(self,k):
+        r"""
+        Return a :class:`~pyclaw.state.State` holding a copy of member *k*.
+        """
+        from state import State
+        state = State(self.grid,self.meqn,self.maux)
+        state.q[...] = self._q[...,k]
+        if self.maux > 0:
+            state.aux[...] = self._aux[...,k]
+        state.aux_global = self.get_aux_global(k)
+        state.t = self.t[k]
+        state.mcapa = self.mcapa
+        return state
+
+
+class EnsembleSolver(object):
+    r"""
+    Evolves all members of an :class:`EnsembleState` with one 1D solver.
+
+    The wrapped solver supplies the Riemann solver, boundary conditions and
+    all numerical parameters (order, limiters, lim_type, char_decomp,
+    time_integrator, cfl_max, cfl_desired, dt_initial, dt_max, dt_variable,
+    max_steps); its kernel_language must be 'Python'.  Custom boundary
+    condition functions are called with the ensemble as the state, qbc of
+    shape (meqn,mx+2*mbc,nmembers) and the array of member times.
+
+    The Riemann solver is called once for all members: q_l and q_r hold the
+    rows of cells of all members one after the other, and entries of
+    aux_global that differ between members are passed as arrays with one
+    value per Riemann problem.  Riemann solvers written with array
+    operations, like those for the Python kernels in riemann, work unchanged.
+
+    .. attribute:: solver
+
+        The :class:`~pyclaw.clawpack.ClawSolver1D` or
+        :class:`~pyclaw.sharpclaw.SharpClawSolver1D` used for all members.
+
+    .. attribute:: dt
+
+        (ndarray(nmembers)) Time step of each member.
+
+    .. attribute:: status
+
+        Dictionary of arrays with one entry per member, reset by
+        :meth:`evolve_to_time`:
+
+         - ``cflmax`` = Maximum CFL number of the accepted steps
+         - ``dtmin`` = Minimum time step taken
+         - ``dtmax`` = Maximum time step taken
+         - ``numsteps`` = Number of time steps taken
+         - ``numrejected`` = Number of time steps rejected because the
+           CFL number was too large
+
+    :Initialization:
+
+    Input:
+     - *solver* - (:class:`~pyclaw.clawpack.ClawSolver1D` or
+       :class:`~pyclaw.sharpclaw.SharpClawSolver1D`) Solver to use
+    Output:
+     - (:class:`EnsembleSolver`) - Initialized ensemble solver
+    """
+
+    def __init__(self,solver):
+        if not isinstance(solver,(ClawSolver1D,SharpClawSolver1D)):
+            raise TypeError('EnsembleSolver needs a ClawSolver1D or SharpClawSolver1D')
+        self.solver = solver
+        self.dt = None
+        self.status = {}
+        self.qbc = None
+        self.auxbc = None
+        self._q_backup = None
+        self._rk_method = None
+        self._rk_registers = [None,None]
+        self._limiter_workspace = limiters.tvd.LimiterWorkspace()
+
+    # ========== Setup and boundary conditions ===============================
+    def setup(self,ensemble):
+        r"""
+        Allocate the work arrays and set the initial time steps.
+        """
+        solver = self.solver
+        if solver.kernel_language != 'Python':
+            raise NotImplementedError('EnsembleSolver only supports the Python kernels')
+        if ensemble.mcapa >= 0:
+            raise NotImplementedError('EnsembleSolver does not support capa')
+        if isinstance(solver,SharpClawSolver1D):
+            if solver.dq_src is not None:
+                raise NotImplementedError('EnsembleSolver does not support dq_src')
+            solver.mbc = (solver.weno_order+1)/2
+        solver.set_mthlim()
+        mbc = solver.mbc
+        mx = ensemble.grid.ng[0]
+        nmembers = ensemble.nmembers
+
+        # The classic step works in place on the ghost-padded storage of q;
+        # the Runge-Kutta stages of SharpClaw need storage of their own
+        if isinstance(solver,ClawSolver1D):
+            self.qbc = ensemble.allocate_qbc(mbc)
+        else:
+            self.qbc = np.zeros((ensemble.meqn,mx+2*mbc,nmembers),order='F')
+        self._q_backup = np.empty(ensemble._q.shape,order='F')
+
+        self.auxbc = np.zeros((ensemble.maux,mx+2*mbc,nmembers),order='F')
+        if ensemble.maux > 0:
+            self.auxbc[:,mbc:-mbc,:] = ensemble._aux
+            dim = ensemble.grid.dimensions[0]
+            solver.auxbc_lower(ensemble,dim,ensemble.t,self.auxbc,0)
+            solver.auxbc_upper(ensemble,dim,ensemble.t,self.auxbc,0)
+
+        # aux_global as seen by the Riemann problems at the interfaces and in
+        # the cells of all members
+        nbc = mx + 2*mbc
+        self._aux_global_cells = {}
+        self._aux_global_faces = {}
+        for key,value in ensemble.aux_global.iteritems():
+            if isinstance(value,np.ndarray) and value.shape == (nmembers,):
+                self._aux_global_cells[key] = np.repeat(value,nbc)
+                self._aux_global_faces[key] = self._aux_global_cells[key][:-1]
+            else:
+                self._aux_global_cells[key] = value
+                self._aux_global_faces[key] = value
+
+        if isinstance(solver,SharpClawSolver1D):
+            solver.allocate_reconstructor(ensemble.meqn,nbc*nmembers)
+            self._rk_method = ssp.get_method(solver.time_integrator)
+            self._rk_registers = [np.empty(ensemble._q.shape,order='F')
+                                  for i in xrange(self._rk_method.nregisters)] + [None,None]
+
+        self.dt = np.zeros(nmembers) + solver.dt_initial
+
+    def apply_q_bcs(self,ensemble,q):
+        r"""
+        Copy *q* (of shape (meqn,mx,nmembers)) into the interior of qbc,
+        unless it is already stored there, and fill in the ghost cells.
+        """
+        mbc = self.solver.mbc
+        if q is not ensemble._q or ensemble.qbc is not self.qbc:
+            self.qbc[:,mbc:-mbc,:] = q
+
+        # The member axis is last, so the 1D boundary conditions of the
+        # solver apply to all members at once
+        dim = ensemble.grid.dimensions[0]
+        self.solver.qbc_lower(ensemble,dim,ensemble.t,self.qbc,0)
+        self.solver.qbc_upper(ensemble,dim,ensemble.t,self.qbc,0)
+        return self.qbc
+
+    def _flat(self,array):
+        r"""
+        View of an array of shape (m,nbc,nmembers) as one row of
+        nbc*nmembers cells.
+        """
+        return array.reshape((array.shape[0],array.shape[1]*array.shape[2]),order='F')
+
+    def _member_cfl(self,s,dtdx):
+        r"""
+        CFL number of each member, from the wave speeds at the interfaces
+        next to its interior cells.
+        """
+        mbc = self.solver.mbc
+        nbc = self.qbc.shape[1]
+        cfl = np.max(np.maximum(dtdx[1:]*s,-dtdx[:-1]*s),axis=0)
+        cfl = np.append(cfl,0.).reshape((nbc,-1),order='F')
+        return np.maximum(0.0,np.max(cfl[mbc-2:nbc-mbc,:],axis=0))
+
+    # ========== Time stepping ===============================================
+    def step_classic(self,ensemble,dt):
+        r"""
+        Take one step of the classic algorithm on all members, with time
+        step dt[k] for member k, and return the CFL number of each member.
+        """
+        solver = self.solver
+        grid = ensemble.grid
+        meqn = ensemble.meqn
+
+        q = self._flat(self.apply_q_bcs(ensemble,ensemble._q))
+        aux = self._flat(self.auxbc)
+        limiter = np.array(solver.mthlim,ndmin=1)
+        dtdx = np.repeat(dt/grid.d[0],self.qbc.shape[1])
+
+        # Solve Riemann problem at each interface
+        if ensemble.maux > 0:
+            aux_l = aux[:,:-1]
+            aux_r = aux[:,1:]
+        else:
+            aux_l = None
+            aux_r = None
+        wave,s,amdq,apdq = solver.rp(q[:,:-1],q[:,1:],aux_l,aux_r,self._aux_global_faces)
+
+        # Godunov update
+        q[:,1:] -= dtdx[1:]*apdq
+        q[:,:-1] -= dtdx[:-1]*amdq
+
+        cfl = self._member_cfl(s,dtdx)
+
+        if solver.order == 2:
+            # Correction fluxes at the left edge of each cell
+            f = np.zeros(q.shape)
+
+            if (limiter > 0).any():
+                wave = limiters.tvd.limit(meqn,wave,s,limiter,dtdx,self._limiter_workspace)
+
+            dtdxave = 0.5 * (dtdx[:-1] + dtdx[1:])
+            for mw in xrange(wave.shape[1]):
+                sabs = np.abs(s[mw])
+                om = 1.0 - sabs*dtdxave
+                if solver.fwave:
+                    f[:,1:] += 0.5 * np.sign(s[mw]) * om * wave[:,mw]
+                else:
+                    f[:,1:] += 0.5 * sabs * om * wave[:,mw]
+
+            q[:,1:-1] -= dtdx[1:-1] * (f[:,2:] - f[:,1:-1])
+
+        return cfl
+
+    def dq(self,ensemble,q,dt):
+        r"""
+        Compute the SharpClaw increment dq/dt * dt of all members for the
+        solution *q* (of shape (meqn,mx,nmembers)) and record the CFL
+        numbers of this stage.
+        """
+        solver = self.solver
+        grid = ensemble.grid
+        mbc = solver.mbc
+
+        qbc = self._flat(self.apply_q_bcs(ensemble,q))
+        aux = self._flat(self.auxbc)
+        dtdx = np.repeat(dt/grid.d[0],self.qbc.shape[1])
+
+        if ensemble.maux > 0:
+            aux_l = aux[:,:-1]
+            aux_r = aux[:,1:]
+        else:
+            aux_l = None
+            aux_r = None
+
+        # Reconstruct (wave reconstruction uses a Riemann solve)
+        if solver.lim_type == -1:
+            ql = qbc; qr = qbc
+        elif solver.lim_type == 2:
+            if solver.char_decomp == 0:
+                ql,qr = solver.weno_reconstruct(qbc)
+            elif solver.char_decomp == 1:
+                wave,s,amdq,apdq = solver.rp(qbc[:,:-1],qbc[:,1:],aux_l,aux_r,
+                                             self._aux_global_faces)
+                ql,qr = recon.weno5_wave(qbc,wave,s)
+            else:
+                raise NotImplementedError
+        else:
+            raise NotImplementedError('lim_type %s not implemented' % solver.lim_type)
+
+        # Solve Riemann problem at each interface
+        wave,s,amdq,apdq = solver.rp(qr[:,:-1],ql[:,1:],aux_l,aux_r,self._aux_global_faces)
+        cfl = self._member_cfl(s,dtdx)
+
+        # Find total fluctuation within each cell
+        wave,s,amdq2,apdq2 = solver.rp(ql,qr,aux,aux,self._aux_global_cells)
+
+        deltaq = np.zeros(qbc.shape,order='F')
+        deltaq[:,1:-1] = -dtdx[1:-1]*(amdq[:,1:] + apdq[:,:-1] \
+                            + apdq2[:,1:-1] + amdq2[:,1:-1])
+
+        # As in SharpClawSolver.step, the first stage that violates cfl_max
+        # determines the CFL number of the step
+        self._cfl = np.where(self._cfl_violated,self._cfl,cfl)
+        self._cfl_violated |= cfl > solver.cfl_max
+
+        return deltaq.reshape(self.qbc.shape,order='F')[:,mbc:-mbc,:]
+
+    def step_sharpclaw(self,ensemble,dt):
+        r"""
+        Take one Runge-Kutta step of SharpClaw on all members, with time
+        step dt[k] for member k, and return the CFL number of each member.
+        """
+        q = ensemble._q
+        self._cfl = np.zeros(ensemble.nmembers)
+        self._cfl_violated = np.zeros(ensemble.nmembers,dtype=bool)
+
+        r1,r2 = self._rk_registers[:2]
+        self._rk_method.step(lambda x,c: self.dq(ensemble,x,dt),q,r1,r2)
+
+        return self._cfl
+
+    def step(self,ensemble,dt):
+        r"""
+        Take one time step on all members and return their CFL numbers.
+        """
+        if isinstance(self.solver,ClawSolver1D):
+            return self.step_classic(ensemble,dt)
+        else:
+            return self.step_sharpclaw(ensemble,dt)
+
+    def evolve_to_time(self,ensemble,tend):
+        r"""
+        Evolve all members to time *tend*.
+
+        Each member adapts its own time step as :meth:`Solver.evolve_to_time`
+        does; members that have reached tend are not changed while the
+        others continue.  A member whose step violates cfl_max gets its q
+        back and retakes the step.
+
+        :Input:
+         - *ensemble* - (:class:`EnsembleState`) Ensemble to evolve
+         - *tend* - (float) Time to evolve to
+
+        :Output:
+         - (dict) - Returns the status dictionary of the solver
+        """
+        solver = self.solver
+        nmembers = ensemble.nmembers
+        tstart = ensemble.t.copy()
+
+        # Reset status dictionary
+        self.status = {'cflmax':np.zeros(nmembers),
+                       'dtmin':self.dt.copy(),
+                       'dtmax':self.dt.copy(),
+                       'numsteps':np.zeros(nmembers,dtype=int),
+                       'numrejected':np.zeros(nmembers,dtype=int)}
+
+        # Setup for the run
+        if solver.dt_variable:
+            if solver.cfl_desired > solver.cfl_max:
+                raise Exception('Variable time-stepping and desired CFL > maximum CFL')
+            max_steps = np.zeros(nmembers,dtype=int) + solver.max_steps
+        else:
+            max_steps = ((tend - tstart + 1e-10) / self.dt).astype(int)
+            if (np.abs(max_steps*self.dt - (tend - tstart)) > 1e-5 * (tend-tstart)).any():
+                raise Exception('dt does not divide (tend-tstart) and dt is fixed!')
+        active = (tstart < tend) & (max_steps > 0)
+        attempts = np.zeros(nmembers,dtype=int)
+
+        # Main time-stepping loop
+        while active.any():
+            # Adjust dt so that we hit tend exactly if we are near tend
+            near = active & (ensemble.t + self.dt > tend)
+            self.dt[near] = tend - ensemble.t[near]
+            dt = np.where(active,self.dt,0.)
+
+            # Keep a backup in case members need to retake the step; the
+            # Runge-Kutta stages of members with dt=0 may also change q by
+            # roundoff, so finished members are set back too
+            self._q_backup[...] = ensemble._q
+
+            cfl = self.step(ensemble,dt)
+            attempts[active] += 1
+
+            accept = active & (cfl <= solver.cfl_max)
+            reject = active & ~accept
+
+            # Accepted members
+            self.status['cflmax'][accept] = np.maximum(cfl[accept],
+                                                       self.status['cflmax'][accept])
+            self.status['numsteps'][accept] += 1
+            if solver.dt_variable:
+                ensemble.t[accept] += self.dt[accept]
+            else:
+                #Avoid roundoff error if dt_variable=False:
+                ensemble.t[accept] = tstart[accept] \
+                        + self.status['numsteps'][accept]*self.dt[accept]
+
+            # Rejected members
+            if reject.any():
+                if not solver.dt_variable:
+                    self.status['cflmax'][reject] = cfl[reject]
+                    raise Exception('CFL too large, giving up!')
+                self.status['numrejected'][reject] += 1
+            if not accept.all():
+                ensemble._q[...,~accept] = self._q_backup[...,~accept]
+
+            # See which members are finished
+            active &= (ensemble.t < tend)
+
+            # Choose new time steps
+            if solver.dt_variable:
+                grow = active & (cfl > 0.0)
+                self.dt[grow] = np.minimum(solver.dt_max,
+                        self.dt[grow] * solver.cfl_desired / cfl[grow])
+                self.dt[active & ~grow] = solver.dt_max
+                self.status['dtmin'][active] = np.minimum(self.dt[active],
+                                                          self.status['dtmin'][active])
+                self.status['dtmax'][active] = np.maximum(self.dt[active],
+                                                          self.status['dtmax'][active])
+
+            active &= (attempts < max_steps)
+
+        # End of main time-stepping loop -------------------------------------
+
+        if solver.dt_variable and (ensemble.t < tend).any():
+            raise Exception("Maximum number of timesteps have been taken")
+
+        return self.status
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+In-memory store for the output frames of a run.
+
+A :class:`FrameStore` keeps the q arrays (and, if requested, the aux arrays)
+of the frames added to it.  The grid of the solution added first is copied
+once, and all frames share the copy.  The frames are returned as
+:class:`~pyclaw.solution.Solution` objects that are built only when they
+are accessed, so the store acts as a lazy sequence of solutions indexed by
+frame number.  Their states are shallow copies of a state created when the
+first frame is added, with the arrays of the frame swapped in; with
+petclaw, they share the PETSc vectors of that state, so the arrays of a
+frame are only valid until another frame is accessed.
+
+Which frames are kept is controlled by an eviction policy:
+
+ - *keep_last* = K keeps only the last K frames
+ - *keep_every* = N keeps only every Nth frame (the most recent frame is
+   always kept, so that the final solution is available)
+ - *max_bytes* limits the memory used by the arrays; when it is exceeded,
+   the least recently used frames are written to disk with np.save and read
+   back as memory maps when they are accessed
+
+The default is to keep all frames in memory.
+"""
+
+import os
+import copy
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+class FrameStore(object):
+    r"""
+    Stores the arrays of output frames, with configurable eviction.
+
+    Typical usage with a Controller::
+
+        >>> claw.keep_copy = True
+        >>> claw.frames = FrameStore(keep_last=2,max_bytes=10**8)
+        >>> claw.run()
+        >>> q = claw.frames[claw.nout].state.q
+
+    .. attribute:: keep_last
+
+        Number of most recent frames to keep, or None to keep all frames,
+        ``default = None``
+
+    .. attribute:: keep_every
+
+        Keep only frames whose number is a multiple of keep_every (and the
+        most recent frame), ``default = 1``
+
+    .. attribute:: max_bytes
+
+        Maximum number of bytes of frame arrays to hold in memory, or None
+        for no limit; frames beyond it are spilled to disk,
+        ``default = None``
+
+    .. attribute:: spill_dir
+
+        Directory for spilled frames; a temporary directory is created if
+        this is None, ``default = None``
+
+    .. attribute:: store_aux
+
+        Whether to store aux with every frame.  If False, aux is stored once,
+        from the first frame, and shared by all frames, ``default = False``
+
+    :Initialization:
+
+    Input:
+     - *keep_last*, *keep_every*, *max_bytes*, *spill_dir*, *store_aux* -
+       See the attributes above
+    Output:
+     - (:class:`FrameStore`) - Empty frame store
+    """
+
+    def __init__(self,keep_last=None,keep_every=1,max_bytes=None,spill_dir=None,
+                 store_aux=False):
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.store_aux = store_aux
+
+        self.nbytes = 0
+        r"""(int) - Number of bytes of frame arrays held in memory"""
+
+        self._nframes = 0
+        # Frames held in memory, least recently used first
+        self._frames = OrderedDict()
+        # Frames spilled to disk
+        self._spilled = {}
+        # Solution class and, for each state, a state on a copy of its grid
+        # into which the arrays of frames are swapped, and the shared aux
+        # array
+        self._layout = None
+        self._tmpdir = None
+
+    def __len__(self):
+        return self._nframes
+
+    def __iter__(self):
+        for frame in self.frame_numbers():
+            yield self[frame]
+
+    def __getitem__(self,frame):
+        if isinstance(frame,slice):
+            return [self[n] for n in xrange(*frame.indices(self._nframes))
+                    if n in self.frame_numbers()]
+        if frame < 0:
+            frame += self._nframes
+        if self._frames.has_key(frame):
+            # Move the frame to the most recently used position
+            entry = self._frames.pop(frame)
+            self._frames[frame] = entry
+        elif self._spilled.has_key(frame):
+            entry = self._spilled[frame]
+        elif 0 <= frame < self._nframes:
+            raise IndexError('Frame %s was evicted from the frame store' % frame)
+        else:
+            raise IndexError('Frame %s is not in the frame store' % frame)
+        return self._build(entry)
+
+    def __str__(self):
+        return "FrameStore with %s of %s frames kept, %s bytes in memory" \
+                    % (len(self.frame_numbers()),self._nframes,self.nbytes)
+
+    def frame_numbers(self):
+        r"""Return the sorted list of the numbers of the frames kept."""
+        return sorted(self._frames.keys() + self._spilled.keys())
+
+    def add(self,solution):
+        r"""
+        Store the arrays of *solution* as the next frame and apply the
+        eviction policy.
+
+        :Output:
+         - (int) - Number of the new frame
+        """
+        frame = self._nframes
+        self._nframes += 1
+
+        if self._layout is None:
+            layout = []
+            for state in solution.states:
+                aux = None
+                if state.maux > 0 and not self.store_aux:
+                    aux = state.aux.copy('F')
+                # Created here rather than at every access: for petclaw,
+                # creating a state is collective
+                shell = type(state)(copy.deepcopy(state.grid),state.meqn,state.maux)
+                shell.mcapa = state.mcapa
+                layout.append((shell,aux))
+            self._layout = (type(solution),layout)
+
+        entry = {'t':[],'q':[],'aux':[],'aux_global':[]}
+        for state in solution.states:
+            entry['t'].append(state.t)
+            entry['q'].append(state.q.copy('F'))
+            if self.store_aux and state.maux > 0:
+                entry['aux'].append(state.aux.copy('F'))
+            else:
+                entry['aux'].append(None)
+            entry['aux_global'].append(copy.copy(state.aux_global))
+        self._frames[frame] = entry
+        self.nbytes += self._nbytes(entry)
+
+        for old_frame in self.frame_numbers():
+            if not self._keep(old_frame,frame):
+                self._discard(old_frame)
+        self._spill()
+
+        return frame
+
+    def clear(self):
+        r"""Remove all frames, including spilled ones."""
+        for frame in self.frame_numbers():
+            self._discard(frame)
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir,ignore_errors=True)
+            self._tmpdir = None
+        self._nframes = 0
+        self._layout = None
+        self.nbytes = 0
+
+    # ========== Eviction ====================================================
+    def _keep(self,frame,latest):
+        r"""Whether the eviction policy keeps *frame* after *latest* is added."""
+        if frame == latest:
+            return True
+        if self.keep_last is not None and frame <= latest - self.keep_last:
+            return False
+        return frame % self.keep_every == 0
+
+    def _nbytes(self,entry):
+        return sum([q.nbytes for q in entry['q']]) \
+             + sum([aux.nbytes for aux in entry['aux'] if aux is not None])
+
+    def _discard(self,frame):
+        if self._frames.has_key(frame):
+            self.nbytes -= self._nbytes(self._frames.pop(frame))
+        else:
+            entry = self._spilled.pop(frame)
+            for path in entry['q'] + entry['aux']:
+                if path is not None and os.path.exists(path):
+                    os.remove(path)
+
+    def _spill(self):
+        r"""Write least recently used frames to disk until within max_bytes."""
+        if self.max_bytes is None:
+            return
+        while self.nbytes > self.max_bytes and len(self._frames) > 0:
+            frame,entry = self._frames.popitem(last=False)
+            self.nbytes -= self._nbytes(entry)
+            spilled = dict(entry)
+            for key in ('q','aux'):
+                spilled[key] = []
+                for i,array in enumerate(entry[key]):
+                    if array is None:
+                        spilled[key].append(None)
+                        continue
+                    path = os.path.join(self._get_spill_dir(),
+                                        'frame%04d_%s%s.npy' % (frame,key,i))
+                    np.save(path,array)
+                    spilled[key].append(path)
+            self._spilled[frame] = spilled
+
+    def _get_spill_dir(self):
+        if self.spill_dir is not None:
+            if not os.path.exists(self.spill_dir):
+                os.makedirs(self.spill_dir)
+            return self.spill_dir
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='pyclaw_frames_')
+        return self._tmpdir
+
+    # ========== Building solutions ==========================================
+    def _load(self,array):
+        r"""Return a stored array, mapping it from disk if it was spilled."""
+        if isinstance(array,basestring):
+            # Copy-on-write, so that changes to the frame stay in memory
+            return np.load(array,mmap_mode='c')
+        return array
+
+    def _build(self,entry):
+        solution_class,layout = self._layout
+        states = []
+        for i,(shell,aux) in enumerate(layout):
+            state = object.__new__(type(shell))
+            state.__dict__.update(shell.__dict__)
+            state.q = self._load(entry['q'][i])
+            if entry['aux'][i] is not None:
+                state.aux = self._load(entry['aux'][i])
+            elif aux is not None:
+                state.aux = aux
+            state.t = entry['t'][i]
+            state.aux_global = copy.copy(entry['aux_global'][i])
+            states.append(state)
+        solution = solution_class(states[0])
+        solution.states.extend(states[1:])
+        return solution
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Recording of solution values at gauges.
+
+A :class:`GaugeRecorder` holds the grid indices of all gauges of a grid as
+index arrays, so that the values at every gauge are extracted from q (and
+aux) with a single fancy index per time step.  The values are collected in
+a preallocated buffer of *buffer_size* time steps and written in blocks
+when the buffer is full, at every output time and when the run ends.
+
+Each gauge can be recorded at a subset of the time steps only: a gauge
+added with *every* = n is recorded at every nth call of :meth:`record`.
+
+A gauge can also be given a stencil of cells with interpolation weights,
+e.g. the 2**ndim cells around the gauge for multilinear interpolation.  The
+stencils of all gauges are held as two arrays of shape (ngauges, stencil
+size), the cell indices and the weights, padded with zero weights, so that
+the interpolation is a sparse matrix-vector product over q in ELLPACK
+format: one fancy index and one weighted sum per time step.
+
+The gauge values are written in one of the formats
+
+ - ``ascii`` - one text file ``<name>.txt`` per gauge, with a line holding
+   t and the values per recorded time step
+ - ``binary`` - a single file ``gauges.bin`` of little-endian float64
+   values: a header of two values (the number of gauges and the number of
+   values per record) followed by one record per gauge and recorded time
+   step, holding the gauge number, t and the values
+ - ``hdf5`` - a single file ``gauges.h5`` with a dataset per gauge, named
+   after the gauge, of shape (number of recorded steps, 1 + number of
+   values) holding t and the values
+
+The files can be read back with :meth:`GaugeRecorder.read`.
+"""
+
+import os
+
+import numpy as np
+
+class GaugeRecorder(object):
+    r"""
+    Records values at the gauges of a grid, with buffered output.
+
+    Typical usage, through :meth:`~pyclaw.grid.Grid.add_gauges`::
+
+        >>> grid.add_gauges([[0.25],[0.75]],every=[1,10])
+        >>> grid.gauge_recorder.format = 'hdf5'
+
+    .. attribute:: path
+
+        Directory of the gauge files, ``default = './_output/_gauges/'``
+
+    .. attribute:: format
+
+        Format of the gauge files, ``'ascii'``, ``'binary'`` or ``'hdf5'``,
+        ``default = 'ascii'``
+
+    .. attribute:: buffer_size
+
+        Number of time steps held in memory before the values are written,
+        ``default = 1000``
+
+    .. attribute:: file_prefix
+
+        Name of the gauge file in the binary and HDF5 formats, without
+        extension, ``default = 'gauges'``
+
+    :Initialization:
+
+    Input:
+     - *path*, *format*, *buffer_size* - See the attributes above
+    Output:
+     - (:class:`GaugeRecorder`) - Recorder without gauges
+    """
+
+    def __init__(self,path='./_output/_gauges/',format='ascii',buffer_size=1000):
+        self.path = path
+        self.format = format
+        self.buffer_size = buffer_size
+        self.file_prefix = 'gauges'
+
+        self.names = []
+        r"""(list) - Name of each gauge"""
+        self.indices = []
+        r"""(list) - Grid indices of each gauge"""
+        self.every = []
+        r"""(list) - Interval in time steps at which each gauge is recorded"""
+        self.stencils = []
+        r"""(list) - Cells and weights of the stencil of each gauge"""
+        self.ghosted = False
+        r"""(bool) - Whether the stencils may reach the ghost cells of the
+            part of a distributed grid, so that :meth:`record` is given q
+            and aux with ghost cells"""
+
+        # Index arrays of the stencil cells of all gauges and their weights,
+        # built on the first record, and the number of ghost cells they
+        # were built for
+        self._index = None
+        self._weights = None
+        self._mbc = 0
+        # Buffer of times, values and step numbers
+        self._times = None
+        self._values = None
+        self._steps = None
+        self._nbuffered = 0
+        # Number of calls to record
+        self._step = 0
+        # Open files (per gauge for ascii), or None
+        self._files = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self,index,name,every=1,stencil=None):
+        r"""
+        Add a gauge at grid cell *index* (a list of local indices), recorded
+        every *every* time steps.
+
+        The values recorded are those in cell *index*, or if *stencil* is
+        given, the weighted sum of the values in the cells of the stencil.
+        *stencil* is a tuple of a list of cells (lists of local indices) and
+        a list of their weights.
+        """
+        if self._nbuffered > 0:
+            self.flush()
+        self.indices.append(list(index))
+        if stencil is None:
+            stencil = ([list(index)],[1.])
+        cells,weights = stencil
+        self.stencils.append(([list(cell) for cell in cells],
+                              [float(w) for w in weights]))
+        self.names.append(name)
+        self.every.append(int(every))
+        self._index = None
+        self._values = None
+        if self._files is not None:
+            self.close()
+
+    # ========== Recording ===================================================
+    def record(self,t,q,aux=None,compute_gauge_values=None,mbc=0):
+        r"""
+        Record the values at all gauges at time *t*.
+
+        :Input:
+         - *t* - (float) Time
+         - *q* - (ndarray(meqn,...)) Solution
+         - *aux* - (ndarray(maux,...)) Auxiliary array, or None
+         - *compute_gauge_values* - (function) Function of the q and aux
+           values at the gauges, arrays with a column per gauge, returning
+           the values to record with a column per gauge; if None, q is
+           recorded
+         - *mbc* - (int) Number of ghost cells of q and aux
+        """
+        if len(self.names) == 0:
+            return
+        if self._index is None or mbc != self._mbc:
+            self._build_stencils(mbc)
+
+        q_gauges = self._interpolate(q)
+        if compute_gauge_values is None:
+            values = q_gauges
+        else:
+            aux_gauges = None
+            if aux is not None:
+                aux_gauges = self._interpolate(aux)
+            values = np.asarray(compute_gauge_values(q_gauges,aux_gauges))
+        values = values.reshape(-1,len(self.names))
+
+        if self._values is None or self._values.shape[2] != values.shape[0]:
+            if self._nbuffered > 0:
+                self.flush()
+            self._values = np.empty((self.buffer_size,len(self.names),values.shape[0]))
+            self._times = np.empty(self.buffer_size)
+            self._steps = np.empty(self.buffer_size,dtype=int)
+
+        n = self._nbuffered
+        self._values[n] = values.T
+        self._times[n] = t
+        self._steps[n] = self._step
+        self._nbuffered += 1
+        self._step += 1
+        if self._nbuffered == self.buffer_size:
+            self.flush()
+
+    def _build_stencils(self,mbc=0):
+        r"""
+        Build the index arrays and weights of shape (ngauges, stencil size)
+        of the stencils of all gauges, in arrays with *mbc* ghost cells.
+        """
+        size = max([len(weights) for (cells,weights) in self.stencils])
+        ndim = len(self.indices[0])
+        cells = np.empty((ndim,len(self.names),size),dtype=int)
+        self._weights = np.zeros((len(self.names),size))
+        for (i,(gauge_cells,weights)) in enumerate(self.stencils):
+            # Pad with the first cell of the stencil, with weight zero
+            gauge_cells = gauge_cells + [gauge_cells[0]]*(size-len(gauge_cells))
+            cells[:,i,:] = np.array(gauge_cells).T + mbc
+            self._weights[i,:len(weights)] = weights
+        self._index = (slice(None),) + tuple(cells)
+        self._every = np.array(self.every)
+        self._mbc = mbc
+
+    def _interpolate(self,array):
+        r"""
+        Return the values of *array* at all gauges, of shape
+        (array.shape[0], ngauges).
+        """
+        return np.einsum('mgs,gs->mg',array[self._index],self._weights)
+
+    def flush(self):
+        r"""Write the buffered values to the gauge files."""
+        if self._nbuffered == 0:
+            if self._files is not None and self.format != 'hdf5':
+                for f in self._files:
+                    f.flush()
+            return
+        if self._files is None:
+            self._open()
+
+        n = self._nbuffered
+        times = self._times[:n]
+        values = self._values[:n]
+        # Whether each gauge is recorded at each buffered step
+        recorded = (self._steps[:n,np.newaxis] % self._every[np.newaxis,:]) == 0
+        mp = values.shape[2]
+
+        if self.format == 'ascii':
+            line = ' '.join(['%.12g']*(mp+1)) + '\n'
+            for (i,f) in enumerate(self._files):
+                rows = np.nonzero(recorded[:,i])[0]
+                data = np.column_stack((times[rows],values[rows,i,:]))
+                f.write((line*len(rows)) % tuple(data.ravel()))
+                f.flush()
+        elif self.format == 'binary':
+            f = self._files[0]
+            f.seek(0,os.SEEK_END)
+            if f.tell() == 0:
+                f.write(np.array([len(self.names),mp+2],dtype='<f8').tostring())
+            rows,gauges = np.nonzero(recorded)
+            records = np.empty((len(rows),mp+2))
+            records[:,0] = gauges
+            records[:,1] = times[rows]
+            records[:,2:] = values[rows,gauges,:]
+            f.write(records.astype('<f8').tostring())
+            f.flush()
+        elif self.format == 'hdf5':
+            f = self._files[0]
+            for (i,name) in enumerate(self.names):
+                rows = np.nonzero(recorded[:,i])[0]
+                if name not in f:
+                    f.create_dataset(name,(0,mp+1),maxshape=(None,mp+1),dtype='f8',
+                                     chunks=(min(self.buffer_size,4096),mp+1))
+                dataset = f[name]
+                start = dataset.shape[0]
+                dataset.resize((start+len(rows),mp+1))
+                dataset[start:,0] = times[rows]
+                dataset[start:,1:] = values[rows,i,:]
+            f.flush()
+        else:
+            raise Exception("Unknown gauge format %s" % self.format)
+        self._nbuffered = 0
+
+    # ========== Files =======================================================
+    def _file_names(self):
+        if self.format == 'ascii':
+            return [os.path.join(self.path,name+'.txt') for name in self.names]
+        elif self.format == 'binary':
+            return [os.path.join(self.path,self.file_prefix+'.bin')]
+        elif self.format == 'hdf5':
+            return [os.path.join(self.path,self.file_prefix+'.h5')]
+        raise Exception("Unknown gauge format %s" % self.format)
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        if self.format == 'hdf5':
+            import h5py
+            self._files = [h5py.File(self._file_names()[0],'a')]
+        else:
+            self._files = [open(file_name,'ab') for file_name in self._file_names()]
+
+    def start(self):
+        r"""Empty the gauge files and the buffer, for a new run."""
+        self._nbuffered = 0
+        self._step = 0
+        if len(self.names) == 0:
+            return
+        if self._files is None:
+            self._open()
+        if self.format == 'hdf5':
+            f = self._files[0]
+            for name in self.names:
+                if name in f:
+                    del f[name]
+        else:
+            self.truncate((0,[0]*len(self._files)))
+
+    def tell(self):
+        r"""
+        Write the buffered values and return the position of the recorder:
+        the number of calls to :meth:`record` and the length of each file
+        (the number of rows of each dataset for HDF5).
+        """
+        if len(self.names) == 0:
+            return (self._step,[])
+        self.flush()
+        if self._files is None:
+            self._open()
+        if self.format == 'hdf5':
+            lengths = [self._files[0][name].shape[0] if name in self._files[0] else 0
+                       for name in self.names]
+        else:
+            lengths = []
+            for f in self._files:
+                f.seek(0,os.SEEK_END)
+                lengths.append(f.tell())
+        return (self._step,lengths)
+
+    def truncate(self,position):
+        r"""
+        Return the recorder and its files to *position*, as returned by
+        :meth:`tell`, discarding the buffered values.
+        """
+        step,lengths = position
+        self._nbuffered = 0
+        self._step = step
+        if len(self.names) == 0:
+            return
+        if self._files is None:
+            self._open()
+        if self.format == 'hdf5':
+            f = self._files[0]
+            for (name,length) in zip(self.names,lengths):
+                if name in f:
+                    f[name].resize((length,f[name].shape[1]))
+            f.flush()
+        else:
+            for (f,length) in zip(self._files,lengths):
+                f.truncate(length)
+
+    def close(self):
+        r"""Write the buffered values and close the gauge files."""
+        self.flush()
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+
+    def read(self):
+        r"""
+        Read the recorded values
+
+        :Output:
+         - (dict) - Array by gauge name, with a row per recorded time step
+           holding t and the values
+        """
+        self.flush()
+        series = {}
+        if len(self.names) == 0:
+            return series
+        file_names = self._file_names()
+        if self.format == 'ascii':
+            for (name,file_name) in zip(self.names,file_names):
+                series[name] = np.loadtxt(file_name,ndmin=2)
+        elif self.format == 'binary':
+            data = np.fromfile(file_names[0],dtype='<f8')
+            if len(data) == 0:
+                return dict([(name,np.empty((0,0))) for name in self.names])
+            records = data[2:].reshape(-1,int(data[1]))
+            for (i,name) in enumerate(self.names):
+                series[name] = records[records[:,0]==i,1:]
+        elif self.format == 'hdf5':
+            if self._files is None:
+                self._open()
+            f = self._files[0]
+            for name in self.names:
+                series[name] = f[name][...] if name in f else np.empty((0,0))
+        return series
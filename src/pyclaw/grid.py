@@ -15,6 +15,7 @@ import logging
 import numpy as np
 
 from data import Data
+from gauges import GaugeRecorder
 
 # ============================================================================
 #  Default function definitions
@@ -309,8 +310,9 @@ class Grid(object):
         r"""(func) - Grid mapping function"""
         self.gauges = []
         r"""(list) - List of gauges"""
-        self.gauge_files     = []
-        r"""(list) - List of files to write gauge values to"""
+        self.gauge_recorder = GaugeRecorder()
+        r"""(:class:`~pyclaw.gauges.GaugeRecorder`) - Recorder of the values
+        at the gauges, which also sets the format of the gauge files"""
         self.gauge_path = './_output/_gauges/'
         r"""(string) - Full path to output directory for gauges"""
         # Dimension parsing
@@ -516,32 +518,88 @@ class Grid(object):
     # ========================================================================
     #  Gauges
     # ========================================================================
-    def add_gauges(self,gauge_coords):
+    def add_gauges(self,gauge_coords,every=1,interpolation='linear'):
         r"""
         Determine the grid indices of each gauge and make a list of all gauges
         with their grid indices.  
         
         For PetClaw, first check whether each gauge is in the part of the grid
         corresponding to this processor.
+
+        The gauges are recorded by :attr:`gauge_recorder` in files in
+        :attr:`gauge_path`.  *every* is the interval in time steps at which
+        the gauges are recorded, either one value for all gauges or a list
+        with a value per gauge.
+
+        With *interpolation* = ``'linear'`` the values at a gauge are
+        interpolated (bi- or trilinearly) from the 2**ndim cell centers
+        around it; the stencils and weights are computed here, once.  Beyond
+        the outermost cell centers the values of the nearest cells are used.
+        On a grid distributed over processes, a gauge is recorded by the
+        process whose part of the grid holds it, and near the edge of the
+        part its stencil reaches into the ghost cells, so that the values
+        recorded do not depend on the number of processes.
+        With *interpolation* = ``'nearest'`` the values in the cell holding
+        the gauge are recorded.
         """
-        import os
         from numpy import floor
-        if not os.path.exists(self.gauge_path):
-            try:
-                os.makedirs(self.gauge_path)
-            except OSError:
-                print "gauge directory already exists, ignoring"
-        
-        for gauge in gauge_coords: 
+        if interpolation not in ('linear','nearest'):
+            raise Exception("Unknown gauge interpolation %s" % interpolation)
+        if isinstance(every,int):
+            every = [every]*len(gauge_coords)
+
+        recorder = self.gauge_recorder
+        recorder.path = self.gauge_path
+        if any([self.nstart[n] > 0 or self.nend[n] < self.n[n] for n in xrange(self.ndim)]):
+            # Part of a grid distributed over processes
+            recorder.file_prefix = 'gauges_' + '_'.join([str(n) for n in self.nstart])
+            # Set on every process, since filling the ghost cells is collective
+            recorder.ghosted = recorder.ghosted or interpolation == 'linear'
+        
+        for gauge,gauge_every in zip(gauge_coords,every): 
             # Determine gauge locations in units of grid spacing
-            gauge_ind = [int(floor(gauge[n]/self.d[n])) for n in xrange(self.ndim)]
+            position = [(gauge[n]-self.lower[n])/self.d[n] for n in xrange(self.ndim)]
+            gauge_ind = [int(floor(position[n])) for n in xrange(self.ndim)]
             if all(self.nstart[n]<=gauge_ind[n]<self.nend[n] for n in range(self.ndim)):
+                stencil = None
+                if interpolation == 'linear':
+                    stencil = self._gauge_stencil(position)
                 #Set indices relative to this processor's part of grid
                 gauge_ind = [gauge_ind[n] - self.nstart[n] for n in range(self.ndim)]
-                gauge_path = self.gauge_path+'gauge'+'_'.join(str(coord) for coord in gauge)+'.txt'
-                # Is this a good idea???  It should depend on self.overwrite.
-                if os.path.isfile(gauge_path): os.remove(gauge_path)
+                name = 'gauge'+'_'.join(str(coord) for coord in gauge)
                 self.gauges.append(list(gauge_ind))
-                self.gauge_files.append(open(gauge_path,'a'))
+                recorder.add(gauge_ind,name,gauge_every,stencil)
+
+    def _gauge_stencil(self,position):
+        r"""
+        Return the cells, relative to this processor's part of the grid, and
+        the weights of the multilinear interpolation stencil at *position*,
+        in units of grid spacing from the lower boundary.  The cells may lie
+        one cell outside the part, in its ghost cells.
+        """
+        from numpy import floor
+        lower_cells = []
+        dim_weights = []
+        for n in xrange(self.ndim):
+            # Position relative to the cell centers, limited to the centers
+            s = min(max(position[n]-0.5,0.),self.n[n]-1.)
+            i = min(int(floor(s)),max(self.n[n]-2,0))
+            if self.n[n] == 1:
+                dim_weights.append([1.,0.])
+            else:
+                dim_weights.append([1.-(s-i),s-i])
+            lower_cells.append(i-self.nstart[n])
+
+        cells = []
+        weights = []
+        for corner in xrange(2**self.ndim):
+            offsets = [(corner >> n) & 1 for n in xrange(self.ndim)]
+            weight = 1.
+            for n in xrange(self.ndim):
+                weight *= dim_weights[n][offsets[n]]
+            if weight != 0.:
+                cells.append([lower_cells[n]+offsets[n] for n in xrange(self.ndim)])
+                weights.append(weight)
+        return cells,weights
 
 
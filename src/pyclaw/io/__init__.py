@@ -10,20 +10,24 @@
 
 import logging
 from ascii import read_ascii,write_ascii
-__all__ = ['read_ascii','write_ascii']
+from binary import read_binary,write_binary
+__all__ = ['read_ascii','write_ascii','read_binary','write_binary']
 
-# Check for HDF 5 support
-try:
-    import h5py
-    from hdf5 import read_hdf5,write_hdf5
-    __all__ += ['read_hdf5','write_hdf5']
-except:
-    logging.debug("No hdf5 support found.")
-    
-# Check for netcdf support
+# Check for netcdf support.  netCDF4 is imported before h5py: when both
+# bundle their own HDF5 library, netCDF4 cannot write once h5py's is loaded
 try:
     import netCDF4
     from netcdf import read_netcdf, write_netcdf
     __all__ += ['read_netcdf','write_netcdf']
 except(ImportError):
     logging.debug("No netcdf4 support found.")
+
+# Check for HDF 5 support
+try:
+    import h5py
+    from hdf5 import read_hdf5,write_hdf5
+    from hdf5 import read_hdf5_series,write_hdf5_series,close_hdf5_series
+    __all__ += ['read_hdf5','write_hdf5','read_hdf5_series','write_hdf5_series',
+                'close_hdf5_series']
+except:
+    logging.debug("No hdf5 support found.")
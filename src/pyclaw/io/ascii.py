@@ -99,30 +99,7 @@ def write_ascii(solution,frame,path,file_prefix='fort',write_aux=False,
             else:
                 q = state.q
 
-            dims = grid.dimensions
-            if grid.ndim == 1:
-                for k in xrange(dims[0].n):
-                    for m in xrange(solution.meqn):
-                        q_file.write("%18.8e" % q[m,k])
-                    q_file.write('\n')
-            elif grid.ndim == 2:
-                for j in xrange(dims[1].n):
-                    for k in xrange(dims[0].n):
-                        for m in xrange(solution.meqn):
-                            q_file.write("%18.8e" % q[m,k,j])
-                        q_file.write('\n')
-                    q_file.write('\n')
-            elif grid.ndim == 3:
-                for l in xrange(dims[2].n):
-                    for j in xrange(dims[1].n):
-                        for k in xrange(dims[0].n):
-                            for m in range(solution.meqn):
-                                q_file.write("%18.8e" % q[m,k,j,l])
-                            q_file.write('\n')
-                    q_file.write('\n')
-                q_file.write('\n')
-            else:
-                raise Exception("Dimension Exception in writing fort file.")
+            write_array(q_file,q)
             
             if state.maux > 0 and write_aux:
                 aux = state.aux
@@ -138,27 +115,7 @@ def write_ascii(solution,frame,path,file_prefix='fort',write_aux=False,
                     aux_file.write("%18.8e     d%s\n" % (dim.d,dim.name))
 
                 aux_file.write("\n")
-                if grid.ndim == 1:
-                    for k in xrange(grid.dimensions[0]):
-                        for m in xrange(state.maux):
-                            aux_file.write("%18.8e" % aux[m,k])
-                        aux_file.write('\n')
-                elif grid.ndim == 2:
-                    for j in xrange(grid.dimensions[1].n):
-                        for k in xrange(grid.dimension[0].n):
-                            for m in xrange(state.maux):
-                                aux_file.write("%18.8e" % aux[m,k,j])
-                            aux_file.write('\n')    
-                        aux_file.write('\n')
-                elif grid.ndim == 3:
-                    for l in xrange(grid.dimensions[2].n):
-                        for j in xrange(grid.dimensions[1].n):
-                            for k in xrange(grid.dimensions[0].n):
-                                for m in xrange(grid.maux):
-                                    aux_file.write("%18.8e" % aux[m,k,j,l])
-                                aux_file.write('\n')
-                            aux_file.write('\n')    
-                        aux_file.write('\n')
+                write_array(aux_file,aux)
     
         q_file.close()
         if state.maux > 0 and write_aux:
@@ -194,8 +151,6 @@ def read_ascii(solution,frame,path='./',file_prefix='fort',read_aux=False,
     
     """
     
-    import numpy as np
-
     # Option parsing
     option_defaults = {}
     
@@ -220,25 +175,16 @@ def read_ascii(solution,frame,path='./',file_prefix='fort',read_aux=False,
     # Read in values from fort.q file:
     try:
         f = open(q_fname,'r')
+        tokens = f.read().split()
+        f.close()
+        pos = 0
     
         # Loop through every grid setting the appropriate information
         # for ng in range(len(solution.grids)):
         for m in xrange(nstates):
         
             # Read in base header for this grid
-            gridno = read_data_line(f,type='int')
-            level = read_data_line(f,type='int')
-            n = np.zeros((ndim))
-            lower = np.zeros((ndim))
-            d = np.zeros((ndim))
-            for i in xrange(ndim):
-                n[i] = read_data_line(f,type='int')
-            for i in xrange(ndim):
-                lower[i] = read_data_line(f)
-            for i in xrange(ndim):
-                d[i] = read_data_line(f)
-        
-            blank = f.readline()
+            gridno,level,n,lower,d,pos = read_header(tokens,pos,ndim)
         
             # Construct the grid
             # Since we do not have names here, we will construct the grid with
@@ -262,41 +208,11 @@ def read_ascii(solution,frame,path='./',file_prefix='fort',read_aux=False,
                 state.aux[:]=0.
             
             # Fill in q values
-            if grid.ndim == 1:
-                for i in xrange(grid.dimensions[0].n):
-                    l = []
-                    while len(l)<state.meqn:
-                        line = f.readline()
-                        l = l + line.split()
-                    for m in xrange(state.meqn):
-                        state.q[m,i] = float(l[m])
-            elif grid.ndim == 2:
-                for j in xrange(grid.dimensions[1].n):
-                    for i in xrange(grid.dimensions[0].n):
-                        l = []
-                        while len(l)<state.meqn:
-                            line = f.readline()
-                            l = l + line.split()
-                        for m in xrange(state.meqn):
-                            state.q[m,i,j] = float(l[m])
-                    blank = f.readline()
-            elif grid.ndim == 3:
-                raise NotImplementedError("3d still does not work!")
-                for k in xrange(grid.dimensions[2].n):
-                    for j in xrange(grid.dimensions[1].n):
-                        for i in xrange(grid.dimensions[0].n):
-                            l=[]
-                            while len(l) < state.meqn:
-                                line = f.readline()
-                                l = l + line.split()
-                            for m in xrange(state.meqn):
-                                state.q[m,i,j,k] = float(l[m])
-                        blank = f.readline()
-                    blank = f.readline()
-            else:
+            if grid.ndim > 3:
                 msg = "Read only supported up to 3d."
                 logger.critical(msg)
                 raise Exception(msg)
+            state.q,pos = read_array(tokens,pos,[meqn]+n)
         
             # Add AMR attributes:
             grid.gridno = gridno
@@ -327,69 +243,126 @@ def read_ascii(solution,frame,path='./',file_prefix='fort',read_aux=False,
         # Found a valid path, try to open and read it
         try:
             f = open(fname,'r')
+            tokens = f.read().split()
+            f.close()
+            pos = 0
             
             # Read in aux file
-            for n in xrange(len(solution.states)):
+            for k in xrange(len(solution.states)):
                 # Fetch correct grid
-                gridno = read_data_line(f,type='int')
-                grid = solution.states[gridno-1].grid
+                gridno,level,n,lower,d,pos = read_header(tokens,pos,ndim)
+                state = solution.states[gridno-1]
+                grid = state.grid
         
-                # These should match this grid already, raise exception otherwise
-                if not (grid.level == read_data_line(f,type='int')):
+                # These should match this grid already (up to the precision
+                # they are written with), raise exception otherwise
+                if not (grid.level == level):
                     raise IOError("Grid level in aux file header did not match grid no %s." % grid.gridno)
-                for dim in grid.dimensions:
-                    if not (dim.n == read_data_line(f,type='int')):
+                for i,dim in enumerate(grid.dimensions):
+                    if not (dim.n == n[i]):
                         raise IOError("Dimension %s's n in aux file header did not match grid no %s." % (dim.name,grid.gridno))
-                for dim in grid.dimensions:
-                    if not (dim.lower == read_data_line(f,type='float')):
+                    if not (float("%18.8e" % dim.lower) == lower[i]):
                         raise IOError("Dimension %s's lower in aux file header did not match grid no %s." % (dim.name,grid.gridno))
-                for dim in grid.dimensions:
-                    if not (dim.d == read_data_line(f,type='float')):
+                    if not (float("%18.8e" % dim.d) == d[i]):
                         raise IOError("Dimension %s's d in aux file header did not match grid no %s." % (dim.name,grid.gridno))
-
-                f.readline()
         
                 # Read in auxillary array
-                if grid.ndim == 1:
-                    for i in xrange(grid.dimensions[0].n):
-                        l = []
-                        while len(l)<state.maux:
-                            line = f.readline()
-                            l = l + line.split()
-                        for m in xrange(state.maux):
-                            state.aux[i,m] = float(l[m])
-                elif grid.ndim == 2:
-                    for j in xrange(grid.dimensions[1].n):
-                        for i in xrange(grid.dimensions[0].n):
-                            l = []
-                            while len(l)<state.maux:
-                                line = f.readline()
-                                l = l + line.split()
-                            for m in xrange(state.maux):
-                                state.aux[i,j,m] = float(l[m])
-                        blank = f.readline()
-                elif grid.ndim == 3:
-                    for k in xrange(grid.dimensions[2].n):
-                        for j in xrange(grid.dimensions[1].n):
-                            for i in xrange(grid.dimensions[0].n):
-                                l = []
-                                while len(l)<state.maux:
-                                    line = f.readline()
-                                    l = l + line.split()
-                                for m in xrange(state.maux):
-                                    state.aux[i,j,k,m] = float(l[m])
-                            blank = f.readline()
-                        blank = f.readline()
-                else:
+                if grid.ndim > 3:
                     logger.critical("Read aux only up to 3d is supported.")
                     raise Exception("Read aux only up to 3d is supported.")
+                state.aux,pos = read_array(tokens,pos,[state.maux]+n)
         except(IOError):
             raise
         except:
-            logger.error("File %s was not able to be read." % q_fname)
+            logger.error("File %s was not able to be read." % fname)
             raise
             
             
+def write_array(f,array):
+    r"""
+    Write out the values of a q or aux array in the fort.q layout
+
+    Every grid cell is written on a line of its own, with the first index of
+    the array varying fastest along the line.  The cells are ordered with x
+    varying fastest; a blank line follows every row of cells in 2D and every
+    plane of cells in 3D, and the 3D layout ends with another blank line.
+
+    :Input:
+     - *f* - (file) Open file to write to
+     - *array* - (ndarray(m,...)) Array of dimension 2, 3 or 4
+    """
+    import numpy as np
+
+    m = array.shape[0]
+    n = array.shape[1:]
+    values = np.reshape(array,(m,-1),order='F')
+    line = "%18.8e" * m + "\n"
+
+    if len(n) == 1:
+        # Write in blocks of bounded size
+        block,separator = 4096,""
+    elif len(n) == 2:
+        block,separator = n[0],"\n"
+    elif len(n) == 3:
+        block,separator = n[0]*n[1],"\n"
+    else:
+        raise Exception("Dimension Exception in writing fort file.")
+
+    for start in xrange(0,values.shape[1],block):
+        cells = values[:,start:start+block]
+        f.write(line * cells.shape[1] % tuple(cells.ravel(order='F').tolist())
+                    + separator)
+    if len(n) == 3:
+        f.write("\n")
+
+
+def read_header(tokens,pos,ndim):
+    r"""
+    Read the header of a grid in a fort.q or fort.a file
+
+    :Input:
+     - *tokens* - (list) Whitespace separated entries of the file
+     - *pos* - (int) Position of the header in *tokens*
+     - *ndim* - (int) Number of dimensions
+
+    :Output:
+     - (list) gridno, level, n, lower and d of the grid (the last three as
+       lists with one entry per dimension) and the position in *tokens*
+       following the header
+    """
+    # Every header line holds a value followed by its name
+    nlines = 2 + 3*ndim
+    values = tokens[pos:pos+2*nlines:2]
+    gridno = int(values[0])
+    level = int(values[1])
+    n = [int(value) for value in values[2:2+ndim]]
+    lower = [float(value) for value in values[2+ndim:2+2*ndim]]
+    d = [float(value) for value in values[2+2*ndim:2+3*ndim]]
+    return gridno,level,n,lower,d,pos+2*nlines
+
+
+def read_array(tokens,pos,shape):
+    r"""
+    Read the values of a q or aux array written by :func:`write_array`
+
+    :Input:
+     - *tokens* - (list) Whitespace separated entries of the file
+     - *pos* - (int) Position of the first value in *tokens*
+     - *shape* - (list) Shape of the array
+
+    :Output:
+     - (ndarray) Array of the given shape, in Fortran order, and the position
+       in *tokens* following its values
+    """
+    import numpy as np
+
+    count = int(np.prod(shape))
+    if pos + count > len(tokens):
+        raise IOError("File ends before all %s values of the array were read." % count)
+    values = np.array(tokens[pos:pos+count],dtype=float)
+    return values.reshape(shape,order='F'),pos+count
+
+
 def read_ascii_t(frame,path='./',file_prefix='fort'):
     r"""Read only the fort.t file and return the data
     
@@ -425,8 +398,8 @@ def read_ascii_t(frame,path='./',file_prefix='fort'):
     except(IOError):
         raise
     except:
-        logger.error("File " + t_fname + " should contain t, meqn, nstates, maux, ndim")
-        print "File " + t_fname + " should contain t, meqn, nstates, maux, ndim"
+        logger.error("File " + path + " should contain t, meqn, nstates, maux, ndim")
+        print "File " + path + " should contain t, meqn, nstates, maux, ndim"
         raise
         
     return t,meqn,nstates,maux,ndim
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Routines for reading and writing a native binary output file
+
+Each frame is written to a single file, ``claw.b0000`` for frame 0 with the
+default prefix, that consists of
+
+ - the 8 byte identifier ``PYCLAWB1``
+ - the length of the header and the offset of the data from the start of the
+   file, as two little-endian unsigned 64 bit integers
+ - the header, a JSON object with the time, meqn, maux, ndim and, for every
+   state, its grid number, AMR level and dimensions and the offsets of its
+   q and aux blocks relative to the start of the data
+ - the data, the q (and optionally aux) array of every state stored as raw
+   little-endian float64 values in Fortran order, each block aligned to 64
+   bytes
+
+Since the arrays are stored exactly as they are laid out in memory, they are
+written without formatting and read as memory maps, so that only the parts
+of an array that are actually accessed are read from disk.
+"""
+
+import os
+import sys
+import struct
+import logging
+
+import numpy as np
+
+import pyclaw.solution
+
+logger = logging.getLogger('io')
+
+magic = 'PYCLAWB1'
+r"""(string) - Identifier at the start of every binary file"""
+alignment = 64
+r"""(int) - Alignment in bytes of the header and data blocks"""
+
+def _file_name(path,file_prefix,frame):
+    return os.path.join(path,'%s.b%s' % (file_prefix,str(frame).zfill(4)))
+
+def _align(offset):
+    return -(-offset // alignment) * alignment
+
+def _read_block(file_name,offset,shape,mmap):
+    if mmap:
+        return np.memmap(file_name,dtype='<f8',mode='c',offset=offset,
+                         shape=tuple(shape),order='F')
+    f = open(file_name,'rb')
+    f.seek(offset)
+    array = np.fromfile(f,dtype='<f8',count=np.prod(shape))
+    f.close()
+    return array.reshape(shape,order='F')
+
+def write_binary(solution,frame,path,file_prefix='claw',write_aux=False,
+                    options={},write_p=False):
+    r"""
+    Write out a binary data file
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) Pyclaw object to be
+       output.
+     - *frame* - (int) Frame number
+     - *path* - (string) Root path
+     - *file_prefix* - (string) Prefix for the file name.  ``default = 'claw'``
+     - *write_aux* - (bool) Boolean controlling whether the associated
+       auxiliary array should be written out.  ``default = False``
+     - *options* - (dict) Optional argument dictionary which in the case for
+       ``binary`` output contains nothing.
+     - *write_p* - (bool) Write the derived quantities p instead of q.
+       ``default = False``
+    """
+
+    # Option parsing
+    option_defaults = {}
+    for (k,v) in option_defaults.iteritems():
+        if options.has_key(k):
+            exec("%s = options['%s']" % (k,k))
+        else:
+            exec('%s = v' % k)
+
+    import json
+
+    # Lay out the blocks of every state
+    blocks = []
+    states = []
+    offset = 0
+    for state in solution.states:
+        grid = state.grid
+        if write_p:
+            q = state.p
+        else:
+            q = state.q
+        header = {'gridno':grid.gridno,'level':grid.level,'t':state.t,
+                  'meqn':q.shape[0],'maux':state.maux,
+                  'dimensions':[{'name':dim.name,'lower':dim.lower,
+                                 'upper':dim.upper,'n':dim.n}
+                                for dim in grid.dimensions],
+                  'q':offset,'aux':None}
+        blocks.append((offset,q))
+        offset = _align(offset + q.size*8)
+        if write_aux and state.maux > 0:
+            header['aux'] = offset
+            blocks.append((offset,state.aux))
+            offset = _align(offset + state.aux.size*8)
+        states.append(header)
+
+    header = json.dumps({'t':solution.t,'meqn':states[0]['meqn'],
+                         'maux':solution.maux,'ndim':solution.ndim,
+                         'states':states})
+    data_offset = _align(len(magic) + 16 + len(header))
+
+    file_name = _file_name(path,file_prefix,frame)
+    try:
+        f = open(file_name,'wb')
+        f.write(magic)
+        f.write(struct.pack('<QQ',len(header),data_offset))
+        f.write(header)
+        for (block_offset,array) in blocks:
+            f.seek(data_offset + block_offset)
+            f.write(np.asarray(array,dtype='<f8').tostring(order='F'))
+        f.close()
+    except IOError, (errno, strerror):
+        logger.error("Error writing file: %s" % file_name)
+        logger.error("I/O error(%s): %s" % (errno, strerror))
+        raise
+    except:
+        logger.error("Unexpected error:", sys.exc_info()[0])
+        raise
+
+
+def read_binary_header(frame,path='./',file_prefix='claw'):
+    r"""Read only the header of a binary file
+
+    :Input:
+     - *frame* - (int) Frame number to be read in
+     - *path* - (string) Path to the current directory of the file
+     - *file_prefix* - (string) Prefix of the files to be read in.
+       ``default = 'claw'``
+
+    :Output:
+     - (dict) Header of the file, see :mod:`pyclaw.io.binary`; the offsets of
+       the q and aux blocks are converted to offsets from the start of the
+       file
+    """
+    import json
+
+    file_name = _file_name(path,file_prefix,frame)
+    f = open(file_name,'rb')
+    try:
+        if f.read(len(magic)) != magic:
+            raise IOError("File %s is not a pyclaw binary file." % file_name)
+        header_length,data_offset = struct.unpack('<QQ',f.read(16))
+        header = json.loads(f.read(header_length))
+    finally:
+        f.close()
+
+    for state in header['states']:
+        state['q'] += data_offset
+        if state['aux'] is not None:
+            state['aux'] += data_offset
+    return header
+
+
+def read_binary(solution,frame,path='./',file_prefix='claw',read_aux=False,
+                options={}):
+    r"""
+    Read in a binary file
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) Solution object to
+       read the data into.
+     - *frame* - (int) Frame number to be read in
+     - *path* - (string) Path to the current directory of the file
+     - *file_prefix* - (string) Prefix of the files to be read in.
+       ``default = 'claw'``
+     - *read_aux* (bool) Whether or not the auxillary arrays should be read
+       in, if they were written.  ``default = False``
+     - *options* - (dict) Dictionary of options particular to this format.
+       If ``mmap`` is True (the default), q and aux are copy-on-write memory
+       maps of the file, otherwise they are read into memory.
+    """
+
+    # Option parsing
+    option_defaults = {'mmap':True}
+    for (k,v) in option_defaults.iteritems():
+        if options.has_key(k):
+            exec("%s = options['%s']" % (k,k))
+        else:
+            exec('%s = v' % k)
+
+    if frame < 0:
+        # Don't construct file names with negative frameno values.
+        raise IOError("Frame " + str(frame) + " does not exist ***")
+
+    file_name = _file_name(path,file_prefix,frame)
+    header = read_binary_header(frame,path,file_prefix)
+
+    for state_header in header['states']:
+        dimensions = [pyclaw.grid.Dimension(str(dim['name']),dim['lower'],
+                                            dim['upper'],dim['n'])
+                      for dim in state_header['dimensions']]
+        grid = pyclaw.grid.Grid(dimensions)
+        grid.gridno = state_header['gridno']
+        grid.level = state_header['level']
+        state = pyclaw.state.State(grid,state_header['meqn'],state_header['maux'])
+        state.t = state_header['t']
+
+        n = [dim['n'] for dim in state_header['dimensions']]
+        state.q = _read_block(file_name,state_header['q'],[state_header['meqn']]+n,mmap)
+        if state.maux > 0:
+            if read_aux and state_header['aux'] is not None:
+                state.aux = _read_block(file_name,state_header['aux'],[state.maux]+n,mmap)
+            else:
+                state.aux[:] = 0.
+
+        solution.states.append(state)
@@ -26,9 +26,13 @@ To install either, you must also install the hdf5 library from the website:
 # ============================================================================
 
 import os
+import time
 import logging
 
+import numpy as np
+
 import pyclaw.solution
+import tuning
 
 logger = logging.getLogger('io')
 
@@ -40,7 +44,7 @@ try:
     use_h5py = True
 except:
     pass
-if use_h5py:
+if not use_h5py:
     try:
         import tables
         use_PyTables = True
@@ -54,7 +58,7 @@ if not use_h5py and not use_PyTables:
     logging.critical("Could not import h5py or PyTables!")
 
 def write_hdf5(solution,frame,path,file_prefix='claw',write_aux=False,
-                options={}):
+                options={},write_p=False):
     r"""
     Write out a Solution to a HDF5 file.
     
@@ -68,6 +72,8 @@ def write_hdf5(solution,frame,path,file_prefix='claw',write_aux=False,
        auxiliary array should be written out.  ``default = False``     
      - *options* - (dict) Optional argument dictionary, see 
        `HDF5 Option Table`_
+     - *write_p* - (bool) Write the derived quantities p instead of q.
+       ``default = False``
     
     .. _`HDF5 Option Table`:
     
@@ -103,6 +109,18 @@ def write_hdf5(solution,frame,path,file_prefix='claw',write_aux=False,
     | fletcher32      | (True/False) Enable Fletcher32 error detection; may  |
     |                 | be used with or without compression.                 |
     +-----------------+------------------------------------------------------+
+    | autotune        | (True/False) Choose the chunks, compression and      |
+    |                 | shuffle options of q automatically, see              |
+    |                 | :mod:`pyclaw.io.tuning`.  ``default = False``        |
+    +-----------------+------------------------------------------------------+
+    | read_pattern    | ('frame' or 'tile') How the files will be read, used |
+    |                 | by autotune to choose the chunk shape.               |
+    |                 | ``default = 'frame'``                                |
+    +-----------------+------------------------------------------------------+
+    | bandwidth       | (float) Write bandwidth of the file system in MB/s,  |
+    |                 | used by autotune to choose the compression.          |
+    |                 | ``default = 200``                                    |
+    +-----------------+------------------------------------------------------+
     """
     
     # Option parsing
@@ -118,48 +136,45 @@ def write_hdf5(solution,frame,path,file_prefix='claw',write_aux=False,
     filename = os.path.join(path,'%s%s.hdf' % 
                                 (file_prefix,str(frame).zfill(4)))
     
+    autotune = tuning.get_options(options)['autotune']
+    
     # Write out using h5py
     if use_h5py:
+        start = time.time()
+        nbytes = 0
         f = h5py.File(filename,'w')
         
-        # For each grid, write out attributes
-        for grid in solution.grids:
+        # For each state, write out attributes
+        for state in solution.states:
             # Create group for this grid
-            subgroup = f.create_group('grid%s' % grid.gridno)
-            
-            # General grid properties
-            for attr in ['t','meqn','mbc','gridno','level']:
-                if hasattr(grid,attr):
-                    if getattr(grid,attr) is not None:
-                        subgroup.attrs[attr] = getattr(grid,attr)
-                    
-            # Add the dimension names as a attribute
-            subgroup.attrs['dimensions'] = grid.get_dim_attribute('name')
-                    
-            # Dimension properties
-            for dim in grid.dimensions:
-                for attr in ['n','lower','d','upper','bc_lower',
-                             'bc_upper','units']:
-                    if hasattr(dim,attr):
-                        if getattr(dim,attr) is not None:
-                            attr_name = '%s.%s' % (dim.name,attr)
-                            subgroup.attrs[attr_name] = getattr(dim,attr)
+            subgroup = f.create_group('grid%s' % state.grid.gridno)
+            write_attributes(subgroup,state)
+            subgroup.attrs['t'] = state.t
             
             # Write out q
-            subgroup.create_dataset('q',data=grid.q,
-                                        compression=compression,
-                                        compression_opts=compression_opts,
-                                        chunks=chunks,shuffle=shuffle,
-                                        fletcher32=fletcher32)
-            if write_aux and grid.maux > 0:
-                subgroup.create_dataset('aux',data=grid.aux,
-                                        compression=compression,
-                                        compression_opts=compression_opts,
-                                        chunks=chunks,shuffle=shuffle,
-                                        fletcher32=fletcher32)
+            if write_p:
+                q = state.p
+            else:
+                q = state.q
+            dataset_options = {'compression':compression,
+                               'compression_opts':compression_opts,
+                               'chunks':chunks,'shuffle':shuffle,
+                               'fletcher32':fletcher32}
+            if autotune:
+                dataset_options.update(tuning.tune(os.path.abspath(path),
+                                                   'hdf5',q,options))
+            subgroup.create_dataset('q',data=q,**dataset_options)
+            nbytes += q.nbytes
+            if write_aux and state.maux > 0:
+                if autotune:
+                    dataset_options['chunks'] = True
+                subgroup.create_dataset('aux',data=state.aux,**dataset_options)
+                nbytes += state.aux.nbytes
     
         # Flush and close the file
         f.close()
+        tuning.record(os.path.abspath(path),nbytes,os.path.getsize(filename),
+                      time.time()-start)
         
     # Write out using PyTables
     elif use_PyTables:
@@ -203,41 +218,18 @@ def read_hdf5(solution,frame,path='./',file_prefix='claw',read_aux=True,
     if use_h5py:
         f = h5py.File(filename,'r')
         
-        for subgroup in f.iterobjects():
-
-            # Construct each dimension
-            dimensions = []
-            dim_names = subgroup.attrs['dimensions']
-            for dim_name in dim_names:
-                # Create dimension
-                dim = pyclaw.solution.Dimension(dim_name,
-                                    subgroup.attrs["%s.lower" % dim_name],
-                                    subgroup.attrs["%s.upper" % dim_name],
-                                    subgroup.attrs["%s.n" % dim_name])                    
-                # Optional attributes
-                for attr in ['bc_lower','bc_upper','units']:
-                    attr_name = "%s.%s" % (dim_name,attr)
-                    if subgroup.attrs.get(attr_name, None):
-                        setattr(dim,attr,subgroup.attrs["%s.%s" % (dim_name,attr)])
-                dimensions.append(dim)
-            
-            # Create grid
-            grid = pyclaw.solution.Grid(dimensions)
-                
-            # Fetch general grid properties
-            for attr in ['t','meqn','gridno','level']:
-                setattr(grid,attr,subgroup.attrs[attr])
+        for subgroup in f.itervalues():
+            state = read_attributes(subgroup)
+            state.t = subgroup.attrs['t']
             
             # Read in q
-            index_str = ','.join( [':' for i in xrange(len(subgroup['q'].shape))] )
-            exec("grid.q = subgroup['q'][%s]" % index_str)
+            state.q = subgroup['q'][...]
             
             # Read in aux if applicable
             if read_aux and subgroup.get('aux',None) is not None:
-                index_str = ','.join( [':' for i in xrange(len(subgroup['aux'].shape))] )
-                exec("grid.aux = subgroup['aux'][%s]" % index_str)
+                state.aux = subgroup['aux'][...]
                 
-            solution.grids.append(grid)
+            solution.states.append(state)
             
         # Flush and close the file
         f.close()
@@ -251,3 +243,333 @@ def read_hdf5(solution,frame,path='./',file_prefix='claw',read_aux=True,
         logging.critical(err_msg)
         raise Exception(err_msg)
         
+
+
+def write_attributes(group,state,meqn=None):
+    r"""
+    Write the attributes of a state and its grid to a HDF5 group
+
+    :Input:
+     - *group* - (h5py.Group) Group to write the attributes to
+     - *state* - (:class:`~pyclaw.state.State`) State to describe
+     - *meqn* - (int) Number of equations of the array stored with the
+       state, if it is not state.meqn (e.g. for p)
+    """
+    grid = state.grid
+    if meqn is None:
+        meqn = state.meqn
+    group.attrs['meqn'] = meqn
+    group.attrs['maux'] = state.maux
+
+    # General grid properties
+    for attr in ['mbc','gridno','level']:
+        if hasattr(grid,attr):
+            if getattr(grid,attr) is not None:
+                group.attrs[attr] = getattr(grid,attr)
+            
+    # Add the dimension names as a attribute
+    group.attrs['dimensions'] = grid.get_dim_attribute('name')
+            
+    # Dimension properties
+    for dim in grid.dimensions:
+        for attr in ['n','lower','d','upper','bc_lower',
+                     'bc_upper','units']:
+            if hasattr(dim,attr):
+                if getattr(dim,attr) is not None:
+                    attr_name = '%s.%s' % (dim.name,attr)
+                    group.attrs[attr_name] = getattr(dim,attr)
+
+
+def read_attributes(group):
+    r"""
+    Create a state from the attributes written by :func:`write_attributes`
+
+    :Input:
+     - *group* - (h5py.Group) Group to read the attributes from
+
+    :Output:
+     - (:class:`~pyclaw.state.State`) State on a new grid, without data
+    """
+    return pyclaw.state.State(read_grid(group),int(group.attrs['meqn']),
+                              int(group.attrs.get('maux',0)))
+
+
+def read_grid(group):
+    r"""
+    Create the grid described by the attributes written by
+    :func:`write_attributes`
+
+    :Input:
+     - *group* - (h5py.Group) Group to read the attributes from
+
+    :Output:
+     - (:class:`~pyclaw.grid.Grid`) New grid
+    """
+    # Construct each dimension
+    dimensions = []
+    dim_names = group.attrs['dimensions']
+    for dim_name in dim_names:
+        # Create dimension
+        dim = pyclaw.grid.Dimension(str(dim_name),
+                            group.attrs["%s.lower" % dim_name],
+                            group.attrs["%s.upper" % dim_name],
+                            int(group.attrs["%s.n" % dim_name]))
+        # Optional attributes
+        for attr in ['bc_lower','bc_upper','units']:
+            attr_name = "%s.%s" % (dim_name,attr)
+            if group.attrs.get(attr_name, None):
+                setattr(dim,attr,group.attrs["%s.%s" % (dim_name,attr)])
+        dimensions.append(dim)
+    
+    # Create grid
+    grid = pyclaw.grid.Grid(dimensions)
+        
+    # Fetch general grid properties
+    for attr in ['gridno','level']:
+        if attr in group.attrs:
+            setattr(grid,attr,int(group.attrs[attr]))
+
+    return grid
+
+
+# ============================================================================
+#  Time series of frames in a single file
+# ============================================================================
+class TimeSeries(object):
+    r"""
+    HDF5 file holding all output frames of a run
+
+    Instead of one file per frame, all frames are appended to one file, which
+    is kept open while frames are being written.  The file contains
+
+     - ``t`` and ``frame`` - (nframes) The time and number of every frame
+     - ``grid<gridno>/q`` - (nframes,meqn,nx[,ny[,nz]]) q of the state with
+       this grid number at every frame, chunked by frame
+     - ``grid<gridno>/aux`` - (maux,nx[,ny[,nz]]) aux of the state, as last
+       written
+     
+    and the attributes of every state and grid as written by
+    :func:`write_hdf5`.  Appending a frame whose number is not larger than
+    those already in the file replaces that frame and all following ones, so
+    a run that is repeated or restarted overwrites its earlier output.
+
+    Since the datasets are read lazily, any frame, field or spatial window can
+    be read without loading the rest, e.g.::
+
+        >>> series = TimeSeries('_output/claw.h5','r')
+        >>> pressure = series.q()[series.index(10),0,100:200,:]
+
+    :Input:
+     - *filename* - (string) Path of the file
+     - *mode* - (string) Mode to open the file with, as for h5py.File,
+       ``default = 'a'``
+     - *options* - (dict) Options used to create the q datasets, see the
+       `HDF5 Option Table`_; chunks default to one frame, and the chunk shape
+       chosen by autotune is used for each frame
+    """
+
+    def __init__(self,filename,mode='a',options={}):
+        self.filename = filename
+        r"""(string) - Path of the file"""
+        self.options = options
+        r"""(dict) - Options used to create the q datasets"""
+        self.file = h5py.File(filename,mode)
+        r"""(h5py.File) - Open HDF5 file"""
+
+    def __len__(self):
+        if 'frame' in self.file:
+            return self.file['frame'].shape[0]
+        return 0
+
+    def frames(self):
+        r"""Return the array of the frame numbers in the file."""
+        if 'frame' in self.file:
+            return self.file['frame'][...]
+        return np.zeros(0,dtype=int)
+
+    def times(self):
+        r"""Return the array of the times of the frames in the file."""
+        if 't' in self.file:
+            return self.file['t'][...]
+        return np.zeros(0)
+
+    def index(self,frame):
+        r"""Return the position of frame number *frame* in the datasets."""
+        position = np.nonzero(self.frames() == frame)[0]
+        if len(position) == 0:
+            raise IOError("Frame %s is not in %s" % (frame,self.filename))
+        return position[0]
+
+    def q(self,gridno=1):
+        r"""Return the (lazy) q dataset of grid number *gridno*."""
+        return self.file['grid%s/q' % gridno]
+
+    def aux(self,gridno=1):
+        r"""Return the (lazy) aux dataset of grid number *gridno*."""
+        return self.file['grid%s/aux' % gridno]
+
+    def append(self,solution,frame,write_aux=False,write_p=False):
+        r"""
+        Append *solution* as frame number *frame*
+
+        :Input:
+         - *solution* - (:class:`~pyclaw.solution.Solution`) Solution to write
+         - *frame* - (int) Frame number
+         - *write_aux* - (bool) Write aux as well, replacing the aux written
+           before.  ``default = False``
+         - *write_p* - (bool) Write the derived quantities p instead of q.
+           ``default = False``
+        """
+        f = self.file
+        start = time.time()
+        nbytes,stored = 0,0
+        datasets = []
+        if 'frame' not in f:
+            for (name,dtype) in (('t',float),('frame',int)):
+                f.create_dataset(name,shape=(0,),maxshape=(None,),dtype=dtype,
+                                 chunks=(1024,))
+        # Replace this frame and the ones after it, if they were written
+        n = len(self)
+        later = np.nonzero(self.frames() >= frame)[0]
+        if len(later) > 0:
+            n = later[0]
+
+        for state in solution.states:
+            if write_p:
+                q = state.p
+            else:
+                q = state.q
+            group = f.require_group('grid%s' % state.grid.gridno)
+            if 'q' not in group:
+                write_attributes(group,state,q.shape[0])
+                dataset_options = {'chunks':self.options.get('chunks',None),
+                    'compression':self.options.get('compression',None),
+                    'compression_opts':self.options.get('compression_opts',None),
+                    'shuffle':self.options.get('shuffle',False),
+                    'fletcher32':self.options.get('fletcher32',False)}
+                if tuning.get_options(self.options)['autotune']:
+                    dataset_options.update(tuning.tune(
+                        os.path.dirname(self.filename),'hdf5',q,self.options))
+                if dataset_options['chunks'] in (None,True):
+                    dataset_options['chunks'] = q.shape
+                dataset_options['chunks'] = (1,) + tuple(dataset_options['chunks'])
+                group.create_dataset('q',shape=(0,)+q.shape,
+                                     maxshape=(None,)+q.shape,dtype=q.dtype,
+                                     **dataset_options)
+            group['q'].resize(n+1,axis=0)
+            group['q'][n] = q
+            datasets.append(group['q'])
+            nbytes += q.nbytes
+            if write_aux and state.maux > 0:
+                if 'aux' in group:
+                    group['aux'][...] = state.aux
+                else:
+                    group.create_dataset('aux',data=state.aux)
+
+        for (name,value) in (('t',solution.t),('frame',frame)):
+            f[name].resize((n+1,))
+            f[name][n] = value
+        f.flush()
+        # Count the average stored size of a frame, since chunks of frames
+        # that are replaced are reused
+        for dataset in datasets:
+            stored += dataset.id.get_storage_size() / float(dataset.shape[0])
+        tuning.record(os.path.dirname(self.filename),nbytes,stored,
+                      time.time()-start)
+
+    def read(self,solution,frame,read_aux=True):
+        r"""
+        Read frame number *frame* into *solution*
+
+        :Input:
+         - *solution* - (:class:`~pyclaw.solution.Solution`) Solution to add
+           the states of the frame to
+         - *frame* - (int) Frame number
+         - *read_aux* - (bool) Read aux as well, if it was written.
+           ``default = True``
+        """
+        n = self.index(frame)
+        t = self.file['t'][n]
+        for name in sorted(self.file.keys()):
+            if not name.startswith('grid'):
+                continue
+            group = self.file[name]
+            state = read_attributes(group)
+            state.t = t
+            state.q = group['q'][n]
+            if read_aux and 'aux' in group:
+                state.aux = group['aux'][...]
+            solution.states.append(state)
+
+    def close(self):
+        r"""Close the file."""
+        self.file.close()
+
+
+# Time series files kept open by write_hdf5_series, by path
+open_series = {}
+
+def write_hdf5_series(solution,frame,path,file_prefix='claw',write_aux=False,
+                      options={},write_p=False):
+    r"""
+    Append a Solution to the HDF5 time series file of the run.
+
+    The frames are written to the file path/file_prefix.h5, which stays open
+    until :func:`close_hdf5_series` is called.  See :class:`TimeSeries`.
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) Pyclaw solution 
+       object to output
+     - *frame* - (int) Frame number
+     - *path* - (string) Root path
+     - *file_prefix* - (string) Prefix for the file name.  ``default = 'claw'``
+     - *write_aux* - (bool) Boolean controlling whether the associated 
+       auxiliary array should be written out.  ``default = False``     
+     - *options* - (dict) Optional argument dictionary, see 
+       `HDF5 Option Table`_; used when the file is created
+     - *write_p* - (bool) Write the derived quantities p instead of q.
+       ``default = False``
+    """
+    filename = os.path.abspath(os.path.join(path,'%s.h5' % file_prefix))
+    if not open_series.has_key(filename):
+        open_series[filename] = TimeSeries(filename,'a',options)
+    open_series[filename].append(solution,frame,write_aux,write_p)
+
+
+def read_hdf5_series(solution,frame,path='./',file_prefix='claw',read_aux=True,
+                     options={}):
+    r"""
+    Read a frame from an HDF5 time series file into a Solution
+
+    :Input:
+     - *solution* - (:class:`~pyclaw.solution.Solution`) Pyclaw object to be 
+       read into
+     - *frame* - (int) Frame number
+     - *path* - (string) Root path
+     - *file_prefix* - (string) Prefix for the file name.  ``default = 'claw'``
+     - *read_aux* - (bool) Read aux as well, if it was written.
+       ``default = True``
+     - *options* - (dict) Optional argument dictionary, unused for reading.
+    """
+    filename = os.path.abspath(os.path.join(path,'%s.h5' % file_prefix))
+    if open_series.has_key(filename):
+        open_series[filename].read(solution,frame,read_aux)
+    else:
+        series = TimeSeries(filename,'r')
+        try:
+            series.read(solution,frame,read_aux)
+        finally:
+            series.close()
+
+
+def close_hdf5_series(path=None):
+    r"""
+    Close the time series files opened by :func:`write_hdf5_series`
+
+    :Input:
+     - *path* - (string) Close only the files in this directory, or all files
+       if None.  ``default = None``
+    """
+    for filename in open_series.keys():
+        if path is None or os.path.dirname(filename) == os.path.abspath(path):
+            open_series.pop(filename).close()
@@ -29,9 +29,11 @@ To install the netCDF 4 library, please see:
 # ============================================================================
 
 import os,sys
+import time
 import logging
 
 import pyclaw.solution
+import tuning
 
 logger = logging.getLogger('io')
 
@@ -55,7 +57,7 @@ if not use_netcdf4:
         print error_msg
 
 def write_netcdf(solution,frame,path,file_prefix='claw',write_aux=False,
-                    options={}):
+                    options={},write_p=False):
     r"""
     Write out a NetCDF data file representation of solution
     
@@ -69,6 +71,8 @@ def write_netcdf(solution,frame,path,file_prefix='claw',write_aux=False,
        auxiliary array should be written out. ``default = False``     
      - *options* - (dict) Optional argument dictionary, see 
        `NetCDF Option Table`_
+     - *write_p* - (bool) Write the derived quantities p instead of q.
+       ``default = False``
     
     .. _`NetCDF Option Table`:
     
@@ -150,6 +154,19 @@ def write_netcdf(solution,frame,path,file_prefix='claw',write_aux=False,
     |                         | set to False, then the variable is not       |
     |                         | pre-filled.                                  |
     +-------------------------+----------------------------------------------+
+    | autotune                | if True, the chunksizes, zlib, complevel and |
+    |                         | shuffle options of q are chosen              |
+    |                         | automatically, see :mod:`pyclaw.io.tuning`.  |
+    |                         | ``default = False``                          |
+    +-------------------------+----------------------------------------------+
+    | read_pattern            | 'frame' or 'tile', how the files will be     |
+    |                         | read, used by autotune to choose chunksizes. |
+    |                         | ``default = 'frame'``                        |
+    +-------------------------+----------------------------------------------+
+    | bandwidth               | Write bandwidth of the file system in MB/s,  |
+    |                         | used by autotune to choose the compression.  |
+    |                         | ``default = 200``                            |
+    +-------------------------+----------------------------------------------+
     
     .. note:: 
         The zlib, complevel, shuffle, fletcher32, contiguous, chunksizes and
@@ -173,7 +190,12 @@ def write_netcdf(solution,frame,path,file_prefix='claw',write_aux=False,
     # Filename
     filename = os.path.join(path,"%s%s.nc" % (file_prefix,str(frame).zfill(4)))
         
+    autotune = tuning.get_options(options)['autotune']
+        
     if use_netcdf4:
+        start = time.time()
+        nbytes = 0
+
         # Open new file
         f = netCDF4.Dataset(filename,'w',clobber=clobber,format=format)
         
@@ -182,14 +204,23 @@ def write_netcdf(solution,frame,path,file_prefix='claw',write_aux=False,
         for (k,v) in description.iteritems():
             exec('f.%s = %s' % (k,v))
         
-        # For each grid, write out attributes
-        for grid in solution.grids:
+        # For each state, write out attributes
+        for state in solution.states:
+            grid = state.grid
+            if write_p:
+                q_data = state.p
+            else:
+                q_data = state.q
+
             # Create group for this grid
             subgroup = f.createGroup('grid%s' % grid.gridno)
         
             # General grid properties
-            for attr in ['t','meqn','gridno','level','mbc']:
-                setattr(subgroup,attr,getattr(grid,attr))
+            subgroup.t = state.t
+            subgroup.meqn = q_data.shape[0]
+            for attr in ['gridno','level','mbc']:
+                if getattr(grid,attr,None) is not None:
+                    setattr(subgroup,attr,getattr(grid,attr))
             
             # Write out dimension names
             setattr(subgroup,'dim_names',grid.name)
@@ -204,29 +235,38 @@ def write_netcdf(solution,frame,path,file_prefix='claw',write_aux=False,
                         if getattr(dim,attr) is not None:
                             attr_name = '%s.%s' % (dim.name,attr)
                             setattr(subgroup,attr_name,getattr(dim,attr))
-            subgroup.createDimension('meqn',grid.meqn)
+            subgroup.createDimension('meqn',q_data.shape[0])
             
             # Write q array
-            dim_names = grid.name
-            dim_names.append('meqn')
-            index_str = ','.join( [':' for name in dim_names] )
-            q = subgroup.createVariable('q','f8',dim_names,zlib,
-                                            complevel,shuffle,fletcher32,
-                                            contiguous,chunksizes,endian,
-                                            least_significant_digit,fill_value)
-            exec("q[%s] = grid.q" % index_str)
+            dim_names = ['meqn'] + grid.name
+            variable_options = {'zlib':zlib,'complevel':complevel,
+                                'shuffle':shuffle,'chunksizes':chunksizes}
+            if autotune:
+                variable_options.update(tuning.tune(os.path.abspath(path),
+                                                    'netcdf',q_data,options))
+            q = subgroup.createVariable('q','f8',dim_names,
+                                        fletcher32=fletcher32,
+                                        contiguous=contiguous,endian=endian,
+                                        least_significant_digit=least_significant_digit,
+                                        fill_value=fill_value,
+                                        **variable_options)
+            q[...] = q_data
+            nbytes += q_data.nbytes
             
             # Write out aux
-            if grid.maux > 0 and write_aux:
-                dim_names[-1] = 'maux'
-                subgroup.createDimension('maux',grid.maux)
+            if state.maux > 0 and write_aux:
+                dim_names[0] = 'maux'
+                subgroup.createDimension('maux',state.maux)
                 aux = subgroup.createVariable('aux','f8',dim_names,
                                             zlib,complevel,shuffle,fletcher32,
                                             contiguous,chunksizes,endian,
                                             least_significant_digit,fill_value)
-                exec("aux[%s] = grid.aux" % index_str)
+                aux[...] = state.aux
+                nbytes += state.aux.nbytes
         
         f.close()
+        tuning.record(os.path.abspath(path),nbytes,os.path.getsize(filename),
+                      time.time()-start)
     elif use_pupynere:
         logging.critical("Pupynere support has not been implemented yet.")
         raise IOError("Pupynere support has not been implemented yet.")
@@ -270,39 +310,21 @@ def read_netcdf(solution,frame,path='./',file_prefix='claw',read_aux=True,
         # We only expect subgroups of grids, otherwise we need to put some
         # sort of conditional here
         for subgroup in f.groups.itervalues():
-            # Construct each dimension
-            dimensions = []
-            
-            # Read in dimension attribute to keep dimension order
-            dim_names = getattr(subgroup,'dim_names')
-            for dim_name in dim_names:
-                dim = pyclaw.solution.Dimension(dim_name, 
-                                      getattr(subgroup,'%s.lower' % dim_name),
-                                      getattr(subgroup,'%s.upper' % dim_name),
-                                      getattr(subgroup,'%s.n' % dim_name))
-                 # Optional attributes
-                for attr in ['bc_lower','bc_upper','units']:
-                    attr_name = "%s.%s" % (dim_name,attr)
-                    if hasattr(subgroup,attr_name):
-                        setattr(dim,attr,getattr(subgroup, "%s.%s" % (dim_name,attr)))
-                dimensions.append(dim)
-            
-            # Create grid
-            grid = pyclaw.solution.Grid(dimensions)
-            
-            # General grid properties
-            for attr in ['t','meqn','gridno','level']:
-                setattr(grid,attr,getattr(subgroup,attr))
+            grid = read_grid(subgroup)
+            maux = 0
+            if subgroup.dimensions.has_key('maux'):
+                maux = len(subgroup.dimensions['maux'])
+            state = pyclaw.state.State(grid,int(getattr(subgroup,'meqn')),maux)
+            state.t = getattr(subgroup,'t')
                 
             # Read in q
-            index_str = ','.join( [':' for i in xrange(grid.ndim+1)] )
-            exec("grid.q = subgroup.variables['q'][%s]" % index_str)
+            state.q = subgroup.variables['q'][...]
             
             # Read in aux if applicable
-            if read_aux and subgroup.dimensions.has_key('maux'):
-                exec("grid.aux = subgroup.variables['aux'][%s]" % index_str)
+            if read_aux and subgroup.variables.has_key('aux'):
+                state.aux = subgroup.variables['aux'][...]
         
-            solution.grids.append(grid)
+            solution.states.append(state)
             
         f.close()
     elif use_pupynere:
@@ -312,3 +334,42 @@ def read_netcdf(solution,frame,path='./',file_prefix='claw',read_aux=True,
         err_msg = "No netcdf python modules available."
         logging.critical(err_msg)
         raise Exception(err_msg)
+
+
+def read_grid(group):
+    r"""
+    Create the grid described by the attributes of a NetCDF group written by
+    :func:`write_netcdf`
+
+    :Input:
+     - *group* - (netCDF4.Group) Group to read the attributes from
+
+    :Output:
+     - (:class:`~pyclaw.grid.Grid`) New grid
+    """
+    # Construct each dimension
+    dimensions = []
+    
+    # Read in dimension attribute to keep dimension order
+    dim_names = getattr(group,'dim_names')
+    for dim_name in dim_names:
+        dim = pyclaw.solution.Dimension(dim_name, 
+                              getattr(group,'%s.lower' % dim_name),
+                              getattr(group,'%s.upper' % dim_name),
+                              getattr(group,'%s.n' % dim_name))
+         # Optional attributes
+        for attr in ['bc_lower','bc_upper','units']:
+            attr_name = "%s.%s" % (dim_name,attr)
+            if hasattr(group,attr_name):
+                setattr(dim,attr,getattr(group, "%s.%s" % (dim_name,attr)))
+        dimensions.append(dim)
+    
+    # Create grid
+    grid = pyclaw.solution.Grid(dimensions)
+    
+    # General grid properties
+    for attr in ['gridno','level']:
+        if hasattr(group,attr):
+            setattr(grid,attr,getattr(group,attr))
+
+    return grid
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Automatic choice of chunk shapes and compression for HDF5 and NetCDF output
+
+With the ``autotune`` output option, the HDF5 and NetCDF writers choose the
+chunk shape of q from the expected way the files are read, and the
+compression from a probe made with the first frame written in a directory:
+
+ - the chunk shape is one field of a whole frame (read pattern ``'frame'``),
+   split along the first dimension if it exceeds *max_chunk_bytes*, or a
+   spatial tile of about *chunk_bytes* (read pattern ``'tile'``)
+ - the probe compresses the first chunk of q with each available codec (no
+   compression, LZF and gzip at levels 1 and 4 for HDF5, zlib at levels 1
+   and 4 for NetCDF, all with the shuffle filter) and picks the codec with
+   the shortest estimated write time, the compression time plus the time to
+   write the compressed bytes at *bandwidth* MB/s
+
+The writers also record how many bytes they wrote and how long it took, so
+that the achieved throughput and compression ratio can be reported with
+:func:`report`.
+"""
+
+import time
+import zlib
+import logging
+
+import numpy as np
+
+logger = logging.getLogger('io')
+
+option_defaults = {'autotune':False,'read_pattern':'frame','bandwidth':200.,
+                   'chunk_bytes':2**20,'max_chunk_bytes':2**22}
+r"""(dict) - Default values of the tuning options"""
+
+# Tuned options by output directory and kind of file
+tuned = {}
+# Bytes written, bytes stored and seconds spent writing, by output directory
+stats = {}
+
+def get_options(options):
+    r"""Return the tuning options in *options*, with defaults filled in."""
+    values = option_defaults.copy()
+    for key in values.iterkeys():
+        if options.has_key(key):
+            values[key] = options[key]
+    return values
+
+
+def chunk_shape(shape,read_pattern='frame',chunk_bytes=2**20,
+                max_chunk_bytes=2**22,itemsize=8):
+    r"""
+    Return a chunk shape for an array of q or aux values
+
+    :Input:
+     - *shape* - (tuple) Shape (m,n1[,n2[,n3]]) of the array
+     - *read_pattern* - (string) ``'frame'`` for chunks holding one field of
+       a whole frame, ``'tile'`` for square spatial tiles of one field
+     - *chunk_bytes* - (int) Target size of a tile
+     - *max_chunk_bytes* - (int) Maximum size of a frame chunk
+     - *itemsize* - (int) Bytes per value
+
+    :Output:
+     - (tuple) Chunk shape
+    """
+    n = list(shape[1:])
+    if read_pattern == 'frame':
+        chunk = list(n)
+        # Split along the slowest varying dimension on disk
+        while np.prod(chunk)*itemsize > max_chunk_bytes and chunk[0] > 1:
+            chunk[0] = (chunk[0]+1)//2
+    elif read_pattern == 'tile':
+        side = int((chunk_bytes/float(itemsize))**(1./len(n)))
+        chunk = [max(1,min(side,ni)) for ni in n]
+    else:
+        raise Exception("Unknown read pattern %s" % read_pattern)
+    return tuple([1] + chunk)
+
+
+def _shuffle(sample):
+    r"""Return the bytes of *sample* reordered as by the shuffle filter."""
+    return sample.view(np.uint8).reshape(-1,sample.itemsize).T.tostring()
+
+
+def _choose(results,nbytes,bandwidth):
+    r"""
+    Return the name of the codec with the shortest estimated write time
+
+    *results* holds (seconds,stored bytes) for each codec name.
+    """
+    best = None
+    for (name,(seconds,stored)) in results.iteritems():
+        estimate = seconds + stored/(bandwidth*1.e6)
+        if best is None or estimate < best[0]:
+            best = (estimate,name)
+    return best[1]
+
+
+def probe_hdf5(sample,chunks,bandwidth=200.):
+    r"""
+    Choose the HDF5 compression for arrays like *sample*
+
+    :Input:
+     - *sample* - (ndarray) Array to compress
+     - *chunks* - (tuple) Chunk shape to use
+     - *bandwidth* - (float) Write bandwidth of the file system in MB/s
+
+    :Output:
+     - (dict) compression, compression_opts and shuffle options for h5py,
+       and the probe results, (seconds,stored bytes) by codec
+    """
+    import h5py
+
+    codecs = {'none':(None,None),'gzip1':('gzip',1),'gzip4':('gzip',4)}
+    if h5py.h5z.filter_avail(h5py.h5z.FILTER_LZF):
+        codecs['lzf'] = ('lzf',None)
+
+    results = {}
+    for (name,(compression,compression_opts)) in codecs.iteritems():
+        f = h5py.File('pyclaw_probe_%s_%s' % (id(sample),name),'w',
+                      driver='core',backing_store=False)
+        start = time.time()
+        dataset = f.create_dataset('q',data=sample,chunks=chunks,
+                                   compression=compression,
+                                   compression_opts=compression_opts,
+                                   shuffle=compression is not None)
+        f.flush()
+        results[name] = (time.time() - start,dataset.id.get_storage_size())
+        f.close()
+
+    compression,compression_opts = codecs[_choose(results,sample.nbytes,bandwidth)]
+    return {'compression':compression,'compression_opts':compression_opts,
+            'shuffle':compression is not None,'probe':results}
+
+
+def probe_zlib(sample,bandwidth=200.):
+    r"""
+    Choose the NetCDF (zlib) compression for arrays like *sample*
+
+    :Input:
+     - *sample* - (ndarray) Array to compress
+     - *bandwidth* - (float) Write bandwidth of the file system in MB/s
+
+    :Output:
+     - (dict) zlib, complevel and shuffle options for netCDF4, and the probe
+       results, (seconds,stored bytes) by codec
+    """
+    results = {'none':(0.,sample.nbytes)}
+    for complevel in (1,4):
+        start = time.time()
+        stored = len(zlib.compress(_shuffle(sample),complevel))
+        results['zlib%s' % complevel] = (time.time() - start,stored)
+
+    name = _choose(results,sample.nbytes,bandwidth)
+    if name == 'none':
+        return {'zlib':False,'complevel':6,'shuffle':True,'probe':results}
+    return {'zlib':True,'complevel':int(name[4:]),'shuffle':True,'probe':results}
+
+
+def tune(path,kind,q,options):
+    r"""
+    Return the tuned output options for q written to *path*
+
+    The chunk shape is computed for every array; the compression is probed
+    once per directory and kind of file and reused afterwards.
+
+    :Input:
+     - *path* - (string) Output directory
+     - *kind* - (string) ``'hdf5'`` or ``'netcdf'``
+     - *q* - (ndarray) Array about to be written
+     - *options* - (dict) Output options, including the tuning options
+
+    :Output:
+     - (dict) Options for h5py (chunks, compression, compression_opts,
+       shuffle) or netCDF4 (chunksizes, zlib, complevel, shuffle)
+    """
+    tuning = get_options(options)
+    chunks = chunk_shape(q.shape,tuning['read_pattern'],tuning['chunk_bytes'],
+                         tuning['max_chunk_bytes'],q.itemsize)
+    key = (path,kind)
+    if not tuned.has_key(key):
+        sample = np.ascontiguousarray(q[tuple([slice(0,c) for c in chunks])])
+        if kind == 'hdf5':
+            tuned[key] = probe_hdf5(sample,chunks,tuning['bandwidth'])
+        else:
+            tuned[key] = probe_zlib(sample,tuning['bandwidth'])
+        results = ', '.join(['%s %.1f MB/s ratio %.2f'
+                             % (name,sample.nbytes/max(seconds,1.e-9)/1.e6,
+                                sample.nbytes/float(max(stored,1)))
+                             for (name,(seconds,stored))
+                             in sorted(tuned[key]['probe'].iteritems())])
+        logger.info("Output tuning probe for %s: %s" % (path,results))
+
+    values = dict([(k,v) for (k,v) in tuned[key].iteritems() if k != 'probe'])
+    if kind == 'hdf5':
+        values['chunks'] = chunks
+    else:
+        values['chunksizes'] = chunks
+    return values
+
+
+def record(path,nbytes,stored,seconds):
+    r"""
+    Record a write of *nbytes* bytes of data, stored in *stored* bytes and
+    taking *seconds* seconds, to the output directory *path*.
+    """
+    total = stats.setdefault(path,[0,0,0.])
+    total[0] += nbytes
+    total[1] += stored
+    total[2] += seconds
+
+
+def report(path):
+    r"""
+    Return a summary of the writes recorded for *path* and reset them
+
+    :Output:
+     - (string) Message with the achieved throughput and compression ratio,
+       or None if nothing was recorded
+    """
+    if not stats.has_key(path):
+        return None
+    nbytes,stored,seconds = stats.pop(path)
+    tuned.pop((path,'hdf5'),None)
+    tuned.pop((path,'netcdf'),None)
+    return ("Wrote %.1f MB of output to %s at %.1f MB/s, compression ratio %.2f"
+            % (nbytes/1.e6,path,nbytes/max(seconds,1.e-9)/1.e6,
+               nbytes/float(max(stored,1))))
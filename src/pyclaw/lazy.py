@@ -0,0 +1,418 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Lazy access to output frames.
+
+A :class:`LazySolution` opens an output frame without reading its arrays.
+Its states are :class:`FrameView` objects whose q and aux are
+:class:`ArrayProxy` objects: indexing a proxy like a numpy array reads only
+the box of values that contains the requested ones, and the boxes read
+recently are kept in a cache shared by all arrays of the solution, so that
+further requests that fall in a cached box are served from memory::
+
+    >>> solution = LazySolution(10,path='./_output',format='hdf5')
+    >>> pressure = solution.state.q[0,:,:,32]
+    >>> solution.close()
+
+The arrays returned are copies: changing them changes neither the file nor
+the cache.
+
+The formats supported are ``binary``, ``hdf5``, ``hdf5_series``, ``netcdf``,
+``petsc`` (binary PETSc files; these are read without PETSc) and
+``petsc_hdf5``.
+"""
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+class BlockCache(object):
+    r"""
+    Least recently used cache of boxes read from arrays.
+
+    :Input:
+     - *max_bytes* - (int) Maximum number of bytes held
+    """
+
+    def __init__(self,max_bytes=2**26):
+        self.max_bytes = max_bytes
+        r"""(int) - Maximum number of bytes held"""
+        self.nbytes = 0
+        r"""(int) - Number of bytes held"""
+        self.hits = 0
+        r"""(int) - Number of requests served from the cache"""
+        self.misses = 0
+        r"""(int) - Number of requests that were read from disk"""
+        self._blocks = OrderedDict()
+
+    def get(self,key,box):
+        r"""
+        Return (box,data) of a cached box of array *key* containing *box*,
+        or None.
+        """
+        for (cached_key,cached_box) in reversed(self._blocks.keys()):
+            if cached_key == key and _contains(cached_box,box):
+                data = self._blocks.pop((cached_key,cached_box))
+                self._blocks[(cached_key,cached_box)] = data
+                self.hits += 1
+                return cached_box,data
+        self.misses += 1
+        return None
+
+    def add(self,key,box,data):
+        r"""Add the values *data* of *box* of array *key*."""
+        if data.nbytes > self.max_bytes:
+            return
+        self._blocks[(key,box)] = data
+        self.nbytes += data.nbytes
+        while self.nbytes > self.max_bytes:
+            (old_key,old_data) = self._blocks.popitem(last=False)
+            self.nbytes -= old_data.nbytes
+
+    def clear(self):
+        r"""Remove all boxes."""
+        self._blocks.clear()
+        self.nbytes = 0
+
+
+def _contains(outer,inner):
+    return all([o[0] <= i[0] and i[1] <= o[1] for (o,i) in zip(outer,inner)])
+
+
+class ArrayProxy(object):
+    r"""
+    Array whose values are read from a file when it is indexed.
+
+    Indexing supports integers, slices (with any step), Ellipsis and integer
+    arrays.  Only the bounding box of the requested values is read.
+
+    :Input:
+     - *shape* - (tuple) Shape of the array
+     - *read* - (function) Function returning the values of a box, given as
+       a tuple of slices with step 1
+     - *cache* - (:class:`BlockCache`) Cache of boxes read
+    """
+
+    def __init__(self,shape,read,cache=None):
+        self.shape = tuple(shape)
+        r"""(tuple) - Shape of the array"""
+        self.read = read
+        r"""(function) - Function reading a box of the array"""
+        self.cache = cache
+        r"""(:class:`BlockCache`) - Cache of boxes read"""
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __array__(self,dtype=None):
+        values = self[...]
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __getitem__(self,key):
+        key = self._expand(key)
+
+        # Bounding box of the requested values
+        box = []
+        for (index,n) in zip(key,self.shape):
+            if isinstance(index,slice):
+                indices = xrange(*index.indices(n))
+                if len(indices) == 0:
+                    box.append((0,0))
+                else:
+                    box.append((min(indices[0],indices[-1]),
+                                max(indices[0],indices[-1])+1))
+            elif isinstance(index,np.ndarray):
+                if index.size == 0:
+                    box.append((0,0))
+                else:
+                    box.append((int(index.min()),int(index.max())+1))
+            else:
+                box.append((index,index+1))
+        box = tuple(box)
+
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.get(id(self),box)
+        if cached is None:
+            data = np.asarray(self.read(tuple([slice(lo,hi) for (lo,hi) in box])))
+            if self.cache is not None:
+                self.cache.add(id(self),box,data)
+        else:
+            box,data = cached
+
+        # Index the box read with indices relative to it
+        local = []
+        for (index,n,(lo,hi)) in zip(key,self.shape,box):
+            if isinstance(index,slice):
+                indices = xrange(*index.indices(n))
+                if len(indices) == 0:
+                    local.append(slice(0,0))
+                else:
+                    stop = indices[-1] - lo + (1 if index.indices(n)[2] > 0 else -1)
+                    if stop < 0:
+                        stop = None
+                    local.append(slice(indices[0]-lo,stop,index.indices(n)[2]))
+            else:
+                local.append(index - lo)
+        values = data[tuple(local)]
+        if self.cache is not None and np.may_share_memory(values,data):
+            # Changing the values returned must not change the cached box
+            values = values.copy()
+        return values
+
+    def _expand(self,key):
+        r"""Return *key* as a tuple with one normalized index per axis."""
+        if not isinstance(key,tuple):
+            key = (key,)
+        # Compare by identity: == would compare integer arrays elementwise
+        ellipses = [i for (i,index) in enumerate(key) if index is Ellipsis]
+        if ellipses:
+            i = ellipses[0]
+            key = key[:i] + (slice(None),)*(self.ndim-len(key)+1) + key[i+1:]
+        key = key + (slice(None),)*(self.ndim-len(key))
+        if len(key) != self.ndim:
+            raise IndexError("Too many indices for an array of shape %s" % (self.shape,))
+        expanded = []
+        for (index,n) in zip(key,self.shape):
+            if isinstance(index,slice):
+                expanded.append(index)
+            elif isinstance(index,(list,np.ndarray)):
+                index = np.asarray(index,dtype=int)
+                expanded.append(np.where(index < 0,index+n,index))
+            else:
+                index = int(index)
+                if index < 0:
+                    index += n
+                if not 0 <= index < n:
+                    raise IndexError("Index %s out of bounds for axis of length %s" % (index,n))
+                expanded.append(index)
+        return tuple(expanded)
+
+
+class FrameView(object):
+    r"""
+    Lazy view of one state of an output frame.
+
+    .. attribute:: q
+
+        (:class:`ArrayProxy`) - Proxy of q
+
+    .. attribute:: aux
+
+        (:class:`ArrayProxy`) - Proxy of aux, or None if aux was not written
+    """
+
+    def __init__(self,grid,t,q,aux=None):
+        self.grid = grid
+        r"""(:class:`~pyclaw.grid.Grid`) - Grid of the state"""
+        self.t = t
+        r"""(float) - Time of the frame"""
+        self.q = q
+        self.aux = aux
+
+    @property
+    def meqn(self):
+        return self.q.shape[0]
+
+    @property
+    def maux(self):
+        if self.aux is None:
+            return 0
+        return self.aux.shape[0]
+
+
+class LazySolution(object):
+    r"""
+    Output frame whose arrays are read on demand.
+
+    :Initialization:
+
+    Input:
+     - *frame* - (int) Frame number
+     - *path* - (string) Directory of the output, ``default = './_output/'``
+     - *format* - (string) Output format, ``default = 'binary'``
+     - *file_prefix* - (string) File prefix, ``default = 'claw'``
+     - *cache_bytes* - (int) Size of the cache of boxes read,
+       ``default = 2**26``
+    Output:
+     - (:class:`LazySolution`) - Open frame, to be closed with :meth:`close`
+    """
+
+    def __init__(self,frame,path='./_output/',format='binary',file_prefix='claw',
+                 cache_bytes=2**26):
+        if not openers.has_key(format):
+            raise IOError("Lazy reading of format %s is not supported" % format)
+        self.frame = frame
+        r"""(int) - Frame number"""
+        self.cache = BlockCache(cache_bytes)
+        r"""(:class:`BlockCache`) - Cache of boxes read from the arrays"""
+        path = os.path.expandvars(os.path.expanduser(path))
+        self.states,self._files = openers[format](frame,path,file_prefix,self.cache)
+        r"""(list) - :class:`FrameView` of every state"""
+
+    @property
+    def state(self):
+        r"""(:class:`FrameView`) - First state"""
+        return self.states[0]
+
+    @property
+    def grid(self):
+        r"""(:class:`~pyclaw.grid.Grid`) - Grid of the first state"""
+        return self.states[0].grid
+
+    @property
+    def t(self):
+        r"""(float) - Time of the frame"""
+        return self.states[0].t
+
+    def close(self):
+        r"""Close the files of the frame and empty the cache."""
+        for f in self._files:
+            f.close()
+        self._files = []
+        self.cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+
+def _make_grid(names,lower,n,d,gridno=1,level=1):
+    import pyclaw.grid
+    dimensions = [pyclaw.grid.Dimension(str(names[i]),lower[i],lower[i]+n[i]*d[i],int(n[i]))
+                  for i in xrange(len(n))]
+    grid = pyclaw.grid.Grid(dimensions)
+    grid.gridno = gridno
+    grid.level = level
+    return grid
+
+
+def _open_binary(frame,path,file_prefix,cache):
+    from pyclaw.io import binary
+    header = binary.read_binary_header(frame,path,file_prefix)
+    file_name = binary._file_name(path,file_prefix,frame)
+    states = []
+    for state in header['states']:
+        dims = state['dimensions']
+        n = [dim['n'] for dim in dims]
+        grid = _make_grid([dim['name'] for dim in dims],[dim['lower'] for dim in dims],n,
+                          [(dim['upper']-dim['lower'])/dim['n'] for dim in dims],
+                          state['gridno'],state['level'])
+        q = binary._read_block(file_name,state['q'],[state['meqn']]+n,True)
+        q_proxy = ArrayProxy(q.shape,lambda box,q=q: np.array(q[box]),cache)
+        aux_proxy = None
+        if state['aux'] is not None:
+            aux = binary._read_block(file_name,state['aux'],[state['maux']]+n,True)
+            aux_proxy = ArrayProxy(aux.shape,lambda box,aux=aux: np.array(aux[box]),cache)
+        states.append(FrameView(grid,state['t'],q_proxy,aux_proxy))
+    return states,[]
+
+
+def _open_hdf5(frame,path,file_prefix,cache):
+    import h5py
+    from pyclaw.io import hdf5
+    f = h5py.File(os.path.join(path,'%s%s.hdf' % (file_prefix,str(frame).zfill(4))),'r')
+    states = []
+    for name in sorted(f.keys()):
+        group = f[name]
+        q = group['q']
+        aux_proxy = None
+        if 'aux' in group:
+            aux_proxy = ArrayProxy(group['aux'].shape,group['aux'].__getitem__,cache)
+        states.append(FrameView(hdf5.read_grid(group),group.attrs['t'],
+                                ArrayProxy(q.shape,q.__getitem__,cache),aux_proxy))
+    return states,[f]
+
+
+def _open_hdf5_series(frame,path,file_prefix,cache):
+    from pyclaw.io import hdf5
+    series = hdf5.TimeSeries(os.path.join(path,'%s.h5' % file_prefix),'r')
+    n = series.index(frame)
+    t = series.times()[n]
+    states = []
+    for name in sorted(series.file.keys()):
+        if not name.startswith('grid'):
+            continue
+        group = series.file[name]
+        q = group['q']
+        aux_proxy = None
+        if 'aux' in group:
+            aux_proxy = ArrayProxy(group['aux'].shape,group['aux'].__getitem__,cache)
+        states.append(FrameView(hdf5.read_grid(group),t,
+                                ArrayProxy(q.shape[1:],lambda box,q=q: q[(n,)+box],cache),
+                                aux_proxy))
+    return states,[series]
+
+
+def _open_netcdf(frame,path,file_prefix,cache):
+    import netCDF4
+    from pyclaw.io import netcdf
+    f = netCDF4.Dataset(os.path.join(path,"%s%s.nc" % (file_prefix,str(frame).zfill(4))),'r')
+    states = []
+    for name in sorted(f.groups.keys()):
+        group = f.groups[name]
+        q = group.variables['q']
+        aux_proxy = None
+        if group.variables.has_key('aux'):
+            aux = group.variables['aux']
+            aux_proxy = ArrayProxy(aux.shape,aux.__getitem__,cache)
+        states.append(FrameView(netcdf.read_grid(group),getattr(group,'t'),
+                                ArrayProxy(q.shape,q.__getitem__,cache),aux_proxy))
+    return states,[f]
+
+
+def _open_petsc(frame,path,file_prefix,cache):
+    r"""
+    Open binary PETSc output, which holds for every state the Vec of q in
+    the natural ordering (meqn varying fastest), preceded by the Vec class
+    id and length as big-endian 32 bit integers.
+    """
+    import pickle
+    pickle_file = open(os.path.join(path,'%s.pkl' % file_prefix) + str(frame).zfill(4),'rb')
+    values = pickle.load(pickle_file)
+    grids = [pickle.load(pickle_file) for m in xrange(values['nstates'])]
+    pickle_file.close()
+
+    def open_vecs(file_name,dof):
+        vecs = []
+        offset = 0
+        for grid in grids:
+            shape = [dof] + list(grid['n'])
+            header = np.memmap(file_name,dtype='>i4',mode='r',offset=offset,shape=(2,))
+            if header[1] != np.prod(shape):
+                raise IOError("Vec in %s has %s values instead of %s"
+                              % (file_name,header[1],np.prod(shape)))
+            vec = np.memmap(file_name,dtype='>f8',mode='r',offset=offset+8,
+                            shape=tuple(shape),order='F')
+            vecs.append(ArrayProxy(vec.shape,lambda box,vec=vec: np.array(vec[box],dtype=float),cache))
+            offset += 8 + 8*int(np.prod(shape))
+        return vecs
+
+    qs = open_vecs(os.path.join(path,'%s.ptc' % file_prefix) + str(frame).zfill(4),values['meqn'])
+    auxs = [None]*len(grids)
+    aux_file_name = os.path.join(path,'%s_aux.ptc' % file_prefix)
+    if values['write_aux'] and os.path.exists(aux_file_name):
+        auxs = open_vecs(aux_file_name,values['maux'])
+    states = []
+    for (grid,q,aux) in zip(grids,qs,auxs):
+        states.append(FrameView(_make_grid(grid['names'],grid['lower'],grid['n'],grid['d'],
+                                           level=grid['level']),values['t'],q,aux))
+    return states,[]
+
+
+openers = {'binary':_open_binary,'hdf5':_open_hdf5,'hdf5_series':_open_hdf5_series,
+           'netcdf':_open_netcdf,'petsc':_open_petsc,'petsc_hdf5':_open_hdf5}
+r"""(dict) - Functions opening a frame lazily, by format"""
@@ -113,3 +113,177 @@ def weno5_wave(q,wave,s):
                 else: ql[m,LL+1:UL+1] += u*wave[m,mw,LL:UL]*wnorm2
 
     return ql,qr
+
+def weno5_char(q,evl,evr):
+    r"""
+    Fifth order WENO reconstruction of *q* in the characteristic fields.
+
+    The jumps of q in the stencil of each interface are projected on the
+    characteristic fields with the left eigenvectors *evl* of that
+    interface, reconstructed field by field and projected back with the
+    right eigenvectors *evr*.  The projections of all interfaces are done
+    at once as products of stacked meqn x meqn matrices.
+
+    :Input:
+     - *q* - (ndarray(meqn,n)) Cell averages, including the ghost cells
+     - *evl* - (ndarray(meqn,meqn,n-1)) Left eigenvectors (rows) at the
+       interface between cells i and i+1, for each i
+     - *evr* - (ndarray(meqn,meqn,n-1)) Right eigenvectors (columns) at
+       the same interfaces
+    :Output:
+     - (ndarray(meqn,n)) - ql
+     - (ndarray(meqn,n)) - qr
+    """
+    import numpy as np
+
+    epweno=1.e-36
+
+    n=q.shape[1]
+    LL=2
+    UL=n-3
+
+    qr=q.copy()
+    ql=q.copy()
+
+    # Jumps at the interfaces LL-2..UL+1, and their projections on the
+    # characteristic fields of the interfaces LL..UL-1 (hh[:,2+k,i] is the
+    # projection of the jump k interfaces away from interface LL+i)
+    dqiph=np.diff(q,1)
+    stencil=np.empty((q.shape[0],5,UL-LL))
+    for k in xrange(5):
+        stencil[:,k,:]=dqiph[:,LL-2+k:UL-2+k]
+    hh=np.einsum('pmi,mki->pki',evl[:,:,LL:UL],stencil)
+
+    # Part of the reconstruction that is stencil-independent
+    z0=(-q[:,LL-1:UL-1]+7.*(q[:,LL:UL]+q[:,LL+1:UL+1])-q[:,LL+2:UL+2])/12.
+
+    for m1 in [1,2]:
+        #m1=1: construct q^-_{i+1/2} (ql)
+        #m1=2: construct q^+_{i+1/2} (qr)
+        im=(-1)**(m1+1)
+        ione=im
+        inone=-im
+        intwo=-2*im
+
+        h_intwo=hh[:,2+intwo,:]
+        h_ione =hh[:,2+ione ,:]
+        h_inone=hh[:,2+inone,:]
+        h      =hh[:,2      ,:]
+
+        t1 = im*(h_intwo-h_inone)
+        t2 = im*(h_inone-h)
+        t3 = im*(h      -h_ione)
+
+        tt1=13.*t1**2+3.*(   h_intwo - 3.*h_inone)**2
+        tt2=13.*t2**2+3.*(   h_inone +    h      )**2
+        tt3=13.*t3**2+3.*(3.*h       -    h_ione )**2
+
+        tt1=(epweno+tt1)**2
+        tt2=(epweno+tt2)**2
+        tt3=(epweno+tt3)**2
+        s1 = tt2*tt3
+        s2 = 6.*tt1*tt3
+        s3 = 3.*tt1*tt2
+        t0 = 1./(s1+s2+s3)
+        s1 *= t0
+        s3 *= t0
+
+        uu=(s1*(t2-t1)+(0.5*s3-0.25)*(t3-t2))/3.
+
+        # Project to the physical space
+        z=z0+np.einsum('mpi,pi->mi',evr[:,:,LL:UL],uu)
+        if m1==1: qr[:,LL:UL] = z
+        else: ql[:,LL+1:UL+1] = z
+
+    return ql,qr
+
+def _cada_torrilhon_simple(r,cfl,out=None,work=None):
+    r"""
+    Simple limiter of Cada and Torrilhon, used by the Fortran TVD
+    reconstruction.
+    """
+    import numpy as np
+    pp=(2.+r)/3.
+    amax=np.maximum(np.maximum(-r/3.,0.),np.minimum(np.minimum(2.*r,pp),2.))
+    return np.maximum(0.,np.minimum(pp,amax))
+
+def _tvd_limiter(limiter):
+    r"""
+    Return the limiter function of the TVD reconstructions numbered
+    *limiter*, numbered as in the Fortran SharpClaw reconstructions:
+    1: minmod, 2: superbee, 3: van Leer, 4: MC, 5: Cada-Torrilhon.
+    """
+    import tvd
+    if limiter==5:
+        return _cada_torrilhon_simple
+    if limiter not in [1,2,3,4]:
+        raise ValueError, 'TVD reconstruction with limiter %s not supported' % limiter
+    return tvd.limiter_functions[limiter]
+
+def _limit_slopes(dqm,dqp,mthlim):
+    r"""
+    Return the limited slopes phi(dqp/dqm)*dqm of each row of *dqm*, with
+    the limiter *mthlim* of the row (or the same limiter for all rows).
+    """
+    import numpy as np
+    mthlim=np.array(mthlim,ndmin=1)
+    if len(mthlim)==1:
+        mthlim=np.repeat(mthlim,dqm.shape[0])
+    elif len(mthlim)!=dqm.shape[0]:
+        raise ValueError, 'TVD reconstruction of %s fields with %s limiters' \
+                          % (dqm.shape[0],len(mthlim))
+
+    nonzero=np.abs(dqm)>1.e-14
+    r=np.zeros(dqm.shape)
+    np.divide(dqp,dqm,out=r,where=nonzero)
+    slope=np.empty(dqm.shape)
+    for limiter in set(mthlim):
+        rows=(mthlim==limiter)
+        slope[rows]=_tvd_limiter(limiter)(r[rows],None)
+    slope*=dqm
+    return slope
+
+def tvd2(q,mthlim):
+    r"""
+    Second order TVD reconstruction of the components of *q*, the component
+    m being limited with the limiter mthlim[m] (see :func:`_tvd_limiter`).
+    """
+    dqiph=q[:,1:]-q[:,:-1]
+    slope=_limit_slopes(dqiph[:,:-1],dqiph[:,1:],mthlim)
+
+    qr=q.copy()
+    ql=q.copy()
+    qr[:,1:-1] += 0.5*slope
+    ql[:,1:-1] -= 0.5*slope
+    return ql,qr
+
+def tvd2_char(q,mthlim,evl,evr):
+    r"""
+    Second order TVD reconstruction of *q* in the characteristic fields,
+    the field p being limited with the limiter mthlim[p].  The eigenvectors
+    *evl* and *evr* are those of :func:`weno5_char`.
+    """
+    import numpy as np
+
+    n=q.shape[1]
+    LL=1
+    UL=n-2
+
+    # Projections on the characteristic fields of the interfaces LL..UL-1
+    # of the jumps at that interface and at its neighbours
+    dqiph=np.diff(q,1)
+    stencil=np.empty((q.shape[0],3,UL-LL))
+    for k in xrange(3):
+        stencil[:,k,:]=dqiph[:,LL-1+k:UL-1+k]
+    hh=np.einsum('pmi,mki->pki',evl[:,:,LL:UL],stencil)
+
+    # Limited slopes of the cells on each side of the interface
+    u_left =0.5*_limit_slopes(hh[:,0,:],hh[:,1,:],mthlim)
+    u_right=0.5*_limit_slopes(hh[:,1,:],hh[:,2,:],mthlim)
+
+    # Project to the physical space
+    qr=q.copy()
+    ql=q.copy()
+    qr[:,LL:UL] += np.einsum('mpi,pi->mi',evr[:,:,LL:UL],u_left)
+    ql[:,LL+1:UL+1] -= np.einsum('mpi,pi->mi',evr[:,:,LL:UL],u_right)
+    return ql,qr
@@ -7,59 +7,111 @@ To build a higher order reconstruction, *k* needs to be tweaked here
 and in 'weno/codegen.py'.  Also, *mbc* needs to be tweaked in the
 PyClaw solver.
 
+The generated module provides the reconstructions of orders 5 to 17
+(k = 3 to 9).
+
 """
 
-import weno.reconstruct as recon
+import numpy as np
 
-def weno(k, q):
-    r"""Return the *k* order WENO based reconstruction of *q*.
+import weno.reconstruct as recon
 
-    The reconstruction is component based.
+class WenoReconstructor(object):
+    r"""
+    Component based WENO reconstruction of arrays of a fixed shape.
+
+    The kernels of the generated module for the order of the reconstruction
+    are looked up once, and the smoothness indicators, the weights and the
+    reconstructed values are held in arrays allocated once, so that a
+    solver that creates a reconstructor in its setup reconstructs q at
+    every Runge-Kutta stage without allocating arrays.  The arrays are laid
+    out so that the kernels write them with unit stride: the smoothness
+    indicators and weights of a cell are contiguous, and so are the
+    reconstructed values of a component.
+
+    The arrays *ql* and *qr* returned by :meth:`reconstruct` are those of
+    the reconstructor, and are overwritten by the next call.
+
+    :Initialization:
+
+    Input:
+     - *order* - (int) Order of the reconstruction, odd, from 5 to 17
+     - *meqn* - (int) Number of components of q
+     - *n* - (int) Number of cells of q, including the ghost cells
+    Output:
+     - (:class:`WenoReconstructor`) - Reconstructor of arrays of shape
+       (meqn,n)
     """
 
-    import numpy as np
-    # XXX: this should really by a class so that the workspaces (sigma
-    # and weights) can be pre-allocated and the 'getattr's can be done
-    # once instead of every call
-
-    if (k % 2) == 0:
-        raise ValueError, 'even order WENO reconstructions are not supported'
-
-    k = (k+1)/2
-    sigma = np.zeros((q.shape[1], k))
-    weights = np.zeros((q.shape[1], k))
-
-    ql = np.zeros(q.shape)
-    qr = np.zeros(q.shape)
-
-    try:
-        smoothness    = getattr(recon, 'smoothness_k' + str(k))
-        weights_l     = getattr(recon, 'weights_left_k' + str(k))
-        weights_r     = getattr(recon, 'weights_right_k' + str(k))
-        reconstruct_l = getattr(recon, 'reconstruct_left_k' + str(k))
-        reconstruct_r = getattr(recon, 'reconstruct_right_k' + str(k))
-    except:
-        raise ValueError, '%d order WENO reconstructions are not supported' % (2*k-1)
+    def __init__(self,order,meqn,n):
+        if (order % 2) == 0:
+            raise ValueError, 'even order WENO reconstructions are not supported'
+        k = (order+1)/2
+        try:
+            self._smoothness    = getattr(recon, 'smoothness_k' + str(k))
+            self._weights_l     = getattr(recon, 'weights_left_k' + str(k))
+            self._weights_r     = getattr(recon, 'weights_right_k' + str(k))
+            self._reconstruct_l = getattr(recon, 'reconstruct_left_k' + str(k))
+            self._reconstruct_r = getattr(recon, 'reconstruct_right_k' + str(k))
+        except AttributeError:
+            raise ValueError, '%d order WENO reconstructions are not supported' % order
+
+        self.order = order
+        self.k = k
+        self.shape = (meqn,n)
+        self.sigma = np.zeros((n,k))
+        r"""(ndarray(n,k)) - Smoothness indicators of one component"""
+        self.weights = np.zeros((n,k))
+        r"""(ndarray(n,k)) - Weights of one component"""
+        self.ql = np.zeros((meqn,n))
+        r"""(ndarray(meqn,n)) - Reconstructed values at the left of each cell"""
+        self.qr = np.zeros((meqn,n))
+        r"""(ndarray(meqn,n)) - Reconstructed values at the right of each cell"""
+
+    def reconstruct(self,q):
+        r"""
+        Return the reconstruction of *q*, of shape (meqn,n)
+
+        :Output:
+         - (ndarray(meqn,n)) - ql
+         - (ndarray(meqn,n)) - qr
+        """
+        if q.shape != self.shape:
+            raise ValueError('WenoReconstructor of arrays of shape %s called on an '
+                             'array of shape %s' % (self.shape,q.shape))
+        k = self.k
+        sigma,weights = self.sigma,self.weights
+        ql,qr = self.ql,self.qr
+        for m in xrange(q.shape[0]):
+            self._smoothness(q[m,:], sigma)
+
+            self._weights_l(sigma, weights)
+            self._reconstruct_l(q[m,:], weights, ql[m,:])
+
+            self._weights_r(sigma, weights)
+            self._reconstruct_r(q[m,:], weights, qr[m,:])
+
+        # XXX: copy ghost-cells.  i'm not sure why this is necessary, but
+        # it make the acoustics examples in the implicit time-stepping
+        # branch work properly.
+
+        ql[:,:k-1]  = ql[:,-2*k+2:-k+1]
+        ql[:,-k+1:] = ql[:,k-1:2*k-2]
+
+        qr[:,:k-1]  = qr[:,-2*k+2:-k+1]
+        qr[:,-k+1:] = qr[:,k-1:2*k-2]
+
+        return ql, qr
+
+    __call__ = reconstruct
 
 
-    for m in range(q.shape[0]):
-        smoothness(q[m,:], sigma)
-
-        weights_l(sigma, weights)
-        reconstruct_l(q[m,:], weights, ql[m,:])
-
-        weights_r(sigma, weights)
-        reconstruct_r(q[m,:], weights, qr[m,:])
-
-
-    # XXX: copy ghost-cells.  i'm not sure why this is necessary, but
-    # it make the acoustics examples in the implicit time-stepping
-    # branch work properly.
-
-    ql[:,:k-1]  = ql[:,-2*k+2:-k+1]
-    ql[:,-k+1:] = ql[:,k-1:2*k-2]
-
-    qr[:,:k-1]  = qr[:,-2*k+2:-k+1]
-    qr[:,-k+1:] = qr[:,k-1:2*k-2]
+def weno(k, q):
+    r"""Return the *k* order WENO based reconstruction of *q*.
 
+    The reconstruction is component based.  Solvers reconstructing arrays
+    of the same shape repeatedly should use a :class:`WenoReconstructor`,
+    which this function creates for every call.
+    """
+    ql, qr = WenoReconstructor(k,q.shape[0],q.shape[1]).reconstruct(q)
     return ql, qr
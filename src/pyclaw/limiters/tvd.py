@@ -50,9 +50,17 @@ All limiters have the same function call signature:
     :Input:
      - *r* - (ndarray(:)) 
      - *cfl* - (ndarray(:)) Local CFL number
+     - *out* - (ndarray(:)) Array the limiter values are written to, or None
+       to allocate one
+     - *work* - (:class:`LimiterWorkspace`) Workspace the temporary arrays
+       are taken from, or None to allocate them
      
     :Output:
-     - (ndarray(:)) - 
+     - (ndarray(:)) - The limiter values, *out* if given
+
+The limiters act elementwise on arrays of any shape, through numpy ufuncs
+writing into *out* and the arrays of *work*, so that with both given a
+limiter allocates no arrays.
 
 Newer limiters are based on work done by Friedemann Kemm [kemm_2009]_, paper 
 in review.
@@ -78,229 +86,352 @@ MC = 4
 
 import numpy as np
 
-def limit(meqn,wave,s,limiter,dtdx):
+
+class LimiterWorkspace(object):
+    r"""
+    Work arrays of :func:`limit` and of the limiter functions
+
+    The arrays are allocated on first use and kept by name, shape and type,
+    so that a solver that owns a workspace limits the waves of every step
+    (and of every sweep direction, whose arrays differ in shape) without
+    allocating arrays.
+    """
+    def __init__(self):
+        self._arrays = {}
+
+    def get(self,name,shape,dtype=float):
+        r"""Return the work array *name* of shape *shape* and type *dtype*."""
+        key = (name,shape,dtype)
+        array = self._arrays.get(key)
+        if array is None:
+            array = np.empty(shape,dtype=dtype)
+            self._arrays[key] = array
+        return array
+
+def _scratch(r,work,n,first=0):
+    r"""
+    Return *n* temporary arrays shaped like *r*, taken from *work* starting
+    with its array number *first*.
+
+    The helpers called by the limiters (:func:`van_leer_limiter`,
+    :func:`roe_third_order_limiter` and :func:`_ultrabee`) use the first
+    one or two arrays, so the arrays a limiter needs across such a call
+    start further on.
+    """
+    if work is None:
+        return [np.empty_like(r) for i in xrange(n)]
+    return [work.get('scratch%s' % i,r.shape) for i in xrange(first,first+n)]
+
+def _mask(r,work):
+    r"""Return a temporary boolean array shaped like *r*."""
+    if work is None:
+        return np.empty(r.shape,dtype=bool)
+    return work.get('mask',r.shape,bool)
+
+def _out(r,out):
+    if out is None:
+        return np.empty_like(r)
+    return out
+
+def limit(meqn,wave,s,limiter,dtdx,workspace=None):
     r"""
     Apply a limiter to the waves
 
     Function that limits the given waves using the methods contained
     in limiter.  This is the vectorized version of the function acting on a 
     row of waves at a time.
+
+    For each wave family the ratio r of the upwind wave to the wave and the
+    local CFL number are computed once, the limiter is evaluated into a work
+    array and all meqn components of the wave are scaled at once.  The
+    waves are limited in place.
     
     :Input:
-     - *wave* - (ndarray(:,meqn,mwaves)) The waves at each interface
-     - *s* - (ndarray(:,mwaves)) Speeds for each wave
+     - *wave* - (ndarray(meqn,mwaves,:)) The waves at each interface
+     - *s* - (ndarray(mwaves,:)) Speeds for each wave
      - *limiter* - (``int`` list) Array of type ``int`` determining which 
          limiter to use
      - *dtdx* - (ndarray(:)) :math:`\Delta t / \Delta x` ratio, used for CFL 
         dependent limiters
+     - *workspace* - (:class:`LimiterWorkspace`) Work arrays, or None to
+       allocate them
         
     :Output:
-     - (ndarray(:,meqn,mwaves)) - Returns the limited waves
+     - (ndarray(meqn,mwaves,:)) - Returns the limited waves
 
-    :Version: 1.1 (2009-07-05)
+    :Version: 1.2
     """
-    
-    # wave_norm2 is the sum of the squares along the meqn axis,
-    # so the norm of the cell i for wave number j is addressed 
-    # as wave_norm2[i,j]
-    wave_norm2 = np.sum(np.square(wave),axis=0)
-    wave_zero_mask = np.array((wave_norm2 == 0), dtype=float)
-    wave_nonzero_mask = (1.0-wave_zero_mask)
-
-    # dotls contains the products of adjacent cell values summed
-    # along the meqn axis.  For reference, dotls[0,:,:] is the dot
-    # product of the 0 cell and the 1 cell.
-    dotls = np.sum(wave[:,:,1:]*wave[:,:,:-1],axis=0)
-
-    # array containing ones where s > 0, zeros elsewhere
-    spos = np.array(s > 0.0, dtype=float)[:,1:-1]
-
-    # Here we construct a masked array, then fill the empty values with 0,
-    # this is done in case wave_norm2 is 0 or close to it
-    # Take upwind dot product
-    r = np.ma.array((spos*dotls[:,:-1] + (1-spos)*dotls[:,1:]))
-    # Divide it by the norm**2
-    r /= np.ma.array(wave_norm2[:,1:-1])
-    # Fill the rest of the array
-    r.fill_value = 0
-    r = r.filled()
-    
+    if workspace is None:
+        workspace = LimiterWorkspace()
+    shape = s.shape[1:]
+    interior = (shape[0]-2,) + shape[1:]
+    wave_norm2 = workspace.get('wave_norm2',shape)
+    dotl = workspace.get('dotl',(shape[0]-1,)+shape[1:])
+    product = workspace.get('product',shape)
+    r = workspace.get('r',interior)
+    cfl = workspace.get('cfl',interior)
+    phi = workspace.get('phi',interior)
+    spos = workspace.get('spos',interior,bool)
+    zero = workspace.get('zero',interior,bool)
+
     for mw in xrange(wave.shape[1]):
         # skip waves that are marked as not needing a limiter
         limit_func = limiter_functions.get(limiter[mw])
-        if limit_func is not None:
-            for m in xrange(meqn):
-                cfl = np.abs(s[mw,1:-1]*(dtdx[1:-2]*spos[mw,:] 
-                                        + (1-spos[mw,:])*dtdx[2:-1]))
-                wlimitr = limit_func(r[mw,:],cfl)
-                wave[m,mw,1:-1] = wave[m,mw,1:-1]*wave_zero_mask[mw,1:-1] \
-                    + wlimitr * wave[m,mw,1:-1] * wave_nonzero_mask[mw,1:-1]
+        if limit_func is None:
+            continue
+        w = wave[:,mw]
+
+        # Norm squared of the wave at each interface, and dot product with
+        # the wave at the next interface
+        np.square(w[0],out=wave_norm2)
+        np.multiply(w[0,1:],w[0,:-1],out=dotl)
+        for m in xrange(1,meqn):
+            np.square(w[m],out=product)
+            np.add(wave_norm2,product,out=wave_norm2)
+            np.multiply(w[m,1:],w[m,:-1],out=product[:-1])
+            np.add(dotl,product[:-1],out=dotl)
+
+        # Take upwind dot product and divide it by the norm squared; where
+        # the wave is zero so are the dot products, and r is set to 0
+        np.greater(s[mw,1:-1],0.0,out=spos)
+        np.copyto(r,dotl[1:])
+        np.copyto(r,dotl[:-1],where=spos)
+        norm2 = wave_norm2[1:-1]
+        np.equal(norm2,0.0,out=zero)
+        np.copyto(norm2,1.0,where=zero)
+        np.divide(r,norm2,out=r)
+
+        # Local CFL number, with the upwind dt/dx
+        np.copyto(cfl,dtdx[2:-1])
+        np.copyto(cfl,dtdx[1:-2],where=spos)
+        np.absolute(s[mw,1:-1],out=phi)
+        np.multiply(phi,cfl,out=cfl)
+
+        limit_func(r,cfl,out=phi,work=workspace)
+        np.copyto(phi,1.0,where=zero)
+        np.multiply(w[:,1:-1],phi,out=w[:,1:-1])
 
     return wave
 
-def minmod_limiter(r,cfl):
+def minmod_limiter(r,cfl,out=None,work=None):
     r"""
     Minmod vectorized limiter
     """
-    a = np.ones((2,len(r)))
-    b = np.zeros((2,len(r)))
-    
-    a[1,:] = r
-    
-    b[1,:] = np.min(a,axis=0)
-    
-    return np.max(b,axis=0)
-    
+    phi = _out(r,out)
+    np.minimum(r,1.0,out=phi)
+    return np.maximum(phi,0.0,out=phi)
 
-def superbee_limiter(r,cfl):
+def superbee_limiter(r,cfl,out=None,work=None):
     r"""
     Superbee vectorized limiter
     """
-    a = np.ones((2,len(r)))
-    b = np.zeros((2,len(r)))
-    c = np.zeros((3,len(r)))
-
-    a[1,:] = 2.0*r
-    
-    b[1,:] = r
-
-    c[1,:] = np.min(a,axis=0)
-    c[2,:] = np.min(b,axis=0)
-
-    return np.max(c,axis=0)
-    
-def mc_limiter(r,cfl):
+    phi = _out(r,out)
+    a, = _scratch(r,work,1)
+    np.multiply(r,2.0,out=a)
+    np.minimum(a,1.0,out=a)
+    np.minimum(r,2.0,out=phi)
+    np.maximum(phi,a,out=phi)
+    return np.maximum(phi,0.0,out=phi)
+    
+def mc_limiter(r,cfl,out=None,work=None):
     r"""
     MC vectorized limiter
     """
-    a = np.empty((3,len(r)))
-    b = np.zeros((2,len(r)))
+    phi = _out(r,out)
+    a, = _scratch(r,work,1)
+    np.add(r,1.0,out=phi)
+    np.divide(phi,2.0,out=phi)
+    np.minimum(phi,2.0,out=phi)
+    np.multiply(r,2.0,out=a)
+    np.minimum(phi,a,out=phi)
+    return np.maximum(phi,0.0,out=phi)
+
+def van_leer_limiter(r,cfl,out=None,work=None):
+    r"""
+    van Leer limiter :math:`(r + |r|) / (1 + |r|)`
+    """
+    phi = _out(r,out)
+    a, = _scratch(r,work,1)
+    np.absolute(r,out=a)
+    np.add(r,a,out=phi)
+    np.add(a,1.0,out=a)
+    return np.divide(phi,a,out=phi)
+
+def beam_warming_limiter(r,cfl,out=None,work=None):
+    r"""
+    Beam-warming :math:`r`
+    """
+    phi = _out(r,out)
+    np.copyto(phi,r)
+    return phi
 
-    a[0,:] = (1.0 + r) / 2.0
-    a[1,:] = 2
-    a[2,:] = 2.0 * r
-    
-    b[1,:] = np.min(a,axis=0)
+def fromm_limiter(r,cfl,out=None,work=None):
+    r"""
+    Fromm :math:`1/2 (1 + r)`
+    """
+    phi = _out(r,out)
+    np.add(r,1.0,out=phi)
+    return np.multiply(phi,0.5,out=phi)
 
-    return np.max(b,axis=0)
-    
-def van_leer_klein_sharpening_limiter(r,cfl):
+def albada2_limiter(r,cfl,out=None,work=None):
+    r"""
+    Albada 2 :math:`(r^2 + r) / (1 + r^2)`
+    """
+    phi = _out(r,out)
+    a, = _scratch(r,work,1)
+    np.square(r,out=a)
+    np.add(a,r,out=phi)
+    np.add(a,1.0,out=a)
+    return np.divide(phi,a,out=phi)
+
+def albada3_limiter(r,cfl,out=None,work=None):
+    r"""
+    Albada 3 :math:`1/2 (1+r) (1 - (|1-r|^3) / (1+|r|^3))`
+    """
+    phi = _out(r,out)
+    a,b = _scratch(r,work,2)
+    np.subtract(1.0,r,out=a)
+    np.absolute(a,out=a)
+    np.power(a,3,out=a)
+    np.absolute(r,out=b)
+    np.power(b,3,out=b)
+    np.add(b,1.0,out=b)
+    np.divide(a,b,out=a)
+    np.subtract(1.0,a,out=a)
+    np.add(r,1.0,out=phi)
+    np.multiply(phi,0.5,out=phi)
+    return np.multiply(phi,a,out=phi)
+
+def van_leer_klein_sharpening_limiter(r,cfl,out=None,work=None):
     r"""
     van Leer with Klein sharpening, k=2
     """
-    a = np.ones((2,len(r))) * 1.e-5
-    a[0,:] = r
-    
-    rcorr = np.max(a,axis=0)
-    a[1,:] = 1/rcorr
-    sharg = np.min(a,axis=0)
-    sharp = 1.0 + sharg * (1.0 - sharg) * (1.0 - sharg**2)
-    
-    return (r+np.abs(r)) / (1.0 + np.abs(r)) * sharp
+    phi = _out(r,out)
+    a,b = _scratch(r,work,2)
+    # sharg = min(r,1/max(r,1.e-5))
+    np.maximum(r,1.e-5,out=a)
+    np.divide(1.0,a,out=a)
+    np.minimum(r,a,out=a)
+    # sharp = 1 + sharg * (1 - sharg) * (1 - sharg**2)
+    np.subtract(1.0,a,out=b)
+    np.multiply(a,b,out=b)
+    np.square(a,out=a)
+    np.subtract(1.0,a,out=a)
+    np.multiply(b,a,out=b)
+    np.add(b,1.0,out=b)
+
+    van_leer_limiter(r,cfl,phi,work)
+    return np.multiply(phi,b,out=phi)
+
+def roe_third_order_limiter(r,cfl,out=None,work=None):
+    r"""
+    Roe's linear third order scheme :math:`1 + (r-1) (1 + cfl) / 3`
+    """
+    phi = _out(r,out)
+    a, = _scratch(r,work,1)
+    np.add(cfl,1.0,out=a)
+    np.divide(a,3.0,out=a)
+    np.subtract(r,1.0,out=phi)
+    np.multiply(a,phi,out=phi)
+    return np.add(phi,1.0,out=phi)
+
+def _cfl_bounds(cfl,cfmod1,cfmod2):
+    r"""
+    Write max(cfl,0.001) to *cfmod1* and 1 - min(cfl,0.999) to *cfmod2*.
+    """
+    np.maximum(cfl,0.001,out=cfmod1)
+    np.minimum(cfl,0.999,out=cfmod2)
+    np.subtract(1.0,cfmod2,out=cfmod2)
 
-def arora_roe(r,cfl):
+def arora_roe(r,cfl,out=None,work=None):
     r"""
     Arora-Roe limiter, limited version of the linear third order scheme
     """
     caut = 0.99
-    
-    a = np.empty((3,len(r)))
-    b = np.zeros((2,len(r)))
-    
-    s1 = (caut * 2.0 / cfl)
-    s2 = (1.0 + cfl) / 3.0
-    phimax = caut * 2.0 / (1.0 - cfl)
-    
-    a[0,:] = s1 * r
-    a[1,:] = 1.0 + s2 * (r - 1.0)
-    a[2,:] = phimax
-    b[1,:] = np.min(a,axis=0)
-    
-    return np.max(b,axis=0)
-
-def theta_limiter(r,cfl,theta=0.95):
+    phi = _out(r,out)
+    a, = _scratch(r,work,1)
+
+    # min(s1*r, 1 + s2*(r-1), phimax), with s1 = 2*caut/cfl and
+    # phimax = 2*caut/(1-cfl)
+    roe_third_order_limiter(r,cfl,phi,work)
+    np.divide(caut * 2.0,cfl,out=a)
+    np.multiply(a,r,out=a)
+    np.minimum(phi,a,out=phi)
+    np.subtract(1.0,cfl,out=a)
+    np.divide(caut * 2.0,a,out=a)
+    np.minimum(phi,a,out=phi)
+    return np.maximum(phi,0.0,out=phi)
+
+def theta_limiter(r,cfl,theta=0.95,out=None,work=None):
     r"""
     Theta limiter
     
     Additional Input:
      - *theta* =
     """
-    a = np.empty((2,len(r)))
-    b = np.empty((3,len(r)))
-    
-    a[0,:] = 0.001
-    a[1,:] = cfl
-    cfmod1 = np.max(a,axis=0)
-    a[0,:] = 0.999
-    cfmod2 = np.min(a,axis=0)
-    s1 = 2.0 / cfmod1
-    s2 = (1.0 + cfl) / 3.0
-    phimax = 2.0 / (1.0 - cfmod2)
-    
-    a[0,:] = (1.0 - theta) * s1
-    a[1,:] = 1.0 + s2 * (r - 1.0)
-    left = np.max(a,axis=0)
-    a[0,:] = (1.0 - theta) * phimax * r
-    a[1,:] = theta * s1 * r
-    middle = np.max(a,axis=0)
-    
-    b[0,:] = left
-    b[1,:] = middle
-    b[2,:] = theta*phimax
-    
-    return np.min(b,axis=0)
-    
-def cfl_superbee(r,cfl):
+    phi = _out(r,out)
+    c,s1,phimax = _scratch(r,work,3,1)
+    _cfl_bounds(cfl,s1,phimax)
+    np.divide(2.0,s1,out=s1)
+    np.divide(2.0,phimax,out=phimax)
+
+    # left = max((1-theta)*s1, 1 + s2*(r-1))
+    roe_third_order_limiter(r,cfl,phi,work)
+    np.multiply(s1,1.0 - theta,out=c)
+    np.maximum(phi,c,out=phi)
+    # middle = max((1-theta)*phimax*r, theta*s1*r)
+    np.multiply(phimax,1.0 - theta,out=c)
+    np.multiply(c,r,out=c)
+    np.multiply(s1,theta,out=s1)
+    np.multiply(s1,r,out=s1)
+    np.maximum(c,s1,out=c)
+
+    np.minimum(phi,c,out=phi)
+    np.multiply(phimax,theta,out=phimax)
+    return np.minimum(phi,phimax,out=phi)
+
+    
+def cfl_superbee(r,cfl,out=None,work=None):
     r"""
     CFL-Superbee (Roe's Ultrabee) without theta parameter
     """
-    a = np.empty((2,len(r)))
-    b = np.zeros((3,len(r)))
-    
-    a[0,:] = 0.001
-    a[1,:] = cfl
-    cfmod1 = np.max(a,axis=0)
-    a[0,:] = 0.999
-    cfmod2 = np.min(a,axis=0)
-    
-    a[0,:] = 1.0
-    a[1,:] = 2.0 * r / cfmod1
-    b[1,:] = np.min(a,axis=0)
-    a[0,:] = 2.0/(1-cfmod2)
-    a[1,:] = r
-    b[2,:] = np.min(a,axis=0)
-    
-    return np.max(b,axis=0)
-
-    
-def cfl_superbee_theta(r,cfl,theta=0.95):
+    phi = _out(r,out)
+    cfmod1,cfmod2 = _scratch(r,work,2)
+    _cfl_bounds(cfl,cfmod1,cfmod2)
+
+    # max(0, min(1, 2*r/cfmod1), min(2/(1-cfmod2), r))
+    np.multiply(r,2.0,out=phi)
+    np.divide(phi,cfmod1,out=phi)
+    np.minimum(phi,1.0,out=phi)
+    np.divide(2.0,cfmod2,out=cfmod2)
+    np.minimum(cfmod2,r,out=cfmod2)
+    np.maximum(phi,cfmod2,out=phi)
+    return np.maximum(phi,0.0,out=phi)
+
+def _ultrabee(r,cfl,theta,phi,work):
+    r"""
+    Write max(0, min(s1*r, phimax)) to *phi*, with s1 = 2*theta/cfmod1 and
+    phimax = 2*theta/(1-cfmod2).
+    """
+    cfmod1,cfmod2 = _scratch(r,work,2)
+    _cfl_bounds(cfl,cfmod1,cfmod2)
+    np.divide(theta * 2.0,cfmod1,out=cfmod1)
+    np.multiply(cfmod1,r,out=phi)
+    np.divide(theta * 2.0,cfmod2,out=cfmod2)
+    np.minimum(phi,cfmod2,out=phi)
+    np.maximum(phi,0.0,out=phi)
+    
+def cfl_superbee_theta(r,cfl,theta=0.95,out=None,work=None):
     r"""
     CFL-Superbee (Roe's Ultrabee) with theta parameter
     """
-    a = np.empty((2,len(r)))
-    b = np.zeros((2,len(r)))
-    
-    a[0,:] = 0.001
-    a[1,:] = cfl
-    cfmod1 = np.max(a,axis=0)
-    a[0,:] = 0.999
-    cfmod2 = np.min(a,axis=0)
-
-    s1 = theta * 2.0 / cfmod1
-    phimax = theta * 2.0 / (1.0 - cfmod2)
-
-    a[0,:] = s1*r
-    a[1,:] = phimax
-    b[1,:] = np.min(a,axis=0)
-    ultra = np.max(b,axis=0)
-    
-    a[0,:] = ultra
-    b[0,:] = 1.0
-    b[1,:] = r
-    a[1,:] = np.max(b,axis=0)
-    return np.min(a,axis=0)
+    phi = _out(r,out)
+    a, = _scratch(r,work,1)
+    _ultrabee(r,cfl,theta,phi,work)
+    np.maximum(r,1.0,out=a)
+    return np.minimum(phi,a,out=phi)
 
-def beta_limiter(r,cfl,theta=0.95,beta=0.66666666666666666):
+def beta_limiter(r,cfl,theta=0.95,beta=0.66666666666666666,out=None,work=None):
     r"""
     Modification of CFL Superbee limiter with theta and beta parameters
     
@@ -308,140 +439,173 @@ def beta_limiter(r,cfl,theta=0.95,beta=0.66666666666666666):
      - *theta*
      - *beta*
     """
-    a = np.empty((2,len(r)))
-    b = np.zeros((2,len(r)))
-    
-    a[0,:] = 0.001
-    a[1,:] = cfl
-    cfmod1 = np.max(a,axis=0)
-    a[0,:] = 0.999
-    cfmod2 = np.min(a,axis=0)
-    
-    s1 = theta * 2.0 / cfmod1
-    s2 = (1.0 + cfl) / 3.0
-    phimax = theta * 2.0 / (1.0 - cfmod2)
-    
-    a[0,:] = s1*r
-    a[1,:] = phimax
-    b[1,:] = np.min(a)
-    ultra = np.max(b)
-    
-    a[0,:] = 1.0 + (s2 - beta/2.0) * (r-1.0)
-    a[1,:] = 1.0 + (s2 + beta/2.0) * (r-1.0)
-    b[0,:] = ultra
-    b[1,:] = np.max(a)
-    a[0,:] = 0.0
-    a[1,:] = np.min(b)
-    
-    return np.max(a)
-
-
-def hyperbee_limiter(r,cfl):
+    phi = _out(r,out)
+    a,b,c = _scratch(r,work,3)
+    _ultrabee(r,cfl,theta,phi,work)
+
+    # max(1 + (s2 - beta/2)*(r-1), 1 + (s2 + beta/2)*(r-1))
+    np.add(cfl,1.0,out=a)
+    np.divide(a,3.0,out=a)
+    np.subtract(r,1.0,out=b)
+    np.subtract(a,beta/2.0,out=c)
+    np.multiply(c,b,out=c)
+    np.add(a,beta/2.0,out=a)
+    np.multiply(a,b,out=a)
+    np.maximum(a,c,out=a)
+    np.add(a,1.0,out=a)
+
+    np.minimum(phi,a,out=phi)
+    return np.maximum(phi,0.0,out=phi)
+
+def hyperbee_limiter(r,cfl,out=None,work=None):
     r"""Hyperbee"""
-    a = np.empty((2,len(r)))
-    
-    a[0,:] = 0.001
-    a[1,:] = cfl
-    cfmod1 = np.max(a,axis=0)
-    a[0,:] = 0.999
-    cfmod2 = np.min(a,axis=0)
-    
-    index1 = r < 0.0
-    index2 = np.abs(r-1.0) < 1.0e-6
-    index3 = np.abs(index1 + index2 - 1)
-    master_index = index1 * 0 + index2 * 1 + index3 * 2
-
-    rmin = r-1.0
-    rdur = r/rmin
-    return np.choose(master_index,[0.0,1.0,
-                                    2.0 * rdur * (cfl * rmin + 1.0 - r**cfl) 
-                                    / (cfmod1 * (1.0 - cfmod2) * rmin)])
-    
-def superpower_limiter(r,cfl,caut=1.0):
+    phi = _out(r,out)
+    a,b,c = _scratch(r,work,3)
+    mask = _mask(r,work)
+    _cfl_bounds(cfl,a,b)
+
+    # 2 r/(r-1) (cfl (r-1) + 1 - r**cfl) / (cfmod1 (1-cfmod2) (r-1))
+    np.multiply(a,b,out=a)
+    np.subtract(r,1.0,out=b)
+    np.multiply(a,b,out=a)
+    np.divide(r,b,out=c)
+    np.multiply(c,2.0,out=c)
+    np.multiply(cfl,b,out=phi)
+    np.add(phi,1.0,out=phi)
+    np.power(r,cfl,out=b)
+    np.subtract(phi,b,out=phi)
+    np.multiply(c,phi,out=phi)
+    np.divide(phi,a,out=phi)
+
+    # 1 where r is 1, and 0 where r is negative
+    np.subtract(r,1.0,out=b)
+    np.absolute(b,out=b)
+    np.less(b,1.0e-6,out=mask)
+    np.copyto(phi,1.0,where=mask)
+    np.less(r,0.0,out=mask)
+    np.copyto(phi,0.0,where=mask)
+    return phi
+    
+def superpower_limiter(r,cfl,caut=1.0,out=None,work=None):
     r"""
     SuperPower limiter
     
     Additional input:
      - *caut* = Limiter parameter
     """
-    s2 = (1.0 + cfl) / 3.0
-    s3 = 1.0 - s2
-    
-    pp = (((r<=1.0) * np.abs(2.0/cfl) * caut) * 2.0 * s3 
-            + (r > 1.0) * (np.abs(2.0)/(1.0 - cfl) * caut) * 2.0 * s2)
-            
-    rabs = np.abs(r)
-    rfrac = np.abs((1.0 - rabs) / (1.0 + rabs))
-    signum = np.floor(0.5 * (1.0 + np.sign(r)))
-    
-    return signum * (s3 + s2 * r) * (1.0 - rfrac**pp)
-    
-def cada_torrilhon_limiter(r,cfl,epsilon=1.0e-3):
+    phi = _out(r,out)
+    s2,s3,pp,a = _scratch(r,work,4)
+    mask = _mask(r,work)
+    np.add(cfl,1.0,out=s2)
+    np.divide(s2,3.0,out=s2)
+    np.subtract(1.0,s2,out=s3)
+
+    # pp = 4 caut s3 / |cfl| where r <= 1, 4 caut s2 / (1-cfl) where r > 1
+    np.divide(2.0,cfl,out=pp)
+    np.absolute(pp,out=pp)
+    np.multiply(pp,caut,out=pp)
+    np.multiply(pp,2.0,out=pp)
+    np.multiply(pp,s3,out=pp)
+    np.subtract(1.0,cfl,out=a)
+    np.divide(2.0,a,out=a)
+    np.multiply(a,caut,out=a)
+    np.multiply(a,2.0,out=a)
+    np.multiply(a,s2,out=a)
+    np.greater(r,1.0,out=mask)
+    np.copyto(pp,a,where=mask)
+
+    # 1 - |(1-|r|) / (1+|r|)|**pp
+    np.absolute(r,out=a)
+    np.subtract(1.0,a,out=phi)
+    np.add(a,1.0,out=a)
+    np.divide(phi,a,out=a)
+    np.absolute(a,out=a)
+    np.power(a,pp,out=a)
+    np.subtract(1.0,a,out=a)
+
+    # (s3 + s2 r) (1 - rfrac**pp) where r > 0, 0 elsewhere
+    np.multiply(s2,r,out=phi)
+    np.add(s3,phi,out=phi)
+    np.multiply(phi,a,out=phi)
+    np.less_equal(r,0.0,out=mask)
+    np.copyto(phi,0.0,where=mask)
+    return phi
+    
+def cada_torrilhon_limiter(r,cfl,epsilon=1.0e-3,out=None,work=None):
     r"""
     Cada-Torrilhon modified
     
     Additional Input:
      - *epsilon* = 
     """
-    a = np.ones((2,len(r))) * 0.95
-    b = np.empty((3,len(r)))
-
-    a[0,:] = cfl
-    cfl = np.min(a)
-    a[1,:] = 0.05
-    cfl = np.max(a)
-    
-    # Multiply all parts except b[0,:] by (1.0 - epsilon) as well
-    b[0,:] = 1.0 + (1+cfl) / 3.0 * (r - 1)
-    b[1,:] = 2.0 * np.abs(r) / (cfl + epsilon)
-    b[2,:] = (8.0 - 2.0 * cfl) / (np.abs(r) * (cfl - 1.0 - epsilon)**2)
-    b[1,::2] *= (1.0 - epsilon)
-    a[0,:] = np.min(b)
-    a[1,:] = (-2.0 * (cfl**2 - 3.0 * cfl + 8.0) * (1.0-epsilon)
-                    / (np.abs(r) * (cfl**3 - cfl**2 - cfl + 1.0 + epsilon)))
-    
-    return np.max(a)
-    
-def cada_torrilhon_limiter_nonlinear(r,cfl):
+    phi = _out(r,out)
+    c,a,b,rabs = _scratch(r,work,4,1)
+    # The CFL number bounded to [0.05,0.95]
+    np.minimum(cfl,0.95,out=c)
+    np.maximum(c,0.05,out=c)
+    np.absolute(r,out=rabs)
+
+    # min(1 + (1+cfl)/3 (r-1), 2|r|/(cfl+eps), (8-2cfl)/(|r| (cfl-1-eps)**2)),
+    # all parts but the first multiplied by (1 - epsilon)
+    roe_third_order_limiter(r,c,phi,work)
+    np.add(c,epsilon,out=a)
+    np.divide(rabs,a,out=a)
+    np.multiply(a,2.0,out=a)
+    np.multiply(a,1.0 - epsilon,out=a)
+    np.minimum(phi,a,out=phi)
+    np.subtract(c,1.0 + epsilon,out=a)
+    np.square(a,out=a)
+    np.multiply(a,rabs,out=a)
+    np.multiply(c,-2.0,out=b)
+    np.add(b,8.0,out=b)
+    np.divide(b,a,out=a)
+    np.multiply(a,1.0 - epsilon,out=a)
+    np.minimum(phi,a,out=phi)
+
+    # -2 (cfl**2 - 3 cfl + 8) (1-eps) / (|r| (cfl**3 - cfl**2 - cfl + 1 + eps))
+    np.subtract(c,3.0,out=a)
+    np.multiply(a,c,out=a)
+    np.add(a,8.0,out=a)
+    np.multiply(a,-2.0 * (1.0 - epsilon),out=a)
+    np.subtract(c,1.0,out=b)
+    np.multiply(b,c,out=b)
+    np.subtract(b,1.0,out=b)
+    np.multiply(b,c,out=b)
+    np.add(b,1.0 + epsilon,out=b)
+    np.multiply(b,rabs,out=b)
+    np.divide(a,b,out=a)
+
+    return np.maximum(phi,a,out=phi)
+    
+def cada_torrilhon_limiter_nonlinear(r,cfl,out=None,work=None):
     r"""
     Cada-Torrilhon modified, version for nonlinear waves
     """
-    a = np.empty((3,len(r)))
-    b = np.empty((2,len(r)))
-    
-    s2 = (1.0 + cfl) / 3.0
-    a[0,:] = 1.0 + s2 * (r - 1.0)
-    a[1,:] = 2.0 * np.abs(r) / (0.6 + np.abs(r))
-    a[2,:] = 5.0 / np.abs(r)
-    b[0,:] = np.min(a)
-    b[1,:] = -3.0 / np.abs(r)
-    
-    return np.max(b)
-    
-def upper_bound_limiter(r,cfl,theta=1.0):
+    phi = _out(r,out)
+    a,b = _scratch(r,work,2,1)
+    np.absolute(r,out=a)
+
+    # max(min(1 + s2 (r-1), 2|r|/(0.6+|r|), 5/|r|), -3/|r|)
+    roe_third_order_limiter(r,cfl,phi,work)
+    np.add(a,0.6,out=b)
+    np.divide(a,b,out=b)
+    np.multiply(b,2.0,out=b)
+    np.minimum(phi,b,out=phi)
+    np.divide(5.0,a,out=b)
+    np.minimum(phi,b,out=phi)
+    np.divide(-3.0,a,out=b)
+    return np.maximum(phi,b,out=phi)
+    
+def upper_bound_limiter(r,cfl,theta=1.0,out=None,work=None):
     r"""
     Upper bound limiter (1st order)
     
     Additional Input:
      - *theta* =
      """
-    a = np.empty((2,len(r)))
-    b = np.zeros((2,len(r)))
-    
-    a[0,:] = 0.001
-    a[1,:] = cfl
-    cfmod1 = np.max(a,axis=0)
-    a[0,:] = 0.999
-    cfmod2 = np.min(a,axis=0)
-    
-    s1 = theta * 2.0 / cfmod1
-    phimax = theta * 2.0 / (1.0 - cfmod2)
-    
-    a[0,:] = s1*r
-    a[1,:] = phimax
-    b[1,:] = np.min(a)
-    
-    return np.max(b)
+    phi = _out(r,out)
+    _ultrabee(r,cfl,theta,phi,work)
+    return phi
 
 
 # ============================================================================
@@ -449,21 +613,21 @@ def upper_bound_limiter(r,cfl,theta=1.0):
 # ============================================================================
 limiter_functions = {1:minmod_limiter,
                      2:superbee_limiter,
-                     3:lambda r,cfl:(r + np.abs(r)) / (1.0 + np.abs(r)),
+                     3:van_leer_limiter,
                      4:mc_limiter,
-                     5:lambda r,cfl:r,
-                     6:lambda r,cfl:0.5*(1.0 + r),
-                     7:lambda r,cfl:(r**2 + r) / (1.0 + r**2),
-                     8:lambda r,cfl:0.5*(1+r)*(1 - np.abs(1-(r))**3/(1+np.abs(r)**3)),
+                     5:beam_warming_limiter,
+                     6:fromm_limiter,
+                     7:albada2_limiter,
+                     8:albada3_limiter,
                      9:van_leer_klein_sharpening_limiter,
-                     10:lambda r,cfl:1.0 + (1.0 + cfl) / 3.0*(r-1.0),
+                     10:roe_third_order_limiter,
                      11:arora_roe,
                      12:theta_limiter,
-                     13:lambda r,cfl:theta_limiter(r,cfl,0.75),
-                     14:lambda r,cfl:theta_limiter(r,cfl,0.5),
+                     13:lambda r,cfl,out=None,work=None:theta_limiter(r,cfl,0.75,out,work),
+                     14:lambda r,cfl,out=None,work=None:theta_limiter(r,cfl,0.5,out,work),
                      15:cfl_superbee,
                      16:cfl_superbee_theta,
-                     17:lambda r,cfl:beta_limiter(r,cfl,theta=0.0),
+                     17:lambda r,cfl,out=None,work=None:beta_limiter(r,cfl,theta=0.0,out=out,work=work),
                      18:beta_limiter,
                      19:hyperbee_limiter,
                      20:superpower_limiter,
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Roofline-style throughput of the Fortran kernels.
+
+For the kernels of the classic solvers (step1, step2, step2ds, step3,
+step3ds) and of the SharpClaw solvers (flux1, flux2), :func:`kernel_model`
+estimates from meqn, mwaves, maux, mbc and the structure of the kernel the
+number of bytes moved and of floating point operations per cell update, a
+cell update being the work of one kernel call on one cell (one sweep for the
+dimensionally split kernels).  Two byte counts are given:
+
+ - *compulsory* bytes - every array of the size of the grid is moved once
+   (twice if it is updated), the least traffic of any implementation
+ - *streamed* bytes - every loop over an array of the size of the grid
+   moves the array, as happens once the grid no longer fits in cache; the
+   work arrays of the size of one grid line used by the 2D and 3D kernels
+   are taken to stay in cache
+
+:func:`measure` times the kernel calls of a number of time steps with the
+profiler of the solver (phase ``kernel``), and :func:`throughput` turns the
+timing into achieved bandwidth and flop rate, which are compared with the
+peaks of the machine measured by :func:`stream` and :func:`peak_flops`:
+
+    >>> machine = perf.machine_peaks()
+    >>> result = perf.measure(solver,solution,nsteps=20,machine=machine)
+    >>> print perf.report([result])
+
+A kernel whose achieved bandwidth on the streamed bytes is close to the
+STREAM bandwidth is memory-bound, and gains from blocking (fusing the loops
+over the grid so that the intermediate arrays stay in cache) rather than
+from vectorization; one whose flop rate is close to the peak of the machine
+is compute-bound.  The ratio of streamed to compulsory bytes bounds the
+gain of blocking.
+
+The flop counts of the Riemann solvers depend on the problem; the defaults
+of :func:`riemann_flops` and :func:`transverse_flops` are those of a linear
+system and may be overridden.  All counts are estimates.
+"""
+
+import numpy as np
+from timeit import default_timer
+
+# Bytes per double precision value
+_word = 8
+
+# ========== Machine peaks ===================================================
+def _best_time(function,repeat):
+    best = None
+    for i in xrange(repeat):
+        start = default_timer()
+        function()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def stream(n=2**23,repeat=5):
+    r"""
+    Measure the memory bandwidth with the four STREAM operations on numpy
+    arrays of *n* doubles
+
+    The triad a = b + s*c takes two passes with numpy, and is counted as
+    the 40 bytes per element they move rather than the 24 of STREAM.
+
+    :Output:
+     - (dict) - Best bandwidth in GB/s of ``copy``, ``scale``, ``add`` and
+       ``triad``
+    """
+    a = np.zeros(n); b = np.ones(n); c = np.ones(n)
+    s = 3.
+    def triad():
+        np.multiply(c,s,out=a)
+        np.add(a,b,out=a)
+    operations = [('copy',lambda: np.copyto(a,b),2),
+                  ('scale',lambda: np.multiply(b,s,out=a),2),
+                  ('add',lambda: np.add(b,c,out=a),3),
+                  ('triad',triad,5)]
+    rates = {}
+    for (name,operation,words) in operations:
+        operation()
+        rates[name] = words*_word*n/_best_time(operation,repeat)/1.e9
+    return rates
+
+def peak_flops(n=512,repeat=5):
+    r"""
+    Measure the peak flop rate in GFLOP/s with a product of *n* by *n*
+    matrices, which the BLAS library runs vectorized and blocked for cache.
+    """
+    a = np.random.rand(n,n); b = np.random.rand(n,n); c = np.empty((n,n))
+    operation = lambda: np.dot(a,b,out=c)
+    operation()
+    return 2.*n**3/_best_time(operation,repeat)/1.e9
+
+def machine_peaks(n=2**23,repeat=5):
+    r"""
+    Measure the peaks of the machine
+
+    :Output:
+     - (dict) - Peak ``bandwidth`` in GB/s (the best STREAM operation),
+       ``flops`` in GFLOP/s and the ``stream`` bandwidths
+    """
+    rates = stream(n,repeat)
+    return {'bandwidth':max(rates.values()),'flops':peak_flops(repeat=repeat),
+            'stream':rates}
+
+# ========== Kernel models ===================================================
+def riemann_flops(meqn,mwaves):
+    r"""
+    Estimate of the flops of a Riemann solve at one interface: the jump in q
+    (meqn), its projection on the eigenvectors (2*meqn*mwaves), the waves
+    (meqn*mwaves) and the fluctuations (2*meqn*mwaves).
+    """
+    return meqn + 5*meqn*mwaves
+
+def transverse_flops(meqn,mwaves):
+    r"""
+    Estimate of the flops of a transverse Riemann solve of one fluctuation
+    at one interface: its projection on the eigenvectors (2*meqn*mwaves)
+    and the up- and down-going fluctuations (2*meqn*mwaves).
+    """
+    return 4*meqn*mwaves
+
+def weno_flops(weno_order):
+    r"""
+    Flops of the WENO reconstruction of the left and right values of one
+    component at one cell: with k = (weno_order+1)/2 stencils, the
+    smoothness indicators (k*(k+1)/2 quadratic terms of 3 flops per
+    stencil), two sets of k nonlinear weights (4 flops each), two sets of k
+    candidate values (2k-1 flops each) and their combinations.  For
+    weno_order = 5 this is 118 flops.
+    """
+    k = (weno_order+1)/2
+    return 3*k*k*(k+1)/2 + 8*k + 2*k*(2*k-1) + 2*(2*k-1)
+
+def kernel_name(solver):
+    r"""Return the name of the Fortran kernel called by *solver*."""
+    from pyclaw.clawpack import ClawSolver
+    from pyclaw.sharpclaw import SharpClawSolver
+    ndim = solver.ndim
+    if isinstance(solver,ClawSolver):
+        if ndim == 1:
+            return 'step1'
+        elif solver.dim_split:
+            return 'step%sds' % ndim
+        return 'step%s' % ndim
+    elif isinstance(solver,SharpClawSolver) and ndim in (1,2):
+        return 'flux%s' % ndim
+    raise Exception('No kernel model for solver %s' % solver.__class__.__name__)
+
+def _classic_sweep(meqn,mwaves,order,limited,rp):
+    r"""
+    Flops per cell of a wave propagation sweep, less the update of q: the
+    Riemann solve, the first-order update, the CFL number and at second
+    order the limiter and the correction fluxes.
+    """
+    flops = rp + 3*meqn + 2*mwaves
+    if order == 2:
+        if limited:
+            flops += (5*meqn+6)*mwaves
+        flops += (5+3*meqn)*mwaves
+    return flops
+
+def _flux1(solver,meqn,mwaves,maux,rp):
+    r"""
+    Words streamed and flops per cell of the SharpClaw 1D kernel, less the
+    update of dq.
+    """
+    k = (solver.weno_order+1)/2
+    # dtdx, the Riemann solve on the reconstructed values and the CFL number
+    words = 1 + (2*meqn+maux) + (meqn*mwaves+mwaves+2*meqn) + (mwaves+1)
+    flops = rp + 2*mwaves
+    # Reconstruction: read q, write ql and qr
+    words += 3*meqn
+    if solver.lim_type == 1:
+        flops += 12*meqn
+    elif solver.lim_type >= 2:
+        flops += meqn*weno_flops(solver.weno_order)
+    if solver.lim_type >= 1:
+        if solver.char_decomp == 1:
+            # Riemann solve on q for the waves, which are reconstructed
+            words += (meqn+maux) + (meqn*mwaves+mwaves+2*meqn) + meqn*mwaves
+            flops += rp
+        elif solver.char_decomp >= 2:
+            # Eigenvectors, and projection of the stencil on them and back
+            width = 3 if solver.lim_type == 1 else 2*k+1
+            words += (meqn+maux) + 2*2*meqn*meqn
+            flops += rp + 2*meqn*meqn*width
+    if solver.tfluct_solver:
+        words += (2*meqn+maux+mwaves) + meqn
+        flops += rp
+    else:
+        # Shift of ql, qr and aux, and Riemann solve inside the cells
+        words += 4*meqn + 3*maux + (2*meqn+2*maux) + (meqn*mwaves+mwaves+2*meqn)
+        flops += rp
+    # Fluctuations read by the update of dq
+    words += 4*meqn + 1
+    return words,flops
+
+def kernel_model(solver,state,rp_flops=None,rpt_flops=None):
+    r"""
+    Estimate the bytes moved and flops per cell update of the Fortran kernel
+    of *solver*, which must have been set up, on *state*.
+
+    The counts include the ghost cells the kernel works on, approximately
+    a factor prod((n+2*mbc)/n) over the interior cells.
+
+    :Input:
+     - *solver* - (:class:`~pyclaw.solver.Solver`) Classic or SharpClaw
+       solver
+     - *state* - (:class:`~pyclaw.state.State`) State the solver works on
+     - *rp_flops* - (int) Flops of a Riemann solve at one interface,
+       ``default = riemann_flops(meqn,mwaves)``
+     - *rpt_flops* - (int) Flops of a transverse Riemann solve,
+       ``default = transverse_flops(meqn,mwaves)``
+
+    :Output:
+     - (dict) - Name of the ``kernel``, ``compulsory_bytes``,
+       ``streamed_bytes`` and ``flops`` per cell update
+    """
+    meqn,maux,mwaves,mbc = state.meqn,state.maux,solver.mwaves,solver.mbc
+    ndim = state.grid.ndim
+    if rp_flops is None:
+        rp_flops = riemann_flops(meqn,mwaves)
+    if rpt_flops is None:
+        rpt_flops = transverse_flops(meqn,mwaves)
+    name = kernel_name(solver)
+
+    if name == 'step1':
+        limited = solver.order == 2 and max(solver.mthlim) > 0
+        compulsory = 2*meqn + maux
+        # Riemann solve, first-order update and CFL number
+        streamed = 1 + (meqn+maux) + (meqn*mwaves+mwaves+2*meqn) \
+                   + (2*meqn+1+2*meqn) + (mwaves+1)
+        if solver.order == 2:
+            streamed += meqn
+            if limited:
+                streamed += 2*meqn*mwaves + mwaves
+            streamed += (mwaves+meqn*mwaves+1+2*meqn) + (3*meqn+1)
+        flops = _classic_sweep(meqn,mwaves,solver.order,limited,rp_flops)
+        if solver.order == 2:
+            flops += 3*meqn
+    elif name.startswith('step'):
+        limited = solver.order == 2 and max(solver.mthlim) > 0
+        split = name.endswith('ds')
+        nsweeps = 1 if split else ndim
+        # Cells of q updated by a sweep: the cell and its neighbours in the
+        # transverse directions
+        nupdated = 2*ndim - 1
+        if split:
+            compulsory = 2*meqn + maux
+        else:
+            compulsory = 3*meqn + maux
+        # Copy of a line of q and of the aux lines, and update of qnew
+        streamed = nsweeps*(meqn + 3**(ndim-1)*maux + 2*nupdated*meqn)
+        flops = _classic_sweep(meqn,mwaves,solver.order,limited,rp_flops)
+        flops += (2*ndim+2)*meqn + 2*(nupdated-1)*meqn
+        if not split:
+            if ndim == 2:
+                ntransverse = 2
+            else:
+                m3,m4 = divmod(solver.order_trans,10)
+                ntransverse = 4*(m3 > 0) + 6*(m3 == 2) + 8*(m4 > 0)
+            # Transverse solves and their increments to the neighbours
+            flops += ntransverse*(rpt_flops + 6*meqn)
+        flops *= nsweeps
+    elif name == 'flux1':
+        compulsory = 2*meqn + maux
+        words,flops = _flux1(solver,meqn,mwaves,maux,rp_flops)
+        streamed = words + 2*meqn
+        flops += 5*meqn
+    elif name == 'flux2':
+        compulsory = 3*meqn + maux
+        # The lines of a sweep stay in cache; the y sweep copies the strided
+        # line of q twice
+        streamed = (3*meqn+maux) + (4*meqn+maux)
+        flops = _flux1(solver,meqn,mwaves,maux,rp_flops)[1]
+        flops = 2*(flops + 5*meqn + meqn)
+
+    ghost = np.prod([(n+2.*mbc)/n for n in state.grid.ng])
+    return {'kernel':name,
+            'compulsory_bytes':_word*compulsory*ghost,
+            'streamed_bytes':_word*streamed*ghost,
+            'flops':flops*ghost}
+
+# ========== Measurement =====================================================
+def throughput(solver,state,calls,seconds,machine=None,**model_options):
+    r"""
+    Return the throughput of *calls* calls of the kernel of *solver* on
+    *state* taking *seconds* in total
+
+    :Input:
+     - *machine* - (dict) Peaks of the machine, as returned by
+       :func:`machine_peaks`, or None
+     - *model_options* - Passed on to :func:`kernel_model`
+
+    :Output:
+     - (dict) - The items of :func:`kernel_model`, and the number of
+       ``cell_updates`` per second, the achieved ``bandwidth`` in GB/s on
+       the streamed bytes and on the compulsory bytes
+       (``compulsory_bandwidth``), the flop rate ``gflops``, and the
+       arithmetic ``intensity`` in flops per compulsory byte.  With
+       *machine*, also the ``attainable`` flop rate min(peak flops,
+       intensity * peak bandwidth) of the roofline, the achieved fractions
+       of the peak bandwidth and flop rate, and the resource the kernel is
+       ``bound`` by, ``'memory'`` or ``'compute'``.
+    """
+    result = kernel_model(solver,state,**model_options)
+    ncells = int(np.prod(state.grid.ng))
+    rate = calls*ncells/seconds
+    result.update({'calls':calls,'seconds':seconds,'ncells':ncells,
+                   'cell_updates':rate,
+                   'bandwidth':rate*result['streamed_bytes']/1.e9,
+                   'compulsory_bandwidth':rate*result['compulsory_bytes']/1.e9,
+                   'gflops':rate*result['flops']/1.e9,
+                   'intensity':result['flops']/result['compulsory_bytes']})
+    if machine is not None:
+        attainable = min(machine['flops'],result['intensity']*machine['bandwidth'])
+        result.update({'attainable':attainable,
+                       'bandwidth_fraction':result['bandwidth']/machine['bandwidth'],
+                       'flops_fraction':result['gflops']/machine['flops']})
+        if result['bandwidth_fraction'] > result['flops_fraction']:
+            result['bound'] = 'memory'
+        else:
+            result['bound'] = 'compute'
+    return result
+
+def measure(solver,solution,nsteps=10,machine=None,**model_options):
+    r"""
+    Time the kernel calls of *nsteps* time steps of size solver.dt of
+    *solver*, which must have been set up and use Fortran kernels, on
+    *solution*, and return their :func:`throughput`.
+
+    The solver profiler is enabled for the steps, after a first step that
+    is not timed, and its timings are left in the profiler.
+    """
+    profiler = solver.profiler
+    enabled,dt_variable = profiler.enabled,solver.dt_variable
+    solver.dt_variable = False
+    try:
+        solver.evolve_to_time(solution,solution.t+solver.dt)
+        profiler.enabled = True
+        profiler.reset()
+        solver.evolve_to_time(solution,solution.t+nsteps*solver.dt)
+    finally:
+        profiler.enabled = enabled
+        solver.dt_variable = dt_variable
+    kernel = profiler.phases.get('kernel')
+    if kernel is None:
+        raise Exception('No kernel calls were timed; kernel_language must be Fortran')
+    return throughput(solver,solution.state,kernel['calls'],kernel['total'],
+                      machine,**model_options)
+
+def report(results):
+    r"""Return a table of the throughput *results* of kernels."""
+    lines = ["%-8s %10s %9s %9s %9s %8s %8s %8s %7s %7s %-7s"
+             % ('kernel','cells','Mcell/s','B/cell','GB/s','flop/B',
+                'GFLOP/s','attain.','%bw','%flop','bound')]
+    for result in results:
+        line = "%-8s %10d %9.2f %9.0f %9.2f %8.2f %8.2f" \
+               % (result['kernel'],result['ncells'],result['cell_updates']/1.e6,
+                  result['streamed_bytes'],result['bandwidth'],
+                  result['intensity'],result['gflops'])
+        if 'attainable' in result:
+            line += " %8.2f %7.1f %7.1f %-7s" \
+                    % (result['attainable'],100.*result['bandwidth_fraction'],
+                       100.*result['flops_fraction'],result['bound'])
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    machine = machine_peaks()
+    for name in ['copy','scale','add','triad']:
+        print "%-6s %8.2f GB/s" % (name,machine['stream'][name])
+    print "%-6s %8.2f GFLOP/s" % ('dgemm',machine['flops'])
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Timing of the phases of a run.
+
+A :class:`Profiler` measures the wall-clock time spent in named phases of a
+run, such as applying boundary conditions, solving Riemann problems or
+limiting.  The code of a phase is wrapped in::
+
+    with solver.profiler.timer('riemann'):
+        wave,s,amdq,apdq = solver.rp(q_l,q_r,aux_l,aux_r,aux_global)
+
+Phases may be nested; for each phase the number of calls, the total time
+and the self time (the total time less that of the phases nested in it) are
+accumulated, so that the self times of all phases add up to the time spent
+in instrumented code.
+
+A profiler is disabled by default.  :meth:`Profiler.timer` then returns a
+shared object whose ``__enter__`` and ``__exit__`` do nothing, so that the
+instrumentation costs a method call per phase.
+"""
+
+import json
+from timeit import default_timer
+
+class _NullTimer(object):
+    r"""Context manager that does nothing, used when profiling is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        return False
+
+_null_timer = _NullTimer()
+
+
+class _Timer(object):
+    r"""Context manager timing one call of a phase."""
+    __slots__ = ('profiler','name','start','nested')
+
+    def __init__(self,profiler,name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.
+        self.profiler._stack.append(self)
+        self.start = default_timer()
+        return self
+
+    def __exit__(self,*args):
+        elapsed = default_timer() - self.start
+        stack = self.profiler._stack
+        stack.pop()
+        if len(stack) > 0:
+            stack[-1].nested += elapsed
+        self.profiler._add(self.name,elapsed,elapsed-self.nested)
+        return False
+
+
+class Profiler(object):
+    r"""
+    Accumulates the time spent in the phases of a run.
+
+    Every solver has a profiler, :attr:`~pyclaw.solver.Solver.profiler`,
+    which is enabled by :attr:`~pyclaw.controller.Controller.profile`.
+
+    .. attribute:: enabled
+
+        Whether phases are timed, ``default = False``
+
+    :Initialization:
+
+    Input:
+     - *enabled* - (bool) Whether phases are timed
+    Output:
+     - (:class:`Profiler`) - Profiler without timings
+    """
+
+    def __init__(self,enabled=False):
+        self.enabled = enabled
+        self.phases = {}
+        r"""(dict) - Number of calls, total and self time of every phase"""
+        self._stack = []
+
+    def timer(self,name):
+        r"""
+        Return a context manager timing phase *name*, if the profiler is
+        enabled.
+        """
+        if not self.enabled:
+            return _null_timer
+        return _Timer(self,name)
+
+    def _add(self,name,total,own):
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = {'calls':1,'total':total,'self':own}
+        else:
+            phase['calls'] += 1
+            phase['total'] += total
+            phase['self'] += own
+
+    def reset(self):
+        r"""Discard the timings."""
+        self.phases = {}
+        self._stack = []
+
+    def summary(self):
+        r"""
+        Return the timings
+
+        :Output:
+         - (dict) - Dictionary by phase name of dictionaries with the
+           number of calls and the total and self time in seconds
+        """
+        return dict([(name,dict(phase)) for (name,phase) in self.phases.iteritems()])
+
+    def table(self):
+        r"""
+        Return the timings as a table of the phases, in decreasing order of
+        self time.
+        """
+        phases = sorted(self.phases.iteritems(),key=lambda item: -item[1]['self'])
+        total = sum([phase['self'] for (name,phase) in phases])
+        lines = ["%-12s %10s %12s %12s %7s" % ('phase','calls','total (s)','self (s)','self %')]
+        for (name,phase) in phases:
+            percent = 100.*phase['self']/total if total > 0 else 0.
+            lines.append("%-12s %10d %12.4f %12.4f %7.1f"
+                         % (name,phase['calls'],phase['total'],phase['self'],percent))
+        lines.append("%-12s %10s %12s %12.4f %7.1f" % ('all','','',total,100.))
+        return '\n'.join(lines)
+
+    def dump(self,path,**info):
+        r"""
+        Write the timings to the JSON file *path*, with the items of *info*
+        (e.g. the number of steps) at the top level.
+        """
+        data = dict(info)
+        data['phases'] = self.summary()
+        f = open(path,'w')
+        json.dump(data,f,indent=1,sort_keys=True)
+        f.close()
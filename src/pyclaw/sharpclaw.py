@@ -7,14 +7,16 @@ Module containing SharpClaw solvers for PyClaw/PetClaw
 """
 # Solver superclass
 from pyclaw.solver import Solver, CFLError
+from pyclaw import ssp
 
-# Reconstructor
+# Reconstructors
+from pyclaw.limiters import recon
 try:
     # load c-based WENO reconstructor (PyWENO)
-    from pyclaw.limiters import reconstruct as recon
+    from pyclaw.limiters import reconstruct as weno_recon
 except:
     # load old WENO5 reconstructor
-    from pyclaw.limiters import recon
+    weno_recon = recon
 
 
 def start_step(solver,solution):
@@ -56,20 +58,39 @@ class SharpClawSolver(Solver):
 
     .. attribute:: time_integrator
 
-        Time integrator to be used.
+        Time integrator to be used, one of the low-storage methods of
+        :mod:`pyclaw.ssp`.
         Euler: forward Euler method.
         SSP33: 3-stages, 3rd-order SSP Runge-Kutta method.
         SSP104: 10-stages, 4th-order SSP Runge-Kutta method.
+        SSP54: 5-stages, 4th-order SSP Runge-Kutta method.
+        SSPs2: s-stages, 2nd-order SSP Runge-Kutta method (s=2,...,10).
         ``Default = 'SSP104'``
 
     .. attribute:: char_decomp
 
         Type of WENO reconstruction.
         0: conservative variables WENO reconstruction (standard).
-        1: characteristic-wise WENO reconstruction.
-        2: transmission-based WENO reconstruction.
+        1: wave-based WENO reconstruction.
+        2: characteristic-wise WENO reconstruction.
+        3: transmission-based WENO reconstruction.
         ``Default = 0``
 
+    .. attribute:: evec
+
+        Function returning the left and right eigenvectors at each
+        interface, needed by the characteristic-wise reconstructions of the
+        Python kernels (char_decomp = 2).  The required signature is::
+
+            evl,evr = evec(q_l,q_r,aux_l,aux_r,aux_global)
+
+        where q_l and q_r are the states on each side of the interfaces,
+        as passed to the Riemann solver, and evl[p,:,i] (evr[:,p,i]) is
+        the left (right) eigenvector of field p at interface i, so that
+        evl[:,:,i] is the inverse of evr[:,:,i].  This mirrors the evec
+        routine of the Fortran kernels.
+        ``Default = None``
+
     .. attribute:: tfluct_solver
 
         Whether a total fluctuation solver have to be used. If True the function
@@ -113,8 +134,31 @@ class SharpClawSolver(Solver):
         Whether a source term is present. If it is present the function that 
         computes its contribution must be provided.
         ``Default = None``
+
+    .. attribute:: error_control
+
+        Whether to choose the time steps from the local error estimates of
+        the embedded method of the time integrator (see :mod:`pyclaw.ssp`),
+        as well as from the CFL number, when dt_variable is set.  Steps
+        whose scaled error is larger than one are rejected and retaken.
+        Requires a time integrator with an embedded method (not 'Euler').
+        ``Default = False``
+
+    .. attribute:: atol
+
+        Absolute tolerance of the local error when error_control is set.
+        ``Default = 1.e-4``
+
+    .. attribute:: rtol
+
+        Relative tolerance of the local error when error_control is set.
+        ``Default = 1.e-4``
     """
-    
+
+    # step() only assigns to state.q once every stage has passed the CFL
+    # check in dq(), so a rejected step leaves q unchanged
+    _q_backup_needed = False
+
     # ========================================================================
     #   Initialization routines
     # ========================================================================
@@ -144,71 +188,144 @@ class SharpClawSolver(Solver):
         self._default_attr_values['cfl_desired'] = 2.45
         self._default_attr_values['cfl_max'] = 2.5
         self._default_attr_values['dq_src'] = None
+        self._default_attr_values['evec'] = None
+        self._default_attr_values['error_control'] = False
+        self._default_attr_values['atol'] = 1.e-4
+        self._default_attr_values['rtol'] = 1.e-4
         
         # Call general initialization function
         super(SharpClawSolver,self).__init__(data)
+
+        # WENO reconstructor of the Python kernels, created by setup
+        self._reconstructor = None
+
+        # Scaled local error estimate of the last step (None if it was not
+        # estimated), reduced over the processes like the CFL number, and
+        # the controller choosing dt from it, created with the registers
+        self._step_error = None
+        self._error_reduce = self.claw_package.CFL(0.)
+        self._error_controller = None
+        self._error_work = {}
         
     # ========== Time stepping routines ======================================
     def step(self,solution):
         """Evolve q over one time step.
 
         Take on Runge-Kutta time step using the method specified by
-        self..time_integrator.  Currently implemented methods:
+        self.time_integrator, one of the low-storage methods of
+        :mod:`pyclaw.ssp`:
 
         'Euler'  : 1st-order Forward Euler integration
         'SSP33'  : 3rd-order strong stability preserving method of Shu & Osher
         'SSP104' : 4th-order strong stability preserving method Ketcheson
+        'SSP54'  : 4th-order strong stability preserving method of Spiteri & Ruuth
+        'SSPs2'  : s-stage, 2nd-order strong stability preserving methods
+                   (s=2,...,10, e.g. 'SSP52')
+
+        The stages are computed in place in the registers allocated by
+        allocate_rk_stages().  If self.error_control is set, the local
+        error of the step is estimated with the embedded method before q
+        is overwritten, and the step is rejected, leaving q unchanged, if
+        the scaled error is larger than one.
         """
-        from pyclaw.solution import Solution
         state = solution.states[0]
 
         self.start_step(self,solution)
 
+        if self._rk_method.name != self.time_integrator:
+            self.allocate_rk_stages(solution)
+        q = state.q
+        if len(self._rk_stages) > 0:
+            stage = self._rk_stages[0]
+            r1 = stage.q
+        else:
+            stage = None
+            r1 = None
+
+        def dq_stage(x,c):
+            if x is q:
+                return self.dq(state)
+            stage.t = state.t + c*self.dt
+            return self.dq(stage)
+
+        check = None
+        self._step_error = None
+        if self.error_control:
+            if self._error_controller is None:
+                raise Exception('Time integrator %s has no embedded method for '
+                                'error control' % self.time_integrator)
+            def check(terms):
+                local = ssp.scaled_error(terms,q,self.atol,self.rtol,self._error_work)
+                self._error_reduce.update_global_max(local)
+                self._step_error = self._error_reduce.get_cached_max()
+                if self._step_error > 1.:
+                    raise ssp.RejectStep
+
         try:
-            if self.time_integrator=='Euler':
-                deltaq=self.dq(state)
-                state.q+=deltaq
-
-            elif self.time_integrator=='SSP33':
-                deltaq=self.dq(state)
-                self._rk_stages[0].q=state.q+deltaq
-                self._rk_stages[0].t =state.t+self.dt
-                deltaq=self.dq(self._rk_stages[0])
-                self._rk_stages[0].q= 0.75*state.q + 0.25*(self._rk_stages[0].q+deltaq)
-                self._rk_stages[0].t = state.t+0.5*self.dt
-                deltaq=self.dq(self._rk_stages[0])
-                state.q = 1./3.*state.q + 2./3.*(self._rk_stages[0].q+deltaq)
-
-            elif self.time_integrator=='SSP104':
-                s1=self._rk_stages[0]
-                s2=self._rk_stages[1]
-                s1.q = state.q.copy()
-
-                deltaq=self.dq(state)
-                s1.q = state.q + deltaq/6.
-                s1.t = state.t + self.dt/6.
-
-                for i in range(4):
-                    deltaq=self.dq(s1)
-                    s1.q=s1.q + deltaq/6.
-                    s1.t =s1.t + self.dt/6.
-
-                s2.q = state.q/25. + 9./25 * s1.q
-                s1.q = 15. * s2.q - 5. * s1.q
-                s1.t = state.t + self.dt/3.
-
-                for i in range(4):
-                    deltaq=self.dq(s1)
-                    s1.q=s1.q + deltaq/6.
-                    s1.t =s1.t + self.dt/6.
-
-                deltaq = self.dq(s1)
-                state.q = s2.q + 0.6 * s1.q + 0.1 * deltaq
-            else:
-                raise Exception('Unrecognized time integrator')
-        except CFLError:
+            self._rk_method.step(dq_stage,q,r1,self._rk_register,check)
+        except (CFLError,ssp.RejectStep):
             return False
 
+    def allocate_rk_stages(self,solution):
+        r"""
+        Allocate the registers of the time integrator, and the controller
+        choosing the time steps from the local error estimates of its
+        embedded method, if it has one.
+        """
+        super(SharpClawSolver,self).allocate_rk_stages(solution)
+        self._error_controller = None
+        if self._rk_method.embedded_order is not None:
+            self._error_controller = ssp.PIController(self._rk_method.embedded_order)
+
+    def error_estimate(self):
+        r"""
+        Return the scaled local error estimate of the last step if
+        :attr:`error_control` is set, else None.
+        """
+        if self.error_control:
+            return self._step_error
+        return None
+
+    def error_dt(self,dt,error,accepted):
+        r"""
+        Return the time step chosen by the PI controller after a step of
+        size *dt* with scaled local error estimate *error*.
+        """
+        return self._error_controller.new_dt(dt,error,accepted)
+
+
+    def allocate_reconstructor(self,meqn,n):
+        r"""
+        Create the WENO reconstructor of arrays of shape (meqn,n) used by the
+        Python kernels if the compiled (PyWENO) reconstruction is available,
+        so that the reconstruction arrays are allocated once for all stages.
+
+        This is typically called by solver.setup(), after
+        allocate_bc_arrays(), with the shape of qbc.
+        """
+        self._reconstructor = None
+        if self.kernel_language=='Python' and self.lim_type==2 and self.char_decomp==0 \
+           and hasattr(weno_recon,'WenoReconstructor'):
+            self._reconstructor = weno_recon.WenoReconstructor(self.weno_order,meqn,n)
+
+    def weno_reconstruct(self,q):
+        r"""
+        Return the component based WENO reconstruction (ql,qr) of *q*, using
+        the reconstructor allocated in setup when there is one.
+        """
+        if self._reconstructor is not None and q.shape == self._reconstructor.shape:
+            return self._reconstructor.reconstruct(q)
+        return weno_recon.weno(self.weno_order,q)
+
+    def eigenvectors(self,q,aux_l,aux_r,state):
+        r"""
+        Return the left and right eigenvectors (evl,evr) at the interfaces
+        of *q*, computed by :attr:`evec`.
+        """
+        if self.evec is None:
+            raise Exception('The characteristic-wise reconstruction needs the '
+                            'eigenvector function solver.evec')
+        return self.evec(q[:,:-1],q[:,1:],aux_l,aux_r,state.aux_global)
 
     def set_mthlim(self):
         self.mthlim = self.limiters
@@ -232,7 +349,8 @@ class SharpClawSolver(Solver):
             raise CFLError('cfl_max exceeded')
 
         if self.dq_src is not None:
-            deltaq+=self.dq_src(self,state,self.dt)
+            with self.profiler.timer('source'):
+                deltaq+=self.dq_src(self,state,self.dt)
 
         return deltaq
 
@@ -249,7 +367,8 @@ class SharpClawSolver(Solver):
         deltaq = self.dq_hyperbolic(state)
 
         if self.dq_src is not None:
-            deltaq+=self.dq_src(self,state,self.dt)
+            with self.profiler.timer('source'):
+                deltaq+=self.dq_src(self,state,self.dt)
 
         return deltaq.flatten('f')
 
@@ -324,6 +443,7 @@ class SharpClawSolver1D(SharpClawSolver):
             self.set_fortran_parameters(state,clawparams,workspace,reconstruct)
 
         self.allocate_bc_arrays(state)
+        self.allocate_reconstructor(state.meqn,self.qbc.shape[1])
 
     def teardown(self):
         r"""
@@ -372,7 +492,8 @@ class SharpClawSolver1D(SharpClawSolver):
     
         import numpy as np
 
-        self.apply_q_bcs(state)
+        with self.profiler.timer('bcs'):
+            self.apply_q_bcs(state)
         q = self.qbc 
 
         grid = state.grid
@@ -382,7 +503,8 @@ class SharpClawSolver1D(SharpClawSolver):
 
         if self.kernel_language=='Fortran':
             from sharpclaw1 import flux1
-            dq,cfl=flux1(q,self.auxbc,self.dt,state.t,ixy,mx,self.mbc,mx)
+            with self.profiler.timer('kernel'):
+                dq,cfl=flux1(q,self.auxbc,self.dt,state.t,ixy,mx,self.mbc,mx)
 
         elif self.kernel_language=='Python':
 
@@ -404,27 +526,41 @@ class SharpClawSolver1D(SharpClawSolver):
                 aux_r = None
 
             #Reconstruct (wave reconstruction uses a Riemann solve)
-            if self.lim_type==-1: #1st-order Godunov
-                ql=q; qr=q;
-            elif self.lim_type==0: #Unlimited reconstruction
-                raise NotImplementedError('Unlimited reconstruction not implemented')
-            elif self.lim_type==1: #TVD Reconstruction
-                raise NotImplementedError('TVD reconstruction not implemented')
-            elif self.lim_type==2: #WENO Reconstruction
-                if self.char_decomp==0: #No characteristic decomposition
-                    ql,qr=recon.weno(5,q)
-                elif self.char_decomp==1: #Wave-based reconstruction
-                    q_l=q[:,:-1]
-                    q_r=q[:,1: ]
-                    wave,s,amdq,apdq = self.rp(q_l,q_r,aux_l,aux_r,state.aux_global)
-                    ql,qr=recon.weno5_wave(q,wave,s)
-                elif self.char_decomp==2: #Characteristic-wise reconstruction
-                    raise NotImplementedError
+            with self.profiler.timer('limiting'):
+                if self.lim_type==-1: #1st-order Godunov
+                    ql=q; qr=q;
+                elif self.lim_type==0: #Unlimited reconstruction
+                    raise NotImplementedError('Unlimited reconstruction not implemented')
+                elif self.lim_type==1: #TVD Reconstruction
+                    if self.char_decomp==0: #No characteristic decomposition
+                        ql,qr=recon.tvd2(q,self.mthlim)
+                    elif self.char_decomp==2: #Characteristic-wise reconstruction
+                        evl,evr=self.eigenvectors(q,aux_l,aux_r,state)
+                        ql,qr=recon.tvd2_char(q,self.mthlim,evl,evr)
+                    else:
+                        raise NotImplementedError('TVD reconstruction with char_decomp %s not implemented'
+                                                  % self.char_decomp)
+                elif self.lim_type==2: #WENO Reconstruction
+                    if self.char_decomp==0: #No characteristic decomposition
+                        ql,qr=self.weno_reconstruct(q)
+                    elif self.char_decomp==1: #Wave-based reconstruction
+                        q_l=q[:,:-1]
+                        q_r=q[:,1: ]
+                        with self.profiler.timer('riemann'):
+                            wave,s,amdq,apdq = self.rp(q_l,q_r,aux_l,aux_r,state.aux_global)
+                        ql,qr=recon.weno5_wave(q,wave,s)
+                    elif self.char_decomp==2: #Characteristic-wise reconstruction
+                        evl,evr=self.eigenvectors(q,aux_l,aux_r,state)
+                        ql,qr=recon.weno5_char(q,evl,evr)
+                    else:
+                        raise NotImplementedError('WENO reconstruction with char_decomp %s not implemented'
+                                                  % self.char_decomp)
 
             # Solve Riemann problem at each interface
             q_l=qr[:,:-1]
             q_r=ql[:,1: ]
-            wave,s,amdq,apdq = self.rp(q_l,q_r,aux_l,aux_r,state.aux_global)
+            with self.profiler.timer('riemann'):
+                wave,s,amdq,apdq = self.rp(q_l,q_r,aux_l,aux_r,state.aux_global)
 
             # Loop limits for local portion of grid
             # THIS WON'T WORK IN PARALLEL!
@@ -439,7 +575,8 @@ class SharpClawSolver1D(SharpClawSolver):
                 cfl = max(cfl,smax1,smax2)
 
             #Find total fluctuation within each cell
-            wave,s,amdq2,apdq2 = self.rp(ql,qr,aux,aux,state.aux_global)
+            with self.profiler.timer('riemann'):
+                wave,s,amdq2,apdq2 = self.rp(ql,qr,aux,aux,state.aux_global)
 
             # Compute dq
             for m in xrange(state.meqn):
@@ -448,7 +585,8 @@ class SharpClawSolver1D(SharpClawSolver):
 
         else: raise Exception('Unrecognized value of solver.kernel_language.')
 
-        self.cfl.update_global_max(cfl)
+        with self.profiler.timer('cfl'):
+            self.cfl.update_global_max(cfl)
         return dq[:,self.mbc:-self.mbc]
     
 
@@ -543,7 +681,8 @@ class SharpClawSolver2D(SharpClawSolver):
     
         import numpy as np
 
-        self.apply_q_bcs(state)
+        with self.profiler.timer('bcs'):
+            self.apply_q_bcs(state)
         q = self.qbc 
 
         grid = state.grid
@@ -555,9 +694,11 @@ class SharpClawSolver2D(SharpClawSolver):
 
         if self.kernel_language=='Fortran':
             from sharpclaw2 import flux2
-            dq,cfl=flux2(q,self.auxbc,self.dt,state.t,mbc,maxm,mx,my)
+            with self.profiler.timer('kernel'):
+                dq,cfl=flux2(q,self.auxbc,self.dt,state.t,mbc,maxm,mx,my)
 
         else: raise Exception('Only Fortran kernels are supported in 2D.')
 
-        self.cfl.update_global_max(cfl)
+        with self.profiler.timer('cfl'):
+            self.cfl.update_global_max(cfl)
         return dq[:,mbc:-mbc,mbc:-mbc]
@@ -388,11 +388,9 @@ class Solution(object):
             format_list = [format]
         elif isinstance(format,list):
             format_list = format
-        if 'petsc' in format_list:
-            from petclaw import io
         # Loop over list of formats requested
         for form in format_list:
-            write_func = eval('io.write_%s' % form)
+            write_func = get_io_function('write',form)
             if file_prefix is None:
                 write_func(self,frame,path,write_aux=write_aux,
                             options=options,write_p=write_p)
@@ -435,10 +433,8 @@ class Solution(object):
          - (bool) - True if read was successful, False otherwise
         """
         
-        if format=='petsc':
-            from petclaw import io
         path = os.path.expandvars(os.path.expanduser(path))
-        read_func = eval('io.read_%s' % format)
+        read_func = get_io_function('read',format)
         if file_prefix is None:
             read_func(self,frame,path,read_aux=read_aux,options=options)
         else:
@@ -454,3 +450,17 @@ class Solution(object):
         raise NotImplementedError("Direct solution plotting has not been " +
             "implemented as of yet, please refer to the plotting module for" +
             " how to plot solutions.")
+
+
+def get_io_function(kind,format):
+    r"""
+    Return the function io.<kind>_<format> that reads or writes *format*
+
+    The formats whose names start with ``petsc`` are the parallel formats
+    of the petclaw io package.
+    """
+    if format.startswith('petsc'):
+        from petclaw import io as format_io
+    else:
+        format_io = io
+    return getattr(format_io,'%s_%s' % (kind,format))
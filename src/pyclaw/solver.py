@@ -7,6 +7,7 @@ import logging
 
 # Clawpack modules
 from pyclaw.data import Data
+from pyclaw.profiling import Profiler
 
 class CFLError(Exception):
     """Error raised when cfl_max is exceeded.  Is this a
@@ -66,14 +67,39 @@ class Solver(object):
          - ``dtmin`` = Minimum time step taken
          - ``dtmax`` = Maximum time step taken
          - ``numsteps`` = Current number of time steps that have been taken
+         - ``bytes_copied`` = Number of bytes of solution data copied by the
+           solver (e.g. into the ghost-padded array qbc, or to save q so
+           that a step can be retaken)
+         - ``numrejected`` = Number of time steps rejected because the
+           CFL number was too large
+         - ``profile`` = If :attr:`profiler` is enabled, the number of
+           calls, total and self time of every phase timed since the
+           profiler was reset (see :meth:`~pyclaw.profiling.Profiler.summary`)
 
         solver.status is reset each time solver.evolve_to_time is called, and
         it is also returned by solver.evolve_to_time.
+
+    .. attribute:: after_step
+
+        (func) Function called as after_step(solver,solution) after every
+        accepted time step, once the time step size for the next step has
+        been chosen, ``default = None``.  The Controller uses it for
+        periodic checkpointing.
     
     .. attribute:: dt_variable
     
         Whether to allow the time step to vary, ``default = True``.
         If false, the initial time step size is used for all steps.
+
+    .. attribute:: predictive_cfl
+
+        If True, q is only saved before a time step (so that the step can
+        be retaken if it violates cfl_max) when the CFL number predicted 
+        for that step from the wave speeds of the previous steps is close to
+        cfl_max.  If a step for which q was not saved turns out to violate
+        cfl_max, a CFLError is raised.  Solvers whose steps keep a copy of
+        q from before the step (the unsplit classic Fortran solvers) never
+        need to save q, and ignore this option.  ``default = False``.
         
     .. attribute:: max_steps
     
@@ -127,7 +153,11 @@ class Solver(object):
             'max_steps','dt_variable','mbc']
             
     _default_attr_values = {'dt_initial':0.1, 'dt_max':1e99, 'max_steps':1000,
-            'dt_variable':True}
+            'dt_variable':True, 'predictive_cfl':False}
+
+    # Whether a rejected step may leave q modified, so that q must be saved
+    # before each step in order to retake it
+    _q_backup_needed = True
     
     #  ======================================================================
     #   Initialization routines
@@ -175,7 +205,14 @@ class Solver(object):
         self.status = {'cflmax':self.cfl.get_cached_max(),
                        'dtmin':self.dt, 
                        'dtmax':self.dt,
-                       'numsteps':0 }
+                       'numsteps':0,
+                       'bytes_copied':0,
+                       'numrejected':0 }
+
+        # Buffers used to save q before a step, and the maximum wave speeds
+        # (relative to the grid spacing) of the last accepted steps
+        self._q_backups = []
+        self._wave_speeds = []
         
         # No default BCs; user must set them
         self.bc_lower =    [None]*self.ndim
@@ -190,7 +227,22 @@ class Solver(object):
         self.user_aux_bc_upper = None
 
         self.compute_gauge_values = None
-        r"""(function) - Function that computes quantities to be recorded at gaugues"""
+        r"""(function) - Function that computes quantities to be recorded at
+        gauges from the q and aux values at the gauges, given as arrays with
+        a column per gauge; if None, q is recorded"""
+
+        self.after_step = None
+        r"""(function) - Function called after every accepted time step"""
+        self.evolve_position = None
+        r"""(tuple) - While after_step is called, the position in
+        evolve_to_time: (start time, number of steps taken, whether the
+        evolution is finished), from which it can be resumed"""
+        self._resume = None
+
+        self.profiler = Profiler()
+        r"""(:class:`~pyclaw.profiling.Profiler`) - Timings of the phases of
+        the time steps, taken when the profiler is enabled (e.g. by
+        :attr:`~pyclaw.controller.Controller.profile`)"""
 
         self.qbc          = None
         r""" Array to hold ghost cell values.  This is the one that gets passed
@@ -265,30 +317,27 @@ class Solver(object):
 
     def allocate_rk_stages(self,solution):
         r"""
-        Instantiate State objects for Runge--Kutta stages.
+        Allocate the registers of the Runge--Kutta time integrator.
 
         This routine is only used by method-of-lines solvers (SharpClaw),
-        not by the Classic solvers.  It allocates additional State objects
-        to store the intermediate stages used by Runge--Kutta time integrators.
+        not by the Classic solvers.  The low-storage methods of
+        :mod:`pyclaw.ssp` need at most two registers besides q: the first
+        is the q of a stage state (see :meth:`State.new_stage`) at which
+        dq is evaluated, the second is only an array.
 
         If we create a MethodOfLinesSolver subclass, this should be moved there.
         """
-        if self.time_integrator   == 'Euler':  nregisters=1
-        elif self.time_integrator == 'SSP33':  nregisters=2
-        elif self.time_integrator == 'SSP104': nregisters=3
- 
+        import numpy as np
+        from pyclaw import ssp
+        self._rk_method = ssp.get_method(self.time_integrator)
+
         state = solution.states[0]
-        # use the same class constructor as the solution for the Runge Kutta stages
-        State = type(state)
         self._rk_stages = []
-        for i in range(nregisters-1):
-            #Maybe should use State.copy() here?
-            self._rk_stages.append(State(state.grid,state.meqn,state.maux))
-            self._rk_stages[-1].aux_global       = state.aux_global
-            self._rk_stages[-1].set_mbc(self.mbc)
-            self._rk_stages[-1].t                = state.t
-            if state.maux > 0:
-                self._rk_stages[-1].aux              = state.aux
+        self._rk_register = None
+        if self._rk_method.nregisters >= 1:
+            self._rk_stages.append(state.new_stage())
+        if self._rk_method.nregisters >= 2:
+            self._rk_register = np.empty(state.q.shape,order='F')
 
 
     # ========================================================================
@@ -310,7 +359,8 @@ class Solver(object):
         auxbc_dim.insert(0,state.maux)
         self.auxbc = np.empty(auxbc_dim,order='F')
         if state.maux>0:
-            self.apply_aux_bcs(state)
+            with self.profiler.timer('aux_bcs'):
+                self.apply_aux_bcs(state)
 
     def apply_q_bcs(self,state):
         r"""
@@ -348,9 +398,11 @@ class Solver(object):
         
         import numpy as np
 
+        if not state.q_is_interior(self.mbc,self.qbc):
+            self.status['bytes_copied'] += state.q.nbytes
         self.qbc = state.get_qbc_from_q(self.mbc,'q',self.qbc)
         grid = state.grid
-       
+
         for idim,dim in enumerate(grid.dimensions):
             # First check if we are actually on the boundary
             # (in case of a parallel run)
@@ -492,7 +544,7 @@ class Solver(object):
         self.auxbc = state.get_qbc_from_q(self.mbc,'aux',self.auxbc)
 
         grid = state.grid
-       
+
         for idim,dim in enumerate(grid.dimensions):
             # First check if we are actually on the boundary
             # (in case of a parallel run)
@@ -624,13 +676,24 @@ class Solver(object):
             
         # Parameters for time-stepping
         retake_step = False
-        tstart = solution.t
-
-        # Reset status dictionary
-        self.status['cflmax'] = self.cfl.get_cached_max()
-        self.status['dtmin'] = self.dt
-        self.status['dtmax'] = self.dt
-        self.status['numsteps'] = 0
+        if self._resume is None:
+            tstart = solution.t
+            nstart = 0
+
+            # Reset status dictionary
+            self.status['cflmax'] = self.cfl.get_cached_max()
+            self.status['dtmin'] = self.dt
+            self.status['dtmax'] = self.dt
+            self.status['numsteps'] = 0
+            self.status['bytes_copied'] = 0
+            self.status['numrejected'] = 0
+        else:
+            # Continue an evolution saved in a checkpoint, with the status
+            # restored from the checkpoint
+            tstart,nstart,finished = self._resume
+            self._resume = None
+            if finished:
+                return self.status
 
         # Setup for the run
         if not self.dt_variable:
@@ -647,7 +710,7 @@ class Solver(object):
             self.max_steps = 0
                 
         # Main time-stepping loop
-        for n in xrange(self.max_steps):
+        for n in xrange(nstart,self.max_steps):
             
             state = solution.state
             
@@ -657,15 +720,18 @@ class Solver(object):
 
             # Keep a backup in case we need to retake a time step
             if self.dt_variable:
-                q_backup = state.q.copy('F')
+                q_backup = self.save_q(state)
                 told = solution.t
             retake_step = False  # Reset flag
             
-            self.step(solution)
+            with self.profiler.timer('step'):
+                self.step(solution)
 
-            # Check to make sure that the Courant number was not too large
+            # Check to make sure that the Courant number was not too large,
+            # nor the local error if the solver estimates it
             cfl = self.cfl.get_cached_max()
-            if cfl <= self.cfl_max:
+            error = self.error_estimate()
+            if cfl <= self.cfl_max and (error is None or error <= 1.0):
                 # Accept this step
                 self.status['cflmax'] = max(cfl, self.status['cflmax'])
                 if self.dt_variable==True:
@@ -680,14 +746,20 @@ class Solver(object):
                 self.write_gauge_values(solution)
                 # Increment number of time steps completed
                 self.status['numsteps'] += 1
+                self._wave_speeds = self._wave_speeds[-1:] + [cfl/self.dt]
                 # See if we are finished yet
                 if solution.t >= tend or take_one_step:
+                    self._call_after_step(solution,tstart,n,True)
                     break
             else:
                 # Reject this step
-                self.logger.debug("Rejecting time step, CFL number too large")
+                if cfl > self.cfl_max:
+                    self.logger.debug("Rejecting time step, CFL number too large")
+                else:
+                    self.logger.debug("Rejecting time step, local error too large")
+                self.status['numrejected'] += 1
                 if self.dt_variable:
-                    state.q = q_backup
+                    self.restore_q(state,q_backup)
                     solution.t = told
                     # Retake step
                     retake_step = True
@@ -695,18 +767,27 @@ class Solver(object):
                     # Give up, we cannot adapt, abort
                     self.status['cflmax'] = \
                         max(cfl, self.status['cflmax'])
-                    raise Exception('CFL too large, giving up!')
+                    if cfl > self.cfl_max:
+                        raise Exception('CFL too large, giving up!')
+                    raise Exception('Local error too large, giving up!')
                     
-            # Choose new time step
+            # Choose new time step, the smaller of those allowed by the CFL
+            # number and by the local error
             if self.dt_variable:
+                dt = self.dt
                 if cfl > 0.0:
                     self.dt = min(self.dt_max,self.dt * self.cfl_desired 
                                     / cfl)
-                    self.status['dtmin'] = min(self.dt, self.status['dtmin'])
-                    self.status['dtmax'] = max(self.dt, self.status['dtmax'])
                 else:
                     self.dt = self.dt_max
+                if error is not None:
+                    self.dt = min(self.dt,self.error_dt(dt,error,not retake_step))
+                if cfl > 0.0 or error is not None:
+                    self.status['dtmin'] = min(self.dt, self.status['dtmin'])
+                    self.status['dtmax'] = max(self.dt, self.status['dtmax'])
 
+            if not retake_step:
+                self._call_after_step(solution,tstart,n,False)
       
         # End of main time-stepping loop -------------------------------------
 
@@ -714,8 +795,116 @@ class Solver(object):
                 and self.status['numsteps'] == self.max_steps:
             raise Exception("Maximum number of timesteps have been taken")
 
+        if self.profiler.enabled:
+            self.status['profile'] = self.profiler.summary()
         return self.status
 
+    def _call_after_step(self,solution,tstart,n,finished):
+        if self.after_step is not None:
+            self.evolve_position = (tstart,n+1,finished)
+            try:
+                self.after_step(self,solution)
+            finally:
+                self.evolve_position = None
+
+    def resume(self,position):
+        r"""
+        Make the next call to :meth:`evolve_to_time` continue from
+        *position*, a value of :attr:`evolve_position`, instead of starting
+        a new evolution.  The solution, dt and status must be those at the
+        time *position* was recorded.
+        """
+        self._resume = tuple(position)
+
+    def predict_cfl(self):
+        r"""
+        Estimate the CFL number of the next step of size dt, assuming
+        that the maximum wave speed keeps growing at the rate observed over
+        the last two accepted steps (or stays constant if it is decreasing).
+
+        :Output:
+         - (float) - Predicted CFL number, or None if fewer than two steps 
+           have been accepted
+        """
+        if len(self._wave_speeds) < 2:
+            return None
+        speed_old,speed = self._wave_speeds
+        growth = 1.0
+        if speed_old > 0.0:
+            growth = max(growth,speed/speed_old)
+        return self.dt * speed * growth
+
+    def save_q(self,state):
+        r"""
+        Save state.q so that the coming step can be retaken.
+
+        The copy goes into one of two buffers that are allocated once; a 
+        buffer that has been given back to state.q by :meth:`restore_q` 
+        is not overwritten.  If the step itself keeps a copy of q from
+        before the step (see :meth:`_q_before_step`), that copy is returned
+        and nothing is saved.  Otherwise, if :attr:`predictive_cfl` is set,
+        nothing is saved unless the predicted CFL number is more than
+        halfway from cfl_desired to cfl_max.
+
+        :Output:
+         - (ndarray) - The saved copy of q, or None if nothing was saved
+        """
+        import numpy as np
+
+        if not self._q_backup_needed:
+            return None
+        q_before_step = self._q_before_step(state)
+        if q_before_step is not None:
+            return q_before_step
+        if self.predictive_cfl:
+            cfl = self.predict_cfl()
+            if cfl is not None and cfl < 0.5*(self.cfl_desired+self.cfl_max):
+                return None
+
+        q = state.q
+        if len(self._q_backups) == 0 or self._q_backups[0].shape != q.shape:
+            self._q_backups = [np.empty(q.shape,order='F') for i in xrange(2)]
+        for q_backup in self._q_backups:
+            if q_backup is not q: break
+        q_backup[...] = q
+        self.status['bytes_copied'] += q_backup.nbytes
+        return q_backup
+
+    def _q_before_step(self,state):
+        r"""
+        Return the array in which the coming step will keep the values of q
+        before the step, or None if it keeps no such copy.
+        """
+        return None
+
+    def restore_q(self,state,q_backup):
+        r"""
+        Undo a rejected step by giving state.q the values saved by 
+        :meth:`save_q`.  The saved array itself becomes state.q, so nothing
+        is copied here.
+        """
+        if q_backup is not None:
+            state.q = q_backup
+        elif self._q_backup_needed:
+            raise CFLError('CFL too large and q was not saved before the step;'
+                           ' unset predictive_cfl to be able to retake steps')
+
+    def error_estimate(self):
+        r"""
+        Return the scaled local error estimate of the last step, which is
+        rejected if it is larger than one, or None if the solver does not
+        estimate it.
+        """
+        return None
+
+    def error_dt(self,dt,error,accepted):
+        r"""
+        Return the time step allowed by the local error after a step of size
+        *dt* with scaled local error estimate *error* (see
+        :meth:`error_estimate`), which was *accepted* or not.
+        """
+        return dt
+
     def step(self):
         r"""
         Take one step
@@ -732,11 +921,20 @@ class Solver(object):
         r"""Write solution (or derived quantity) values at each gauge coordinate
             to file.
         """
-        for i,gauge in enumerate(solution.state.grid.gauges):
-            x=gauge[0]; y=gauge[1]
-            aux=solution.state.aux[:,x,y]
-            q=solution.state.q[:,x,y]
-            p=self.compute_gauge_values(q,aux)
-            t=solution.t
-            solution.state.grid.gauge_files[i].write(str(t)+' '+' '.join(str(j) for j in p)+'\n')  
+        state = solution.state
+        recorder = state.grid.gauge_recorder
+        with self.profiler.timer('gauges'):
+            if recorder.ghosted:
+                # The stencils reach into the parts of the grid of other
+                # processes.  Filling the ghost cells is collective, so it is
+                # done even if this process has no gauges.
+                qbc = state.get_qbc_from_q(self.mbc,'q',self.qbc)
+                auxbc = None
+                if state.aux is not None and self.compute_gauge_values is not None:
+                    auxbc = state.get_qbc_from_q(self.mbc,'aux',self.auxbc)
+                recorder.record(solution.t,qbc,auxbc,self.compute_gauge_values,
+                                self.mbc)
+            else:
+                recorder.record(solution.t,state.q,state.aux,
+                                self.compute_gauge_values)
 
@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Low-storage strong stability preserving (SSP) Runge-Kutta methods.
+
+The methods are given as tables of the Shu-Osher form written for two
+registers, *r1* and *r2*, besides the solution *u* at the start of the
+step.  Each stage evaluates the increment ``d = dt*f(x)`` at the stage
+value x, which is u for the first stage and r1 for the others, then
+applies a list of linear combinations::
+
+    (target, [(coefficient, source), ...])
+
+that sets register *target* ('r1', 'r2' or 'u') to the sum of the
+coefficients times the registers *source* ('u', 'r1', 'r2' or 'd').  Only
+the last stage writes u, so that u is unchanged if a stage fails, e.g. on a
+CFL violation.
+
+The linear combinations are computed in place (see :func:`lincomb`), so
+that a step allocates nothing besides the increments returned by f, and
+the methods need at most two q-sized registers.
+
+Methods may have an embedded method of lower order, whose solution is a
+linear combination of the registers at the last stage; the difference of
+the two solutions estimates the local error of the step before u is
+overwritten, so that a step can be rejected on it (see
+:meth:`SSPMethod.step`), and :class:`PIController` chooses the time steps
+from these estimates.
+
+The available methods, see :data:`methods`, are
+
+ - 'Euler': forward Euler (no register)
+ - 'SSP33': 3-stage, 3rd order method of Shu and Osher (one register),
+   with an embedded 2nd order method
+ - 'SSP104': 10-stage, 4th order method of Ketcheson (two registers), with
+   an embedded 2nd order method (its last stage)
+ - 'SSP54': 5-stage, 4th order method of Spiteri and Ruuth (two registers),
+   with an embedded 2nd order method
+ - 'SSPs2' for s = 2 to 10 (i.e. 'SSP22' to 'SSP102'): s-stage, 2nd order
+   methods with SSP coefficient s-1 (one register), with an embedded 1st
+   order method (their last stage)
+
+The embedded methods are convex combinations of forward Euler steps, hence
+SSP as well.
+"""
+
+import numpy as np
+
+_block_elements = 32768
+
+class RejectStep(Exception):
+    r"""
+    Raised by the check function of :meth:`SSPMethod.step` to reject the
+    step, which leaves u unchanged.
+    """
+    pass
+
+class SSPMethod(object):
+    r"""
+    Low-storage SSP Runge-Kutta method.
+
+    :Initialization:
+
+    Input:
+     - *name* - (string) Name of the method
+     - *order* - (int) Order of accuracy
+     - *sspcoef* - (float) SSP coefficient: the method is SSP for time
+       steps up to sspcoef times the forward Euler limit
+     - *stages* - (list) Linear combinations of each stage, as described
+       in :mod:`pyclaw.ssp`
+     - *embedded* - (tuple) Order of the embedded method and terms
+       [(coefficient, source), ...] of the difference between the
+       solutions of the method and of the embedded method, in the registers
+       of the last stage, or None
+    Output:
+     - (:class:`SSPMethod`) - Method
+    """
+
+    def __init__(self,name,order,sspcoef,stages,embedded=None):
+        self.name = name
+        self.order = order
+        self.sspcoef = sspcoef
+        self.stages = stages
+        r"""(list) - Linear combinations applied after each stage"""
+        self.embedded_order = None
+        r"""(int) - Order of the embedded method, None if there is none"""
+        self.error_terms = None
+        r"""(list) - Terms of the local error estimate"""
+        if embedded is not None:
+            (self.embedded_order,self.error_terms) = embedded
+        targets = set([target for ops in stages for (target,terms) in ops])
+        self.nregisters = len(targets & set(['r1','r2']))
+        r"""(int) - Number of registers besides u"""
+        self.c = self._abscissae()
+        r"""(list) - Time of each stage, as a fraction of the time step"""
+        self._work = {}
+
+    def _abscissae(self):
+        r"""
+        Return the time of each stage.  A register holding sum(a_i*x_i)
+        + b*d is an approximation of sum(a_i) times the solution at the time
+        sum(a_i*t_i) + b, which is tracked as its (weight, time moment); the
+        result of the step must approximate the solution at the end of it.
+        """
+        moments = {'u':(1.,0.)}
+        c = []
+        for (k,ops) in enumerate(self.stages):
+            if k < len(self.stages)-1 and ('u' in [target for (target,terms) in ops]):
+                raise ValueError('%s: only the last stage may write u' % self.name)
+            x = 'u' if k == 0 else 'r1'
+            weight,moment = moments[x]
+            c.append(moment/weight)
+            moments['d'] = (0.,1.)
+            for (target,terms) in ops:
+                moments[target] = (sum([coef*moments[source][0] for (coef,source) in terms]),
+                                   sum([coef*moments[source][1] for (coef,source) in terms]))
+        if 'u' not in [target for (target,terms) in self.stages[-1]]:
+            raise ValueError('%s: the last stage must write u' % self.name)
+        if abs(moments['u'][0]-1.) > 1.e-12 or abs(moments['u'][1]-1.) > 1.e-12:
+            raise ValueError('%s: the step is not consistent' % self.name)
+        return c
+
+    def step(self,f,u,r1=None,r2=None,check=None):
+        r"""
+        Take one step of the method, overwriting *u* with the solution at
+        the end of it.
+
+        :Input:
+         - *f* - (function) Called as f(x,c) with the stage value x (u or
+           r1) and the time c of the stage as a fraction of the time step,
+           returns the increment dt*f(x) (an array of the shape of u)
+         - *u* - (ndarray) Solution at the start of the step
+         - *r1*, *r2* - (ndarray) Registers of the shape of u, as many as
+           :attr:`nregisters`
+         - *check* - (function) If the method has an embedded method,
+           called before u is overwritten with the terms [(coefficient,
+           array), ...] of the local error estimate (see
+           :func:`scaled_error`); it may raise :class:`RejectStep`
+        """
+        registers = {'u':u,'r1':r1,'r2':r2}
+        last = len(self.stages)-1
+        for (k,ops) in enumerate(self.stages):
+            x = u if k == 0 else r1
+            registers['d'] = f(x,self.c[k])
+            if k == last and check is not None and self.error_terms is not None:
+                check([(coef,registers[source]) for (coef,source) in self.error_terms])
+            for (target,terms) in ops:
+                lincomb(registers[target],[(coef,registers[source]) for (coef,source) in terms],
+                        self._work)
+
+    def __str__(self):
+        return "%s: %s stages, order %s, SSP coefficient %s, %s registers" \
+               % (self.name,len(self.stages),self.order,self.sspcoef,self.nregisters)
+
+
+def lincomb(out,terms,work=None):
+    r"""
+    Set *out* to the sum of coef*x for (coef,x) in *terms*, in place.
+
+    *out* may be one of the arrays of terms.  The sum is accumulated in
+    *out*, starting with its own term; the products by the coefficients
+    are computed in a scratch array of *work* (a dictionary, in which it is
+    kept between calls).  Arrays larger than a few hundred kilobytes are
+    processed by blocks of their last axis, so that the scratch array stays
+    small and each block stays in cache while it is accumulated.  All
+    arrays must have the shape of *out*.
+    """
+    if work is None: work = {}
+    inplace = False
+    for (k,(coef,x)) in enumerate(terms):
+        if x is out:
+            terms = [terms[k]] + terms[:k] + terms[k+1:]
+            inplace = True
+            break
+    n = out.shape[-1]
+    if out.size <= _block_elements:
+        _accumulate(out,terms,inplace,work)
+    else:
+        nblock = max(1,_block_elements*n/out.size)
+        for i in xrange(0,n,nblock):
+            block = (Ellipsis,slice(i,min(i+nblock,n)))
+            _accumulate(out[block],[(coef,x[block]) for (coef,x) in terms],inplace,work)
+
+def _accumulate(out,terms,inplace,work):
+    r"""
+    Set out to the sum of coef*x for (coef,x) in terms; if *inplace*, the
+    first term is that of out itself.
+    """
+    tmp = work.get(out.shape)
+    if tmp is None:
+        tmp = work[out.shape] = np.empty(out.shape)
+
+    (coef,x) = terms[0]
+    if inplace:
+        if coef != 1.: np.multiply(out,coef,out)
+    elif coef == 1.: out[...] = x
+    else: np.multiply(x,coef,out)
+    for (coef,x) in terms[1:]:
+        if coef == 1.:
+            np.add(out,x,out)
+        else:
+            np.multiply(x,coef,tmp)
+            np.add(out,tmp,out)
+
+
+def scaled_error(terms,u,atol,rtol,work=None):
+    r"""
+    Return the maximum over all entries of abs(e)/(atol+rtol*abs(u)),
+    where e is the sum of coef*x for (coef,x) in *terms*, computed by
+    blocks as :func:`lincomb` does.
+    """
+    if work is None: work = {}
+    n = u.shape[-1]
+    nblock = n if u.size <= _block_elements else max(1,_block_elements*n/u.size)
+    error = 0.
+    for i in xrange(0,n,nblock):
+        block = (Ellipsis,slice(i,min(i+nblock,n)))
+        shape = u[block].shape
+        e = work.get(('error',shape))
+        if e is None:
+            e = work[('error',shape)] = np.empty(shape)
+            work[('scale',shape)] = np.empty(shape)
+        scale = work[('scale',shape)]
+        _accumulate(e,[(coef,x[block]) for (coef,x) in terms],False,work)
+        np.absolute(e,e)
+        np.absolute(u[block],scale)
+        np.multiply(scale,rtol,scale)
+        np.add(scale,atol,scale)
+        np.divide(e,scale,e)
+        error = max(error,e.max())
+    return error
+
+
+class PIController(object):
+    r"""
+    Proportional-integral time step controller.
+
+    After a step of size dt with scaled local error estimate err (the step
+    is accepted if err <= 1), the next time step is::
+
+        dt * safety * err**(-beta1/k) * err_prev**(beta2/k)
+
+    where k is the order of the embedded method plus one and err_prev the
+    error of the previous accepted step; after a rejected step the integral
+    term is left out.  The factor is kept between facmin and facmax.
+
+    :Initialization:
+
+    Input:
+     - *embedded_order* - (int) Order of the embedded method
+    Output:
+     - (:class:`PIController`) - Controller
+    """
+
+    def __init__(self,embedded_order,safety=0.9,beta1=0.7,beta2=0.4,facmin=0.2,facmax=5.):
+        self.k = embedded_order + 1
+        self.safety = safety
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.facmin = facmin
+        self.facmax = facmax
+        self.err_prev = 1.
+        r"""(float) - Error of the last accepted step"""
+
+    def new_dt(self,dt,err,accepted):
+        r"""
+        Return the time step to take after a step of size *dt* with error
+        *err*, which was *accepted* or not.
+        """
+        err = max(err,1.e-10)
+        if accepted:
+            factor = self.safety * err**(-self.beta1/self.k) * self.err_prev**(self.beta2/self.k)
+            self.err_prev = err
+            factor = min(self.facmax,max(self.facmin,factor))
+        else:
+            factor = min(1.,max(self.facmin,self.safety * err**(-1./self.k)))
+        return dt*factor
+
+
+def ssp_s2(s):
+    r"""
+    Return the s-stage, 2nd order SSP method with SSP coefficient s-1 of
+    Ketcheson, which needs one register.
+    """
+    if s < 2:
+        raise ValueError('SSP(s,2) methods need at least 2 stages')
+    stages = [[('r1',[(1.,'u'),(1./(s-1),'d')])]]
+    for i in xrange(s-2):
+        stages.append([('r1',[(1.,'r1'),(1./(s-1),'d')])])
+    stages.append([('u',[(1./s,'u'),((s-1.)/s,'r1'),(1./s,'d')])])
+    return SSPMethod('SSP%s2' % s,2,s-1.,stages,
+                     (1,[(1./s,'u'),(-1./s,'r1'),(1./s,'d')]))
+
+
+euler = SSPMethod('Euler',1,1.,[[('u',[(1.,'u'),(1.,'d')])]])
+
+ssp33 = SSPMethod('SSP33',3,1.,
+    [[('r1',[(1.,'u'),(1.,'d')])],
+     [('r1',[(0.75,'u'),(0.25,'r1'),(0.25,'d')])],
+     [('u',[(1./3.,'u'),(2./3.,'r1'),(2./3.,'d')])]],
+    (2,[(1./3.,'u'),(-1./3.,'r1'),(1./6.,'d')]))
+
+ssp104 = SSPMethod('SSP104',4,6.,
+    [[('r1',[(1.,'u'),(1./6.,'d')])]]
+    + [[('r1',[(1.,'r1'),(1./6.,'d')])]]*3
+    + [[('r1',[(1.,'r1'),(1./6.,'d')]),
+        ('r2',[(1./25.,'u'),(9./25.,'r1')]),
+        ('r1',[(15.,'r2'),(-5.,'r1')])]]
+    + [[('r1',[(1.,'r1'),(1./6.,'d')])]]*4
+    + [[('u',[(1.,'r2'),(0.6,'r1'),(0.1,'d')])]],
+    (2,[(1.,'r2'),(-0.4,'r1'),(0.1,'d')]))
+
+ssp54 = SSPMethod('SSP54',4,1.508,
+    [[('r1',[(1.,'u'),(0.391752226571890,'d')])],
+     [('r1',[(0.444370493651235,'u'),(0.555629506348765,'r1'),(0.368410593050371,'d')]),
+      ('r2',[(0.517231671970585,'r1')])],
+     [('r1',[(0.620101851488403,'u'),(0.379898148511597,'r1'),(0.251891774271694,'d')])],
+     [('r2',[(1.,'r2'),(0.096059710526147,'r1'),(0.063692468666290,'d')]),
+      ('r1',[(0.178079954393132,'u'),(0.821920045606868,'r1'),(0.544974750228521,'d')])],
+     [('u',[(1.,'r2'),(0.386708617503269,'r1'),(0.226007483236906,'d')])]],
+    (2,[(1.,'r2'),(-0.031646779406556,'u'),(-0.581644603090175,'r1'),(0.131428039023541,'d')]))
+
+methods = {'Euler':euler, 'SSP33':ssp33, 'SSP104':ssp104, 'SSP54':ssp54}
+r"""(dict) - Methods by name, the names accepted by solver.time_integrator"""
+for _s in xrange(2,11):
+    methods['SSP%s2' % _s] = ssp_s2(_s)
+del _s
+
+def get_method(name):
+    r"""
+    Return the method called *name*.
+    """
+    try:
+        return methods[name]
+    except KeyError:
+        raise Exception('Unrecognized time integrator')
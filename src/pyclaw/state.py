@@ -98,6 +98,11 @@ class State(object):
         r"""(float) - Current time represented on this grid, 
             ``default = 0.0``"""
         self.mcapa = -1
+        self.qbc = None
+        r"""(ndarray(meqn,...)) - Ghost-padded storage for q, if allocated
+            with :meth:`allocate_qbc`; q is then a view of its interior,
+            ``default = None``"""
+        self._qbc_mbc = 0
 
         self.q   = self.new_array(meqn)
         self.aux = self.new_array(maux)
@@ -134,7 +139,8 @@ class State(object):
         if self.meqn == 0:
             logger.debug('State.meqn has not been set.')
             valid = False
-        if not self.q.flags['F_CONTIGUOUS']:
+        if not (self.q.flags['F_CONTIGUOUS'] or 
+                self.q_is_interior(self._qbc_mbc,self.qbc)):
             logger.debug('q array is not Fortran contiguous.')
             valid = False
         return valid
@@ -185,13 +191,46 @@ class State(object):
         else:
             raise Exception("Assumption (1 <= ndim <= 3) violated.")
 
+    def allocate_qbc(self,mbc):
+        """
+        Allocate a ghost-padded array qbc, copy q into its interior and make q 
+        a view of that interior.  From then on, q and the interior of qbc are 
+        the same memory, so :meth:`get_qbc_from_q` only leaves the ghost cells
+        to be filled and does not copy q.
+
+        This is called from solver.setup() by the solvers that support it.
+        """
+        shape = [n + 2*mbc for n in self.grid.ng]
+        shape.insert(0,self.meqn)
+        qbc = np.zeros(shape,order='F')
+        self.get_qbc_from_q(mbc,'q',qbc)
+        self.set_q_from_qbc(mbc,qbc)
+        self.qbc = qbc
+        self._qbc_mbc = mbc
+        return qbc
+
+    def q_is_interior(self,mbc,qbc):
+        """
+        Return True if qbc is the ghost-padded storage allocated by
+        :meth:`allocate_qbc` and q is still the interior of it, i.e. if q 
+        does not need to be copied into qbc before filling the ghost cells.
+        """
+        if qbc is None or qbc is not self.qbc or self.q is None: return False
+        interior = qbc[(slice(None),)+(slice(mbc,-mbc),)*self.grid.ndim]
+        return (self.q.shape == interior.shape and 
+                self.q.strides == interior.strides and
+                self.q.__array_interface__['data'][0] == 
+                interior.__array_interface__['data'][0])
+
     def get_qbc_from_q(self,mbc,whichvec,qbc):
         """
         Fills in the interior of qbc (local vector) by copying q (global vector) to it.
+        Nothing is copied if q is already the interior of qbc.
         """
         ndim = self.grid.ndim
         
         if whichvec == 'q':
+            if self.q_is_interior(mbc,qbc): return qbc
             q    = self.q
         elif whichvec == 'aux':
             q    = self.aux
@@ -226,6 +265,21 @@ class State(object):
         
         return result
 
+    def new_stage(self):
+        r"""
+        Return a state for the stages of Runge-Kutta methods, which shares
+        the grid, aux and aux_global of this state and has storage of its
+        own for q (not initialized).
+        """
+        stage = object.__new__(self.__class__)
+        stage.__dict__.update(self.__dict__)
+        stage.q = self.new_array(self.meqn)
+        stage.p = None
+        stage.F = None
+        stage.qbc = None
+        stage._qbc_mbc = 0
+        return stage
+
     def sum_F(self,i):
         return np.sum(np.abs(self.F[i,...]))
 
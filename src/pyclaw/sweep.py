@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Parameter sweeps over Controller runs in a pool of processes.
+
+A sweep runs one problem for many sets of parameters.  The problem is given
+by a factory function that takes the parameters as keyword arguments and
+returns a :class:`~pyclaw.controller.Controller` that is ready to run::
+
+    def setup(bulk=1.0,mx=100):
+        ...
+        claw = pyclaw.Controller()
+        claw.solution = pyclaw.Solution(state)
+        claw.solver = solver
+        return claw
+
+    >>> sweep = Sweep(setup,parameter_grid(bulk=[1.,2.,4.],mx=[100,200]))
+    >>> results = sweep.run()
+
+The factory must be defined at the top level of a module so that it can be
+sent to the worker processes.  Every run takes place in a new worker process
+(the pool replaces each worker after one run) and in a directory of its own,
+outdir/runNNNN.  Fortran modules imported by the factory, and thus the
+common blocks set by :meth:`~pyclaw.state.State.set_cparam`, are therefore
+never shared between runs, nor are output, gauge and functional files
+written with relative paths.
+
+Results are passed back to the calling process as each run finishes.  A
+result is a dictionary with the keys
+
+ - ``index`` - Position of the run in the list of parameter sets
+ - ``parameters`` - The parameters of the run
+ - ``status`` - The status dictionary returned by Controller.run
+ - ``gauges`` - Dictionary of the gauge series, as arrays whose rows hold
+   t followed by the gauge values, by gauge file name
+ - ``frames`` - Dictionary of (t,q) of the frames requested in *frames*,
+   by frame number
+ - ``error`` - Traceback of the exception raised by a failed run (the other
+   entries are then missing)
+
+Arrays of successful runs are saved in outdir/runNNNN/result.npz and the run
+is recorded in the manifest outdir/manifest.txt, which holds one JSON record
+per line.  When a sweep is run again with the same outdir, runs recorded in
+the manifest with the same parameters are loaded instead of being run, so
+a sweep that was interrupted picks up where it stopped.
+"""
+
+import os
+import logging
+import itertools
+import traceback
+
+import numpy as np
+
+def parameter_grid(**values):
+    r"""
+    Return the list of all combinations of parameter values.
+
+    :Input:
+     - *values* - Lists of values for each parameter, by parameter name
+
+    :Output:
+     - (list) - One dictionary of parameters per combination; the last
+       parameter in alphabetical order varies fastest
+
+    For example, ``parameter_grid(a=[1,2],b=[3])`` returns
+    ``[{'a':1,'b':3},{'a':2,'b':3}]``.
+    """
+    names = sorted(values.keys())
+    return [dict(zip(names,combination))
+            for combination in itertools.product(*[values[name] for name in names])]
+
+
+def _plain(value):
+    r"""Convert numpy scalars and arrays to Python objects for JSON."""
+    if isinstance(value,dict):
+        return dict((key,_plain(item)) for key,item in value.iteritems())
+    if isinstance(value,(list,tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value,np.ndarray):
+        return value.tolist()
+    if isinstance(value,np.generic):
+        return value.item()
+    return value
+
+
+def _run(task):
+    r"""
+    Run one parameter set in a worker process and save its arrays.
+    """
+    factory,index,parameters,rundir,frames = task
+    result = {'index':index,'parameters':parameters}
+    cwd = os.getcwd()
+    try:
+        if not os.path.exists(rundir):
+            os.makedirs(rundir)
+        os.chdir(rundir)
+
+        claw = factory(**parameters)
+        if len(frames) > 0:
+            claw.keep_copy = True
+        result['status'] = _plain(claw.run())
+
+        arrays = {}
+        result['gauges'] = {}
+        for (name,series) in claw.solution.state.grid.gauge_recorder.read().iteritems():
+            result['gauges'][name] = series
+            arrays['gauge_'+name] = series
+        result['frames'] = {}
+        for frame in frames:
+            solution = claw.frames[frame]
+            result['frames'][frame] = (solution.t,solution.state.q.copy())
+            arrays['t_%s' % frame] = np.array(solution.t)
+            arrays['q_%s' % frame] = solution.state.q
+        np.savez(os.path.join(rundir,'result.npz'),**arrays)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    finally:
+        os.chdir(cwd)
+    return result
+
+
+class Sweep(object):
+    r"""
+    Runs a problem for many parameter sets in a pool of processes.
+
+    See :mod:`pyclaw.sweep` for the factory function and the results.
+
+    :Initialization:
+
+    Input:
+     - *factory* - (function) Function of the parameters returning a
+       :class:`~pyclaw.controller.Controller`
+     - *parameters* - (list of dict or dict of lists) Parameter sets to run;
+       a dictionary of lists is expanded with :func:`parameter_grid`
+     - *outdir* - (string) Directory for the runs and the manifest,
+       ``default = './_sweep'``
+     - *nprocs* - (int) Number of worker processes, ``default = None`` (one
+       per CPU)
+     - *frames* - (list of int) Frames to send back from each run,
+       ``default = []``
+
+    Output:
+     - (:class:`Sweep`) - Initialized sweep
+    """
+
+    def __init__(self,factory,parameters,outdir='./_sweep',nprocs=None,frames=None):
+        if isinstance(parameters,dict):
+            parameters = parameter_grid(**parameters)
+
+        self.factory = factory
+        r"""(function) - Function of the parameters returning a Controller"""
+        self.parameters = list(parameters)
+        r"""(list) - Parameter sets to run"""
+        self.outdir = os.path.abspath(outdir)
+        r"""(string) - Directory for the runs and the manifest"""
+        self.nprocs = nprocs
+        r"""(int) - Number of worker processes, ``default = None``"""
+        self.frames = list(frames or [])
+        r"""(list) - Frames to send back from each run, ``default = []``"""
+        self.manifest = os.path.join(self.outdir,'manifest.txt')
+        r"""(string) - Path of the results manifest"""
+
+    def rundir(self,index):
+        r"""Return the directory of run *index*."""
+        return os.path.join(self.outdir,'run%04d' % index)
+
+    def read_manifest(self):
+        r"""
+        Read the results of completed runs from the manifest.
+
+        :Output:
+         - (dict) - Results by run index, for the runs whose recorded
+           parameters match :attr:`parameters`
+        """
+        import json
+
+        results = {}
+        if not os.path.exists(self.manifest):
+            return results
+        for line in open(self.manifest):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line that was being written when the sweep was interrupted
+                continue
+            index = record['index']
+            if index >= len(self.parameters) \
+                    or record['parameters'] != _plain(self.parameters[index]):
+                continue
+            result = {'index':index,'parameters':self.parameters[index],
+                      'status':record['status'],'gauges':{},'frames':{}}
+            data = np.load(os.path.join(self.rundir(index),'result.npz'))
+            for key in data.files:
+                kind,name = key.split('_',1)
+                if kind == 'gauge':
+                    result['gauges'][name] = data[key]
+                elif kind == 'q':
+                    result['frames'][int(name)] = (float(data['t_'+name]),data[key])
+            results[index] = result
+        return results
+
+    def record(self,result):
+        r"""
+        Append a successful run to the manifest.
+        """
+        import json
+
+        record = {'index':result['index'],
+                  'parameters':_plain(result['parameters']),
+                  'status':result['status']}
+        manifest = open(self.manifest,'a')
+        manifest.write(json.dumps(record)+'\n')
+        manifest.flush()
+        os.fsync(manifest.fileno())
+        manifest.close()
+
+    def run(self,callback=None):
+        r"""
+        Run all parameter sets that are not yet in the manifest.
+
+        :Input:
+         - *callback* - (function) If given, called with each result as soon
+           as it is available (including results read from the manifest)
+
+        :Output:
+         - (list) - Results of all runs, ordered like :attr:`parameters`
+        """
+        import multiprocessing
+
+        if not os.path.exists(self.outdir):
+            os.makedirs(self.outdir)
+
+        results = self.read_manifest()
+        if callback is not None:
+            for index in sorted(results.keys()):
+                callback(results[index])
+
+        tasks = [(self.factory,index,parameters,self.rundir(index),self.frames)
+                 for index,parameters in enumerate(self.parameters)
+                 if index not in results]
+        if len(tasks) > 0:
+            pool = multiprocessing.Pool(self.nprocs,maxtasksperchild=1)
+            try:
+                for result in pool.imap_unordered(_run,tasks):
+                    if 'error' in result:
+                        logging.error("Run %s with parameters %s failed:\n%s"
+                            % (result['index'],result['parameters'],result['error']))
+                    else:
+                        self.record(result)
+                        logging.info("Run %s with parameters %s done"
+                            % (result['index'],result['parameters']))
+                    results[result['index']] = result
+                    if callback is not None:
+                        callback(result)
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+
+        return [results[index] for index in xrange(len(self.parameters))]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Background writer for output frames.
+
+:class:`AsyncWriter` writes solutions in a separate thread, so that time
+stepping continues while a frame is being written.  When a frame is handed to
+the writer, the arrays of the solution are copied into a snapshot whose
+buffers are reused from frame to frame, and the snapshot is queued for
+writing.  At most *maxsize* snapshots exist; when all of them are waiting to
+be written, handing over the next frame blocks until the writer has finished
+one of them.
+
+The writer records the time spent writing (in the writer thread), copying
+snapshots, and waiting for the writer (in the calling thread), from which the
+overlap of output with computation follows.
+"""
+
+import sys
+import copy
+import time
+import Queue
+import threading
+
+class AsyncWriter(object):
+    r"""
+    Writes solutions in a background thread.
+
+    Typical usage::
+
+        >>> writer = AsyncWriter(maxsize=2)
+        >>> writer.start()
+        >>> writer.write(solution,frame,outdir,'ascii')
+        >>> writer.flush()
+
+    .. attribute:: maxsize
+
+        Maximum number of frames held for writing, ``default = 2``
+
+    :Initialization:
+
+    Input:
+     - *maxsize* - (int) Maximum number of frames held for writing
+    Output:
+     - (:class:`AsyncWriter`) - Writer, to be started with :meth:`start`
+    """
+
+    def __init__(self,maxsize=2):
+        self.maxsize = maxsize
+        self.io_time = 0.
+        r"""(float) - Seconds spent writing frames in the writer thread"""
+        self.wait_time = 0.
+        r"""(float) - Seconds the caller was blocked waiting for the writer"""
+        self.snapshot_time = 0.
+        r"""(float) - Seconds spent copying solutions into snapshots"""
+        self.frames_written = 0
+        r"""(int) - Number of frames written"""
+
+        self._snapshots = []
+        self._free = Queue.Queue()
+        self._work = Queue.Queue()
+        self._thread = None
+        self._error = None
+
+    def start(self):
+        r"""Start the writer thread."""
+        self._thread = threading.Thread(target=self._run,name='pyclaw-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self,solution,frame,*args,**kwargs):
+        r"""
+        Queue a copy of *solution* for writing.
+
+        The remaining arguments are passed to
+        :meth:`~pyclaw.solution.Solution.write` in the writer thread.  An
+        exception raised by an earlier write is raised here.
+        """
+        self._check()
+        if len(self._snapshots) < self.maxsize:
+            snapshot = self._new_snapshot(solution)
+            self._snapshots.append(snapshot)
+        else:
+            start = time.time()
+            snapshot = self._free.get()
+            self.wait_time += time.time() - start
+
+        start = time.time()
+        for state,snap in zip(solution.states,snapshot.states):
+            snap.q[...] = state.q
+            if state.maux > 0:
+                snap.aux[...] = state.aux
+            if state.p is not None:
+                if snap.p is None or snap.p.shape != state.p.shape:
+                    snap.p = state.p.copy('F')
+                else:
+                    snap.p[...] = state.p
+            snap.t = state.t
+            snap.aux_global = copy.copy(state.aux_global)
+            snap.mcapa = state.mcapa
+        self.snapshot_time += time.time() - start
+
+        self._work.put((snapshot,frame,args,kwargs))
+
+    def flush(self):
+        r"""
+        Wait until all queued frames are written and stop the writer thread.
+        """
+        if self._thread is None:
+            return
+        start = time.time()
+        self._work.put(None)
+        self._thread.join()
+        self._thread = None
+        self.wait_time += time.time() - start
+        self._check()
+
+    def overlap_time(self):
+        r"""Return the seconds of writing that overlapped with the caller."""
+        return max(self.io_time - self.wait_time,0.)
+
+    def _new_snapshot(self,solution):
+        states = []
+        for state in solution.states:
+            snap = type(state)(state.grid,state.meqn,state.maux)
+            states.append(snap)
+        snapshot = type(solution)(states[0])
+        snapshot.states.extend(states[1:])
+        return snapshot
+
+    def _run(self):
+        while True:
+            item = self._work.get()
+            if item is None:
+                break
+            snapshot,frame,args,kwargs = item
+            if self._error is None:
+                start = time.time()
+                try:
+                    snapshot.write(frame,*args,**kwargs)
+                    self.frames_written += 1
+                except Exception:
+                    self._error = sys.exc_info()
+                self.io_time += time.time() - start
+            self._free.put(snapshot)
+
+    def _check(self):
+        if self._error is not None:
+            error,self._error = self._error,None
+            raise error[0],error[1],error[2]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_adaptive(solver_type='sharpclaw',kernel_language='Python'):
+    """
+    1D acoustics with the time steps chosen from the local error estimates
+    of the embedded SSP Runge-Kutta methods.
+
+    Returns the number of problems found: error estimates that do not
+    decrease with the order of the embedded method on a scalar ODE,
+    solutions with a stiff relaxation source that are not finite, a
+    tighter tolerance that does not take more steps, and error control
+    accepted for a method without an embedded method.
+    """
+    import numpy as np
+    from pyclaw import ssp
+    from acoustics_sweep import setup
+
+    errors = 0
+    for (name,method) in sorted(ssp.methods.items()):
+        if method.embedded_order is None:
+            continue
+        estimate = []
+        for dt in [0.1,0.05]:
+            u = 0.5*np.ones((1,4))
+            r1 = np.empty_like(u); r2 = np.empty_like(u)
+            error = []
+            method.step(lambda x,c: dt*(np.cos(c*dt)-x**2),u,r1,r2,
+                        lambda terms: error.append(ssp.scaled_error(terms,u,1.,0.)))
+            estimate.append(error[0])
+        if np.log2(estimate[0]/estimate[1]) < method.embedded_order + 0.7:
+            errors += 1
+
+    def relaxation(solver,state,dt):
+        dq = np.zeros(state.q.shape)
+        dq[1,:] = -dt*1000.*state.q[1,:]
+        return dq
+
+    numsteps = []
+    for (dq_src,tol) in [(relaxation,1.e-3),(None,1.e-3),(None,1.e-5)]:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.solver.time_integrator = 'SSP104'
+        claw.solver.cfl_max = 0.4*ssp.methods['SSP104'].sspcoef
+        claw.solver.cfl_desired = 0.9*claw.solver.cfl_max
+        claw.solver.dq_src = dq_src
+        claw.solver.error_control = True
+        claw.solver.atol = tol
+        claw.solver.rtol = tol
+        claw.run()
+        if not np.all(np.isfinite(claw.solution.state.q)) \
+           or np.max(np.abs(claw.solution.state.q)) > 1.:
+            errors += 1
+        numsteps.append(claw.solver.status['numsteps'])
+    if numsteps[2] <= numsteps[1]:
+        errors += 1
+
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw.solver.time_integrator = 'Euler'
+    claw.solver.error_control = True
+    try:
+        claw.run()
+        errors += 1
+    except Exception:
+        pass
+    return errors
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    errors=acoustics_adaptive(*args,**kwargs)
+    print 'Problems found with the error-controlled time stepping: ',errors
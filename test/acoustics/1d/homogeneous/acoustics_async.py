@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_async(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    1D acoustics with output written in the background.
+
+    Returns the maximum difference between the frames written in the
+    background and the frames written by a run with synchronous output.
+    """
+    import os
+    import numpy as np
+    import pyclaw
+    from acoustics_sweep import setup
+
+    solutions = {}
+    for async_output in (False,True):
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.nout = 10
+        claw.output_format = 'ascii'
+        claw.outdir = os.path.join(outdir,'async_%s' % async_output)
+        claw.overwrite = True
+        claw.async_output = async_output
+        claw.output_queue_size = 2
+        claw.run()
+        solutions[async_output] = [pyclaw.Solution(frame,path=claw.outdir)
+                                   for frame in xrange(claw.nout+1)]
+
+    error = 0.
+    for sync,background in zip(solutions[False],solutions[True]):
+        error = max(error,abs(sync.t-background.t),
+                    np.max(np.abs(sync.state.q-background.state.q)))
+
+    # A run that fails raises its own error, not one raised while cleaning
+    # up, and still tears the solver down
+    class StepError(Exception): pass
+    def fail(*args):
+        raise StepError()
+    def fail_to_close():
+        raise IOError('closing the output failed')
+    torn_down = []
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw.output_format = 'ascii'
+    claw.outdir = os.path.join(outdir,'async_failed')
+    claw.overwrite = True
+    claw.async_output = True
+    claw.solver.evolve_to_time = fail
+    claw.solver.teardown = lambda: torn_down.append(True)
+    claw.close_output = fail_to_close
+    try:
+        claw.run()
+        error = np.inf
+    except StepError:
+        if not torn_down:
+            error = np.inf
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_async(*args,**kwargs)
+    print 'Maximum difference between background and synchronous output: ',error
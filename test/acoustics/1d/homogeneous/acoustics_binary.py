@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_binary(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    1D acoustics with output in the binary format.
+
+    Returns the maximum difference between the frames read back from the
+    binary files and the frames kept in memory.
+    """
+    import numpy as np
+    import pyclaw
+    from acoustics_sweep import setup
+
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw.output_format = 'binary'
+    claw.outdir = outdir
+    claw.overwrite = True
+    claw.keep_copy = True
+    claw.run()
+
+    error = 0.
+    for frame in xrange(claw.nout+1):
+        for mmap in (True,False):
+            solution = pyclaw.Solution(frame,path=outdir,format='binary',
+                                       options={'mmap':mmap})
+            error = max(error,abs(solution.t-claw.frames[frame].t),
+                        np.max(np.abs(solution.state.q-claw.frames[frame].state.q)))
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_binary(*args,**kwargs)
+    print 'Maximum difference between binary output and frames in memory: ',error
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_evec(q_l,q_r,aux_l,aux_r,aux_global):
+    """
+    Left and right eigenvectors of 1D acoustics at each interface.
+    """
+    import numpy as np
+    zz = aux_global['zz']
+    n = q_l.shape[1]
+    evr = np.empty((2,2,n))
+    evr[0,0,:] = -zz; evr[0,1,:] = zz
+    evr[1,0,:] = 1.;  evr[1,1,:] = 1.
+    evl = np.empty((2,2,n))
+    evl[0,0,:] = -0.5/zz; evl[0,1,:] = 0.5
+    evl[1,0,:] =  0.5/zz; evl[1,1,:] = 0.5
+    return evl,evr
+
+def weno5_char_loops(q,evl,evr):
+    """
+    Loop transcription of weno5_char of the Fortran reconstruct.f90, with
+    the eigenvectors laid out as for pyclaw.limiters.recon.weno5_char.
+    Only the cells reconstructed from complete stencils are set.
+    """
+    epweno = 1.e-36
+    meqn,n = q.shape
+    ql = q.copy()
+    qr = q.copy()
+    for i in xrange(2,n-3):
+        qr[:,i] = (-q[:,i-1]+7.*(q[:,i]+q[:,i+1])-q[:,i+2])/12.
+        ql[:,i+1] = qr[:,i]
+    for i in xrange(2,n-3):
+        for ip in xrange(meqn):
+            hh = {}
+            for m2 in xrange(-2,3):
+                hh[m2] = 0.
+                for m in xrange(meqn):
+                    hh[m2] += evl[ip,m,i]*(q[m,i+1+m2]-q[m,i+m2])
+            uu = {}
+            for m1 in [1,2]:
+                im = (-1)**(m1+1)
+                ione = im; inone = -im; intwo = -2*im
+                t1 = im*(hh[intwo]-hh[inone])
+                t2 = im*(hh[inone]-hh[0])
+                t3 = im*(hh[0]-hh[ione])
+                tt1 = 13.*t1**2+3.*(hh[intwo]-3.*hh[inone])**2
+                tt2 = 13.*t2**2+3.*(hh[inone]+hh[0])**2
+                tt3 = 13.*t3**2+3.*(3.*hh[0]-hh[ione])**2
+                tt1 = (epweno+tt1)**2
+                tt2 = (epweno+tt2)**2
+                tt3 = (epweno+tt3)**2
+                s1 = tt2*tt3
+                s2 = 6.*tt1*tt3
+                s3 = 3.*tt1*tt2
+                t0 = 1./(s1+s2+s3)
+                s1 = s1*t0
+                s3 = s3*t0
+                uu[m1] = (s1*(t2-t1)+(0.5*s3-0.25)*(t3-t2))/3.
+            for m in xrange(meqn):
+                qr[m,i] += evr[m,ip,i]*uu[1]
+                ql[m,i+1] += evr[m,ip,i]*uu[2]
+    return ql,qr
+
+def tvd2_char_loops(q,mthlim,evl,evr):
+    """
+    Loop transcription of tvd2_char of the Fortran reconstruct.f90, with
+    the eigenvectors laid out as for pyclaw.limiters.recon.tvd2_char.
+    """
+    meqn,n = q.shape
+    ql = q.copy()
+    qr = q.copy()
+    for i in xrange(1,n-2):
+        u = {}
+        for m in xrange(meqn):
+            hh = {}
+            for m1 in xrange(-1,2):
+                hh[m1] = 0.
+                for mm in xrange(meqn):
+                    hh[m1] += evl[m,mm,i]*(q[mm,i+1+m1]-q[mm,i+m1])
+            for m1 in [1,2]:
+                im = (-1)**(m1+1)
+                if abs(hh[m1-2]) > 1.e-14:
+                    r = hh[m1-1]/hh[m1-2]
+                else:
+                    r = 0.
+                if mthlim[m] == 1:
+                    slimitr = max(0.,min(1.,r))
+                elif mthlim[m] == 2:
+                    slimitr = max(0.,min(1.,2.*r),min(2.,r))
+                elif mthlim[m] == 3:
+                    slimitr = (r+abs(r))/(1.+abs(r))
+                elif mthlim[m] == 4:
+                    slimitr = max(0.,min((1.+r)/2.,2.,2.*r))
+                elif mthlim[m] == 5:
+                    pp = (2.+r)/3.
+                    amax = max(-r/3.,0.,min(2.*r,pp,2.))
+                    slimitr = max(0.,min(pp,amax))
+                u[m,m1] = im*0.5*slimitr*hh[m1-2]
+        for m in xrange(meqn):
+            for mm in xrange(meqn):
+                qr[m,i] += evr[m,mm,i]*u[mm,1]
+                ql[m,i+1] += evr[m,mm,i]*u[mm,2]
+    return ql,qr
+
+def acoustics_char(solver_type='sharpclaw',kernel_language='Python'):
+    """
+    1D acoustics with the TVD and characteristic-wise reconstructions of the
+    Python SharpClaw kernels.
+
+    Returns the number of problems found: reconstructions in the fields
+    of the identity that differ from the component-wise ones,
+    reconstructions in random orthonormal fields that differ from loop
+    transcriptions of the Fortran ones, and solutions that are not finite
+    or that differ from the solution with the component-wise WENO
+    reconstruction by more than the accuracy of the reconstructions.
+    """
+    import numpy as np
+    from pyclaw.limiters import recon
+    from acoustics_sweep import setup
+
+    errors = 0
+    random = np.random.RandomState(0)
+    meqn,n = 3,40
+    q = np.sin(np.linspace(0.,6.,n))*np.arange(1.,meqn+1.)[:,np.newaxis] \
+        + 0.2*random.rand(meqn,n)
+    identity = np.repeat(np.eye(meqn)[:,:,np.newaxis],n-1,axis=2)
+    evr = np.empty((meqn,meqn,n-1))
+    for i in xrange(n-1):
+        evr[:,:,i] = np.linalg.qr(random.randn(meqn,meqn))[0]
+    evl = evr.transpose((1,0,2)).copy()
+
+    ql,qr = recon.weno5_char(q,identity,identity)
+    ql0,qr0 = recon.weno(5,q)
+    if np.any(ql != ql0) or np.any(qr != qr0):
+        errors += 1
+    ql,qr = recon.weno5_char(q,evl,evr)
+    ql0,qr0 = weno5_char_loops(q,evl,evr)
+    if np.max(np.abs(ql-ql0)) > 1.e-12 or np.max(np.abs(qr-qr0)) > 1.e-12:
+        errors += 1
+    for mthlim in [[1,2,3],[4,5,1]]:
+        ql,qr = recon.tvd2_char(q,mthlim,identity,identity)
+        ql0,qr0 = recon.tvd2(q,mthlim)
+        if np.any(ql[:,2:-1] != ql0[:,2:-1]) or np.any(qr[:,1:-2] != qr0[:,1:-2]):
+            errors += 1
+        ql,qr = recon.tvd2_char(q,mthlim,evl,evr)
+        ql0,qr0 = tvd2_char_loops(q,mthlim,evl,evr)
+        if np.max(np.abs(ql-ql0)) > 1.e-12 or np.max(np.abs(qr-qr0)) > 1.e-12:
+            errors += 1
+
+    def run(lim_type,char_decomp):
+        claw = setup(bulk=2.0,solver_type=solver_type,kernel_language=kernel_language)
+        claw.solver.lim_type = lim_type
+        claw.solver.char_decomp = char_decomp
+        claw.solver.evec = acoustics_evec
+        claw.run()
+        return claw.solution.state.q
+
+    reference = run(2,0)
+    for (lim_type,char_decomp,tolerance) in [(2,2,1.e-3),(1,0,5.e-2),(1,2,5.e-2)]:
+        q = run(lim_type,char_decomp)
+        if not np.all(np.isfinite(q)):
+            errors += 1
+        elif np.max(np.abs(q-reference)) > tolerance:
+            errors += 1
+    return errors
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    errors=acoustics_char(*args,**kwargs)
+    print 'Problems found with the characteristic-wise reconstructions: ',errors
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+class Preempted(Exception):
+    pass
+
+def acoustics_checkpoint(solver_type='classic',kernel_language='Python',outdir='./_output',
+                         error_control=False):
+    """
+    1D acoustics interrupted after some checkpoints, written after every
+    step, and restarted from the last checkpoint.  With error_control, the
+    SharpClaw time steps are chosen from the local error estimates.
+
+    Returns the maximum difference between the output and final solution
+    of the restarted run and those of an uninterrupted run, or infinity if
+    the solver status differs.
+    """
+    import numpy as np
+    import pyclaw
+    import acoustics_sweep
+
+    def setup(solver_type,kernel_language):
+        claw = acoustics_sweep.setup(solver_type=solver_type,kernel_language=kernel_language)
+        if error_control:
+            claw.solver.time_integrator = 'SSP104'
+            claw.solver.error_control = True
+            claw.solver.atol = 1.e-6
+            claw.solver.rtol = 1.e-6
+        return claw
+
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw.keep_copy = True
+    status = claw.run()
+    nsteps = status['numsteps']
+
+    # Stop in the middle of the last output interval
+    claw_interrupted = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw_interrupted.output_format = 'binary'
+    claw_interrupted.outdir = outdir
+    claw_interrupted.checkpoint_interval = 0.
+    checkpoint = claw_interrupted.checkpoint
+    def preempt(*args):
+        checkpoint(*args)
+        if claw_interrupted.solution.t > claw.frames[1].t \
+                and claw_interrupted.solver.status['numsteps'] == nsteps/2:
+            raise Preempted
+    claw_interrupted.checkpoint = preempt
+    try:
+        claw_interrupted.run()
+    except Preempted:
+        pass
+    else:
+        return np.inf
+
+    claw_restarted = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw_restarted.output_format = 'binary'
+    claw_restarted.outdir = outdir
+    status = claw_restarted.restart()
+
+    if status['numsteps'] != nsteps:
+        return np.inf
+    error = np.max(np.abs(claw_restarted.solution.state.q-claw.solution.state.q))
+    for frame in xrange(claw.nout+1):
+        solution = pyclaw.Solution(frame,path=outdir,format='binary')
+        error = max(error,abs(solution.t-claw.frames[frame].t),
+                    np.max(np.abs(solution.state.q-claw.frames[frame].state.q)))
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_checkpoint(*args,**kwargs)
+    print 'Maximum difference between restarted and uninterrupted runs: ',error
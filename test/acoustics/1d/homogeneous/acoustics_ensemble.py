@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_ensemble(kernel_language='Python',solver_type='classic',nmembers=4):
+    """
+    1D acoustics with several bulk moduli, evolved as one ensemble.
+
+    Returns the maximum difference between the ensemble members and
+    separate runs of the same problems.
+    """
+    import numpy as np
+    import pyclaw
+    from riemann import rp_acoustics
+
+    def make_solver():
+        if solver_type=='classic':
+            solver = pyclaw.ClawSolver1D()
+        elif solver_type=='sharpclaw':
+            solver = pyclaw.SharpClawSolver1D()
+        else: raise Exception('Unrecognized value of solver_type.')
+        solver.mwaves=2
+        solver.kernel_language=kernel_language
+        solver.rp = rp_acoustics.rp_acoustics_1d
+        solver.limiters = [4]*solver.mwaves
+        solver.dt_initial=0.005
+        solver.bc_lower[0] = pyclaw.BC.periodic
+        solver.bc_upper[0] = pyclaw.BC.periodic
+        return solver
+
+    def make_state(bulk):
+        x = pyclaw.Dimension('x',0.0,1.0,100)
+        grid = pyclaw.Grid(x)
+        state = pyclaw.State(grid,2)
+        rho = 1.0
+        state.aux_global['rho']=rho
+        state.aux_global['bulk']=bulk
+        state.aux_global['zz']=np.sqrt(rho*bulk)
+        state.aux_global['cc']=np.sqrt(bulk/rho)
+        xc=grid.x.center
+        state.q[0,:] = np.exp(-100 * (xc-0.75)**2)
+        state.q[1,:] = 0.
+        return state
+
+    bulks = np.linspace(1.0,4.0,nmembers)
+    tfinal = 1.0
+
+    ensemble = pyclaw.EnsembleState([make_state(bulk) for bulk in bulks])
+    ensemble_solver = pyclaw.EnsembleSolver(make_solver())
+    ensemble_solver.setup(ensemble)
+    ensemble_solver.evolve_to_time(ensemble,tfinal)
+
+    error = 0.
+    for k,bulk in enumerate(bulks):
+        solution = pyclaw.Solution(make_state(bulk))
+        solver = make_solver()
+        solver.setup(solution)
+        solver.dt = solver.dt_initial
+        solver.evolve_to_time(solution,tfinal)
+        error = max(error,np.max(np.abs(solution.state.q-ensemble.q[k])))
+
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_ensemble(*args,**kwargs)
+    print 'Maximum difference between ensemble and separate runs: ',error
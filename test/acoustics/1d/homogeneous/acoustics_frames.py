@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_frames(solver_type='classic',kernel_language='Python'):
+    """
+    1D acoustics with frames kept under several eviction policies.
+
+    Returns the maximum difference between the frames kept and the frames
+    of a run that keeps all of them in memory, or infinity if the frames
+    kept are not the expected ones or do not share one copy of the grid.
+    """
+    import numpy as np
+    import pyclaw
+    from acoustics_sweep import setup
+
+    def run(frames=None):
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.nout = 10
+        claw.keep_copy = True
+        if frames is not None:
+            claw.frames = frames
+        claw.run()
+        return claw
+
+    reference = run()
+    # The frames share one copy of the grid, not the grid of the solution
+    grids = [frame.state.grid for frame in reference.frames]
+    if grids[0] is reference.solution.state.grid \
+            or any([grid is not grids[0] for grid in grids]):
+        return np.inf
+    policies = [(pyclaw.FrameStore(keep_last=3),[8,9,10]),
+                (pyclaw.FrameStore(keep_every=4),[0,4,8,10]),
+                (pyclaw.FrameStore(max_bytes=3*reference.frames[0].state.q.nbytes),range(11)),
+                (pyclaw.FrameStore(keep_every=2,max_bytes=0),[0,2,4,6,8,10])]
+
+    error = 0.
+    for frames,kept in policies:
+        claw = run(frames)
+        if claw.frames.frame_numbers() != kept or len(claw.frames) != 11:
+            return np.inf
+        for n in kept:
+            error = max(error,abs(claw.frames[n].t-reference.frames[n].t),
+                        np.max(np.abs(claw.frames[n].state.q-reference.frames[n].state.q)))
+        claw.frames.clear()
+
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_frames(*args,**kwargs)
+    print 'Maximum difference between frames kept and all frames: ',error
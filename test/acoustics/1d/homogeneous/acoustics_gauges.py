@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_gauges(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    1D acoustics with two gauges, one recorded at every step and one at
+    every third step, written in the ascii, binary and (if h5py is
+    available) HDF5 formats with a buffer smaller than the number of steps.
+
+    Returns the maximum difference between the recorded values and the
+    values of q at the gauges taken after every step.
+    """
+    import numpy as np
+    from acoustics_sweep import setup
+
+    formats = ['ascii','binary']
+    try:
+        __import__('h5py')
+        formats.append('hdf5')
+    except ImportError:
+        pass
+
+    error = 0.
+    for format in formats:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        grid = claw.solution.state.grid
+        grid.gauge_path = outdir+'/_gauges/'
+        grid.add_gauges([[0.255],[0.705]],every=[1,3],interpolation='nearest')
+        grid.gauge_recorder.format = format
+        grid.gauge_recorder.buffer_size = 7
+
+        # Reference values at the gauge cells, taken after every step
+        cells = [25,70]
+        state = claw.solution.state
+        expected = [np.hstack((state.t,state.q[:,cells].T.ravel()))]
+        def after_step(solver,solution):
+            q = solution.state.q[:,cells]
+            expected.append(np.hstack((solution.t,q.T.ravel())))
+        claw.solver.after_step = after_step
+        claw.run()
+        expected = np.array(expected)
+
+        series = grid.gauge_recorder.read()
+        meqn = state.meqn
+        for (i,(name,every)) in enumerate([('gauge0.255',1),('gauge0.705',3)]):
+            reference = np.column_stack((expected[::every,0],
+                                         expected[::every,1+i*meqn:1+(i+1)*meqn]))
+            if series[name].shape != reference.shape:
+                return np.inf
+            error = max(error,np.max(np.abs(series[name]-reference)))
+    return error
+
+
+def acoustics_gauge_interpolation(solver_type='classic',kernel_language='Python',
+                                  outdir='./_output'):
+    """
+    Gauges on 1D and 2D grids with non-zero lower bounds, recording a q
+    that is linear in x and y; linear interpolation should reproduce it
+    and the nearest cell should hold the gauge.  The grids are also split
+    in two parts, and the gauges recorded by the parts should be those of
+    the whole grid.
+
+    Returns the maximum interpolation error, or infinity if a gauge is
+    assigned to the wrong cell or part.
+    """
+    import numpy as np
+    import pyclaw
+
+    error = 0.
+    for dimensions in ([pyclaw.Dimension('x',-2.0,1.0,30)],
+                       [pyclaw.Dimension('x',-2.0,1.0,30),
+                        pyclaw.Dimension('y',0.5,1.5,20)]):
+        grid = pyclaw.Grid(dimensions)
+        grid.gauge_path = outdir+'/_gauges/'
+        state = pyclaw.State(grid,2)
+        centers = grid.p_center
+        state.q[0,...] = 1. + 2.*centers[0]
+        state.q[1,...] = 3. - centers[-1]
+
+        coords = [[-1.93]+[0.52]*(grid.ndim-1),[-0.4321]+[1.0]*(grid.ndim-1),
+                  [0.87]+[1.43]*(grid.ndim-1)]
+        grid.add_gauges(coords)
+        nearest = pyclaw.Grid(dimensions)
+        nearest.gauge_path = outdir+'/_gauges_nearest/'
+        nearest.add_gauges(coords,interpolation='nearest')
+
+        for recorder in (grid.gauge_recorder,nearest.gauge_recorder):
+            recorder.start()
+            recorder.record(0.,state.q)
+            recorder.close()
+        linear = grid.gauge_recorder.read()
+        cells = nearest.gauge_recorder.read()
+        for (coord,name) in zip(coords,grid.gauge_recorder.names):
+            # Beyond the outermost cell centers the nearest values are used
+            center = [min(max(coord[n],grid.lower[n]+grid.d[n]/2),grid.upper[n]-grid.d[n]/2)
+                      for n in xrange(grid.ndim)]
+            exact = np.array([1.+2.*center[0],3.-center[-1]])
+            error = max(error,np.max(np.abs(linear[name][0,1:]-exact)))
+            cell = [int((coord[n]-grid.lower[n])/grid.d[n]) for n in xrange(grid.ndim)]
+            if np.max(np.abs(cells[name][0,1:]-state.q[(slice(None),)+tuple(cell)])) > 1.e-12:
+                return np.inf
+
+        # On a grid split in two parts along x, as by petclaw, each gauge is
+        # recorded by the part holding it from q with ghost cells, and the
+        # values of a q that is not linear are those of the whole grid.  The
+        # second gauge is in the last cell of the first part.
+        state.q[0,...] = centers[0]**2
+        grid.gauge_recorder.start()
+        grid.gauge_recorder.record(0.,state.q)
+        grid.gauge_recorder.close()
+        whole = grid.gauge_recorder.read()
+        mbc = 2
+        qbc = np.zeros([2]+[n+2*mbc for n in grid.n])
+        qbc[(slice(None),)+(slice(mbc,-mbc),)*grid.ndim] = state.q
+        recorded = []
+        for (nstart,nend) in ((0,16),(16,30)):
+            part = pyclaw.Grid([pyclaw.Dimension(dim.name,dim.lower,dim.upper,dim.n)
+                                for dim in dimensions])
+            part.dimensions[0].nstart = nstart
+            part.dimensions[0].nend = nend
+            part.gauge_path = outdir+'/_gauges_part/'
+            part.add_gauges(coords)
+            if not part.gauge_recorder.ghosted:
+                return np.inf
+            part.gauge_recorder.start()
+            part.gauge_recorder.record(0.,qbc[:,nstart:nend+2*mbc,...],mbc=mbc)
+            part.gauge_recorder.close()
+            values = part.gauge_recorder.read()
+            for name in part.gauge_recorder.names:
+                error = max(error,np.max(np.abs(values[name]-whole[name])))
+                recorded.append(name)
+        if sorted(recorded) != sorted(grid.gauge_recorder.names):
+            return np.inf
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_gauges(*args,**kwargs)
+    print 'Maximum difference between recorded and expected gauge values: ',error
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_hdf5(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    1D acoustics with output to one HDF5 file per frame and to a single
+    HDF5 time series file, the latter written twice to the same file.
+
+    Returns the maximum difference between the frames read back from the
+    files and the frames kept in memory.
+    """
+    import numpy as np
+    import pyclaw
+    from acoustics_sweep import setup
+
+    error = 0.
+    for (output_format,autotune) in [('hdf5',False),('hdf5',True),
+                                     ('hdf5_series',False),('hdf5_series',True)]:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.output_format = output_format
+        claw.output_options = {'autotune':autotune,'bandwidth':1.}
+        claw.outdir = outdir
+        claw.overwrite = True
+        claw.keep_copy = True
+        claw.run()
+
+        for frame in xrange(claw.nout+1):
+            solution = pyclaw.Solution(frame,path=outdir,format=output_format)
+            error = max(error,abs(solution.t-claw.frames[frame].t),
+                        np.max(np.abs(solution.state.q-claw.frames[frame].state.q)))
+
+    from pyclaw.io.hdf5 import TimeSeries
+    series = TimeSeries(outdir+'/claw.h5','r')
+    if list(series.frames()) != range(claw.nout+1):
+        error = np.inf
+    series.close()
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_hdf5(*args,**kwargs)
+    print 'Maximum difference between HDF5 output and frames in memory: ',error
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def write_frames(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    Run 1D acoustics with petclaw, writing parallel HDF5 output.
+    """
+    from acoustics_sweep import setup
+
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language,use_petsc=True)
+    claw.output_format = 'petsc_hdf5'
+    claw.outdir = outdir
+    claw.overwrite = True
+    claw.run()
+
+
+def rewrite_frame(frame,outdir='./_output',rewrite_dir='./_rewrite'):
+    """
+    Read a frame of parallel HDF5 output with petclaw and write it again.
+    """
+    import petclaw
+
+    solution = petclaw.Solution(frame,path=outdir,format='petsc_hdf5')
+    solution.write(frame,rewrite_dir,format='petsc_hdf5')
+
+
+def acoustics_hdf5_mpi(solver_type='classic',kernel_language='Python',np_write=4,np_read=3,
+                       outdir='./_output'):
+    """
+    1D acoustics with parallel HDF5 output written on np_write processes,
+    then read back and written again on np_read processes.
+
+    Returns the maximum difference between the frames read serially from
+    both outputs and the frames of a serial run.
+    """
+    import os
+    import shutil
+    import subprocess
+    import numpy as np
+    import pyclaw
+    from acoustics_sweep import setup
+
+    path = os.path.dirname(os.path.abspath(__file__))
+    rewrite_dir = outdir + '_rewrite'
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw.keep_copy = True
+    claw.run()
+
+    for (np_run,call) in [(np_write,"write_frames('%s','%s','%s')"
+                                    % (solver_type,kernel_language,outdir)),
+                          (np_read,"rewrite_frame(%s,'%s','%s')"
+                                   % (claw.nout,outdir,rewrite_dir))]:
+        run_command = "mpiexec", "-n", str(np_run), "python", "-c", \
+            "import sys; sys.path.append('"+path+"'); import acoustics_hdf5_mpi; "\
+            +"acoustics_hdf5_mpi."+call
+        p = subprocess.Popen(run_command,stdout=subprocess.PIPE,stderr=subprocess.STDOUT)
+        (stdout_data, ignore) = p.communicate()
+        if p.returncode != 0:
+            raise Exception(stdout_data)
+
+    error = 0.
+    for (frame,frame_dir) in [(n,outdir) for n in xrange(claw.nout+1)] + [(claw.nout,rewrite_dir)]:
+        solution = pyclaw.Solution(frame,path=frame_dir,format='hdf5')
+        error = max(error,abs(solution.t-claw.frames[frame].t),
+                    np.max(np.abs(solution.state.q-claw.frames[frame].state.q)))
+    shutil.rmtree(rewrite_dir)
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_hdf5_mpi(*args,**kwargs)
+    print 'Maximum difference between parallel HDF5 output and serial run: ',error
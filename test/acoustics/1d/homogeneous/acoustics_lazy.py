@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_lazy(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    1D acoustics with output in the binary format and, if h5py is
+    available, in the HDF5 formats, read back lazily with LazySolution.
+
+    Returns the maximum difference between slices of the lazily read
+    frames and the same slices of the frames kept in memory.
+    """
+    import numpy as np
+    import pyclaw
+    from acoustics_sweep import setup
+
+    output_formats = ['binary']
+    try:
+        __import__('h5py')
+        output_formats.extend(['hdf5','hdf5_series'])
+    except ImportError:
+        pass
+
+    keys = [Ellipsis,(0,slice(None)),(slice(None),slice(10,40)),
+            (1,slice(None,None,3)),(1,slice(50,5,-2)),(-1,-1),
+            (slice(None),[3,7,2]),np.array([0,1]),(0,np.array([0,2,-1])),
+            (Ellipsis,np.array([5,1])),(0,slice(20,30))]
+
+    error = 0.
+    for output_format in output_formats:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.output_format = output_format
+        claw.outdir = outdir
+        claw.overwrite = True
+        claw.keep_copy = True
+        claw.run()
+
+        for frame in xrange(claw.nout+1):
+            solution = pyclaw.LazySolution(frame,path=outdir,format=output_format)
+            q = claw.frames[frame].state.q
+            error = max(error,abs(solution.t-claw.frames[frame].t))
+            if solution.state.q.shape != q.shape:
+                error = np.inf
+            for key in keys:
+                values = solution.state.q[key]
+                if np.shape(values) != np.shape(q[key]):
+                    error = np.inf
+                else:
+                    error = max(error,np.max(np.abs(values-q[key])))
+            # The last key is contained in an earlier box
+            if solution.cache.hits == 0:
+                error = np.inf
+            # Changing values read leaves the cached boxes unchanged
+            values = solution.state.q[0,:]
+            values *= 10.
+            error = max(error,np.max(np.abs(solution.state.q[0,:]-q[0,:])))
+            solution.close()
+
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_lazy(*args,**kwargs)
+    print 'Maximum difference between lazily read frames and frames in memory: ',error
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_limiters(solver_type='classic',kernel_language='Python'):
+    """
+    1D acoustics with each of the TVD limiters.
+
+    Returns the number of problems found: limiters whose values on an array
+    differ from their values on each element, whose values differ when
+    computed in a workspace, waves limited differently with and without a
+    workspace, or solutions that are not finite.
+    """
+    import numpy as np
+    from pyclaw.limiters import tvd
+    from acoustics_sweep import setup
+
+    errors = 0
+    rng = np.random.RandomState(0)
+    r = np.concatenate((3*rng.randn(50),[0.,1.,-1.,2.]))
+    cfl = 0.01 + 0.98*rng.rand(len(r))
+    workspace = tvd.LimiterWorkspace()
+    old_settings = np.seterr(all='ignore')
+    for (number,limiter) in sorted(tvd.limiter_functions.items()):
+        phi = limiter(r,cfl)
+        elementwise = np.array([limiter(r[i:i+1],cfl[i:i+1])[0] for i in xrange(len(r))])
+        if not np.array_equal(np.isnan(phi),np.isnan(elementwise)) \
+           or np.any(phi[~np.isnan(phi)] != elementwise[~np.isnan(phi)]):
+            errors += 1
+        out = np.empty_like(r)
+        phi_workspace = limiter(r,cfl,out=out,work=workspace)
+        if phi_workspace is not out or not np.array_equal(phi[~np.isnan(phi)],
+                                                          out[~np.isnan(phi)]):
+            errors += 1
+
+        wave = rng.randn(2,2,30,4)
+        wave[:,:,10] = 0.
+        s = rng.randn(2,30,4)
+        dtdx = np.zeros((31,1)) + 0.4
+        limited = tvd.limit(2,wave.copy(),s,[number,number],dtdx)
+        limited_workspace = tvd.limit(2,wave.copy(),s,[number,number],dtdx,workspace)
+        if not np.array_equal(limited,limited_workspace):
+            errors += 1
+    np.seterr(**old_settings)
+
+    for number in [1,2,3,4,6,12,15,16,20]:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.solver.limiters = number
+        claw.run()
+        if not np.all(np.isfinite(claw.solution.state.q)):
+            errors += 1
+    return errors
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    errors=acoustics_limiters(*args,**kwargs)
+    print 'Problems found with the limiters: ',errors
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_netcdf(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    1D acoustics with output to one NetCDF file per frame, with and without
+    autotuning of the chunks and compression.
+
+    Returns the maximum difference between the frames read back from the
+    files and the frames kept in memory.
+    """
+    import numpy as np
+    import pyclaw
+    from acoustics_sweep import setup
+
+    error = 0.
+    for autotune in [False,True]:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.output_format = 'netcdf'
+        claw.output_options = {'autotune':autotune,'bandwidth':1.}
+        claw.outdir = outdir
+        claw.overwrite = True
+        claw.keep_copy = True
+        claw.run()
+
+        for frame in xrange(claw.nout+1):
+            solution = pyclaw.Solution(frame,path=outdir,format='netcdf')
+            if solution.state.q.shape != claw.frames[frame].state.q.shape:
+                return np.inf
+            error = max(error,abs(solution.t-claw.frames[frame].t),
+                        np.max(np.abs(solution.state.q-claw.frames[frame].state.q)))
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_netcdf(*args,**kwargs)
+    print 'Maximum difference between NetCDF output and frames in memory: ',error
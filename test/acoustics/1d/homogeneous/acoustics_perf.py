@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_perf(solver_type='classic',kernel_language='Python'):
+    """
+    Throughput model of the kernel for 1D acoustics.
+
+    Returns the number of problems found: compulsory bytes other than q read
+    and written once per cell (with the ghost cells), fewer streamed than
+    compulsory bytes, rates inconsistent with the model, or a measurement
+    that does not fail without Fortran kernels.
+    """
+    from pyclaw import perf
+    from acoustics_sweep import setup
+
+    errors = 0
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+    solver,solution = claw.solver,claw.solution
+    solver.setup(solution)
+    state = solution.state
+
+    model = perf.kernel_model(solver,state)
+    expected = {'classic':'step1','sharpclaw':'flux1'}[solver_type]
+    if model['kernel'] != expected:
+        errors += 1
+    ghost = (100.+2*solver.mbc)/100.
+    if abs(model['compulsory_bytes'] - 8*2*state.meqn*ghost) > 1.e-12:
+        errors += 1
+    if model['streamed_bytes'] <= model['compulsory_bytes'] or model['flops'] <= 0:
+        errors += 1
+
+    machine = {'bandwidth':10.,'flops':1000.}
+    result = perf.throughput(solver,state,20,0.5,machine)
+    if result['cell_updates'] != 20*100/0.5:
+        errors += 1
+    if abs(result['bandwidth'] - 4000*model['streamed_bytes']/1.e9) > 1.e-12:
+        errors += 1
+    attainable = min(1000.,10.*model['flops']/model['compulsory_bytes'])
+    if abs(result['attainable'] - attainable) > 1.e-12 or result['bound'] != 'memory':
+        errors += 1
+    if len(perf.report([result]).splitlines()) != 2:
+        errors += 1
+
+    try:
+        perf.measure(solver,solution,nsteps=2)
+        errors += 1
+    except Exception:
+        pass
+    if solver.profiler.enabled or not solver.dt_variable:
+        errors += 1
+    return errors
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    errors=acoustics_perf(*args,**kwargs)
+    print 'Problems found with the throughput model: ',errors
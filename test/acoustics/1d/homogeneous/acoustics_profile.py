@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_profile(solver_type='classic',kernel_language='Python',outdir='./_output'):
+    """
+    1D acoustics with the phases of the run timed, and without.
+
+    Returns the number of problems found: phases missing from the timings,
+    timings that differ between the status and the JSON file, self times
+    that add up to more than the run time, a profiler left enabled after
+    the run or after a failed run, or timings taken or a solution that
+    differs when profiling is off.
+    """
+    import os
+    import json
+    import numpy as np
+    from acoustics_sweep import setup
+
+    errors = 0
+    claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+    claw.outdir = outdir
+    claw.output_format = 'ascii'
+    claw.profile = True
+    status = claw.run()
+
+    phases = status['profile']
+    for phase in ['step','bcs','riemann','limiting','cfl','output','gauges']:
+        if phase not in phases:
+            errors += 1
+    # The status counts the steps of the last output interval only
+    if phases['step']['calls'] <= status['numsteps']:
+        errors += 1
+    dump = json.load(open(os.path.join(outdir,'profile.json')))
+    if dump['phases'] != phases or dump['grid'] != [100]:
+        errors += 1
+    if sum([phase['self'] for phase in phases.itervalues()]) > dump['run_time']:
+        errors += 1
+    if claw.solver.profiler.enabled:
+        errors += 1
+
+    failed = setup(solver_type=solver_type,kernel_language=kernel_language)
+    failed.profile = True
+    failed.outstyle = 4
+    try:
+        failed.run()
+        errors += 1
+    except Exception:
+        pass
+    if failed.solver.profiler.enabled:
+        errors += 1
+
+    unprofiled = setup(solver_type=solver_type,kernel_language=kernel_language)
+    status = unprofiled.run()
+    if 'profile' in status or len(unprofiled.solver.profiler.phases) > 0:
+        errors += 1
+    if np.any(unprofiled.solution.state.q != claw.solution.state.q):
+        errors += 1
+    return errors
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    errors=acoustics_profile(*args,**kwargs)
+    print 'Problems found with the profile: ',errors
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_ssp(solver_type='sharpclaw',kernel_language='Python'):
+    """
+    1D acoustics with each of the low-storage SSP Runge-Kutta methods.
+
+    Returns the number of problems found: methods that do not reach their
+    order on the pendulum, that use more than two registers, or whose
+    solutions are not finite.
+    """
+    import numpy as np
+    from pyclaw import ssp
+    from acoustics_sweep import setup
+
+    # The orders are measured on the pendulum, which is nonlinear so that
+    # all the order conditions are needed, from the differences of the
+    # solutions with 10, 20 and 40 steps
+    errors = 0
+    for (name,method) in sorted(ssp.methods.items()):
+        if method.nregisters > 2:
+            errors += 1
+        solutions = []
+        for nsteps in [10,20,40]:
+            dt = 2./nsteps
+            u = np.zeros((2,3))
+            u[0,:] = [0.5,1.,2.]
+            r1 = np.empty_like(u); r2 = np.empty_like(u)
+            for i in xrange(nsteps):
+                method.step(lambda x,c: dt*np.vstack((x[1],-np.sin(x[0]))),u,r1,r2)
+            solutions.append(u)
+        error = [np.max(np.abs(solutions[i+1]-solutions[i])) for i in [0,1]]
+        if np.log2(error[0]/error[1]) < method.order - 0.2:
+            errors += 1
+
+    for time_integrator in ['SSP22','SSP33','SSP52','SSP54','SSP104']:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.solver.time_integrator = time_integrator
+        claw.solver.cfl_max = 0.4*ssp.methods[time_integrator].sspcoef
+        claw.solver.cfl_desired = 0.9*claw.solver.cfl_max
+        claw.run()
+        if not np.all(np.isfinite(claw.solution.state.q)) \
+           or np.max(np.abs(claw.solution.state.q)) > 1.:
+            errors += 1
+    return errors
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    errors=acoustics_ssp(*args,**kwargs)
+    print 'Problems found with the SSP Runge-Kutta methods: ',errors
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def setup(bulk=1.0,solver_type='classic',kernel_language='Python',use_petsc=False):
+    """
+    1D acoustics with bulk modulus bulk, for use in a parameter sweep.
+    """
+    import numpy as np
+    if use_petsc:
+        import petclaw as pyclaw
+    else:
+        import pyclaw
+
+    if solver_type=='classic':
+        solver = pyclaw.ClawSolver1D()
+    elif solver_type=='sharpclaw':
+        solver = pyclaw.SharpClawSolver1D()
+    else: raise Exception('Unrecognized value of solver_type.')
+
+    x = pyclaw.Dimension('x',0.0,1.0,100)
+    grid = pyclaw.Grid(x)
+    state = pyclaw.State(grid,2)
+
+    rho = 1.0
+    state.aux_global['rho']=rho
+    state.aux_global['bulk']=bulk
+    state.aux_global['zz']=np.sqrt(rho*bulk)
+    state.aux_global['cc']=np.sqrt(bulk/rho)
+
+    xc=grid.x.center
+    state.q[0,:] = np.exp(-100 * (xc-0.75)**2)
+    state.q[1,:] = 0.
+
+    solver.mwaves=2
+    solver.kernel_language=kernel_language
+    if kernel_language=='Python': 
+        from riemann import rp_acoustics
+        solver.rp = rp_acoustics.rp_acoustics_1d
+    solver.limiters = [4]*solver.mwaves
+    solver.dt_initial=grid.d[0]/state.aux_global['cc']*0.1
+    solver.bc_lower[0] = pyclaw.BC.periodic
+    solver.bc_upper[0] = pyclaw.BC.periodic
+
+    claw = pyclaw.Controller()
+    claw.output_format = None
+    claw.nout = 2
+    claw.tfinal = 0.5
+    claw.solution = pyclaw.Solution(state)
+    claw.solver = solver
+    return claw
+
+
+def acoustics_sweep(solver_type='classic',kernel_language='Python',outdir='./_sweep'):
+    """
+    Sweep over three bulk moduli in two processes, then run the sweep again,
+    which should only read the results from its manifest.
+
+    Returns the maximum difference between the final frames of the sweep
+    and of runs in this process.
+    """
+    import os
+    import shutil
+    import numpy as np
+    from pyclaw.sweep import Sweep
+
+    if os.path.exists(outdir): shutil.rmtree(outdir)
+    parameters = {'bulk':[1.0,2.0,4.0],'solver_type':[solver_type],
+                  'kernel_language':[kernel_language]}
+    sweep = Sweep(setup,parameters,outdir=outdir,nprocs=2,frames=[2])
+    results = sweep.run()
+    resumed = Sweep(setup,parameters,outdir=outdir,nprocs=2,frames=[2]).run()
+    shutil.rmtree(outdir)
+
+    error = 0.
+    for result,result2 in zip(results,resumed):
+        if 'error' in result: raise Exception(result['error'])
+        claw = setup(**result['parameters'])
+        claw.run()
+        q = claw.solution.state.q
+        error = max(error,np.max(np.abs(result['frames'][2][1]-q)),
+                    np.max(np.abs(result2['frames'][2][1]-q)),
+                    abs(result2['status']['numsteps']-result['status']['numsteps']))
+    return error
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    error=acoustics_sweep(*args,**kwargs)
+    print 'Maximum difference between sweep and direct runs: ',error
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+def acoustics_weno(solver_type='sharpclaw',kernel_language='Python'):
+    """
+    1D acoustics with the WENO reconstructions of orders 5 to 17.
+
+    Returns the number of problems found: reconstructors whose results
+    differ from those of weno or that allocate new arrays between calls,
+    reconstructors missing from the solver, or solutions that are not
+    finite.
+    """
+    import numpy as np
+    from pyclaw.limiters import reconstruct
+    from acoustics_sweep import setup
+
+    errors = 0
+    rng = np.random.RandomState(0)
+    for order in xrange(5,19,2):
+        q = rng.randn(2,60)
+        reconstructor = reconstruct.WenoReconstructor(order,2,60)
+        ql,qr = reconstructor(q)
+        ql_weno,qr_weno = reconstruct.weno(order,q)
+        if not (np.array_equal(ql,ql_weno) and np.array_equal(qr,qr_weno)):
+            errors += 1
+        if reconstructor(rng.randn(2,60))[0] is not ql:
+            errors += 1
+    try:
+        reconstruct.WenoReconstructor(19,2,60)
+        errors += 1
+    except ValueError:
+        pass
+
+    for order in [5,9,17]:
+        claw = setup(solver_type=solver_type,kernel_language=kernel_language)
+        claw.solver.weno_order = order
+        claw.run()
+        reconstructor = claw.solver._reconstructor
+        if reconstructor is None or reconstructor.order != order:
+            errors += 1
+        if not np.all(np.isfinite(claw.solution.state.q)):
+            errors += 1
+    return errors
+
+
+if __name__=="__main__":
+    import sys
+    from pyclaw.util import _info_from_argv
+    args, kwargs = _info_from_argv(sys.argv)
+    errors=acoustics_weno(*args,**kwargs)
+    print 'Problems found with the WENO reconstructions: ',errors
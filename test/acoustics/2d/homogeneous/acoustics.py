@@ -16,7 +16,7 @@ def qinit(state,width=0.2):
     state.q[2,:,:] = 0.
 
 
-def acoustics2D(use_petsc=False,kernel_language='Fortran',iplot=False,htmlplot=False,solver_type='classic', outdir = './_output', nout = 10):
+def acoustics2D(use_petsc=False,kernel_language='Fortran',iplot=False,htmlplot=False,solver_type='classic', outdir = './_output', nout = 10, dim_split = 1):
     """
     Example python script for solving the 2d acoustics equations.
     """
@@ -30,10 +30,16 @@ def acoustics2D(use_petsc=False,kernel_language='Fortran',iplot=False,htmlplot=F
     elif solver_type=='sharpclaw':
         solver = pyclaw.SharpClawSolver2D()
 
+    solver.kernel_language = kernel_language
+    if kernel_language == 'Python':
+        import rp_acoustics_2d
+        solver.rp = rp_acoustics_2d.rp
+        solver.rpt = rp_acoustics_2d.rpt
+
     solver.cfl_max = 0.5
     solver.cfl_desired = 0.45
     solver.mwaves = 2
-    solver.dim_split = 1
+    solver.dim_split = dim_split
     solver.limiters = [4]*solver.mwaves
     solver.bc_lower[0] = pyclaw.BC.outflow
     solver.bc_upper[0] = pyclaw.BC.outflow
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# encoding: utf-8
+r"""
+Riemann solvers for constant coefficient acoustics in 2D, for use with
+the Python kernels of ClawSolver2D.
+
+The direction of the Riemann problems is axis 1 of each array and the
+transverse direction is axis 2.  These are direct translations of
+rpn2_acoustics.f and rpt2_acoustics.f.
+"""
+
+import numpy as np
+
+def _rpn2(q_l,q_r,aux_global,mu,mv):
+    meqn = 3
+    mwaves = 2
+
+    cc = aux_global['cc']
+    zz = aux_global['zz']
+
+    delta_p = q_r[0] - q_l[0]
+    delta_u = q_r[mu] - q_l[mu]
+    a1 = (-delta_p + zz*delta_u) / (2.*zz)
+    a2 =  (delta_p + zz*delta_u) / (2.*zz)
+
+    wave = np.zeros((meqn,mwaves)+q_l.shape[1:])
+    s = np.empty((mwaves,)+q_l.shape[1:])
+
+    wave[0,0] = -a1*zz
+    wave[mu,0] = a1
+    s[0] = -cc
+
+    wave[0,1] = a2*zz
+    wave[mu,1] = a2
+    s[1] = cc
+
+    amdq = s[0]*wave[:,0]
+    apdq = s[1]*wave[:,1]
+
+    return wave,s,amdq,apdq
+
+def _rpt2(asdq,aux_global,mu,mv):
+    cc = aux_global['cc']
+    zz = aux_global['zz']
+
+    a1 = (-asdq[0] + zz*asdq[mv]) / (2.*zz)
+    a2 =  (asdq[0] + zz*asdq[mv]) / (2.*zz)
+
+    bmasdq = np.zeros(asdq.shape)
+    bpasdq = np.zeros(asdq.shape)
+
+    bmasdq[0] = cc * a1*zz
+    bmasdq[mv] = -cc * a1
+    bpasdq[0] = cc * a2*zz
+    bpasdq[mv] = cc * a2
+
+    return bmasdq,bpasdq
+
+def rp_acoustics_2d_x(q_l,q_r,aux_l,aux_r,aux_global):
+    r"""Normal Riemann solver in the x-direction"""
+    return _rpn2(q_l,q_r,aux_global,1,2)
+
+def rp_acoustics_2d_y(q_l,q_r,aux_l,aux_r,aux_global):
+    r"""Normal Riemann solver in the y-direction"""
+    return _rpn2(q_l,q_r,aux_global,2,1)
+
+def rpt_acoustics_2d_x(q_l,q_r,aux_below,aux_center,aux_above,imp,asdq,aux_global):
+    r"""Transverse Riemann solver for fluctuations from x-interfaces"""
+    return _rpt2(asdq,aux_global,1,2)
+
+def rpt_acoustics_2d_y(q_l,q_r,aux_below,aux_center,aux_above,imp,asdq,aux_global):
+    r"""Transverse Riemann solver for fluctuations from y-interfaces"""
+    return _rpt2(asdq,aux_global,2,1)
+
+rp  = [rp_acoustics_2d_x, rp_acoustics_2d_y]
+rpt = [rpt_acoustics_2d_x, rpt_acoustics_2d_y]
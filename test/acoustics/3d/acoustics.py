@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 # encoding: utf-8
 
+import os
+import sys
 import numpy as np
 
-def acoustics3D(iplot=False,htmlplot=False,use_petsc=False,outdir='./_output',solver_type='classic',test='hom'):
+def acoustics3D(iplot=False,htmlplot=False,use_petsc=False,outdir='./_output',solver_type='classic',test='hom',kernel_language='Fortran'):
     """
     Example python script for solving the 3d acoustics equations.
     """
@@ -18,6 +20,16 @@ def acoustics3D(iplot=False,htmlplot=False,use_petsc=False,outdir='./_output',so
     else:
         raise Exception('Unrecognized solver_type.')
 
+    solver.kernel_language = kernel_language
+    if kernel_language == 'Python':
+        # The Python Riemann solver is the one of the 3D acoustics app
+        app = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..','..','..','apps','acoustics','3d','variable')
+        if app not in sys.path:
+            sys.path.append(app)
+        import rp_vc_acoustics_3d
+        solver.rp = rp_vc_acoustics_3d.rp
+
     solver.bc_lower[0]=pyclaw.BC.periodic
     solver.bc_upper[0]=pyclaw.BC.periodic
     solver.bc_lower[1]=pyclaw.BC.periodic
@@ -128,6 +140,5 @@ def acoustics3D(iplot=False,htmlplot=False,use_petsc=False,outdir='./_output',so
         return pfinal
 
 if __name__=="__main__":
-    import sys
     from pyclaw.util import run_app_from_main
     output = run_app_from_main(acoustics3D)
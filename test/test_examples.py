@@ -220,9 +220,339 @@ def test_1D_acoustics_1i():
     problem_name   = 'acoustics'
     method_options = {'kernel_language' : 'Fortran', 'use_petsc' : True, 'solver_type' : 'sharpclaw'}
     verifier       = lambda error: abs(error-0.000298935748775)<1.e-5
-    yield(util.build_run_verify, path, target_name, module_name, module_name, verifier, method_options)    
+    yield(util.build_run_verify, path, target_name, module_name, module_name, verifier, method_options)
 
 
+# Regression test: 1D acoustics with several bulk moduli evolved as an ensemble
+#@attr(testType ='regression')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_ensemble():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_ensemble'
+    problem_name   = 'acoustics_ensemble'
+    verifier       = lambda error: error<1.e-13
+    for solver_type in ['classic','sharpclaw']:
+        method_options = {'kernel_language' : 'Python', 'solver_type' : solver_type}
+        yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with several bulk moduli run as a parameter sweep
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_sweep():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_sweep'
+    problem_name   = 'acoustics_sweep'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error<1.e-13
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with frames kept under several eviction policies
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_frames():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_frames'
+    problem_name   = 'acoustics_frames'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error==0.
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with output written in a background thread
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_async():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_async'
+    problem_name   = 'acoustics_async'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error==0.
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with output in the binary format
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_binary():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_binary'
+    problem_name   = 'acoustics_binary'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error==0.
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with HDF5 output, per frame and as a time series
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_hdf5():
+    try:
+        import h5py
+    except ImportError:
+        raise SkipTest
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_hdf5'
+    problem_name   = 'acoustics_hdf5'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error==0.
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with NetCDF output, read back
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_netcdf():
+    try:
+        import netCDF4
+    except ImportError:
+        raise SkipTest
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_netcdf'
+    problem_name   = 'acoustics_netcdf'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error==0.
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with output read back lazily
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_lazy():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_lazy'
+    problem_name   = 'acoustics_lazy'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error==0.
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics interrupted and restarted from a checkpoint
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_checkpoint():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_checkpoint'
+    problem_name   = 'acoustics_checkpoint'
+    for (solver_type,error_control) in [('classic',False),('sharpclaw',False),
+                                        ('sharpclaw',True)]:
+        method_options = {'kernel_language' : 'Python', 'solver_type' : solver_type,
+                          'error_control' : error_control}
+        verifier       = lambda error: error==0.
+        yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with buffered gauges in all gauge formats
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_gauges():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_gauges'
+    problem_name   = 'acoustics_gauges'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error<1.e-11
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: interpolation of gauge values on grids with non-zero
+# lower bounds, whole and split in two parts
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_gauge_interpolation():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_gauges'
+    problem_name   = 'acoustics_gauge_interpolation'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda error: error<1.e-12
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with the phases of the run timed
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_profile():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_profile'
+    problem_name   = 'acoustics_profile'
+    for solver_type in ['classic','sharpclaw']:
+        method_options = {'kernel_language' : 'Python', 'solver_type' : solver_type}
+        verifier       = lambda errors: errors==0
+        yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics throughput model of the kernels
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_perf():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_perf'
+    problem_name   = 'acoustics_perf'
+    for solver_type in ['classic','sharpclaw']:
+        method_options = {'kernel_language' : 'Python', 'solver_type' : solver_type}
+        verifier       = lambda errors: errors==0
+        yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with each of the TVD limiters
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_limiters():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_limiters'
+    problem_name   = 'acoustics_limiters'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic'}
+    verifier       = lambda errors: errors==0
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with the WENO reconstructions of orders 5 to 17
+#@attr(testType ='regression')
+@attr(solver_type='sharpclaw')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_weno():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_weno'
+    problem_name   = 'acoustics_weno'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'sharpclaw'}
+    verifier       = lambda errors: errors==0
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with the TVD and characteristic-wise
+# reconstructions of the Python SharpClaw kernels
+#@attr(testType ='regression')
+@attr(solver_type='sharpclaw')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_char():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_char'
+    problem_name   = 'acoustics_char'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'sharpclaw'}
+    verifier       = lambda errors: errors==0
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with the low-storage SSP Runge-Kutta methods
+#@attr(testType ='regression')
+@attr(solver_type='sharpclaw')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_ssp():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_ssp'
+    problem_name   = 'acoustics_ssp'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'sharpclaw'}
+    verifier       = lambda errors: errors==0
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with error-controlled time stepping
+#@attr(testType ='regression')
+@attr(solver_type='sharpclaw')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_adaptive():
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_adaptive'
+    problem_name   = 'acoustics_adaptive'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'sharpclaw'}
+    verifier       = lambda errors: errors==0
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
+
+# Regression test: 1D acoustics with parallel HDF5 output, read back on a
+# different number of processes
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=True)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_1D_acoustics_hdf5_parallel():
+    from distutils.spawn import find_executable
+    try:
+        __import__('mpi4py')
+        __import__('petsc4py')
+        import h5py
+    except ImportError:
+        raise SkipTest
+    # The output is written with parallel HDF5 by processes run with mpiexec
+    if not getattr(h5py.get_config(),'mpi',False) or find_executable('mpiexec') is None:
+        raise SkipTest
+    path           = './test/acoustics/1d/homogeneous'
+    module_name    = 'acoustics_hdf5_mpi'
+    problem_name   = 'acoustics_hdf5_mpi'
+    method_options = {'kernel_language' : 'Python', 'solver_type' : 'classic',
+                      'np_write' : 4, 'np_read' : 3}
+    verifier       = lambda error: error<1.e-14
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
 
 
 
@@ -254,6 +584,56 @@ def test_2D_acoustics_1a():
     yield(util.build_run_verify, path, target_name, module_name, problem_name, verify_acoustics2D_classic, method_options)
 
 
+# Regression test: 2D acoustics in homogeneous material, pure Python kernels
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_2D_acoustics_python():
+    path           = './test/acoustics/2d/homogeneous'
+    module_name    = 'acoustics'
+    problem_name   = 'acoustics2D'
+
+    def verify_acoustics2D_classic(test_x):
+        import numpy
+        verify_x=numpy.loadtxt('test/acoustics2D_solution')
+        diff = numpy.linalg.norm(test_x-verify_x)
+        if diff>1.e-13:
+            raise Exception('Difference between expected and computed solutions: %s' % diff)
+        else: return True
+
+    method_options = {'kernel_language' : 'Python', 'use_petsc' : False, 'solver_type' : 'classic'}
+    yield(util.run_verify, path, module_name, problem_name, verify_acoustics2D_classic, method_options)
+
+
+# Regression test: unsplit 2D acoustics, pure Python kernels against classic2.so
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(time_stepping_mode='explicit')
+@attr(speed='fast')
+def test_2D_acoustics_python_unsplit():
+    path           = './test/acoustics/2d/homogeneous'
+    target_name    = 'classic2.so'
+    module_name    = 'acoustics'
+    problem_name   = 'acoustics2D'
+
+    def verify_acoustics2D_unsplit(test_x):
+        import numpy
+        import acoustics
+        verify_x = acoustics.acoustics2D(kernel_language='Fortran',dim_split=0)
+        diff = numpy.linalg.norm(test_x-verify_x)
+        if diff>1.e-13:
+            raise Exception('Difference between Python and Fortran solutions: %s' % diff)
+        else: return True
+
+    method_options = {'kernel_language' : 'Python', 'use_petsc' : False, 'solver_type' : 'classic', 'dim_split' : 0}
+    yield(util.build_run_verify, path, target_name, module_name, problem_name, verify_acoustics2D_unsplit, method_options)
+
+
 # Regression test: Parallel 2D acoustics in homogeneous material
 #@attr(testType ='regression')
 @attr(solver_type='classic')
@@ -487,6 +867,21 @@ def test_3D_acoustics_homogeneous():
     verifier       = lambda error: (abs(error-0.00286)<1.e-4)# and (abs(error[1]-3.2)<1.e-4))
     yield(util.build_run_verify, path, target_name, module_name, problem_name, verifier, method_options)
 
+# Regression test: 3D acoustics in homogeneous material, pure Python kernels
+#@attr(testType ='regression')
+@attr(solver_type='classic')
+@attr(kernel_language='python')
+@attr(petsc=False)
+@attr(ndim=3)
+@attr(speed='fast')
+def test_3D_acoustics_homogeneous_python():
+    path           = './test/acoustics/3d/'
+    module_name    = 'acoustics'
+    problem_name   = 'acoustics3D'
+    method_options = {'use_petsc' : False, 'test' : 'hom', 'kernel_language' : 'Python'}
+    verifier       = lambda error: (abs(error-0.00286)<1.e-4)
+    yield(util.run_verify, path, module_name, problem_name, verifier, method_options)
+
 # Regression test: 3D acoustics in heterogeneous material
 #@attr(testType ='regression')
 @attr(solver_type='classic')